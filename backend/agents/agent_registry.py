@@ -0,0 +1,274 @@
+"""
+Agent Registry - Indexed view over DEPLOYED_AGENTS
+
+WHY: DEPLOYED_AGENTS is {user_address: [agent, ...]}. ContractMonitor matched
+users with a case-insensitive loop over every key (O(users) per user, so
+O(users^2) per check), and PositionMonitor, DepositMonitor, StrategyExecutor,
+LogIngestor and the balance refresh job each rebuilt their own active-agent
+lists on every pass or per-agent lookup.
+
+DESIGN:
+- DEPLOYED_AGENTS stays the source of truth (routers keep mutating it)
+- Indexes are rebuilt only when the source changed:
+  * _save_agents() invalidates the agents it saves (every router mutation
+    ends with a save)
+  * the source dict was replaced or gained/lost users (O(1) check)
+  * REFRESH_TTL expired (catches in-place edits that were never saved)
+- O(1) lookups by normalized user address, agent id and agent address,
+  plus a precomputed active list
+- Change counters: a global version and a per-agent version, so loops can
+  iterate only agents that changed since their last pass (changed_since)
+- Content fingerprints are only recomputed for agents a save marked dirty
+  (plus agents seen for the first time); a TTL rebuild re-indexes without
+  serializing anything, and a bare invalidate() re-checks everyone
+"""
+
+import hashlib
+import json
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Max age of the indexes when nothing invalidated them (seconds)
+REFRESH_TTL = 30
+
+
+def _default_source() -> dict:
+    from api.agent_config_router import DEPLOYED_AGENTS
+    return DEPLOYED_AGENTS
+
+
+def _fingerprint(agent: dict) -> str:
+    """Content hash used to detect per-agent changes between rebuilds"""
+    payload = json.dumps(agent, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def agent_address_of(agent: dict) -> Optional[str]:
+    """Normalized on-chain address of an agent (agent_address or legacy address)"""
+    address = agent.get("agent_address") or agent.get("address")
+    return address.lower() if isinstance(address, str) and address else None
+
+
+class AgentRegistry:
+    """
+    Lazily rebuilt indexes over DEPLOYED_AGENTS.
+
+    Usage:
+        agent_registry.get_user_agents("0xAbC...")      # case-insensitive
+        agent_registry.get_agent(agent_id)
+        agent_registry.get_by_address(agent_address)
+        for user_address, agent in agent_registry.active_agents(): ...
+        changed, version = agent_registry.changed_since(last_version)
+    """
+
+    def __init__(self, source: Callable[[], dict] = _default_source, ttl: float = REFRESH_TTL):
+        self._source = source
+        self.ttl = ttl
+
+        self.version = 0
+        self._dirty = True
+        self._built_at = 0.0
+        self._source_id: Optional[int] = None
+        self._source_len = -1
+
+        self._by_user: Dict[str, List[dict]] = {}
+        self._by_id: Dict[str, Tuple[str, dict]] = {}
+        self._by_address: Dict[str, Tuple[str, dict]] = {}
+        self._all: List[Tuple[str, dict]] = []
+        self._active: List[Tuple[str, dict]] = []
+        self._fingerprints: Dict[str, str] = {}
+        self._agent_versions: Dict[str, int] = {}
+        self._check_all = True                   # fingerprint every agent on the next rebuild
+        self._dirty_ids: Set[str] = set()
+        self._dirty_users: Set[str] = set()
+
+        self.stats = {"rebuilds": 0, "lookups": 0}
+
+    # ------------------------------------------------------------------
+    # Change tracking
+    # ------------------------------------------------------------------
+
+    def invalidate(self, agent_id: Optional[str] = None, user_address: Optional[str] = None):
+        """
+        Mark indexes stale; the next lookup rebuilds them.
+
+        With agent_id / user_address only that agent (or all of that user's
+        agents) is re-fingerprinted; with neither, every agent is.
+        """
+        self._dirty = True
+        if agent_id:
+            self._dirty_ids.add(agent_id)
+        if user_address:
+            self._dirty_users.add(user_address.lower())
+        if not agent_id and not user_address:
+            self._check_all = True
+
+    def _is_stale(self, source: dict) -> bool:
+        return (
+            self._dirty
+            or id(source) != self._source_id
+            or len(source) != self._source_len
+            or time.monotonic() - self._built_at > self.ttl
+        )
+
+    def refresh(self, force: bool = False):
+        """Rebuild indexes if the source changed (or unconditionally with force)"""
+        source = self._source()
+        if force or self._is_stale(source):
+            self._rebuild(source)
+
+    def _rebuild(self, source: dict):
+        by_user: Dict[str, List[dict]] = {}
+        by_id: Dict[str, Tuple[str, dict]] = {}
+        by_address: Dict[str, Tuple[str, dict]] = {}
+        all_agents: List[Tuple[str, dict]] = []
+        active: List[Tuple[str, dict]] = []
+        fingerprints: Dict[str, str] = {}
+        changed: List[str] = []
+
+        for user_address, user_agents in list(source.items()):
+            # Legacy entries stored a single agent dict per user
+            if isinstance(user_agents, dict):
+                user_agents = [user_agents]
+            if not isinstance(user_agents, list):
+                continue
+
+            user_lower = user_address.lower()
+            by_user.setdefault(user_lower, []).extend(user_agents)
+
+            for agent in user_agents:
+                entry = (user_address, agent)
+                all_agents.append(entry)
+                agent_id = agent.get("id")
+                if agent_id:
+                    by_id[agent_id] = entry
+                    fingerprint = self._fingerprints.get(agent_id)
+                    if (fingerprint is None or self._check_all or agent_id in self._dirty_ids
+                            or user_lower in self._dirty_users):
+                        previous, fingerprint = fingerprint, _fingerprint(agent)
+                        if previous != fingerprint:
+                            changed.append(agent_id)
+                    fingerprints[agent_id] = fingerprint
+
+                address = agent_address_of(agent)
+                if address:
+                    by_address[address] = entry
+                if agent.get("is_active", False):
+                    active.append(entry)
+
+        removed = set(self._fingerprints) - set(fingerprints)
+        if changed or removed or self.stats["rebuilds"] == 0:
+            self.version += 1
+            for agent_id in changed:
+                self._agent_versions[agent_id] = self.version
+            for agent_id in removed:
+                self._agent_versions.pop(agent_id, None)
+
+        self._by_user = by_user
+        self._by_id = by_id
+        self._by_address = by_address
+        self._all = all_agents
+        self._active = active
+        self._fingerprints = fingerprints
+        self._check_all = False
+        self._dirty_ids.clear()
+        self._dirty_users.clear()
+
+        self._dirty = False
+        self._built_at = time.monotonic()
+        self._source_id = id(source)
+        self._source_len = len(source)
+        self.stats["rebuilds"] += 1
+
+        if changed or removed:
+            logger.debug(
+                f"[AgentRegistry] v{self.version}: {len(all_agents)} agents, "
+                f"{len(active)} active, {len(changed)} changed, {len(removed)} removed"
+            )
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def get_user_agents(self, user_address: str) -> List[dict]:
+        """All agents of a user (case-insensitive address match)"""
+        self.refresh()
+        self.stats["lookups"] += 1
+        return self._by_user.get((user_address or "").lower(), [])
+
+    def get_primary_agent(self, user_address: str) -> Optional[dict]:
+        """First agent of a user, matching the existing agents[0] convention"""
+        agents = self.get_user_agents(user_address)
+        return agents[0] if agents else None
+
+    def get_agent(self, agent_id: str) -> Optional[dict]:
+        entry = self.get_entry(agent_id)
+        return entry[1] if entry else None
+
+    def get_entry(self, agent_id: str) -> Optional[Tuple[str, dict]]:
+        """(user_address, agent) for an agent id"""
+        self.refresh()
+        self.stats["lookups"] += 1
+        return self._by_id.get(agent_id)
+
+    def get_by_address(self, agent_address: str) -> Optional[Tuple[str, dict]]:
+        """(user_address, agent) for an agent's on-chain address"""
+        self.refresh()
+        self.stats["lookups"] += 1
+        return self._by_address.get((agent_address or "").lower())
+
+    def get_owner(self, agent_id: str) -> Optional[str]:
+        entry = self.get_entry(agent_id)
+        return entry[0] if entry else None
+
+    def all_agents(self) -> List[Tuple[str, dict]]:
+        """(user_address, agent) for every agent, active or not"""
+        self.refresh()
+        return list(self._all)
+
+    def active_agents(self) -> List[Tuple[str, dict]]:
+        """(user_address, agent) for every active agent"""
+        self.refresh()
+        return list(self._active)
+
+    def active_ids(self) -> List[str]:
+        return [agent.get("id") for _, agent in self.active_agents() if agent.get("id")]
+
+    def is_active(self, agent_id: str) -> bool:
+        agent = self.get_agent(agent_id)
+        return bool(agent and agent.get("is_active", False))
+
+    def changed_since(self, version: int, active_only: bool = True) -> Tuple[List[Tuple[str, dict]], int]:
+        """
+        Agents whose content changed after `version`.
+
+        Returns:
+            ([(user_address, agent), ...], current_version) - pass the
+            returned version back on the next call.
+        """
+        self.refresh()
+        changed = []
+        for agent_id, agent_version in self._agent_versions.items():
+            if agent_version <= version:
+                continue
+            entry = self._by_id.get(agent_id)
+            if entry and (not active_only or entry[1].get("is_active", False)):
+                changed.append(entry)
+        return changed, self.version
+
+    def get_stats(self) -> dict:
+        self.refresh()
+        return {
+            "version": self.version,
+            "users": len(self._by_user),
+            "agents": len(self._all),
+            "active": len(self._active),
+            **self.stats,
+        }
+
+
+# Global instance
+agent_registry = AgentRegistry()
@@ -18,6 +18,9 @@ from eth_account import Account
 from eth_account.messages import encode_defunct
 import logging
 
+from infrastructure.scheduler import scheduler, PRIORITY_HIGH
+from infrastructure.work_leases import work_partitioner
+
 # Gas Manager for auto-refill
 try:
     from services.gas_manager import get_gas_manager, GasManager
@@ -630,9 +633,8 @@ class ContractMonitor:
         # Format: {user_address: {protocol_key: {"entry_value": amount, "entry_time": timestamp, "current_value": amount}}}
         self.user_positions: Dict[str, Dict[str, dict]] = {}
         
-        # Rebalance check interval (run every N deposit checks)
-        self.rebalance_check_counter = 0
-        self.rebalance_check_interval = 4  # Check every 4th poll cycle (~60 seconds)
+        # Rebalance check interval (every N deposit poll intervals)
+        self.rebalance_check_interval = 4  # Every 4 poll intervals (~60 seconds)
         
         # Track last harvest time per user for compound_frequency
         # Format: {user_address: datetime_of_last_harvest}
@@ -770,32 +772,35 @@ class ContractMonitor:
             return (True, 0, 0, 0)  # Fail-open for now
     
     async def start(self):
-        """Start monitoring loop"""
+        """Register deposit polling and risk checks with the shared scheduler"""
         self.running = True
         logger.info("[ContractMonitor] Starting contract event monitoring...")
         print("[ContractMonitor] Starting contract event monitoring...")
         
-        while self.running:
-            try:
-                await self.check_for_deposits()
-                
-                # Periodic rebalance/drawdown monitoring
-                self.rebalance_check_counter += 1
-                if self.rebalance_check_counter >= self.rebalance_check_interval:
-                    self.rebalance_check_counter = 0
-                    
-                    # Check gas levels for all tracked users
-                    await self._check_gas_levels()
-                    await self.check_rebalance_and_drawdown()
-                    
-            except Exception as e:
-                logger.error(f"[ContractMonitor] Error: {e}")
-                print(f"[ContractMonitor] Error: {e}")
-            
-            await asyncio.sleep(self.poll_interval)
+        scheduler.register(
+            "contract_deposits",
+            self.check_for_deposits,
+            self.poll_interval,
+            priority=PRIORITY_HIGH
+        )
+        # Periodic rebalance/drawdown monitoring (~60 seconds)
+        scheduler.register(
+            "contract_risk_checks",
+            self.run_risk_checks,
+            self.poll_interval * self.rebalance_check_interval,
+            initial_delay=self.poll_interval * self.rebalance_check_interval
+        )
+        scheduler.start()
+    
+    async def run_risk_checks(self):
+        """Gas levels + rebalance/drawdown checks for all tracked users"""
+        await self._check_gas_levels()
+        await self.check_rebalance_and_drawdown()
     
     def stop(self):
         self.running = False
+        scheduler.unregister("contract_deposits")
+        scheduler.unregister("contract_risk_checks")
         print("[ContractMonitor] Stopped")
     
     async def _check_gas_levels(self):
@@ -881,6 +886,10 @@ class ContractMonitor:
         received = event.args.received
         amount_usdc = received / 1e6
         
+        # Every replica sees the event; only the shard owner allocates
+        if not work_partitioner.owns(user):
+            return
+        
         print(f"[ContractMonitor] 💰 Deposit detected!")
         print(f"  User: {user}")
         print(f"  Amount: {amount_usdc:.2f} USDC")
@@ -1469,15 +1478,10 @@ class ContractMonitor:
             import json
             
             # Get user's agent config to determine preferred protocol
-            from api.agent_config_router import DEPLOYED_AGENTS
+            from agents.agent_registry import agent_registry
             
             user_lower = user.lower()
-            agent_config = None
-            
-            for u, agents in DEPLOYED_AGENTS.items():
-                if u.lower() == user_lower and agents:
-                    agent_config = agents[0]
-                    break
+            agent_config = agent_registry.get_primary_agent(user_lower)
             
             # ==========================================
             # RULE: DATA STALENESS CHECK (VC Requirement #1)
@@ -2056,42 +2060,27 @@ class ContractMonitor:
         1. max_drawdown violations (trigger emergency exit)
         2. rebalance opportunities (if auto_rebalance enabled)
         
-        REM-2 FIX: Dedup with strategy_executor — skip if executor has run
-        within the last 15 minutes (executor runs every 10 min and handles
+        REM-2 FIX: Dedup with strategy_executor — skip agents whose risks the
+        executor checked within the last 15 minutes (executor runs every 10 min and handles
         all risk checks + rebalance via check_position_risks/check_rebalance_needed).
         Contract_monitor only acts as a fallback safety net.
         """
-        from api.agent_config_router import DEPLOYED_AGENTS
-        
-        # REM-2: Check if strategy_executor has run recently — if so, skip (it handles this)
-        try:
-            from agents.strategy_executor import strategy_executor as se
-            for user_addr, positions in self.user_positions.items():
-                agent_config = None
-                for u, agents in DEPLOYED_AGENTS.items():
-                    if u.lower() == user_addr.lower() and agents:
-                        agent_config = agents[0]
-                        break
-                if agent_config:
-                    agent_id = agent_config.get("id", "")
-                    last_exec = se.last_execution.get(agent_id)
-                    if last_exec and (datetime.utcnow() - last_exec).total_seconds() < 900:
-                        # Strategy executor ran <15 min ago — it already checked risks
-                        continue
-        except ImportError:
-            pass
+        from agents.agent_registry import agent_registry
         
         for user_addr, positions in self.user_positions.items():
-            # Get user's agent config
-            agent_config = None
-            for u, agents in DEPLOYED_AGENTS.items():
-                if u.lower() == user_addr.lower() and agents:
-                    agent_config = agents[0]
-                    break
+            if not work_partitioner.owns(user_addr):
+                continue
+            
+            # Get user's agent config (O(1) case-insensitive lookup)
+            agent_config = agent_registry.get_primary_agent(user_addr)
             
             if not agent_config:
                 continue
             
+            # REM-2: Strategy executor checked this agent's risks <15 min ago
+            if scheduler.ran_within("agent_risk_checks", agent_config.get("id", ""), 900):
+                continue
+            
             max_drawdown = agent_config.get("max_drawdown", 100) or 100  # default 100% = no limit
             auto_rebalance = agent_config.get("auto_rebalance", False)
             rebalance_threshold = agent_config.get("rebalance_threshold", 5) or 5
@@ -10,6 +10,12 @@ from typing import Dict, List, Optional
 from web3 import Web3
 import httpx
 
+from infrastructure.scheduler import scheduler, PRIORITY_HIGH
+from agents.log_ingestor import log_ingestor
+from agents.agent_registry import agent_registry
+from data_sources.balance_snapshot import balance_snapshots
+from infrastructure.work_leases import work_partitioner
+
 # Token addresses on Base
 TOKENS = {
     "USDC": "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913",
@@ -34,15 +40,21 @@ class DepositMonitor:
     Monitors agent wallets and triggers allocation when deposits detected
     
     Flow:
-    1. Poll balances every 30 seconds
-    2. Detect new deposits (balance increase)
+    1. Watch Transfer logs into agent wallets (or poll balances every 30s).
+       Native ETH emits no log, so its balance is polled in both modes
+    2. Detect new deposits (Transfer in / balance increase)
     3. Trigger Strategy Executor
     4. Execute swaps + deposits to pools
     """
     
     def __init__(self):
         self.running = False
-        self.poll_interval = 30  # seconds
+        self.poll_interval = 30  # seconds (polling fallback only)
+        
+        # Event-driven deposit detection via eth_getLogs (see log_ingestor)
+        self.event_driven = os.getenv("DEPOSIT_EVENT_DRIVEN", "true").lower() == "true"
+        # Tokens the balance poll compares; ERC20s come from logs when event-driven
+        self.poll_symbols = ["ETH"] if self.event_driven else ["ETH", *TOKENS]
         
         # Track last known balances
         self.last_balances: Dict[str, Dict[str, int]] = {}
@@ -61,38 +73,64 @@ class DepositMonitor:
         return self.w3
     
     async def start(self):
-        """Start monitoring loop"""
+        """Start deposit detection (Transfer logs, or per-agent balance polling)"""
         self.running = True
         print("[DepositMonitor] Starting deposit monitoring...")
         
-        while self.running:
-            try:
-                await self.check_all_agents()
-            except Exception as e:
-                print(f"[DepositMonitor] Error: {e}")
-            
-            await asyncio.sleep(self.poll_interval)
+        if self.event_driven:
+            # React to ERC20 Transfers into agent wallets within a block
+            log_ingestor.on_event("deposit", self.on_deposit_logs)
+            log_ingestor.start()
+            print("[DepositMonitor] Event-driven mode (Transfer logs + native ETH polling)")
+        
+        scheduler.register("deposit_monitor_sync", self.sync_agent_tasks, self.poll_interval)
+        scheduler.start()
     
     def stop(self):
         """Stop monitoring"""
         self.running = False
+        log_ingestor.callbacks.pop("deposit", None)
+        scheduler.unregister("deposit_monitor_sync")
+        scheduler.unregister_all("deposit_check")
         print("[DepositMonitor] Stopped")
     
+    async def on_deposit_logs(self, agent: dict, deposits: List[dict]):
+        """Transfer logs into an agent wallet -> allocation (no balance polling)"""
+        if not work_partitioner.owns_agent(agent.get("id", "")):
+            return  # another replica owns this agent's shard
+        agent_address = agent.get("agent_address") or ""
+        print(f"[DepositMonitor] New deposits for {agent_address[:10]} (block {deposits[-1].get('block_number')}):")
+        for d in deposits:
+            print(f"  + {d['formatted']} {d['token']}")
+        
+        await self.trigger_allocation(agent, deposits)
+    
+    def _active_agents(self) -> Dict[str, dict]:
+        """agent_id -> agent for every active agent in this replica's shards"""
+        return {
+            agent.get("id"): agent for user_address, agent in agent_registry.active_agents()
+            if work_partitioner.owns(user_address)
+        }
+    
+    async def sync_agent_tasks(self):
+        """Keep one scheduled deposit_check per active agent (staggered)"""
+        scheduler.sync_agents(
+            "deposit_check",
+            self._active_agents().keys(),
+            self.check_agent_by_id,
+            self.poll_interval,
+            priority=PRIORITY_HIGH
+        )
+    
+    async def check_agent_by_id(self, agent_id: str):
+        """Scheduled per-agent entry point"""
+        agent = agent_registry.get_agent(agent_id)
+        if agent and agent.get("is_active", False) and work_partitioner.owns_agent(agent_id):
+            await self.check_agent_balance(agent)
+    
     async def check_all_agents(self):
         """Check balances for all deployed agents"""
-        try:
-            from api.agent_config_router import DEPLOYED_AGENTS
-        except ImportError:
-            return
-        
-        # DEPLOYED_AGENTS is {user_address: [list of agents]}
-        active_agents = []
-        for user_agents in DEPLOYED_AGENTS.values():
-            for agent in user_agents:
-                if agent.get("is_active", False):
-                    active_agents.append(agent)
-        
-        for agent in active_agents:
+        for agent in self._active_agents().values():
             await self.check_agent_balance(agent)
     
     async def check_agent_balance(self, agent: dict):
@@ -109,7 +147,8 @@ class DepositMonitor:
         
         # Detect deposits
         deposits = []
-        for token, balance in current.items():
+        for token in self.poll_symbols:
+            balance = current.get(token, 0)
             prev_balance = previous.get(token, 0)
             if balance > prev_balance:
                 deposit_amount = balance - prev_balance
@@ -132,6 +171,14 @@ class DepositMonitor:
     
     async def get_balances(self, address: str) -> Dict[str, int]:
         """Get token balances for an address"""
+        # Shared cross-agent Multicall snapshot (one batch for every agent)
+        try:
+            snapshot = await balance_snapshots.get_balances(address, refresh_all=True)
+            if snapshot is not None:
+                return {symbol: snapshot.get(symbol, 0) for symbol in ["ETH", *TOKENS]}
+        except Exception as e:
+            print(f"[DepositMonitor] Balance snapshot error, reading directly: {e}")
+        
         w3 = self._get_web3()
         balances = {}
         
@@ -0,0 +1,379 @@
+"""
+Leverage Monitor - Batched, risk-tiered health-factor polling for loops
+
+WHY: SmartLoopEngine.monitor_positions called getUserAccountData user by user
+every 60s, regardless of how close each user was to liquidation, and the
+Morpho loop engine had no health sweep at all.
+
+DESIGN:
+- One pass reads every due position through Multicall3 aggregate3:
+  * Aave:   Pool.getUserAccountData(user) -> healthFactor
+  * Morpho: Morpho.position(id, user) per position, plus Morpho.market(id)
+            and oracle.price() once per market -> HF computed locally
+            (collateral * price * lltv / borrowAssets)
+- Positions are bucketed by HF distance above their deleverage threshold;
+  closer buckets are due more often (TIERS). Unknown HF = due immediately
+- The scheduler ticks at the fastest tier interval; healthy positions only
+  cost RPC once per minute, positions near the threshold every 5s
+- Below threshold -> engine.deleverage(); inside the warning band -> log.
+  The Morpho threshold is per market: the engine keeps LTV at most
+  LLTV - MIN_SAFETY_MARGIN, i.e. HF >= LLTV / (LLTV - margin)
+- Morpho positions (volatile collateral, stable debt: HF ~ price) also arm a
+  price trigger at the collateral price where HF reaches the threshold, so
+  an oracle move re-reads them immediately instead of at the next tier tick
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from eth_abi import decode, encode
+from web3 import Web3
+
+from data_sources.multicall import MULTICALL3_ABI, MULTICALL3_ADDRESS
+from infrastructure.scheduler import scheduler, PRIORITY_CRITICAL
+from agents.price_triggers import price_triggers, price_exposure, DOWN
+
+logger = logging.getLogger(__name__)
+
+AAVE_POOL_ADDRESS = "0xA238Dd80C259a72e81d7e4664a9801593F98d1c5"
+MORPHO_BLUE_ADDRESS = "0xBBBBBbbBBb9cC5e90e3b3Af64bdAF62C37EEFFCb"
+
+# Function selectors
+GET_USER_ACCOUNT_DATA = Web3.keccak(text="getUserAccountData(address)")[:4]
+MORPHO_POSITION = Web3.keccak(text="position(bytes32,address)")[:4]
+MORPHO_MARKET = Web3.keccak(text="market(bytes32)")[:4]
+ORACLE_PRICE = Web3.keccak(text="price()")[:4]
+
+AAVE_ACCOUNT_TYPES = ["uint256"] * 6
+MORPHO_POSITION_TYPES = ["uint256", "uint128", "uint128"]
+MORPHO_MARKET_TYPES = ["uint128"] * 6
+
+# Morpho Blue virtual shares/assets (SharesMathLib)
+VIRTUAL_SHARES = 10 ** 6
+VIRTUAL_ASSETS = 1
+ORACLE_PRICE_SCALE = 10 ** 36
+
+# Deleverage thresholds (HF) and warning bands
+AAVE_DELEVERAGE_HF = 1.2
+AAVE_WARNING_HF = 1.5
+AAVE_TARGET_LEVERAGE = 1.5
+# Morpho engine keeps LTV at most LLTV - MIN_SAFETY_MARGIN (additive, see morpho_deleverage_hf)
+MORPHO_SAFETY_MARGIN = 0.10
+MORPHO_TARGET_LEVERAGE = 1.5
+
+# (max HF distance above threshold, poll interval seconds), closest first
+TIERS = [
+    (0.1, 5),
+    (0.5, 15),
+    (float("inf"), 60),
+]
+TICK_INTERVAL = TIERS[0][1]
+CHUNK_SIZE = 300
+
+
+def morpho_market_id(market_params: tuple) -> bytes:
+    """Id = keccak256(abi.encode(MarketParams))"""
+    return Web3.keccak(encode(["address", "address", "address", "address", "uint256"], list(market_params)))
+
+
+def morpho_deleverage_hf(lltv_wad: int, margin: float = MORPHO_SAFETY_MARGIN) -> float:
+    """HF (= LLTV / LTV) at which LTV reaches LLTV - margin"""
+    lltv = lltv_wad / 1e18
+    if lltv <= margin:
+        return float("inf")  # No safe LTV at all: always deleverage
+    return lltv / (lltv - margin)
+
+
+def poll_interval_for(hf: Optional[float], threshold: float) -> float:
+    """Tier interval for a health factor (unknown HF -> fastest tier)"""
+    if hf is None:
+        return TIERS[0][1]
+    distance = hf - threshold
+    for max_distance, interval in TIERS:
+        if distance <= max_distance:
+            return interval
+    return TIERS[-1][1]
+
+
+@dataclass
+class WatchedPosition:
+    key: str
+    protocol: str                 # "aave" | "morpho"
+    user: str
+    market_key: Optional[str] = None
+    market_params: Optional[tuple] = None
+    threshold: float = AAVE_DELEVERAGE_HF
+    health_factor: Optional[float] = None
+    price_asset: Optional[str] = None  # oracle feed the collateral follows
+    next_due: float = 0.0
+    last_read: float = 0.0
+
+
+class LeverageMonitor:
+    """
+    Usage:
+        leverage_monitor.start()          # tiered background sweeps
+        await leverage_monitor.check()    # one pass over due positions
+        await leverage_monitor.check(force=True)  # every position now
+    """
+
+    def __init__(self, w3: Optional[Web3] = None, chunk_size: int = CHUNK_SIZE):
+        self.w3 = w3
+        self.chunk_size = chunk_size
+        self.watched: Dict[str, WatchedPosition] = {}
+        self._deleveraging: set = set()
+        self._unreadable: set = set()  # Morpho markets without readable params (warned once)
+        self.stats = {"passes": 0, "reads": 0, "rpc_calls": 0, "deleverages": 0, "errors": 0}
+
+    def _get_web3(self) -> Web3:
+        if not self.w3:
+            from agents.smart_loop_engine import smart_loop_engine
+            smart_loop_engine._init_contracts()
+            self.w3 = smart_loop_engine.w3
+        return self.w3
+
+    # ------------------------------------------------------------------
+    # Watch set
+    # ------------------------------------------------------------------
+
+    def _sync_watch_set(self):
+        """Mirror the loop engines' open positions (keeps tier state)"""
+        current: Dict[str, WatchedPosition] = {}
+
+        try:
+            from agents.smart_loop_engine import smart_loop_engine
+            for user in list(smart_loop_engine.positions):
+                key = f"aave:{user.lower()}"
+                current[key] = self.watched.get(key) or WatchedPosition(
+                    key=key, protocol="aave", user=user, threshold=AAVE_DELEVERAGE_HF
+                )
+        except ImportError:
+            pass
+
+        try:
+            from agents.morpho_loop_engine import morpho_loop_engine, MORPHO_MARKETS
+            margin = getattr(morpho_loop_engine, "MIN_SAFETY_MARGIN", MORPHO_SAFETY_MARGIN)
+            for position in list(morpho_loop_engine.positions.values()):
+                key = f"morpho:{position.user.lower()}:{position.market_key}"
+                if key in self.watched:
+                    current[key] = self.watched[key]
+                    continue
+                if position.market_key in self._unreadable:
+                    continue
+                try:
+                    params = morpho_loop_engine._get_market_params(position.market_key)
+                except Exception as e:
+                    # Placeholder oracle addresses in MORPHO_MARKETS can't be read
+                    self._unreadable.add(position.market_key)
+                    logger.warning(f"[LeverageMonitor] Skipping Morpho {position.market_key}: {e}")
+                    continue
+                collateral = MORPHO_MARKETS[position.market_key]["name"].split("/")[-1]
+                exposure = price_exposure({"tokens": [collateral]})
+                current[key] = WatchedPosition(
+                    key=key, protocol="morpho", user=position.user,
+                    market_key=position.market_key, market_params=params,
+                    threshold=morpho_deleverage_hf(params[4], margin),
+                    price_asset=exposure[0] if exposure else None
+                )
+        except ImportError:
+            pass
+
+        for key in self.watched.keys() - current.keys():
+            price_triggers.disarm(key)
+        self.watched = current
+
+    # ------------------------------------------------------------------
+    # Batched reads
+    # ------------------------------------------------------------------
+
+    def _build_calls(self, positions: List[WatchedPosition]) -> List[Tuple[tuple, str, bytes]]:
+        """[(result key, target, callData)] - market/oracle reads deduplicated"""
+        calls: List[Tuple[tuple, str, bytes]] = []
+        markets: Dict[bytes, tuple] = {}
+
+        for p in positions:
+            user = bytes(12) + bytes.fromhex(Web3.to_checksum_address(p.user)[2:])
+            if p.protocol == "aave":
+                calls.append((("aave", p.key), AAVE_POOL_ADDRESS, GET_USER_ACCOUNT_DATA + user))
+            else:
+                market_id = morpho_market_id(p.market_params)
+                markets[market_id] = p.market_params
+                calls.append((("position", p.key), MORPHO_BLUE_ADDRESS, MORPHO_POSITION + market_id + user))
+
+        for market_id, params in markets.items():
+            calls.append((("market", market_id), MORPHO_BLUE_ADDRESS, MORPHO_MARKET + market_id))
+            calls.append((("price", market_id), params[2], ORACLE_PRICE))
+
+        return calls
+
+    def _aggregate(self, calls: List[dict]) -> List[Tuple[bool, bytes]]:
+        multicall = self._get_web3().eth.contract(
+            address=Web3.to_checksum_address(MULTICALL3_ADDRESS),
+            abi=MULTICALL3_ABI
+        )
+        return multicall.functions.aggregate3(calls).call()
+
+    async def read_health_factors(self, positions: List[WatchedPosition]) -> Dict[str, Optional[float]]:
+        """Health factor per position key (None if the read failed)"""
+        calls = self._build_calls(positions)
+        chunks = [calls[i:i + self.chunk_size] for i in range(0, len(calls), self.chunk_size)]
+        results = await asyncio.gather(*(
+            asyncio.to_thread(self._aggregate, [
+                {"target": Web3.to_checksum_address(target), "allowFailure": True, "callData": data}
+                for _, target, data in chunk
+            ])
+            for chunk in chunks
+        ), return_exceptions=True)
+        self.stats["rpc_calls"] += len(chunks)
+
+        raw: Dict[tuple, bytes] = {}
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                self.stats["errors"] += 1
+                logger.warning(f"[LeverageMonitor] aggregate3 failed: {result}")
+                continue
+            for (key, _, _), (success, data) in zip(chunk, result):
+                if success and data:
+                    raw[key] = data
+
+        health: Dict[str, Optional[float]] = {}
+        for p in positions:
+            try:
+                if p.protocol == "aave":
+                    data = raw.get(("aave", p.key))
+                    health[p.key] = decode(AAVE_ACCOUNT_TYPES, data)[5] / 1e18 if data else None
+                else:
+                    health[p.key] = self._morpho_health(p, raw)
+            except Exception as e:
+                logger.debug(f"[LeverageMonitor] Decode failed for {p.key}: {e}")
+                health[p.key] = None
+        return health
+
+    @staticmethod
+    def _morpho_health(p: WatchedPosition, raw: Dict[tuple, bytes]) -> Optional[float]:
+        market_id = morpho_market_id(p.market_params)
+        position_data = raw.get(("position", p.key))
+        market_data = raw.get(("market", market_id))
+        price_data = raw.get(("price", market_id))
+        if not (position_data and market_data and price_data):
+            return None
+
+        _, borrow_shares, collateral = decode(MORPHO_POSITION_TYPES, position_data)
+        _, _, total_borrow_assets, total_borrow_shares, _, _ = decode(MORPHO_MARKET_TYPES, market_data)
+        (price,) = decode(["uint256"], price_data)
+
+        if borrow_shares == 0:
+            return float("inf")
+        # toAssetsUp: shares * (totalAssets + 1) / (totalShares + 1e6), rounded up
+        denominator = total_borrow_shares + VIRTUAL_SHARES
+        borrow_assets = -(-borrow_shares * (total_borrow_assets + VIRTUAL_ASSETS) // denominator)
+        max_borrow = collateral * price // ORACLE_PRICE_SCALE * p.market_params[4] // 10 ** 18
+        return max_borrow / borrow_assets
+
+    # ------------------------------------------------------------------
+    # Pass
+    # ------------------------------------------------------------------
+
+    async def check(self, force: bool = False) -> Dict[str, Optional[float]]:
+        """Read every due position in one batched pass and act on the results"""
+        self._sync_watch_set()
+        now = time.monotonic()
+        due = [p for p in self.watched.values() if force or p.next_due <= now]
+        if not due:
+            return {}
+
+        self.stats["passes"] += 1
+        self.stats["reads"] += len(due)
+        health = await self.read_health_factors(due)
+
+        for p in due:
+            hf = health.get(p.key)
+            p.health_factor = hf if hf is not None else p.health_factor
+            p.last_read = now
+            p.next_due = now + poll_interval_for(hf, p.threshold)
+            if hf is not None:
+                self._arm_price_trigger(p, hf)
+                await self._act(p, hf)
+        return health
+
+    def _arm_price_trigger(self, p: WatchedPosition, hf: float):
+        """Collateral price at which HF crosses the threshold (HF ~ price)"""
+        if p.price_asset and 0 < hf < float("inf"):
+            price_triggers.arm(p.key, p.price_asset, "deleverage", ref_value=hf, thresholds=[(DOWN, p.threshold)])
+        else:
+            price_triggers.disarm(p.key)
+
+    async def _on_price_trigger(self, trigger, price: float):
+        """Oracle crossed a deleverage price - re-read that position now"""
+        p = self.watched.get(trigger.key)
+        if not p:
+            return
+        logger.info(f"[LeverageMonitor] {trigger.asset} at {price:.2f} crossed {trigger.price:.2f} for {p.key}")
+        p.next_due = 0.0
+        await self.check()
+
+    async def _act(self, p: WatchedPosition, hf: float):
+        if p.protocol == "aave":
+            from agents.smart_loop_engine import smart_loop_engine
+            position = smart_loop_engine.positions.get(p.user)
+            if position:
+                position.health_factor = hf
+                position.last_updated = datetime.utcnow().isoformat()
+
+            if hf < AAVE_DELEVERAGE_HF:
+                print(f"[SmartLoop] ⚠️ CRITICAL: {p.user[:10]} HF={hf:.2f} - AUTO DELEVERAGE!")
+                await self._deleverage(p, lambda: smart_loop_engine.deleverage(p.user, AAVE_TARGET_LEVERAGE))
+            elif hf < AAVE_WARNING_HF:
+                print(f"[SmartLoop] ⚠️ WARNING: {p.user[:10]} HF={hf:.2f} - Consider deleveraging")
+        elif hf < p.threshold:
+            from agents.morpho_loop_engine import morpho_loop_engine
+            print(f"[MorphoLoop] ⚠️ CRITICAL: {p.user[:10]} {p.market_key} HF={hf:.2f} - AUTO DELEVERAGE!")
+            await self._deleverage(p, lambda: morpho_loop_engine.deleverage(p.user, p.market_key, MORPHO_TARGET_LEVERAGE))
+
+    async def _deleverage(self, p: WatchedPosition, action: Callable):
+        """Run one deleverage per position at a time"""
+        if p.key in self._deleveraging:
+            return
+        self._deleveraging.add(p.key)
+        try:
+            self.stats["deleverages"] += 1
+            await action()
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"[LeverageMonitor] Deleverage failed for {p.key}: {e}")
+        finally:
+            self._deleveraging.discard(p.key)
+            p.next_due = 0.0  # re-read right after acting
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def _tick(self):
+        await self.check()
+
+    def start(self):
+        """Register the tiered sweep with the shared scheduler (idempotent)"""
+        scheduler.register("leverage_monitor", self._tick, TICK_INTERVAL, priority=PRIORITY_CRITICAL)
+        price_triggers.on_trigger("deleverage", self._on_price_trigger)
+        price_triggers.start()
+        scheduler.start()
+
+    def stop(self):
+        scheduler.unregister("leverage_monitor")
+        price_triggers.callbacks.pop("deleverage", None)
+
+    def get_stats(self) -> dict:
+        tiers: Dict[str, int] = {}
+        for p in self.watched.values():
+            interval = poll_interval_for(p.health_factor, p.threshold)
+            tiers[f"{interval}s"] = tiers.get(f"{interval}s", 0) + 1
+        return {**self.stats, "watched": len(self.watched), "tiers": tiers}
+
+
+# Global instance
+leverage_monitor = LeverageMonitor()
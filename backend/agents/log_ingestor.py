@@ -0,0 +1,332 @@
+"""
+Log Ingestor - Event-driven agent triggers from on-chain logs
+
+WHY: DepositMonitor polled every agent's balances every 30s (5 RPC calls per
+agent per poll) even when nothing happened. EventSubscriber/HybridMonitor
+listened to a single contract and were never wired to executor decisions.
+
+DESIGN:
+- One eth_blockNumber per tick; eth_getLogs only when new blocks exist
+- Block ranges chunked (provider limits) and checkpointed by block number,
+  so a restart or RPC error never skips a range
+- Topic filters:
+  * USDC/USDT/WETH/DAI Transfer(from, to) with `to` in all agent addresses
+  * Native ETH moves emit no log; DepositMonitor keeps polling ETH balances
+  * Gauge/pool events (reward notify, liquidity mint/burn) for held positions
+- Matching logs become targeted per-agent evaluations via registered
+  callbacks, coalesced per agent so a burst of logs = one evaluation
+- Idle agents cost zero RPC: they only appear inside the topic filter
+"""
+
+import asyncio
+import json
+import os
+import re
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from web3 import Web3
+
+from agents.agent_registry import agent_registry, agent_address_of
+from infrastructure.rpc import get_web3
+from infrastructure.scheduler import scheduler, PRIORITY_HIGH
+
+
+def _topic(signature: str) -> str:
+    return Web3.keccak(text=signature).hex()
+
+
+TRANSFER_TOPIC = _topic("Transfer(address,address,uint256)")
+
+# Deposit tokens watched for Transfers into agent wallets (Base)
+DEPOSIT_TOKENS = {
+    "0x833589fcd6edb6e08f4c7c32d4f71b54bda02913": ("USDC", 6),
+    "0xfde4c96c8593536e31f229ea8f37b2ada2699bb2": ("USDT", 6),
+    "0x4200000000000000000000000000000000000006": ("WETH", 18),
+    "0x50c5725949a6f0c72e6c4a641f24049a917db0cb": ("DAI", 18),
+}
+
+# Gauge/pool events that should re-evaluate the agents holding them.
+# Swap/Sync are deliberately excluded - they fire every block.
+POSITION_EVENT_TOPICS = {
+    _topic("NotifyReward(address,uint256)"): "reward_notify",                         # Gauge epoch rewards
+    _topic("Mint(address,uint256,uint256)"): "liquidity_added",                        # V2 pool
+    _topic("Burn(address,address,uint256,uint256)"): "liquidity_removed",              # Aerodrome V2 pool
+    _topic("Burn(address,uint256,uint256,address)"): "liquidity_removed",              # Uniswap V2 pool
+    _topic("Mint(address,address,int24,int24,uint128,uint256,uint256)"): "liquidity_added",   # CL pool
+    _topic("Burn(address,int24,int24,uint128,uint256,uint256)"): "liquidity_removed",         # CL pool
+}
+
+CHECKPOINT_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "log_checkpoint.json")
+
+MAX_BLOCK_RANGE = 2000        # eth_getLogs block span per request
+MAX_FILTER_ADDRESSES = 500    # addresses / topic values per request
+POLL_INTERVAL = 2             # seconds, Base block time
+
+_ADDRESS_RE = re.compile(r"^0x[0-9a-fA-F]{40}$")
+
+
+def address_to_topic(address: str) -> str:
+    """Left-pad a 20-byte address to a 32-byte topic"""
+    return "0x" + "0" * 24 + address.lower()[2:]
+
+
+def topic_to_address(topic) -> str:
+    """Last 20 bytes of a 32-byte topic as a lowercase address"""
+    if not isinstance(topic, str):
+        topic = Web3.to_hex(topic)
+    return "0x" + topic[-40:].lower()
+
+
+def _hex(value) -> str:
+    return value if isinstance(value, str) else Web3.to_hex(value)
+
+
+def _uint(data) -> int:
+    """uint256 log data; empty data ("0x") is 0"""
+    data = _hex(data)
+    return int(data, 16) if data not in ("0x", "") else 0
+
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class LogIngestor:
+    """
+    Block-range log ingestion with checkpointing and per-agent dispatch.
+
+    Usage:
+        log_ingestor.on_event("deposit", handler)          # handler(agent, deposits)
+        log_ingestor.on_event("position_event", handler)   # handler(agent, events)
+        log_ingestor.start()
+    """
+
+    def __init__(self, checkpoint_file: str = CHECKPOINT_FILE):
+        self.checkpoint_file = checkpoint_file
+        self.confirmations = int(os.getenv("LOG_INGEST_CONFIRMATIONS", "0"))
+        self.w3: Optional[Web3] = None
+        self.last_block: Optional[int] = None
+        self.callbacks: Dict[str, Callable] = {}
+
+        # (event, agent_id) -> queued payloads / worker task (coalescing)
+        self._pending: Dict[Tuple[str, str], list] = {}
+        self._workers: Dict[Tuple[str, str], asyncio.Task] = {}
+
+        # Watch set cached per agent_registry version
+        self._watch_cache: Optional[Tuple[Dict[str, dict], Dict[str, List[dict]]]] = None
+        self._watch_version = -1
+
+        self.stats = {"ticks": 0, "get_logs": 0, "logs": 0, "dispatched": 0}
+        self._load_checkpoint()
+
+    # ------------------------------------------------------------------
+    # Setup
+    # ------------------------------------------------------------------
+
+    def on_event(self, event_name: str, callback: Callable):
+        """Register callback for "deposit" or "position_event" """
+        self.callbacks[event_name] = callback
+        print(f"[LogIngestor] Registered callback for {event_name}")
+
+    def start(self):
+        """Register the ingestion tick with the shared scheduler (idempotent)"""
+        scheduler.register("log_ingestion", self.tick, POLL_INTERVAL, priority=PRIORITY_HIGH)
+        scheduler.start()
+
+    def stop(self):
+        scheduler.unregister("log_ingestion")
+        print("[LogIngestor] Stopped")
+
+    def _get_web3(self) -> Web3:
+        if not self.w3:
+            self.w3 = get_web3()
+        return self.w3
+
+    def _load_checkpoint(self):
+        try:
+            if os.path.exists(self.checkpoint_file):
+                with open(self.checkpoint_file, "r") as f:
+                    self.last_block = json.load(f).get("last_block")
+        except Exception as e:
+            print(f"[LogIngestor] Failed to load checkpoint: {e}")
+
+    def _save_checkpoint(self):
+        try:
+            os.makedirs(os.path.dirname(self.checkpoint_file), exist_ok=True)
+            tmp = self.checkpoint_file + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"last_block": self.last_block, "updated_at": datetime.utcnow().isoformat()}, f)
+            os.replace(tmp, self.checkpoint_file)
+        except Exception as e:
+            print(f"[LogIngestor] Failed to save checkpoint: {e}")
+
+    # ------------------------------------------------------------------
+    # Watch set
+    # ------------------------------------------------------------------
+
+    def _watch_set(self) -> Tuple[Dict[str, dict], Dict[str, List[dict]]]:
+        """
+        Returns:
+            (agent_address -> agent, position_contract -> [agents holding it])
+        """
+        # Reuse the last watch set until an agent changes
+        agent_registry.refresh()
+        if self._watch_cache and self._watch_version == agent_registry.version:
+            return self._watch_cache
+
+        agents_by_address: Dict[str, dict] = {}
+        holders: Dict[str, List[dict]] = {}
+
+        for _, agent in agent_registry.active_agents():
+            agent_address = agent_address_of(agent)
+            if agent_address:
+                agents_by_address[agent_address] = agent
+
+            for position in agent.get("allocations", []) + agent.get("positions", []):
+                for field in ("pool_address", "gauge_address", "pool"):
+                    contract = position.get(field)
+                    if isinstance(contract, str) and _ADDRESS_RE.match(contract):
+                        agents = holders.setdefault(contract.lower(), [])
+                        if agent not in agents:
+                            agents.append(agent)
+
+        self._watch_cache = (agents_by_address, holders)
+        self._watch_version = agent_registry.version
+        return self._watch_cache
+
+    # ------------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------------
+
+    async def tick(self):
+        """Fetch logs for new blocks since the checkpoint and dispatch them"""
+        if not self.callbacks:
+            return
+        self.stats["ticks"] += 1
+
+        w3 = self._get_web3()
+        head = await asyncio.to_thread(lambda: w3.eth.block_number)
+        to_block = head - self.confirmations
+
+        if self.last_block is None:
+            # First run: start from head (no backfill of past transfers)
+            self.last_block = to_block
+            self._save_checkpoint()
+            return
+        if to_block <= self.last_block:
+            return
+
+        agents_by_address, holders = self._watch_set()
+
+        from_block = self.last_block + 1
+        while from_block <= to_block:
+            end_block = min(from_block + MAX_BLOCK_RANGE - 1, to_block)
+            logs = await self._fetch_range(from_block, end_block, list(agents_by_address), list(holders))
+            self._dispatch(logs, agents_by_address, holders)
+
+            # Checkpoint only after the whole range was fetched
+            self.last_block = end_block
+            from_block = end_block + 1
+
+        self._save_checkpoint()
+
+    async def _fetch_range(
+        self,
+        from_block: int,
+        to_block: int,
+        agent_addresses: List[str],
+        position_contracts: List[str]
+    ) -> List[dict]:
+        """All matching logs in [from_block, to_block] (raises on RPC error)"""
+        filters = []
+
+        token_addresses = [Web3.to_checksum_address(t) for t in DEPOSIT_TOKENS]
+        for chunk in _chunks(agent_addresses, MAX_FILTER_ADDRESSES):
+            filters.append({
+                "address": token_addresses,
+                "topics": [TRANSFER_TOPIC, None, [address_to_topic(a) for a in chunk]],
+            })
+
+        for chunk in _chunks(position_contracts, MAX_FILTER_ADDRESSES):
+            filters.append({
+                "address": [Web3.to_checksum_address(c) for c in chunk],
+                "topics": [list(POSITION_EVENT_TOPICS)],
+            })
+
+        if not filters:
+            return []
+
+        w3 = self._get_web3()
+        logs: List[dict] = []
+        for params in filters:
+            params = {**params, "fromBlock": from_block, "toBlock": to_block}
+            result = await asyncio.to_thread(w3.eth.get_logs, params)
+            self.stats["get_logs"] += 1
+            logs.extend(result)
+
+        self.stats["logs"] += len(logs)
+        return logs
+
+    def _dispatch(self, logs: List[dict], agents_by_address: Dict[str, dict], holders: Dict[str, List[dict]]):
+        """Group logs per agent and enqueue one evaluation per agent"""
+        for log in logs:
+            contract = (log.get("address") or "").lower()
+            topics = [_hex(t) for t in log.get("topics", [])]
+            if not topics:
+                continue
+
+            block_number = log.get("blockNumber")
+            tx_hash = _hex(log.get("transactionHash", ""))
+
+            if topics[0] == TRANSFER_TOPIC and contract in DEPOSIT_TOKENS and len(topics) >= 3:
+                agent = agents_by_address.get(topic_to_address(topics[2]))
+                if not agent:
+                    continue
+                symbol, decimals = DEPOSIT_TOKENS[contract]
+                amount = _uint(log.get("data", "0x"))
+                self._enqueue("deposit", agent, {
+                    "token": symbol,
+                    "amount": amount,
+                    "formatted": f"{amount / (10 ** decimals):.4f}",
+                    "from": topic_to_address(topics[1]),
+                    "tx_hash": tx_hash,
+                    "block_number": block_number,
+                })
+            elif topics[0] in POSITION_EVENT_TOPICS:
+                for agent in holders.get(contract, []):
+                    self._enqueue("position_event", agent, {
+                        "event": POSITION_EVENT_TOPICS[topics[0]],
+                        "contract": contract,
+                        "tx_hash": tx_hash,
+                        "block_number": block_number,
+                    })
+
+    def _enqueue(self, event_name: str, agent: dict, payload: dict):
+        if event_name not in self.callbacks:
+            return
+        key = (event_name, agent.get("id", ""))
+        self._pending.setdefault(key, []).append(payload)
+
+        worker = self._workers.get(key)
+        if worker is None or worker.done():
+            self._workers[key] = asyncio.create_task(self._run_worker(key, agent))
+
+    async def _run_worker(self, key: Tuple[str, str], agent: dict):
+        """Drain queued payloads for one (event, agent); new logs coalesce"""
+        event_name, agent_id = key
+        try:
+            while self._pending.get(key):
+                payloads = self._pending.pop(key)
+                self.stats["dispatched"] += 1
+                try:
+                    await self.callbacks[event_name](agent, payloads)
+                except Exception as e:
+                    print(f"[LogIngestor] {event_name} handler error for {agent_id[:15]}: {e}")
+        finally:
+            self._workers.pop(key, None)
+
+
+# Global instance
+log_ingestor = LogIngestor()
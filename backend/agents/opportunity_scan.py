@@ -0,0 +1,240 @@
+"""
+Opportunity Scan - Shared per-cycle pool scan for all agents
+
+WHY: Every agent's find_matching_pools used to call get_scout_pools with its own
+chain/TVL/APY arguments. With N agents on Base the same DefiLlama download,
+risk scoring and APY validation ran N times per cycle.
+
+DESIGN:
+- One superset scan per chain per cycle (lowest min_tvl requested on that chain)
+- Scan results stored column-wise (NumPy arrays) next to the pool dicts
+- Per-agent filters become boolean masks over the shared columns
+- Substring masks (protocols, preferred assets) are cached per scan, so
+  agents sharing a protocol list pay for it once
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    from artisan.scout_agent import scout_agent
+except ImportError:
+    scout_agent = None
+
+
+# get_scout_pools() default upper TVL bound - kept so shared-scan results
+# match what the per-agent Scout call used to return
+SCOUT_MAX_TVL = 100_000_000
+DEFAULT_MIN_POOL_TVL = 500_000
+DEFAULT_MIN_APY = 3
+DEFAULT_MAX_APY = 50000
+
+# Trusted protocols are considered audited (only_audited)
+AUDITED_PROTOCOLS = [
+    'aave', 'compound', 'curve', 'uniswap', 'morpho', 'lido', 'aerodrome', 'velodrome',
+    'moonwell', 'seamless', 'beefy', 'convex', 'exactly', 'sonne'
+]
+
+# Single-sided lending protocols (no IL risk) - avoid_il
+IL_SAFE_PROTOCOLS = ["aave", "aave-v3", "compound", "compound-v3", "morpho", "moonwell", "beefy"]
+
+CHAIN_MAP = {"base": "Base", "ethereum": "Ethereum", "arbitrum": "Arbitrum"}
+
+
+def normalize_chain(chain: Optional[str]) -> str:
+    """Normalize agent chain name to DefiLlama naming ("base" -> "Base")"""
+    chain = chain or "base"
+    return CHAIN_MAP.get(chain.lower(), chain.title())
+
+
+class OpportunityScan:
+    """
+    Immutable snapshot of one Scout scan for a chain, with columnar views.
+
+    Pools keep Scout's order (APY descending), masks preserve it.
+    """
+
+    def __init__(self, chain: str, pools: List[Dict], min_tvl: float):
+        self.chain = chain
+        self.pools = pools
+        self.min_tvl = min_tvl
+        self.scanned_at = datetime.utcnow()
+
+        n = len(pools)
+        self.projects = [(p.get("project") or "").lower() for p in pools]
+        self.symbols = [(p.get("symbol") or "").upper() for p in pools]
+
+        self.apy = np.fromiter((p.get("apy", 0) or 0 for p in pools), dtype=np.float64, count=n)
+        self.tvl = np.fromiter(
+            (p.get("tvlUsd", p.get("tvl", 0)) or 0 for p in pools), dtype=np.float64, count=n
+        )
+        self.stablecoin = np.fromiter((bool(p.get("stablecoin", False)) for p in pools), dtype=bool, count=n)
+        self.high_risk = np.fromiter((p.get("risk_score", "Medium") == "High" for p in pools), dtype=bool, count=n)
+        self.is_lp = np.fromiter(
+            (any(sep in s for sep in ["-", "/", " / "]) for s in self.symbols), dtype=bool, count=n
+        )
+        self.audited = self._any_substring(self.projects, AUDITED_PROTOCOLS)
+
+        pool_types = [(p.get("pool_type", p.get("category", "")) or "").lower() for p in pools]
+        self.il_safe = self._any_substring(self.projects, IL_SAFE_PROTOCOLS) | np.fromiter(
+            ("lending" in t or "single" in t for t in pool_types), dtype=bool, count=n
+        )
+
+        # token -> mask, shared by every agent filtering this scan
+        self._project_masks: Dict[str, np.ndarray] = {}
+        self._symbol_masks: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.pools)
+
+    @staticmethod
+    def _any_substring(values: List[str], needles: List[str]) -> np.ndarray:
+        return np.fromiter(
+            (any(n in v for n in needles) for v in values), dtype=bool, count=len(values)
+        )
+
+    def _token_mask(self, cache: Dict[str, np.ndarray], values: List[str], tokens: List[str]) -> np.ndarray:
+        """OR of cached per-token substring masks"""
+        mask = np.zeros(len(values), dtype=bool)
+        for token in tokens:
+            token_mask = cache.get(token)
+            if token_mask is None:
+                token_mask = np.fromiter((token in v for v in values), dtype=bool, count=len(values))
+                cache[token] = token_mask
+            mask |= token_mask
+        return mask
+
+    def mask_for(self, agent: dict) -> np.ndarray:
+        """
+        Boolean mask of pools matching the agent config.
+
+        Mirrors the former get_scout_pools + find_matching_pools filter chain
+        (everything except avoid_il, which needs a fallback - see select()).
+        """
+        # BUG-02 FIX: min_pool_tvl is the agent field name
+        mask = self.tvl >= agent.get("min_pool_tvl", DEFAULT_MIN_POOL_TVL)
+
+        # FIX #6: max TVL (upper bound) on top of Scout's default cap
+        max_tvl = SCOUT_MAX_TVL
+        if agent.get("max_pool_tvl"):
+            max_tvl = min(max_tvl, agent["max_pool_tvl"])
+        mask &= self.tvl <= max_tvl
+
+        # BUG-05 FIX: min_apy=3 default keeps quality lending pools
+        mask &= self.apy >= agent.get("min_apy", DEFAULT_MIN_APY)
+        mask &= self.apy <= agent.get("max_apy", DEFAULT_MAX_APY)
+
+        pool_type = agent.get("pool_type", "all")
+        if pool_type == "stablecoin":
+            mask &= self.stablecoin
+        elif pool_type == "single":
+            mask &= ~self.is_lp
+        elif pool_type == "dual":
+            mask &= self.is_lp
+
+        protocols = [p.lower() for p in agent.get("protocols", []) or []]
+        if protocols:
+            mask &= self._token_mask(self._project_masks, self.projects, protocols)
+
+        preferred_assets = [a.upper() for a in agent.get("preferred_assets", []) or []]
+        if preferred_assets:
+            mask &= self._token_mask(self._symbol_masks, self.symbols, preferred_assets)
+
+        if agent.get("risk_level", "medium") == "low":
+            mask &= ~self.high_risk
+
+        if agent.get("only_audited", False):
+            mask &= self.audited
+
+        return mask
+
+    def select(self, agent: dict) -> List[Dict]:
+        """Pools matching the agent config, in Scout order"""
+        mask = self.mask_for(agent)
+
+        if agent.get("avoid_il", False):
+            safe_mask = mask & self.il_safe
+            if safe_mask.any():
+                mask = safe_mask
+            else:
+                # Fallback to top 3 if all filtered
+                mask = mask & (np.cumsum(mask) <= 3)
+
+        return [self.pools[i] for i in np.flatnonzero(mask)]
+
+
+class OpportunityScanner:
+    """
+    Caches one OpportunityScan per chain per executor cycle.
+
+    Usage:
+        opportunity_scanner.begin_cycle()
+        await opportunity_scanner.prepare(agents)       # one scan per chain
+        pools = (await opportunity_scanner.get_scan("Base")).select(agent)
+    """
+
+    def __init__(self, max_age_seconds: int = 300):
+        # Outside of an executor cycle (e.g. PositionMonitor reinvestment) a
+        # snapshot is reused while younger than Scout's cache TTL
+        self.max_age_seconds = max_age_seconds
+        self._scans: Dict[str, OpportunityScan] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.stats = {"scans": 0, "reused": 0}
+
+    def begin_cycle(self):
+        """Drop snapshots so the next cycle scans fresh data"""
+        self._scans.clear()
+
+    def _is_usable(self, scan: Optional[OpportunityScan], min_tvl: float) -> bool:
+        if scan is None or scan.min_tvl > min_tvl:
+            return False
+        age = (datetime.utcnow() - scan.scanned_at).total_seconds()
+        return age < self.max_age_seconds
+
+    async def get_scan(self, chain: str, min_tvl: float = DEFAULT_MIN_POOL_TVL) -> OpportunityScan:
+        """Shared scan for a chain covering at least pools with TVL >= min_tvl"""
+        scan = self._scans.get(chain)
+        if self._is_usable(scan, min_tvl):
+            self.stats["reused"] += 1
+            return scan
+
+        lock = self._locks.setdefault(chain, asyncio.Lock())
+        async with lock:
+            # Another agent may have scanned while we waited
+            scan = self._scans.get(chain)
+            if self._is_usable(scan, min_tvl):
+                self.stats["reused"] += 1
+                return scan
+
+            if not scout_agent:
+                return OpportunityScan(chain, [], min_tvl)
+
+            pools = await scout_agent.scan_all_protocols(chain, min_tvl)
+            scan = OpportunityScan(chain, pools, min_tvl)
+            self._scans[chain] = scan
+            self.stats["scans"] += 1
+            print(f"[OpportunityScan] Scanned {chain}: {len(scan)} pools (min_tvl=${min_tvl:,.0f})")
+            return scan
+
+    async def prepare(self, agents: List[dict]):
+        """Run one superset scan per chain used by the given agents"""
+        min_tvl_by_chain: Dict[str, float] = {}
+        for agent in agents:
+            chain = normalize_chain(agent.get("chain"))
+            min_tvl = agent.get("min_pool_tvl", DEFAULT_MIN_POOL_TVL)
+            min_tvl_by_chain[chain] = min(min_tvl_by_chain.get(chain, min_tvl), min_tvl)
+
+        results = await asyncio.gather(
+            *[self.get_scan(chain, min_tvl) for chain, min_tvl in min_tvl_by_chain.items()],
+            return_exceptions=True
+        )
+        for chain, result in zip(min_tvl_by_chain, results):
+            if isinstance(result, Exception):
+                print(f"[OpportunityScan] Scan error for {chain}: {result}")
+
+
+# Singleton instance
+opportunity_scanner = OpportunityScanner()
@@ -0,0 +1,325 @@
+"""
+Pool Analysis Store - Materialized SmartRouter analyses for the pools people view
+
+WHY: SmartRouter.smart_route_pool_check() rebuilt the whole analysis (Gecko
+base, seven enrichment fetches, audit status, risk score, risk flags,
+DefiLlama/Merkl patches) on every request. Its caches only covered single
+sub-pieces for 2-5 minutes, so a popular pool viewed every few seconds
+still paid the assembly - and every slow API - over and over.
+
+DESIGN:
+- One document per (chain, pool): the finished response plus, for Aerodrome
+  pools, the raw sections it was built from (Gecko base, ohlcv, apy, ...)
+- A repeat view is a single dict read (shallow-copied so callers can add
+  fields); each view bumps a decaying popularity score
+- Sections depend on one of three inputs - price, APY, security - each with
+  its own refresh interval, stretched up to MAX_SLOWDOWN x for cold pools
+- A background tick refreshes due documents, most popular first. For price
+  it re-reads only the Gecko base; the price-driven sections are re-fetched
+  only if TVL actually moved. APY and security sections are re-fetched on
+  their own cadence. Sections that came back pending or errored are retried
+  every tick. The response is re-assembled (risk score, flags - all local
+  math) only when some section changed
+- Other routes (Beefy, Moonwell, Uniswap V3, universal) have no sections and
+  are rebuilt whole on the price cadence
+- Documents nobody views decay below MIN_POPULARITY and are dropped
+"""
+
+import asyncio
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from infrastructure.scheduler import scheduler, PRIORITY_LOW
+
+# Refresh interval per dependency for a hot pool (seconds)
+DEPENDENCY_INTERVALS = {
+    "price": int(os.getenv("ANALYSIS_PRICE_INTERVAL", "60")),
+    "apy": int(os.getenv("ANALYSIS_APY_INTERVAL", "300")),
+    "security": int(os.getenv("ANALYSIS_SECURITY_INTERVAL", "1800")),
+}
+SECTION_DEPENDENCY = {
+    "base": "price",
+    "ohlcv": "price",
+    "dexscreener": "price",
+    "peg": "price",
+    "apy": "apy",
+    "security": "security",
+    "lp_lock": "security",
+    "whale": "security",
+}
+HOT_VIEWS = 10.0                  # popularity at which a pool refreshes at full cadence
+MAX_SLOWDOWN = 10.0               # cold pools refresh up to this much slower
+VIEW_HALF_LIFE = 3600             # seconds
+MIN_POPULARITY = 0.05             # below this a document is dropped
+MAX_AGE = DEPENDENCY_INTERVALS["price"] * MAX_SLOWDOWN * 2   # never serve prices older than this
+PRICE_EPSILON = 0.005             # relative TVL move that counts as a price change
+REFRESH_TICK = 15                 # seconds
+REFRESH_BATCH = 10                # documents refreshed per tick
+REFRESH_BUDGET = 10.0             # seconds - background refreshes can wait longer than users
+
+
+@dataclass
+class AnalysisDoc:
+    address: str
+    chain: str
+    route: str                                   # "aerodrome" (sectioned) or "full"
+    response: Dict[str, Any]
+    protocol: Any = None                         # smart_router.Protocol the pool was routed as
+    hint: Any = None                             # Protocol hint from URL parsing (vault routes)
+    sections: Dict[str, Any] = field(default_factory=dict)
+    states: Dict[str, str] = field(default_factory=dict)
+    dirty: Set[str] = field(default_factory=set)
+    dependency_at: Dict[str, float] = field(default_factory=dict)
+    built_at: float = field(default_factory=time.time)
+    views: float = 0.0
+    viewed_at: float = field(default_factory=time.time)
+
+    def popularity(self, now: float) -> float:
+        return self.views * math.pow(0.5, (now - self.viewed_at) / VIEW_HALF_LIFE)
+
+
+def _detach(response: Dict[str, Any], **extra) -> Dict[str, Any]:
+    """Copy of a response whose top level and "pool" dict callers may modify freely"""
+    response = {**response, **extra}
+    if isinstance(response.get("pool"), dict):
+        response["pool"] = dict(response["pool"])
+    return response
+
+
+def _tvl_moved(old: Optional[Dict], new: Dict) -> bool:
+    old_tvl = (old or {}).get("tvl", 0) or 0
+    new_tvl = new.get("tvl", 0) or 0
+    if not old_tvl:
+        return bool(new_tvl)
+    return abs(new_tvl - old_tvl) / old_tvl > PRICE_EPSILON
+
+
+class PoolAnalysisStore:
+    """
+    Materialized pool analyses, kept fresh in the background.
+
+    Usage:
+        pool_analysis_store.start()
+        response = pool_analysis_store.get(address, chain)     # None -> build it
+        pool_analysis_store.materialize(address, chain, response, route="full")
+        pool_analysis_store.invalidate(address, chain, "security")
+    """
+
+    def __init__(self, router=None):
+        self.router = router
+        self.docs: Dict[Tuple[str, str], AnalysisDoc] = {}
+        self._refreshing: Set[Tuple[str, str]] = set()
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0, "sections_refetched": 0,
+                      "rebuilt": 0, "unchanged": 0, "errors": 0, "evicted": 0}
+
+    # ------------------------------------------------------------------
+    # Setup
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Register the refresh tick with the shared scheduler (idempotent)"""
+        scheduler.register("pool_analysis_refresh", self.tick, REFRESH_TICK, priority=PRIORITY_LOW)
+        scheduler.start()
+
+    def stop(self):
+        scheduler.unregister("pool_analysis_refresh")
+        print("[PoolAnalysisStore] Stopped")
+
+    def _get_router(self):
+        if self.router is None:
+            from api.smart_router import smart_router
+            self.router = smart_router
+        return self.router
+
+    # ------------------------------------------------------------------
+    # Reads and writes (no I/O)
+    # ------------------------------------------------------------------
+
+    def get(self, address: str, chain: str) -> Optional[Dict[str, Any]]:
+        """Materialized response for a pool, or None (build it and materialize)"""
+        now = time.time()
+        doc = self.docs.get((chain.lower(), address.lower()))
+        if doc is None or now - doc.dependency_at.get("price", 0) > MAX_AGE:
+            self.stats["misses"] += 1
+            return None
+        self._view(doc, now)
+        self.stats["hits"] += 1
+        return _detach(doc.response, materialized_at=doc.built_at)
+
+    def materialize(self, address: str, chain: str, response: Dict[str, Any], route: str = "full",
+                    protocol: Any = None, hint: Any = None,
+                    sections: Optional[Dict[str, Any]] = None,
+                    states: Optional[Dict[str, str]] = None) -> Optional[AnalysisDoc]:
+        """Store a freshly built analysis (successful ones only) and count the view"""
+        if not response.get("success"):
+            return None
+        now = time.time()
+        key = (chain.lower(), address.lower())
+        doc = self.docs.get(key)
+        if doc is None:
+            doc = AnalysisDoc(address=key[1], chain=key[0], route=route, response=response)
+            self.docs[key] = doc
+        doc.route, doc.response, doc.protocol, doc.hint = route, _detach(response), protocol, hint
+        doc.sections = dict(sections or {})
+        doc.states = dict(states or {})
+        doc.dirty = {name for name, state in doc.states.items() if state not in ("ok", "cached")}
+        doc.dependency_at = {dep: now for dep in DEPENDENCY_INTERVALS}
+        doc.built_at = now
+        self._view(doc, now)
+        return doc
+
+    def invalidate(self, address: str, chain: str, dependency: Optional[str] = None):
+        """
+        Mark a dependency ("price", "apy", "security") changed - or, without
+        one, the whole document - so the next tick recomputes what depends on it.
+        """
+        doc = self.docs.get((chain.lower(), address.lower()))
+        if doc is None:
+            return
+        deps = [dependency] if dependency else list(DEPENDENCY_INTERVALS)
+        for dep in deps:
+            doc.dependency_at[dep] = 0.0
+            if dep != "price":
+                # Price sections are only re-fetched if the base shows a move
+                doc.dirty.update(s for s, d in SECTION_DEPENDENCY.items() if d == dep and s in doc.sections)
+
+    def interval(self, doc: AnalysisDoc, dependency: str, now: Optional[float] = None) -> float:
+        """Refresh interval for one dependency, stretched for unpopular pools"""
+        popularity = doc.popularity(now or time.time())
+        slowdown = min(MAX_SLOWDOWN, max(1.0, HOT_VIEWS / max(popularity, 1e-9)))
+        return DEPENDENCY_INTERVALS[dependency] * slowdown
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "documents": len(self.docs)}
+
+    def _view(self, doc: AnalysisDoc, now: float):
+        doc.views = doc.popularity(now) + 1.0
+        doc.viewed_at = now
+
+    # ------------------------------------------------------------------
+    # Background refresh
+    # ------------------------------------------------------------------
+
+    def due(self, now: Optional[float] = None) -> List[AnalysisDoc]:
+        """Documents with a due dependency or a dirty section, most popular first"""
+        now = now or time.time()
+        due = [
+            doc for key, doc in self.docs.items()
+            if key not in self._refreshing and (doc.dirty or any(
+                now - doc.dependency_at.get(dep, 0) >= self.interval(doc, dep, now)
+                for dep in DEPENDENCY_INTERVALS
+            ))
+        ]
+        due.sort(key=lambda doc: doc.popularity(now), reverse=True)
+        return due
+
+    async def tick(self):
+        self._evict()
+        due = self.due()[:REFRESH_BATCH]
+        if due:
+            await asyncio.gather(*(self.refresh(doc) for doc in due), return_exceptions=True)
+
+    async def refresh(self, doc: AnalysisDoc) -> bool:
+        """Bring one document up to date; returns True if its response was rebuilt"""
+        key = (doc.chain, doc.address)
+        if key in self._refreshing:
+            return False
+        self._refreshing.add(key)
+        self.stats["refreshes"] += 1
+        try:
+            if doc.route == "aerodrome":
+                rebuilt = await self._refresh_sections(doc)
+            else:
+                rebuilt = await self._refresh_full(doc)
+            self.stats["rebuilt" if rebuilt else "unchanged"] += 1
+            return rebuilt
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[PoolAnalysisStore] Refresh failed for {doc.address[:10]}...: {e}")
+            return False
+        finally:
+            self._refreshing.discard(key)
+
+    async def _refresh_full(self, doc: AnalysisDoc) -> bool:
+        """Routes without sections: rebuild the whole analysis on the price cadence"""
+        now = time.time()
+        if not doc.dirty and now - doc.dependency_at.get("price", 0) < self.interval(doc, "price", now):
+            return False
+        router = self._get_router()
+        response = await router.route_pool(doc.address, doc.chain, hint=doc.hint, materialize=False)
+        if not response.get("success"):
+            return False
+        doc.response = response
+        doc.dirty.clear()
+        doc.dependency_at = {dep: now for dep in DEPENDENCY_INTERVALS}
+        doc.built_at = now
+        return True
+
+    async def _refresh_sections(self, doc: AnalysisDoc) -> bool:
+        """Aerodrome: re-fetch only the sections whose dependency is due or changed"""
+        router = self._get_router()
+        now = time.time()
+        due = {dep for dep in DEPENDENCY_INTERVALS
+               if now - doc.dependency_at.get(dep, 0) >= self.interval(doc, dep, now)}
+        refetch = set(doc.dirty)
+        changed = False
+
+        base = doc.sections.get("base") or {}
+        if "price" in due:
+            fresh, _ = await router._aerodrome_base(doc.address, doc.chain)
+            if fresh:
+                if _tvl_moved(base, fresh):
+                    refetch.update(s for s, d in SECTION_DEPENDENCY.items() if d == "price" and s != "base")
+                    changed = True
+                if (fresh.get("apy") or 0) != (base.get("apy") or 0):
+                    refetch.add("apy")
+                    changed = True
+                if (fresh.get("token0"), fresh.get("token1")) != (base.get("token0"), base.get("token1")):
+                    refetch.update(s for s, d in SECTION_DEPENDENCY.items() if d == "security")
+                doc.sections["base"] = base = fresh
+            else:
+                due.discard("price")
+        for dep in due - {"price"}:
+            refetch.update(s for s, d in SECTION_DEPENDENCY.items() if d == dep)
+        refetch.discard("base")
+
+        if refetch and base:
+            fetchers = router._aerodrome_fetchers(dict(base), doc.address, doc.chain, doc.protocol)
+            fetchers = {name: fetch for name, fetch in fetchers.items() if name in refetch}
+            async for name, data, state in router._run_sections(doc.address, fetchers, REFRESH_BUDGET):
+                self.stats["sections_refetched"] += 1
+                if state != "ok":
+                    # Keep serving the previous value, retry next tick
+                    doc.dirty.add(name)
+                    continue
+                doc.dirty.discard(name)
+                if doc.states.get(name) != "ok" or data != doc.sections.get(name):
+                    changed = True
+                doc.sections[name], doc.states[name] = data, "ok"
+
+        for dep in due:
+            doc.dependency_at[dep] = now
+        if not changed or not base:
+            return False
+
+        sections = {name: data for name, data in doc.sections.items() if name != "base"}
+        doc.response = router._finish_aerodrome(
+            dict(base), sections, dict(doc.states), doc.address, doc.chain, doc.protocol,
+            doc.response.get("source", "geckoterminal+factory_detected")
+        )
+        doc.built_at = now
+        return True
+
+    def _evict(self):
+        now = time.time()
+        cold = [key for key, doc in self.docs.items() if doc.popularity(now) < MIN_POPULARITY]
+        for key in cold:
+            del self.docs[key]
+        self.stats["evicted"] += len(cold)
+
+
+# Global instance
+pool_analysis_store = PoolAnalysisStore()
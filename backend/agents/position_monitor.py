@@ -6,19 +6,27 @@ Exit Triggers:
 1. Duration Expiry - investment duration ended
 2. APY Below Range - pool APY dropped below min_apy
 3. Stop-Loss - position lost >= stop_loss_percent (default 15%)
+4. Conditional Rules - the user's parsed rules (/rules/set), evaluated for
+   all of an agent's positions in one RulesEngine.evaluate_many() pass
 
 After exit, automatically finds and enters a new position.
 """
 
 import asyncio
 import logging
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional
 import os
 
 from dotenv import load_dotenv
 load_dotenv()
 
+from infrastructure.scheduler import scheduler, PRIORITY_NORMAL
+from agents.log_ingestor import log_ingestor
+from agents.agent_registry import agent_registry
+from infrastructure.work_leases import work_partitioner
+
 logger = logging.getLogger(__name__)
 
 # Import dependencies
@@ -36,7 +44,7 @@ try:
     from api.agent_config_router import DEPLOYED_AGENTS, _save_agents
 except ImportError:
     DEPLOYED_AGENTS = {}
-    _save_agents = lambda: None
+    _save_agents = lambda *args, **kwargs: None
 
 try:
     from data_sources.thegraph import graph_client
@@ -53,15 +61,23 @@ try:
 except ImportError:
     supabase = None
 
+try:
+    from services.rules_engine import get_rules_engine
+    from services.conditional_rules import PositionState
+    from api.agent_router import get_user_rules_for_engine
+except ImportError:
+    get_rules_engine = None
+
 
 class PositionMonitor:
     """
     Background service monitoring positions for exit triggers.
     
-    Runs every 60 seconds checking:
+    Checks every agent once per 60 seconds (staggered per agent):
     - Duration expiry
     - APY below min_apy range
     - Stop-loss threshold
+    - The user's conditional rules
     
     When triggered, executes withdrawal and reinvestment.
     """
@@ -69,131 +85,289 @@ class PositionMonitor:
     def __init__(self):
         self.running = False
         self.check_interval = 60  # seconds
+        self.max_concurrent_checks = 4  # per-agent checks running at once
         self.last_check = None
         
         # Default settings for BASIC mode
         self.default_duration_days = 30
         self.default_stop_loss_percent = 15
         
+        # Bulk Supabase positions shared by every agent check:
+        # (user, pool, protocol) -> rows, reloaded at most every positions_ttl
+        self.positions_ttl = self.check_interval / 2
+        self._position_index: Optional[Dict[tuple, List[Dict]]] = None
+        self._positions_by_user: Dict[str, List[Dict]] = {}
+        self._positions_loaded_at = 0.0
+        self._positions_load: Optional[asyncio.Future] = None
+        
         logger.info("[PositionMonitor] Initialized")
     
     async def start(self):
-        """Start the monitoring loop"""
+        """Register monitoring with the shared scheduler"""
         self.running = True
         logger.info("[PositionMonitor] Starting position monitoring loop")
         
-        while self.running:
-            try:
-                await self.check_all_positions()
-                self.last_check = datetime.utcnow()
-            except Exception as e:
-                logger.error(f"[PositionMonitor] Error in check loop: {e}")
-            
-            await asyncio.sleep(self.check_interval)
+        # Per-agent checks, spread across check_interval instead of one burst
+        scheduler.set_concurrency("position_check", self.max_concurrent_checks)
+        scheduler.register("position_monitor_sync", self.sync_agent_tasks, self.check_interval)
+        scheduler.start()
+        
+        # Gauge/pool events on held positions pull the agent's check forward
+        log_ingestor.on_event("position_event", self.on_position_logs)
+        log_ingestor.start()
     
     def stop(self):
         """Stop the monitoring loop"""
         self.running = False
+        scheduler.unregister("position_monitor_sync")
+        scheduler.unregister_all("position_check")
+        log_ingestor.callbacks.pop("position_event", None)
         logger.info("[PositionMonitor] Stopped")
     
+    async def sync_agent_tasks(self):
+        """Keep one scheduled position_check per active agent"""
+        agent_ids = [
+            agent.get("id") for user_address, agent in agent_registry.active_agents()
+            if work_partitioner.owns(user_address)
+        ]
+        added, removed = scheduler.sync_agents(
+            "position_check",
+            agent_ids,
+            self.check_agent_by_id,
+            self.check_interval,
+            priority=PRIORITY_NORMAL
+        )
+        if added or removed:
+            logger.info(f"[PositionMonitor] Agent tasks: +{added} / -{removed}")
+    
+    async def on_position_logs(self, agent: Dict, events: List[Dict]):
+        """Targeted re-check of one agent after on-chain pool/gauge events"""
+        kinds = sorted({e.get("event", "") for e in events})
+        logger.info(f"[PositionMonitor] {len(events)} events ({', '.join(kinds)}) for {agent.get('id', '?')[:15]}")
+        scheduler.trigger("position_check", agent.get("id"))
+    
+    async def check_agent_by_id(self, agent_id: str):
+        """Scheduled per-agent entry point"""
+        entry = agent_registry.get_entry(agent_id)
+        # Shard may have moved to another replica since the last task sync
+        if entry and entry[1].get("is_active", False) and work_partitioner.owns(entry[0]):
+            await self.check_agent_positions(*entry)
+            self.last_check = datetime.utcnow()
+    
     async def check_all_positions(self):
-        """Check all user positions for exit triggers.
+        """Check all user positions for exit triggers (one full pass)."""
+        checked = 0
+        exits_triggered = 0
+        
+        for user_address, agent in agent_registry.active_agents():
+            if not work_partitioner.owns(user_address):
+                continue
+            agent_checked, agent_exits = await self.check_agent_positions(user_address, agent)
+            checked += agent_checked
+            exits_triggered += agent_exits
+        
+        if checked > 0:
+            logger.info(f"[PositionMonitor] Checked {checked} positions, {exits_triggered} exits triggered")
+    
+    @staticmethod
+    def _position_key(user_address: str, position: Dict) -> tuple:
+        pool = position.get("pool") or position.get("pool_address", "")
+        protocol = (position.get("protocol", "") or "").lower()
+        return (user_address.lower(), pool, protocol)
+    
+    async def load_all_positions(self, force: bool = False) -> Optional[Dict[str, List[Dict]]]:
+        """All active Supabase positions by user, shared by every agent check.
+        
+        One paginated query per positions_ttl instead of one query per agent;
+        concurrent callers wait on the same load. None if Supabase is unavailable.
+        """
+        if not (supabase and supabase.is_available):
+            return None
+        fresh = time.monotonic() - self._positions_loaded_at < self.positions_ttl
+        if self._position_index is not None and fresh and not force:
+            return self._positions_by_user
+        
+        if self._positions_load is None or self._positions_load.done():
+            self._positions_load = asyncio.ensure_future(self._fetch_all_positions())
+        return await asyncio.shield(self._positions_load)
+    
+    async def _fetch_all_positions(self) -> Optional[Dict[str, List[Dict]]]:
+        rows = await supabase.get_all_active_positions()
+        if rows is None:
+            # Same as the old per-user failure path: fall back to in-memory positions
+            self._position_index = None
+            self._positions_by_user = {}
+            return None
+        
+        index: Dict[tuple, List[Dict]] = {}
+        by_user: Dict[str, List[Dict]] = {}
+        for row in rows:
+            user = (row.get("user_address") or "").lower()
+            by_user.setdefault(user, []).append(row)
+            index.setdefault(self._position_key(user, row), []).append(row)
+        
+        self._position_index = index
+        self._positions_by_user = by_user
+        self._positions_loaded_at = time.monotonic()
+        logger.debug(f"[PositionMonitor] Loaded {len(rows)} active positions for {len(by_user)} users")
+        return by_user
+    
+    def _merge_in_memory_flags(self, user_address: str, in_memory: List[Dict]):
+        """REM-4: copy exit flags from in-memory entries onto Supabase rows.
+        
+        O(in-memory entries) dict lookups into the (user, pool, protocol) index
+        instead of a nested scan per Supabase row.
+        """
+        index = self._position_index or {}
+        seen = set()
+        for mp in in_memory:
+            key = (user_address.lower(), mp.get("pool", ""), (mp.get("protocol", "") or "").lower())
+            # First in-memory entry per (pool, protocol) wins
+            if key in seen:
+                continue
+            seen.add(key)
+            for sp in index.get(key, []):
+                if mp.get("exit_in_progress"):
+                    sp["exit_in_progress"] = True
+                if mp.get("exit_status"):
+                    sp["exit_status"] = mp["exit_status"]
+    
+    async def check_agent_positions(self, user_address: str, agent: Dict) -> tuple:
+        """Check one agent's positions for exit triggers.
         
         Data sources:
         1. Supabase user_positions (primary - persistent)
         2. DEPLOYED_AGENTS in-memory (fallback)
         
         REM-4: Merges in-memory flags (exit_in_progress) onto Supabase positions
-        REM-2: Skips SL/TP checks if strategy_executor ran recently (dedup)
+        REM-2: Skips SL/TP checks if strategy_executor checked this agent recently (dedup)
+        
+        Returns:
+            (positions_checked, exits_triggered)
         """
         checked = 0
         exits_triggered = 0
         
-        for user_address, agents in DEPLOYED_AGENTS.items():
-            for agent in agents:
-                if not agent.get("is_active", False):
-                    continue
-                
-                # REM-2 DEDUP: Skip if strategy_executor ran <15 min ago
-                # strategy_executor already handles SL/TP via check_position_risks
-                # position_monitor only handles: duration, apy_range (which strategy_executor doesn't check)
-                skip_risk_checks = False
-                if strategy_executor:
-                    agent_id = agent.get("id", "")
-                    last_exec = strategy_executor.last_execution.get(agent_id)
-                    if last_exec and (datetime.utcnow() - last_exec).total_seconds() < 900:
-                        skip_risk_checks = True
-                
-                # Get in-memory positions for flag merging (exit_in_progress etc.)
-                in_memory_positions = agent.get("positions", [])
-                in_memory_allocations = agent.get("allocations", [])
-                
-                # Try to get positions from Supabase first
-                positions = []
-                if supabase and supabase.is_available:
-                    try:
-                        positions = await supabase.get_user_positions(user_address)
-                        logger.debug(f"[PositionMonitor] Got {len(positions)} positions from Supabase for {user_address[:10]}")
-                        
-                        # REM-4 FIX: Merge in-memory flags onto Supabase positions
-                        # Supabase rows don't carry exit_in_progress flag
-                        for sp in positions:
-                            sp_pool = sp.get("pool") or sp.get("pool_address", "")
-                            sp_protocol = (sp.get("protocol", "") or "").lower()
-                            
-                            for mp in (in_memory_allocations + in_memory_positions):
-                                mp_pool = mp.get("pool", "")
-                                mp_protocol = (mp.get("protocol", "") or "").lower()
-                                if mp_pool == sp_pool and mp_protocol == sp_protocol:
-                                    if mp.get("exit_in_progress"):
-                                        sp["exit_in_progress"] = True
-                                    if mp.get("exit_status"):
-                                        sp["exit_status"] = mp["exit_status"]
-                                    break
-                    except Exception as e:
-                        logger.warning(f"[PositionMonitor] Supabase fetch failed: {e}")
-                
-                # Fallback to in-memory positions
-                if not positions:
-                    positions = in_memory_positions
+        # REM-2 DEDUP: Skip if strategy_executor checked risks <15 min ago
+        # strategy_executor already handles SL/TP via check_position_risks
+        # position_monitor only handles: duration, apy_range (which strategy_executor doesn't check)
+        skip_risk_checks = scheduler.ran_within("agent_risk_checks", agent.get("id", ""), 900)
+        
+        # Get in-memory positions for flag merging (exit_in_progress etc.)
+        in_memory_positions = agent.get("positions", [])
+        in_memory_allocations = agent.get("allocations", [])
+        
+        # Try to get positions from Supabase first (bulk-loaded for all users)
+        positions = []
+        try:
+            positions_by_user = await self.load_all_positions()
+            if positions_by_user is not None:
+                positions = list(positions_by_user.get(user_address.lower(), []))
+                logger.debug(f"[PositionMonitor] Got {len(positions)} positions from Supabase for {user_address[:10]}")
                 
-                if not positions:
-                    continue
+                # REM-4 FIX: Merge in-memory flags onto Supabase positions
+                # Supabase rows don't carry exit_in_progress flag
+                self._merge_in_memory_flags(user_address, in_memory_allocations + in_memory_positions)
+        except Exception as e:
+            logger.warning(f"[PositionMonitor] Supabase fetch failed: {e}")
+        
+        # Fallback to in-memory positions
+        if not positions:
+            positions = in_memory_positions
+        
+        # REM-4 FIX: Skip positions being exited by strategy_executor
+        # Skip already exited positions
+        positions = [
+            p for p in positions
+            if not p.get("exit_in_progress") and p.get("exit_status") not in ("completed", "exited")
+        ]
+        rule_results = self.evaluate_user_rules(user_address, positions)
+        
+        for position, rule_result in zip(positions, rule_results):
+            checked += 1
+            
+            # REM-2 DEDUP: Only check duration and APY range 
+            # (SL/TP/volatility handled by strategy_executor)
+            if skip_risk_checks:
+                exit_result = await self._check_position_exit_no_risk(agent, position)
+            else:
+                exit_result = await self.check_position_exit(agent, position)
+            
+            if not exit_result.get("should_exit") and rule_result and rule_result.should_exit:
+                exit_result = {"should_exit": True, "reason": rule_result.exit_reason, "trigger": "rule"}
+            
+            if exit_result.get("should_exit"):
+                exits_triggered += 1
+                # REM-4: Set guard before exit to prevent strategy_executor double-exit
+                position["exit_in_progress"] = True
+                # Also set on in-memory positions
+                for mp in (in_memory_allocations + in_memory_positions):
+                    if mp.get("pool") == (position.get("pool") or position.get("pool_address", "")):
+                        mp["exit_in_progress"] = True
                 
-                for position in positions:
-                    # REM-4 FIX: Skip positions being exited by strategy_executor
-                    if position.get("exit_in_progress"):
-                        continue
-                    # Skip already exited positions
-                    if position.get("exit_status") in ("completed", "exited"):
-                        continue
-                    
-                    checked += 1
-                    
-                    # REM-2 DEDUP: Only check duration and APY range 
-                    # (SL/TP/volatility handled by strategy_executor)
-                    if skip_risk_checks:
-                        exit_result = await self._check_position_exit_no_risk(agent, position)
-                    else:
-                        exit_result = await self.check_position_exit(agent, position)
-                    
-                    if exit_result.get("should_exit"):
-                        exits_triggered += 1
-                        # REM-4: Set guard before exit to prevent strategy_executor double-exit
-                        position["exit_in_progress"] = True
-                        # Also set on in-memory positions
-                        for mp in (in_memory_allocations + in_memory_positions):
-                            if mp.get("pool") == (position.get("pool") or position.get("pool_address", "")):
-                                mp["exit_in_progress"] = True
-                        
-                        await self.execute_exit_and_reinvest(
-                            agent, 
-                            position, 
-                            exit_result.get("reason", "Unknown")
-                        )
+                await self.execute_exit_and_reinvest(
+                    agent, 
+                    position, 
+                    exit_result.get("reason", "Unknown")
+                )
+                # Closed row must not be served from the bulk cache again
+                self._positions_loaded_at = 0.0
+                if rule_result:
+                    get_rules_engine().clear_position_state(self._rule_position_id(user_address, position))
         
-        if checked > 0:
-            logger.info(f"[PositionMonitor] Checked {checked} positions, {exits_triggered} exits triggered")
+        return checked, exits_triggered
+    
+    def evaluate_user_rules(self, user_address: str, positions: List[Dict]) -> List:
+        """RuleEvaluation per position (None without rules), one table per agent cycle"""
+        if not get_rules_engine or not positions:
+            return [None] * len(positions)
+        rules = get_user_rules_for_engine(user_address)
+        if not rules:
+            return [None] * len(positions)
+        engine = get_rules_engine()
+        states = [self._position_state(engine, user_address, p) for p in positions]
+        return engine.evaluate_many(states, rules)
+    
+    @classmethod
+    def _rule_position_id(cls, user_address: str, position: Dict) -> str:
+        return str(position.get("id") or ":".join(cls._position_key(user_address, position)))
+    
+    @classmethod
+    def _position_state(cls, engine, user_address: str, position: Dict) -> "PositionState":
+        """Supabase row or in-memory position as the rules engine sees it"""
+        position_id = cls._rule_position_id(user_address, position)
+        entry_value = float(position.get("entry_value") or position.get("amount") or 0)
+        current_value = float(position.get("current_value") or entry_value)
+        
+        entry_time = datetime.utcnow()
+        entered = position.get("entry_time") or position.get("created_at")
+        if entered:
+            try:
+                entry_time = datetime.fromisoformat(str(entered).replace('Z', '+00:00'))
+                if entry_time.tzinfo:
+                    entry_time = entry_time.astimezone(timezone.utc).replace(tzinfo=None)
+            except ValueError:
+                pass
+        
+        metadata = position.get("metadata") or {}
+        asset = position.get("asset")
+        apy = position.get("current_apy")
+        return PositionState(
+            position_id=position_id,
+            user_address=user_address,
+            pool_address=position.get("pool_address") or position.get("pool", ""),
+            entry_time=entry_time,
+            entry_value=entry_value,
+            peak_value=max(engine.peak_values.get(position_id, entry_value), current_value),
+            current_value=current_value,
+            pool_info={
+                "tvl": float(position.get("tvl") or metadata.get("tvl") or 0),
+                "apy": float(position.get("apy") or 0) if apy is None else float(apy),
+                "protocol": position.get("protocol") or "",
+                "pool_type": position.get("pool_type") or "",
+                "assets": position.get("tokens") or metadata.get("assets") or ([asset] if asset else []),
+            },
+        )
     
     async def _check_position_exit_no_risk(self, agent: Dict, position: Dict) -> Dict:
         """
@@ -529,7 +703,7 @@ class PositionMonitor:
                 logger.error(f"[PositionMonitor] Reinvestment failed: {e}")
         
         # 7. Save updated agents to file
-        _save_agents()
+        _save_agents(dirty=[(agent_registry.get_owner(agent_id) or (user_address or "").lower(), agent_id)])
         
         logger.info(f"[PositionMonitor] Exit complete for {agent_id}")
     
@@ -0,0 +1,298 @@
+"""
+Price Triggers - Sorted per-asset threshold index for stop-loss, take-profit
+and deleverage decisions
+
+WHY: Stop-loss / take-profit were only evaluated when StrategyExecutor
+re-read every position on its cycle (check_position_risks), and deleverage
+when LeverageMonitor's tiered sweep came around. A fast price move was seen
+minutes late, and every position was re-evaluated whether or not the price
+had moved anywhere near its limits.
+
+DESIGN:
+- When a position is checked, its rules are turned into the oracle prices
+  at which they would fire, using a simple exposure model:
+      value(p) = ref_value * (p / ref_price) ** exponent
+  exponent 1.0 for single-asset exposure (lending/vault, loop HF),
+  0.5 for volatile/stable LPs (constant-product value ~ sqrt(p))
+- Thresholds live in two sorted lists per asset (bisect):
+  * down: fire when price <= threshold (stop-loss, deleverage)
+  * up:   fire when price >= threshold (take-profit)
+- A price update pops only the crossed slice - O(log n + k) - and hands the
+  fired triggers to the callback registered for their kind. Triggers are
+  one-shot: the owner re-checks the position with live data and re-arms it
+- Owners pass the (ref_price, ref_value) anchor recorded at entry, so a
+  re-arm keeps the same fire prices instead of following the market down
+- Positions without single-asset price exposure (stable lending, exotic
+  pairs) are not indexed and stay on the timer checks
+- While triggers are armed, the shared price snapshot is refreshed every
+  PRICE_POLL_INTERVAL (one multicall for all feeds); any other source can
+  push prices through update_price()
+"""
+
+import itertools
+import logging
+import re
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from infrastructure.scheduler import scheduler, PRIORITY_CRITICAL
+
+logger = logging.getLogger(__name__)
+
+PRICE_POLL_INTERVAL = 1  # seconds
+
+DOWN = "down"
+UP = "up"
+
+# Token symbol -> oracle feed (services.price_oracle.PRICE_FEEDS keys)
+PRICE_FEED_FOR_TOKEN = {
+    "ETH": "ETH/USD",
+    "WETH": "ETH/USD",
+    "CBETH": "ETH/USD",
+    "WSTETH": "ETH/USD",
+    "RETH": "ETH/USD",
+    "WEETH": "ETH/USD",
+    "BTC": "BTC/USD",
+    "WBTC": "BTC/USD",
+    "CBBTC": "BTC/USD",
+    "TBTC": "BTC/USD",
+}
+
+STABLE_TOKENS = {"USDC", "USDBC", "USDT", "DAI", "EURC", "USDS", "GHO", "LUSD", "USD+", "CRVUSD"}
+
+_SYMBOL_SPLIT = re.compile(r"[-/_ ]+")
+
+
+def price_exposure(position: Dict) -> Optional[Tuple[str, float]]:
+    """
+    (price feed, exponent) for a position with exposure to exactly one
+    volatile asset, or None if its value does not follow a single feed.
+    """
+    tokens = position.get("tokens") or _SYMBOL_SPLIT.split(position.get("pool") or position.get("symbol") or "")
+    symbols = [t.upper() for t in tokens if t]
+    if not symbols:
+        return None
+
+    volatile = [s for s in symbols if s not in STABLE_TOKENS]
+    if not volatile or any(s not in PRICE_FEED_FOR_TOKEN for s in volatile):
+        return None
+    feeds = {PRICE_FEED_FOR_TOKEN[s] for s in volatile}
+    if len(feeds) != 1:
+        return None
+
+    # Volatile/stable pair: half the value is the stable leg
+    exponent = 0.5 if len(volatile) < len(symbols) else 1.0
+    return feeds.pop(), exponent
+
+
+@dataclass
+class PriceTrigger:
+    key: str                 # owner's position key
+    kind: str                # callback name: "risk", "deleverage", ...
+    asset: str               # price feed, e.g. "ETH/USD"
+    direction: str           # DOWN | UP
+    price: float             # oracle price at which the rule fires
+    ref_price: float
+    ref_value: float
+    exponent: float = 1.0
+    context: Dict = field(default_factory=dict)
+
+    def value_at(self, price: float) -> float:
+        """Modelled position value (or HF) at an oracle price"""
+        return self.ref_value * (price / self.ref_price) ** self.exponent
+
+
+class PriceTriggerIndex:
+    """
+    Usage:
+        price_triggers.on_trigger("risk", callback)    # async callback(trigger, price)
+        price_triggers.arm(key, "ETH/USD", "risk", ref_value=1000,
+                           thresholds=[(DOWN, 850), (UP, 1500)], exponent=0.5)
+        await price_triggers.update_price("ETH/USD", 2950.0)
+    """
+
+    def __init__(self):
+        # asset -> sorted [(price, seq)]
+        self._down: Dict[str, List[Tuple[float, int]]] = {}
+        self._up: Dict[str, List[Tuple[float, int]]] = {}
+        self._triggers: Dict[int, PriceTrigger] = {}
+        self._by_key: Dict[str, List[int]] = {}
+        self._seq = itertools.count()
+
+        # Armed before the asset's first price: asset -> {key: arm kwargs}
+        self._pending: Dict[str, Dict[str, dict]] = {}
+        self.last_price: Dict[str, float] = {}
+
+        self.callbacks: Dict[str, Callable[[PriceTrigger, float], Awaitable]] = {}
+        self.stats = {"updates": 0, "fired": 0, "armed": 0, "errors": 0}
+
+    def on_trigger(self, kind: str, callback: Callable[[PriceTrigger, float], Awaitable]):
+        self.callbacks[kind] = callback
+
+    # ------------------------------------------------------------------
+    # Arming
+    # ------------------------------------------------------------------
+
+    def arm(
+        self,
+        key: str,
+        asset: str,
+        kind: str,
+        ref_value: float,
+        thresholds: List[Tuple[str, float]],
+        exponent: float = 1.0,
+        context: Optional[Dict] = None,
+        ref_price: Optional[float] = None
+    ) -> int:
+        """
+        Replace the key's triggers with value thresholds converted to prices.
+        ref_value is the position's value at ref_price (default: the latest
+        price). Pass the anchor recorded at entry so re-arming never drifts.
+        Returns the number of triggers armed (0 while waiting for a price).
+        """
+        self.disarm(key)
+        if ref_value <= 0 or exponent <= 0:
+            return 0
+
+        if ref_price is None or ref_price <= 0:
+            ref_price = self.last_price.get(asset)
+        if ref_price is None:
+            self._pending.setdefault(asset, {})[key] = dict(
+                asset=asset, kind=kind, ref_value=ref_value,
+                thresholds=thresholds, exponent=exponent, context=context
+            )
+            return 0
+
+        seqs = []
+        for direction, value in thresholds:
+            if value <= 0:
+                continue
+            trigger = PriceTrigger(
+                key=key, kind=kind, asset=asset, direction=direction,
+                price=ref_price * (value / ref_value) ** (1 / exponent),
+                ref_price=ref_price, ref_value=ref_value, exponent=exponent,
+                context=context or {}
+            )
+            seq = next(self._seq)
+            self._triggers[seq] = trigger
+            book = self._down if direction == DOWN else self._up
+            insort(book.setdefault(asset, []), (trigger.price, seq))
+            seqs.append(seq)
+
+        if seqs:
+            self._by_key[key] = seqs
+            self.stats["armed"] += len(seqs)
+        return len(seqs)
+
+    def disarm(self, key: str):
+        for seq in self._by_key.pop(key, []):
+            trigger = self._triggers.pop(seq, None)
+            if trigger:
+                book = (self._down if trigger.direction == DOWN else self._up).get(trigger.asset, [])
+                i = bisect_left(book, (trigger.price, seq))
+                if i < len(book) and book[i][1] == seq:
+                    del book[i]
+        for pending in self._pending.values():
+            pending.pop(key, None)
+
+    def disarm_prefix(self, prefix: str, keep: set = frozenset()):
+        """Drop every key under prefix except `keep` (positions that went away)"""
+        keys = [k for k in self._by_key if k.startswith(prefix) and k not in keep]
+        keys += [k for p in self._pending.values() for k in p if k.startswith(prefix) and k not in keep]
+        for key in keys:
+            self.disarm(key)
+
+    def armed(self, key: str) -> List[PriceTrigger]:
+        return [self._triggers[s] for s in self._by_key.get(key, [])]
+
+    # ------------------------------------------------------------------
+    # Price updates
+    # ------------------------------------------------------------------
+
+    def on_price(self, asset: str, price: float) -> List[PriceTrigger]:
+        """Record a price and pop every trigger it crossed (O(log n + k))"""
+        self.stats["updates"] += 1
+        self.last_price[asset] = price
+
+        for key, kwargs in list(self._pending.pop(asset, {}).items()):
+            self.arm(key, **kwargs)
+
+        fired: List[Tuple[float, int]] = []
+        down = self._down.get(asset)
+        if down:
+            i = bisect_left(down, (price, -1))
+            fired.extend(down[i:])
+            del down[i:]
+        up = self._up.get(asset)
+        if up:
+            i = bisect_right(up, (price, float("inf")))
+            fired.extend(up[:i])
+            del up[:i]
+
+        triggers: List[PriceTrigger] = []
+        for _, seq in fired:
+            trigger = self._triggers.pop(seq, None)
+            if trigger is None:
+                continue
+            # One-shot per key: the owner re-checks and re-arms the position
+            self.disarm(trigger.key)
+            triggers.append(trigger)
+        self.stats["fired"] += len(triggers)
+        return triggers
+
+    async def update_price(self, asset: str, price: float) -> List[PriceTrigger]:
+        """on_price() + dispatch to the registered callbacks"""
+        triggers = self.on_price(asset, price)
+        for trigger in triggers:
+            callback = self.callbacks.get(trigger.kind)
+            if not callback:
+                continue
+            try:
+                await callback(trigger, price)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"[PriceTriggers] {trigger.kind} callback failed for {trigger.key}: {e}")
+        return triggers
+
+    # ------------------------------------------------------------------
+    # Feed
+    # ------------------------------------------------------------------
+
+    def watched_assets(self) -> List[str]:
+        assets = {a for a, book in self._down.items() if book}
+        assets |= {a for a, book in self._up.items() if book}
+        assets |= {a for a, pending in self._pending.items() if pending}
+        return sorted(assets)
+
+    async def _poll(self):
+        assets = self.watched_assets()
+        if not assets:
+            return
+        from data_sources.price_snapshot import price_snapshots
+        snapshot = await price_snapshots.get_snapshot(max_age=PRICE_POLL_INTERVAL)
+        for asset in assets:
+            feed = snapshot.feeds.get(asset)
+            if feed and not feed.is_stale:
+                await self.update_price(asset, feed.price)
+
+    def start(self):
+        """Poll armed assets on the shared scheduler (idempotent)"""
+        scheduler.register("price_triggers", self._poll, PRICE_POLL_INTERVAL, priority=PRIORITY_CRITICAL, jitter=0)
+        scheduler.start()
+
+    def stop(self):
+        scheduler.unregister("price_triggers")
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "triggers": len(self._triggers),
+            "pending": sum(len(p) for p in self._pending.values()),
+            "assets": self.watched_assets(),
+            "last_price": dict(self.last_price),
+        }
+
+
+# Global instance
+price_triggers = PriceTriggerIndex()
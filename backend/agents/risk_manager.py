@@ -128,11 +128,15 @@ class RiskManager:
     async def check_stop_loss(
         self,
         agent: Dict,
-        position: Dict
+        position: Dict,
+        marked_value: Optional[float] = None
     ) -> Dict:
         """
         Check if position should be stopped due to loss
         
+        marked_value: price-marked value to judge instead of current_value
+        (a price trigger fired and the stored value predates the move)
+        
         Returns:
             {should_exit: bool, reason: str, loss_percent: float}
         """
@@ -142,7 +146,7 @@ class RiskManager:
             return {"should_exit": False, "reason": "Stop-loss disabled"}
         
         entry_value = position.get("entry_value", 0)
-        current_value = position.get("current_value", entry_value)
+        current_value = position.get("current_value", entry_value) if marked_value is None else marked_value
         
         if entry_value <= 0:
             return {"should_exit": False, "reason": "No entry value"}
@@ -165,10 +169,12 @@ class RiskManager:
     async def check_take_profit(
         self,
         agent: Dict,
-        position: Dict
+        position: Dict,
+        marked_value: Optional[float] = None
     ) -> Dict:
         """
         Check if position should be closed for profit taking
+        (marked_value as in check_stop_loss)
         
         Returns:
             {should_exit: bool, reason: str, profit: float}
@@ -179,7 +185,7 @@ class RiskManager:
             return {"should_exit": False, "reason": "Take-profit disabled"}
         
         entry_value = position.get("entry_value", 0)
-        current_value = position.get("current_value", entry_value)
+        current_value = position.get("current_value", entry_value) if marked_value is None else marked_value
         
         profit = current_value - entry_value
         
@@ -278,7 +284,8 @@ class RiskManager:
     async def evaluate_position(
         self,
         agent: Dict,
-        position: Dict
+        position: Dict,
+        marked_value: Optional[float] = None
     ) -> Dict:
         """
         Full risk evaluation for a position
@@ -288,13 +295,14 @@ class RiskManager:
         results = {
             "timestamp": datetime.utcnow().isoformat(),
             "position_id": position.get("id"),
+            "price_marked": marked_value is not None,
             "should_exit": False,
             "should_pause": False,
             "alerts": []
         }
         
         # Check stop loss
-        sl_check = await self.check_stop_loss(agent, position)
+        sl_check = await self.check_stop_loss(agent, position, marked_value)
         if sl_check["should_exit"]:
             results["should_exit"] = True
             results["alerts"].append({
@@ -304,7 +312,7 @@ class RiskManager:
             })
         
         # Check take profit
-        tp_check = await self.check_take_profit(agent, position)
+        tp_check = await self.check_take_profit(agent, position, marked_value)
         if tp_check["should_exit"]:
             results["should_exit"] = True
             results["alerts"].append({
@@ -340,6 +348,6 @@ def get_risk_limits(agent_config: Dict) -> RiskLimits:
     return risk_manager.parse_pro_config(agent_config.get("pro_config"))
 
 
-async def check_position_risk(agent: Dict, position: Dict) -> Dict:
-    """Check risk for a position"""
-    return await risk_manager.evaluate_position(agent, position)
+async def check_position_risk(agent: Dict, position: Dict, marked_value: Optional[float] = None) -> Dict:
+    """Check risk for a position (marked_value: price-marked value, see check_stop_loss)"""
+    return await risk_manager.evaluate_position(agent, position, marked_value)
@@ -641,26 +641,15 @@ class SmartLoopEngine:
                 "health_factor": float('inf')
             }
     
+    async def check_health_factors(self):
+        """One health-factor pass over all looped positions (batched via Multicall)"""
+        from agents.leverage_monitor import leverage_monitor
+        await leverage_monitor.check(force=True)
+    
     async def monitor_positions(self):
-        """Background task to monitor health factors"""
-        while True:
-            for user, position in list(self.positions.items()):
-                try:
-                    hf = await self._get_health_factor(user)
-                    
-                    if hf < 1.2:
-                        print(f"[SmartLoop] ⚠️ CRITICAL: {user[:10]} HF={hf:.2f} - AUTO DELEVERAGE!")
-                        await self.deleverage(user, 1.5)
-                    elif hf < 1.5:
-                        print(f"[SmartLoop] ⚠️ WARNING: {user[:10]} HF={hf:.2f} - Consider deleveraging")
-                    
-                    position.health_factor = hf
-                    position.last_updated = datetime.utcnow().isoformat()
-                    
-                except Exception as e:
-                    print(f"[SmartLoop] Monitor error for {user}: {e}")
-            
-            await asyncio.sleep(60)  # Check every minute
+        """Start risk-tiered health-factor monitoring (Aave + Morpho loops)"""
+        from agents.leverage_monitor import leverage_monitor
+        leverage_monitor.start()
 
 
 # Global instance
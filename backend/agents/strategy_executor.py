@@ -10,18 +10,23 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import json
 
+from infrastructure.scheduler import scheduler, PRIORITY_HIGH
+from agents.agent_registry import agent_registry
+from infrastructure.work_leases import work_partitioner
+from agents.price_triggers import price_triggers, price_exposure, DOWN, UP
+
 # Import agent config storage
 try:
     from api.agent_config_router import DEPLOYED_AGENTS, _save_agents
 except ImportError:
     DEPLOYED_AGENTS = {}
-    _save_agents = lambda x: None
+    _save_agents = lambda *args, **kwargs: None
 
-# Import scout for pool finding
+# Import shared opportunity scan for pool finding
 try:
-    from artisan.scout_agent import get_scout_pools
+    from agents.opportunity_scan import opportunity_scanner, normalize_chain
 except ImportError:
-    get_scout_pools = None
+    opportunity_scanner = None
 
 # Import on-chain executor for real execution
 try:
@@ -100,6 +105,7 @@ class StrategyExecutor:
         self.idle_since: Dict[str, datetime] = {}  # agent_id → when idle balance started
         self.park_locked_until: Dict[str, datetime] = {}  # agent_id → when Park lock expires
         self.parked_amount: Dict[str, float] = {}  # agent_id → amount parked in Aave
+        self._trigger_checks: set = set()  # agent_ids with a price-triggered risk check running
         
         # Smart contract config - V4.3.3 PRODUCTION (same as frontend!)
         self.wallet_contract = os.getenv(
@@ -232,32 +238,6 @@ class StrategyExecutor:
         
         return False
     
-    def filter_avoid_il(self, pools: list, agent: dict) -> list:
-        """
-        Filter out pools that may cause impermanent loss if avoid_il is enabled.
-        Single-sided lending pools are preferred.
-        """
-        if not agent.get("avoid_il", False):
-            return pools
-        
-        # Single-sided lending protocols (no IL risk)
-        safe_protocols = ["aave", "aave-v3", "compound", "compound-v3", "morpho", "moonwell", "beefy"]
-        
-        filtered = []
-        for pool in pools:
-            project = pool.get("project", "").lower()
-            pool_type = pool.get("pool_type", pool.get("category", "")).lower()
-            
-            # Keep if it's a lending protocol or single-asset vault
-            if any(safe in project for safe in safe_protocols):
-                filtered.append(pool)
-            elif "lending" in pool_type or "single" in pool_type:
-                filtered.append(pool)
-            # Skip DEX LP pools (high IL risk)
-        
-        print(f"[StrategyExecutor] Avoid IL filter: {len(pools)} -> {len(filtered)} pools")
-        return filtered if filtered else pools[:3]  # Fallback to top 3 if all filtered
-    
     def check_park_conditions(self, agent: dict, pools_found: bool, idle_balance: float, has_allocations: bool = False) -> dict:
         """
         Check if Park conditions are met for auto-deposit to Aave USDC.
@@ -357,38 +337,48 @@ class StrategyExecutor:
         print(f"[StrategyExecutor] 🔒 Park lock set for {agent_id[:15]}: ${amount:.0f} locked for {self.park_lock_hours}h")
     
     async def start(self):
-        """Start the executor loop"""
+        """Register the executor cycle with the shared scheduler"""
         self.running = True
         print("[StrategyExecutor] Starting executor loop...")
         
-        while self.running:
-            try:
-                await self.execute_all_agents()
-            except Exception as e:
-                print(f"[StrategyExecutor] Execution error: {e}")
-            
-            await asyncio.sleep(self.execution_interval)
+        scheduler.register(
+            "strategy_executor",
+            self.execute_all_agents,
+            self.execution_interval,
+            priority=PRIORITY_HIGH
+        )
+        # Stop-loss / take-profit between cycles: oracle crossings re-check the position
+        price_triggers.on_trigger("risk", self._on_price_trigger)
+        price_triggers.start()
+        scheduler.start()
     
     def stop(self):
         """Stop the executor"""
         self.running = False
+        scheduler.unregister("strategy_executor")
+        price_triggers.callbacks.pop("risk", None)
         print("[StrategyExecutor] Stopped")
     
     async def execute_all_agents(self):
         """Execute strategies for all active agents"""
-        # DEPLOYED_AGENTS now stores: user_address -> [list of agents]
-        all_agents = []
-        for user_agents in DEPLOYED_AGENTS.values():
-            if isinstance(user_agents, list):
-                all_agents.extend([a for a in user_agents if a.get("is_active", False)])
-            elif isinstance(user_agents, dict) and user_agents.get("is_active", False):
-                all_agents.append(user_agents)
+        # Registry handles both list and legacy single-dict entries;
+        # only users in shards leased by this replica
+        entries = [
+            (user_address, agent) for user_address, agent in agent_registry.active_agents()
+            if work_partitioner.owns(user_address)
+        ]
+        all_agents = [agent for _, agent in entries]
         
         if not all_agents:
             return
         
         print(f"[StrategyExecutor] Processing {len(all_agents)} active agents")
         
+        # One superset Scout scan per chain for the whole cycle
+        if opportunity_scanner:
+            opportunity_scanner.begin_cycle()
+            await opportunity_scanner.prepare(all_agents)
+        
         for agent in all_agents:
             try:
                 # Skip paused agents (volatility guard etc.) until pause expires
@@ -411,6 +401,9 @@ class StrategyExecutor:
                 # REM-1 FIX: Refresh current_value BEFORE risk checks so SL/TP use live data
                 await self._refresh_allocations_value(agent)
                 await self.check_position_risks(agent)
+                # REM-2: monitors skip SL/TP for agents we just checked
+                scheduler.record_run("agent_risk_checks", agent.get("id"))
+                self._arm_price_triggers(agent)
                 
                 # Check if rebalancing needed (also always runs)
                 if agent.get("auto_rebalance", True):
@@ -436,9 +429,9 @@ class StrategyExecutor:
             except Exception as e:
                 print(f"[StrategyExecutor] Error for {agent.get('id', 'unknown')}: {e}")
         
-        # DISC-4 FIX: Persist state after processing all agents
+        # DISC-4 FIX: Persist state after processing all agents (only those this cycle touched)
         try:
-            _save_agents(DEPLOYED_AGENTS)
+            _save_agents(DEPLOYED_AGENTS, dirty=[(user_address, agent.get("id")) for user_address, agent in entries])
         except Exception as e:
             print(f"[StrategyExecutor] State persistence error: {e}")
     
@@ -1023,7 +1016,7 @@ class StrategyExecutor:
                             }
                         )
     
-    async def check_position_risks(self, agent: dict):
+    async def check_position_risks(self, agent: dict, marked_values: Optional[Dict[str, float]] = None):
         """
         Check all positions for risk triggers using Pro Mode settings
         
@@ -1031,6 +1024,9 @@ class StrategyExecutor:
         - Stop-loss: exit if loss >= threshold
         - Take-profit: exit if profit >= target
         - Volatility guard: pause if market too volatile
+        
+        marked_values: _position_key -> price-marked value, judged instead of
+        the stored current_value (set by a price trigger for its position)
         """
         if not check_position_risk:
             return
@@ -1048,7 +1044,11 @@ class StrategyExecutor:
             if position.get("exit_in_progress"):
                 continue
             
-            result = await check_position_risk(agent, position)
+            marked = (marked_values or {}).get(self._position_key(position))
+            if marked is None:
+                result = await check_position_risk(agent, position)
+            else:
+                result = await check_position_risk(agent, position, marked_value=marked)
             
             if result.get("should_exit"):
                 print(f"[StrategyExecutor] 🚨 Risk trigger for {agent_id}: {result.get('alerts', [])}")
@@ -1096,104 +1096,141 @@ class StrategyExecutor:
                     }
                 )
     
+    @staticmethod
+    def _position_key(position: dict) -> str:
+        return f"{position.get('protocol', '')}:{position.get('pool', '')}"
+    
+    @staticmethod
+    def _price_anchor(position: dict, asset: str, exponent: float, price: Optional[float], value: float) -> Optional[dict]:
+        """
+        (price, value) the position's exposure is modelled from, recorded the
+        first time it is indexed and kept until its asset or entry changes -
+        re-arming against the latest price would drag the stop price along
+        """
+        anchor = position.get("price_ref")
+        entry_value = position.get("entry_value", 0)
+        if (anchor and anchor.get("asset") == asset and anchor.get("exponent") == exponent
+                and anchor.get("entry_value") == entry_value):
+            return anchor
+        if not price:
+            return None
+        anchor = {"asset": asset, "exponent": exponent, "price": price, "value": value, "entry_value": entry_value}
+        position["price_ref"] = anchor
+        return anchor
+    
+    def _arm_price_triggers(self, agent: dict):
+        """
+        Index the oracle prices at which each position's stop-loss /
+        take-profit would fire (see agents/price_triggers.py).
+        Positions without single-asset price exposure stay on the cycle.
+        """
+        agent_id = agent.get("id", "unknown")
+        prefix = f"{agent_id}:"
+        armed = set()
+        
+        if risk_manager and agent.get("is_active", False):
+            limits = risk_manager.parse_pro_config(agent.get("pro_config"))
+            for position in agent.get("allocations", []):
+                if position.get("exit_in_progress") or position.get("exit_status") in ("completed", "exited"):
+                    continue
+                exposure = price_exposure(position)
+                if not exposure:
+                    continue
+                
+                entry_value = position.get("entry_value", 0)
+                thresholds = []
+                if limits.stop_loss_enabled:
+                    thresholds.append((DOWN, entry_value * (1 - limits.stop_loss_percent / 100)))
+                if limits.take_profit_enabled:
+                    thresholds.append((UP, entry_value + limits.take_profit_amount))
+                if entry_value <= 0 or not thresholds:
+                    continue
+                
+                key = f"{prefix}{self._position_key(position)}"
+                anchor = self._price_anchor(
+                    position, exposure[0], exposure[1],
+                    price_triggers.last_price.get(exposure[0]), position.get("current_value", entry_value)
+                )
+                price_triggers.arm(
+                    key,
+                    exposure[0],
+                    "risk",
+                    ref_value=anchor["value"] if anchor else position.get("current_value", entry_value),
+                    ref_price=anchor["price"] if anchor else None,
+                    thresholds=thresholds,
+                    exponent=exposure[1],
+                    context={"agent_id": agent_id, "pool": position.get("pool"), "protocol": position.get("protocol")}
+                )
+                armed.add(key)
+        
+        price_triggers.disarm_prefix(prefix, keep=armed)
+    
+    async def _on_price_trigger(self, trigger, price: float):
+        """
+        Oracle crossed a stop-loss / take-profit price: re-check that agent now.
+        
+        Values are re-read like a cycle does, but the stored value of an LP or
+        volatile position doesn't follow the price, so the triggered position
+        is judged on its price-marked value (trigger.value_at, modelled from
+        the anchor recorded at entry). The marked value is never persisted.
+        """
+        agent_id = trigger.context.get("agent_id")
+        entry = agent_registry.get_entry(agent_id)
+        if not entry or not entry[1].get("is_active", False) or not work_partitioner.owns(entry[0]):
+            return
+        if agent_id in self._trigger_checks:
+            return  # A triggered check for this agent is already reading values
+        agent = entry[1]
+        
+        position = next((
+            p for p in agent.get("allocations", [])
+            if p.get("pool") == trigger.context.get("pool") and p.get("protocol") == trigger.context.get("protocol")
+        ), None)
+        if not position or position.get("exit_in_progress"):
+            return
+        
+        print(f"[StrategyExecutor] ⚡ {trigger.asset} at {price:.2f} crossed {trigger.price:.2f} for {agent_id[:15]} {position.get('pool')}")
+        
+        # A trigger armed before the first price carries the anchor it used
+        self._price_anchor(position, trigger.asset, trigger.exponent, trigger.ref_price, trigger.ref_value)
+        
+        self._trigger_checks.add(agent_id)
+        try:
+            await self._refresh_allocations_value(agent)
+            await self.check_position_risks(agent, marked_values={self._position_key(position): trigger.value_at(price)})
+            scheduler.record_run("agent_risk_checks", agent_id)
+            self._arm_price_triggers(agent)
+        finally:
+            self._trigger_checks.discard(agent_id)
+        
+        try:
+            _save_agents(DEPLOYED_AGENTS, dirty=[(entry[0], agent_id)])
+        except Exception as e:
+            print(f"[StrategyExecutor] State persistence error: {e}")
+    
     async def find_matching_pools(self, agent: dict) -> List[dict]:
         """Find pools matching agent's configuration"""
-        if not get_scout_pools:
+        if not opportunity_scanner:
             print("[StrategyExecutor] Scout not available, using fallback")
             return []
         
         try:
-            # Get pools from Scout - returns {"pools": [...], "total": N, ...}
-            chain = agent.get("chain", "base")
-            # Normalize chain name for DefiLlama
-            chain_map = {"base": "Base", "ethereum": "Ethereum", "arbitrum": "Arbitrum"}
-            normalized_chain = chain_map.get(chain.lower(), chain.title())
-            
-            result = await get_scout_pools(
-                chain=normalized_chain,
-                # BUG-02 FIX: Read correct field name min_pool_tvl
-                min_tvl=agent.get("min_pool_tvl", 500000),  # $500k minimum (user wants quality)
-                # BUG-05 FIX: Use min_apy=3 default to include quality lending pools (Aave 5%, Compound 8%)
-                min_apy=agent.get("min_apy", 3),  # 3% minimum — don't exclude lending
-                max_apy=agent.get("max_apy", 50000),  # Allow high APY
-                protocols=agent.get("protocols", []),
-                stablecoin_only=agent.get("pool_type") == "stablecoin"
+            # Shared per-cycle scan - one Scout scan per chain, not per agent
+            normalized_chain = normalize_chain(agent.get("chain", "base"))
+            scan = await opportunity_scanner.get_scan(
+                normalized_chain,
+                min_tvl=agent.get("min_pool_tvl", 500000)
             )
             
-            # CRITICAL: Extract pools from result dict
-            if isinstance(result, dict):
-                pools = result.get("pools", [])
-                print(f"[StrategyExecutor] Got {len(pools)} pools from Scout")
-            elif isinstance(result, list):
-                pools = result
-            else:
-                pools = []
-            
-            if not pools:
+            if not len(scan):
                 print(f"[StrategyExecutor] No pools returned from Scout for {normalized_chain}")
                 return []
             
-            # Filter by agent preferences
-            filtered = []
-            
-            for pool in pools:
-                # Check APY range
-                apy = pool.get("apy", 0)
-                # BUG-05 FIX: Match default with Scout call (3%)
-                if apy < agent.get("min_apy", 3):
-                    continue
-                # If max_apy is 500 or higher, treat as "unlimited" (no upper limit)
-                max_apy_setting = agent.get("max_apy", 1000)
-                if max_apy_setting < 500 and apy > max_apy_setting:
-                    continue
-                
-                # FIX #6: Check max TVL (upper bound filter)
-                tvl = pool.get("tvlUsd", pool.get("tvl", 0))
-                max_pool_tvl = agent.get("max_pool_tvl")
-                if max_pool_tvl and tvl > max_pool_tvl:
-                    continue
-                
-                # Check protocols
-                project = (pool.get("project") or "").lower()
-                allowed_protocols = [p.lower() for p in agent.get("protocols", [])]
-                if allowed_protocols and not any(p in project for p in allowed_protocols):
-                    continue
-                
-                # Check assets (if specified)
-                symbol = (pool.get("symbol") or "").upper()
-                preferred_assets = [a.upper() for a in agent.get("preferred_assets", [])]
-                if preferred_assets and not any(a in symbol for a in preferred_assets):
-                    continue
-                
-                # Check pool type (default: allow ALL pools)
-                pool_type = agent.get("pool_type", "all")
-                is_lp = any(sep in symbol for sep in ["-", "/", " / "])
-                if pool_type == "single" and is_lp:
-                    continue
-                if pool_type == "dual" and not is_lp:
-                    continue
-                # pool_type == "all" allows everything
-                
-                # Check risk score (from Scout)
-                risk_score = pool.get("risk_score", "Medium")
-                risk_level = agent.get("risk_level", "medium")
-                if risk_level == "low" and risk_score == "High":
-                    continue
-                
-                # Check audit status if required
-                if agent.get("only_audited", False):
-                    # Trusted protocols are considered audited
-                    trusted = ['aave', 'compound', 'curve', 'uniswap', 'morpho', 'lido', 'aerodrome', 'velodrome',
-                                'moonwell', 'seamless', 'beefy', 'convex', 'exactly', 'sonne']
-                    if not any(t in project for t in trusted):
-                        continue
-                
-                filtered.append(pool)
-            
-            # Apply avoid_il filter if enabled
-            filtered = self.filter_avoid_il(filtered, agent)
+            # Filter by agent preferences (protocols, assets, TVL/APY bounds,
+            # pool_type, risk, only_audited, avoid_il) as masks over the scan
+            filtered = scan.select(agent)
             
-            print(f"[StrategyExecutor] Filtered to {len(filtered)} pools matching agent config")
+            print(f"[StrategyExecutor] Filtered {len(scan)} -> {len(filtered)} pools matching agent config")
             return filtered
             
         except Exception as e:
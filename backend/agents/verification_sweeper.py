@@ -0,0 +1,351 @@
+"""
+Verification Sweeper - Background on-chain verification of the pools people look at
+
+WHY: /verify-onchain, /verify-rpc, /smart-verify and /verify-any verified
+on demand only, so every user paid the full RPC cost (seconds per pool)
+even for the handful of large pools everybody checks, and two users asking
+for the same pool a minute apart paid it twice.
+
+DESIGN:
+- The sweep set is the top SWEEP_TOP_TVL Base pools by DefiLlama TVL plus
+  the top SWEEP_TOP_INTEREST pools by request interest (every verify
+  request records interest; scores halve every INTEREST_HALF_LIFE)
+- One eth_blockNumber per tick; a sweep runs every SWEEP_BLOCKS blocks and
+  re-verifies the whole set through OnChainVerifier.verify_batch(), so each
+  read round of every pool shares one multicall
+- Protocols come from the request that showed interest, else from the
+  cached protocol classifier (one multicall the first time a pool is seen);
+  addresses it can't label are not re-probed for UNCLASSIFIED_TTL
+- Each result is stored with the block it was read at, the API values it
+  was compared to and the API-vs-chain delta; on-demand verifications are
+  stored the same way, so a repeat request is served from memory
+- Endpoints serve any record younger than MAX_AGE_BLOCKS instantly and only
+  verify the long tail themselves; SmartRouter responses (which also carry
+  security checks) are kept per endpoint with the same block-based expiry
+- A stored result whose on-chain TVL/price or APY moved since the pool's
+  previous record invalidates that input in pool_analysis_store
+"""
+
+import asyncio
+import math
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from web3 import Web3
+
+from agents.pool_analysis_store import pool_analysis_store
+from infrastructure.rpc import get_web3
+from infrastructure.scheduler import scheduler, PRIORITY_LOW
+
+SWEEP_TOP_TVL = int(os.getenv("SWEEP_TOP_TVL", "50"))
+SWEEP_TOP_INTEREST = int(os.getenv("SWEEP_TOP_INTEREST", "50"))
+SWEEP_BLOCKS = int(os.getenv("SWEEP_BLOCKS", "150"))   # ~5 min of Base blocks
+MAX_AGE_BLOCKS = 3 * SWEEP_BLOCKS                       # served while younger than this
+SWEEP_BATCH = 25                  # pools per verify_batch()
+TICK_INTERVAL = 10                # seconds between block checks
+BLOCK_TIME = 2                    # seconds, Base - used before the first block read
+INTEREST_HALF_LIFE = 3600         # seconds
+SWEEP_CHAIN = "base"              # OnChainVerifier reads Base
+UNCLASSIFIED_TTL = 3600           # seconds before an unlabelled address is probed again
+CHANGE_EPSILON = 0.005            # relative on-chain move that marks a pool's analysis stale
+
+# Whole addresses only - not the first 40 hex chars of a 32-byte market id
+_ADDRESS_RE = re.compile(r"\b0x[0-9a-f]{40}\b")
+
+
+def api_data_from_defillama(pool: Dict) -> Dict:
+    """DefiLlama pool -> the api_data OnChainVerifier compares against"""
+    return {
+        "tvl": pool.get("tvlUsd", 0) or pool.get("tvl", 0),
+        "apy": pool.get("apy", 0),
+        "apy_base": pool.get("apyBase", 0),
+        "apy_reward": pool.get("apyReward", 0),
+        "project": pool.get("project", ""),
+        "symbol": pool.get("symbol", ""),
+    }
+
+
+def _moved(old: Dict, new: Dict, name: str) -> bool:
+    before, after = old.get(name) or 0, new.get(name) or 0
+    if not before:
+        return bool(after)
+    return abs(after - before) / abs(before) > CHANGE_EPSILON
+
+
+def moved_inputs(previous: Optional[Dict], result: Dict) -> List[str]:
+    """Analysis dependencies ("price", "apy") whose on-chain value moved between two verifications"""
+    if previous is None:
+        return []
+    old, new = previous.get("onchain") or {}, result.get("onchain") or {}
+    moved = []
+    if _moved(old, new, "tvl") or _moved(old, new, "price"):
+        moved.append("price")
+    if _moved(old, new, "apy"):
+        moved.append("apy")
+    return moved
+
+
+@dataclass
+class VerificationRecord:
+    address: str
+    chain: str
+    protocol: str
+    block: int
+    verified_at: float
+    result: Dict[str, Any]          # OnChainVerifier.verify() output (onchain, api, delta, ...)
+    source: str = "sweep"           # "sweep" or "on_demand"
+
+
+@dataclass
+class _Interest:
+    score: float = 0.0
+    updated_at: float = field(default_factory=time.time)
+    protocol: Optional[str] = None
+
+    def value(self, now: float) -> float:
+        return self.score * math.pow(0.5, (now - self.updated_at) / INTEREST_HALF_LIFE)
+
+
+class VerificationSweeper:
+    """
+    Keeps recent on-chain verifications for hot pools.
+
+    Usage:
+        verification_sweeper.start(pool_source)      # async () -> DefiLlama pools
+        record = verification_sweeper.get(address)   # fresh record or None
+        verification_sweeper.record_interest(address, protocol=...)
+    """
+
+    def __init__(self, w3: Optional[Web3] = None, verifier=None):
+        self.w3 = w3
+        self.verifier = verifier
+        self.pool_source: Optional[Callable[[], Awaitable[List[Dict]]]] = None
+        self.records: Dict[Tuple[str, str], VerificationRecord] = {}
+        self.responses: Dict[Tuple[str, str, str], Tuple[int, Dict]] = {}
+        self.interest: Dict[Tuple[str, str], _Interest] = {}
+        self.unclassified: Dict[str, float] = {}   # address -> last failed classify
+        self.head_block: Optional[int] = None
+        self.head_at = 0.0
+        self.last_sweep_block: Optional[int] = None
+        self._sweeping = False
+        self.stats = {"sweeps": 0, "swept": 0, "failed": 0, "served": 0, "misses": 0}
+
+    # ------------------------------------------------------------------
+    # Setup
+    # ------------------------------------------------------------------
+
+    def start(self, pool_source: Optional[Callable[[], Awaitable[List[Dict]]]] = None):
+        """Register the sweep tick with the shared scheduler (idempotent)"""
+        if pool_source is not None:
+            self.pool_source = pool_source
+        scheduler.register("verification_sweep", self.tick, TICK_INTERVAL, priority=PRIORITY_LOW)
+        scheduler.start()
+
+    def stop(self):
+        scheduler.unregister("verification_sweep")
+        print("[VerificationSweeper] Stopped")
+
+    def _get_web3(self) -> Web3:
+        if not self.w3:
+            self.w3 = get_web3()
+        return self.w3
+
+    def _get_verifier(self):
+        if self.verifier is None:
+            from services.onchain_verifier import get_onchain_verifier
+            self.verifier = get_onchain_verifier()
+        return self.verifier
+
+    # ------------------------------------------------------------------
+    # Served reads (no I/O)
+    # ------------------------------------------------------------------
+
+    def current_block(self) -> Optional[int]:
+        """Last seen head, extrapolated by block time between ticks"""
+        if self.head_block is None:
+            return None
+        return self.head_block + int((time.time() - self.head_at) / BLOCK_TIME)
+
+    def _is_fresh(self, block: int, max_age_blocks: int) -> bool:
+        head = self.current_block()
+        return head is not None and head - block <= max_age_blocks
+
+    def get(self, address: str, chain: str = SWEEP_CHAIN, protocol: Optional[str] = None,
+            max_age_blocks: int = MAX_AGE_BLOCKS) -> Optional[VerificationRecord]:
+        """Fresh verification for a pool, or None (verify on demand)"""
+        record = self.records.get((chain.lower(), address.lower()))
+        if record is None or not self._is_fresh(record.block, max_age_blocks):
+            self.stats["misses"] += 1
+            return None
+        if protocol and protocol != "auto" and protocol.lower() != record.protocol.lower():
+            self.stats["misses"] += 1
+            return None
+        self.stats["served"] += 1
+        return record
+
+    def store(self, address: str, chain: str, protocol: str, result: Dict,
+              block: Optional[int] = None, source: str = "on_demand") -> Optional[VerificationRecord]:
+        """Keep a verification (verified results only - errors are retried)"""
+        if result.get("error") or not result.get("verified"):
+            return None
+        block = block if block is not None else self.current_block()
+        if block is None:
+            return None
+        record = VerificationRecord(
+            address=address.lower(), chain=chain.lower(), protocol=protocol,
+            block=block, verified_at=time.time(), result=result, source=source
+        )
+        previous = self.records.get((record.chain, record.address))
+        self.records[(record.chain, record.address)] = record
+        # A materialized SmartRouter analysis of this pool re-reads what moved on its next tick
+        for dependency in moved_inputs(previous.result if previous else None, result):
+            pool_analysis_store.invalidate(record.address, record.chain, dependency)
+        return record
+
+    def get_response(self, endpoint: str, address: str, chain: str,
+                     max_age_blocks: int = MAX_AGE_BLOCKS) -> Optional[Dict]:
+        """Cached endpoint response (SmartRouter endpoints), or None"""
+        entry = self.responses.get((endpoint, chain.lower(), address.lower()))
+        if entry is None or not self._is_fresh(entry[0], max_age_blocks):
+            return None
+        self.stats["served"] += 1
+        return entry[1]
+
+    def store_response(self, endpoint: str, address: str, chain: str, response: Dict):
+        block = self.current_block()
+        if block is not None and response.get("success"):
+            self.responses[(endpoint, chain.lower(), address.lower())] = (block, response)
+
+    def record_interest(self, address: str, chain: str = SWEEP_CHAIN, protocol: Optional[str] = None):
+        now = time.time()
+        key = (chain.lower(), address.lower())
+        entry = self.interest.get(key) or _Interest(updated_at=now)
+        entry.score = entry.value(now) + 1.0
+        entry.updated_at = now
+        if protocol and protocol != "auto":
+            entry.protocol = protocol
+        self.interest[key] = entry
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "records": len(self.records),
+            "responses": len(self.responses),
+            "tracked_interest": len(self.interest),
+            "unclassified": len(self.unclassified),
+            "head_block": self.head_block,
+            "last_sweep_block": self.last_sweep_block,
+        }
+
+    # ------------------------------------------------------------------
+    # Sweep
+    # ------------------------------------------------------------------
+
+    async def tick(self):
+        w3 = self._get_web3()
+        self.head_block = await asyncio.to_thread(lambda: w3.eth.block_number)
+        self.head_at = time.time()
+        self._prune()
+        if self._sweeping:
+            return
+        if self.last_sweep_block is not None and self.head_block - self.last_sweep_block < SWEEP_BLOCKS:
+            return
+        await self.sweep(self.head_block)
+
+    async def sweep(self, block: int) -> int:
+        """Re-verify the sweep set at `block`; returns pools stored"""
+        self._sweeping = True
+        try:
+            targets = await self._targets()
+            stored = 0
+            verifier = self._get_verifier()
+            for i in range(0, len(targets), SWEEP_BATCH):
+                chunk = targets[i:i + SWEEP_BATCH]
+                results = await verifier.verify_batch(chunk)
+                for target, result in zip(chunk, results):
+                    if isinstance(result, Exception) or not self.store(
+                        target["address"], SWEEP_CHAIN, target["protocol"], result, block=block, source="sweep"
+                    ):
+                        self.stats["failed"] += 1
+                    else:
+                        stored += 1
+            self.last_sweep_block = block
+            self.stats["sweeps"] += 1
+            self.stats["swept"] += stored
+            print(f"[VerificationSweeper] Block {block}: {stored}/{len(targets)} pools verified")
+            return stored
+        finally:
+            self._sweeping = False
+
+    async def _targets(self) -> List[Dict]:
+        """[{address, protocol, api_data}] - top TVL plus top interest"""
+        candidates: Dict[str, Dict] = {}
+
+        pools = []
+        if self.pool_source is not None:
+            try:
+                pools = await self.pool_source()
+            except Exception as e:
+                print(f"[VerificationSweeper] Pool source failed: {e}")
+        base_pools = []
+        for pool in pools:
+            if SWEEP_CHAIN not in (pool.get("chain") or "").lower():
+                continue
+            match = _ADDRESS_RE.search((pool.get("pool") or "").lower())
+            if match:
+                base_pools.append((match.group(0), pool))
+        base_pools.sort(key=lambda item: item[1].get("tvlUsd") or 0, reverse=True)
+        api_by_address = {address: api_data_from_defillama(pool) for address, pool in base_pools}
+        for address, _ in base_pools[:SWEEP_TOP_TVL]:
+            candidates[address] = {"address": address, "protocol": None}
+
+        now = time.time()
+        hot = sorted(
+            ((key, entry) for key, entry in self.interest.items() if key[0] == SWEEP_CHAIN),
+            key=lambda item: item[1].value(now), reverse=True
+        )[:SWEEP_TOP_INTEREST]
+        for (_, address), entry in hot:
+            target = candidates.setdefault(address, {"address": address, "protocol": None})
+            target["protocol"] = entry.protocol or target["protocol"]
+
+        unknown = [
+            t for t in candidates.values()
+            if not t["protocol"] and now - self.unclassified.get(t["address"], 0.0) >= UNCLASSIFIED_TTL
+        ]
+        if unknown:
+            from data_sources.protocol_classifier import protocol_classifier
+            records = await asyncio.gather(
+                *(protocol_classifier.classify(t["address"], SWEEP_CHAIN) for t in unknown),
+                return_exceptions=True
+            )
+            for target, record in zip(unknown, records):
+                if not isinstance(record, Exception) and record is not None:
+                    target["protocol"] = record.protocol
+                if target["protocol"]:
+                    self.unclassified.pop(target["address"], None)
+                else:
+                    self.unclassified[target["address"]] = now
+
+        targets = []
+        for target in candidates.values():
+            if target["protocol"]:
+                target["api_data"] = api_by_address.get(target["address"])
+                targets.append(target)
+        return targets
+
+    def _prune(self):
+        """Drop stale records/responses and interest that has decayed away"""
+        head = self.current_block()
+        if head is not None:
+            self.records = {k: r for k, r in self.records.items() if head - r.block <= MAX_AGE_BLOCKS}
+            self.responses = {k: v for k, v in self.responses.items() if head - v[0] <= MAX_AGE_BLOCKS}
+        now = time.time()
+        self.interest = {k: e for k, e in self.interest.items() if e.value(now) >= 0.01}
+        self.unclassified = {a: t for a, t in self.unclassified.items() if now - t < UNCLASSIFIED_TTL}
+
+
+# Global instance
+verification_sweeper = VerificationSweeper()
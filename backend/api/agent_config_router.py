@@ -5,7 +5,7 @@ Handles agent deployment and configuration from Build UI
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Iterable, List, Optional, Tuple
 from datetime import datetime
 import json
 import os
@@ -22,31 +22,50 @@ from services.whitelist_service import get_whitelist_service
 # Supabase for persistent storage
 from infrastructure.supabase_client import supabase
 
+# Indexed lookups over DEPLOYED_AGENTS (invalidated on save)
+from agents.agent_registry import agent_registry
+
+# Journaled file persistence for DEPLOYED_AGENTS
+from infrastructure.agent_store import create_store
+
 router = APIRouter(prefix="/api/agent", tags=["agent"])
 
 # Fallback storage file (when Supabase unavailable)
 AGENTS_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "deployed_agents.json")
 MAX_AGENTS_PER_WALLET = 5
 
+# Dirty-tracked journal + atomic snapshot compaction for AGENTS_FILE
+agent_store = create_store(AGENTS_FILE)
+
 # In-memory cache (synced with Supabase)
 DEPLOYED_AGENTS = {}
 
 def _load_agents() -> dict:
-    """Load agents from file (fallback)"""
+    """Load agents from file (fallback): snapshot + journal replay"""
     try:
-        if os.path.exists(AGENTS_FILE):
-            with open(AGENTS_FILE, "r") as f:
-                return json.load(f)
+        return agent_store.load()
     except Exception as e:
         print(f"[AgentConfig] Failed to load agents from file: {e}")
     return {}
 
-def _save_agents(agents: dict):
-    """Save agents to file (fallback)"""
+def _save_agents(agents: dict = None, dirty: Iterable[Tuple[str, Optional[str]]] = ()):
+    """
+    Save changed agents to file (fallback) - journaled, written off the event loop
+
+    dirty: (user_address, agent_id) pairs that were mutated; agent_id None
+    marks the user's whole list (agents added, removed or replaced)
+    """
+    # Every router mutation ends with a save - rebuild the lookup indexes lazily,
+    # re-fingerprinting only the agents this save touched
+    dirty = list(dirty)
+    if not dirty:
+        agent_registry.invalidate()
+    for user_address, agent_id in dirty:
+        agent_registry.invalidate(agent_id=agent_id, user_address=None if agent_id else user_address)
     try:
-        os.makedirs(os.path.dirname(AGENTS_FILE), exist_ok=True)
-        with open(AGENTS_FILE, "w") as f:
-            json.dump(agents, f, indent=2)
+        for user_address, agent_id in dirty:
+            agent_store.mark_dirty(user_address, agent_id)
+        agent_store.save(DEPLOYED_AGENTS if agents is None else agents)
     except Exception as e:
         print(f"[AgentConfig] Failed to save agents to file: {e}")
 
@@ -196,7 +215,7 @@ async def deploy_agent(request: AgentDeployRequest):
             agent_data = _build_agent_data(request, user_address, agent_id, agent_address, signature_verified, user_agents)
             user_agents.append(agent_data)
             DEPLOYED_AGENTS[user_address] = user_agents
-            _save_agents(DEPLOYED_AGENTS)
+            _save_agents(DEPLOYED_AGENTS, dirty=[(user_address, None)])
             
             return {
                 "success": True,
@@ -225,7 +244,7 @@ async def deploy_agent(request: AgentDeployRequest):
             agent_data = _build_agent_data(request, user_address, agent_id, predicted_address, signature_verified, user_agents)
             user_agents.append(agent_data)
             DEPLOYED_AGENTS[user_address] = user_agents
-            _save_agents(DEPLOYED_AGENTS)
+            _save_agents(DEPLOYED_AGENTS, dirty=[(user_address, None)])
             
             return {
                 "success": True,
@@ -418,7 +437,7 @@ async def confirm_deploy(request: ConfirmDeployRequest):
     # Save to persistent storage
     user_agents.append(agent_data)
     DEPLOYED_AGENTS[user_address] = user_agents
-    _save_agents(DEPLOYED_AGENTS)
+    _save_agents(DEPLOYED_AGENTS, dirty=[(user_address, None)])
     
     # Clean up pending deploy
     del PENDING_DEPLOYS[pending_key]
@@ -561,8 +580,8 @@ async def setup_auto_trading(request: SetupAutoTradingRequest):
                 if ag_addr == agent_address.lower():
                     ag["session_key_address"] = session_key_address
                     print(f"[AgentConfig] Session key saved to DEPLOYED_AGENTS: {session_key_address[:10]}...")
+                    _save_agents(DEPLOYED_AGENTS, dirty=[(user_address, ag.get("id"))])
                     break
-            _save_agents(DEPLOYED_AGENTS)
         except Exception as e:
             print(f"[AgentConfig] Session key cache save error: {e}")
         
@@ -661,7 +680,7 @@ async def stop_agent(user_address: str, agent_id: str):
     # Update in cache
     agent["is_active"] = False
     agent["paused_at"] = datetime.utcnow().isoformat()
-    _save_agents(DEPLOYED_AGENTS)
+    _save_agents(DEPLOYED_AGENTS, dirty=[(user_address.lower(), agent_id)])
     
     # Update in Supabase
     agent_address = agent.get("agent_address") or agent.get("address")
@@ -697,7 +716,7 @@ async def resume_agent(user_address: str, agent_id: str):
     agent["resumed_at"] = datetime.utcnow().isoformat()
     if "paused_at" in agent:
         del agent["paused_at"]
-    _save_agents(DEPLOYED_AGENTS)
+    _save_agents(DEPLOYED_AGENTS, dirty=[(user_address.lower(), agent_id)])
     
     # Update in Supabase
     agent_address = agent.get("agent_address") or agent.get("address")
@@ -781,7 +800,7 @@ async def delete_agent(user_address: str, agent_id: str):
     if agent and agent in user_agents:
         user_agents.remove(agent)
         DEPLOYED_AGENTS[user_addr] = user_agents
-        _save_agents(DEPLOYED_AGENTS)
+        _save_agents(DEPLOYED_AGENTS, dirty=[(user_addr, None)])
         print(f"[AgentConfig] Agent {agent_id} removed from cache")
     
     print(f"[AgentConfig] Agent {agent_id} deleted for {user_address}")
@@ -854,7 +873,7 @@ async def sync_agent(request: AgentSyncRequest):
         user_agents.append(agent_data)
         print(f"[AgentConfig] Synced (added) agent {agent_data.get('id')} to cache")
     
-    _save_agents(DEPLOYED_AGENTS)
+    _save_agents(DEPLOYED_AGENTS, dirty=[(user_addr, None)])
     
     return {
         "success": True,
@@ -1165,7 +1165,8 @@ async def close_position(request: ClosePositionRequest):
             from api.agent_config_router import DEPLOYED_AGENTS, _save_agents
             from datetime import datetime
             
-            user_agents = DEPLOYED_AGENTS.get(request.user_address.lower(), [])
+            user_key = request.user_address.lower()
+            user_agents = DEPLOYED_AGENTS.get(user_key, [])
             for agent in user_agents:
                 positions = agent.get("positions", [])
                 if request.percentage >= 100:
@@ -1181,7 +1182,7 @@ async def close_position(request: ClosePositionRequest):
                 agent["last_position_close"] = datetime.utcnow().isoformat()
                 print(f"[ClosePosition] Cooldown set - agent cannot allocate for 5 minutes")
             
-            _save_agents()
+            _save_agents(dirty=[(user_key, None)])
             print(f"[ClosePosition] In-memory agents updated")
         except Exception as e:
             print(f"[ClosePosition] In-memory update failed: {e}")
@@ -132,6 +132,36 @@ async def get_error_stats():
         return {"error": str(e)}
 
 
+@router.get("/scheduler/stats")
+async def get_scheduler_stats():
+    """Get background scheduler statistics (runs, errors, overruns per task)"""
+    try:
+        from infrastructure.scheduler import scheduler
+        return scheduler.get_stats()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@router.get("/leases/stats")
+async def get_lease_stats():
+    """Get this replica's agent shard leases"""
+    try:
+        from infrastructure.work_leases import work_partitioner
+        return work_partitioner.get_stats()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@router.get("/prices/stats")
+async def get_price_snapshot_stats():
+    """Get the shared price snapshot (feeds, sources, version)"""
+    try:
+        from data_sources.price_snapshot import price_snapshots
+        return price_snapshots.get_stats()
+    except Exception as e:
+        return {"error": str(e)}
+
+
 # ============================================
 # CONFIGURATION
 # ============================================
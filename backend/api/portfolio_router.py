@@ -54,7 +54,7 @@ WSOL_ADDRESS = Web3.to_checksum_address("0x1c61629598e4a901136a81bc138e5828dc150
 # ERC20 ABI (just balanceOf)
 ERC20_ABI = [{"constant": True, "inputs": [{"name": "account", "type": "address"}], "name": "balanceOf", "outputs": [{"name": "", "type": "uint256"}], "type": "function"}]
 
-# Approximate prices (could be fetched from oracle later)
+# Last-resort prices when the shared price snapshot has no value yet
 TOKEN_PRICES = {
     "USDC": 1.0,
     "USDT": 1.0,
@@ -71,6 +71,19 @@ TOKEN_PRICES = {
     "HIGHER": 0.05,
 }
 
+
+def _token_price(symbol: str) -> float:
+    """Live price from the shared snapshot (O(1)), TOKEN_PRICES if unknown"""
+    try:
+        from data_sources.price_snapshot import price_snapshots
+        price = price_snapshots.get_price(symbol)
+        if price:
+            return price
+    except ImportError:
+        pass
+    return TOKEN_PRICES.get(symbol, 0)
+
+
 # All tokens to check (address, symbol, decimals)
 ALL_TOKENS = [
     ("0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913", "USDC", 6),
@@ -141,8 +154,16 @@ def get_eth_balance_sync(wallet_address: str) -> float:
         return 0.0
 
 
-async def fetch_all_balances(agent_address: str) -> List[Holding]:
-    """Fetch all token balances in parallel using thread pool"""
+async def _read_balances(agent_address: str, max_age: Optional[float] = None) -> list:
+    """ALL_TOKENS balances + ETH (last), from the shared Multicall snapshot if possible"""
+    try:
+        from data_sources.balance_snapshot import balance_snapshots
+        raw = await balance_snapshots.get_balances(agent_address, max_age=max_age)
+        if raw is not None:
+            return [raw.get(symbol, 0) / (10 ** decimals) for _, symbol, decimals in ALL_TOKENS] + [raw.get("ETH", 0) / 1e18]
+    except Exception as e:
+        print(f"[Portfolio] Balance snapshot error, reading per token: {e}")
+    
     loop = asyncio.get_event_loop()
     
     # Build tasks dynamically from ALL_TOKENS list + ETH
@@ -153,7 +174,12 @@ async def fetch_all_balances(agent_address: str) -> List[Holding]:
     tasks.append(loop.run_in_executor(None, get_eth_balance_sync, agent_address))
     
     # Execute all in parallel
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def fetch_all_balances(agent_address: str, max_age: Optional[float] = None) -> List[Holding]:
+    """Fetch all token balances (shared snapshot, thread-pool fallback)"""
+    results = await _read_balances(agent_address, max_age=max_age)
     
     holdings = []
     
@@ -161,7 +187,7 @@ async def fetch_all_balances(agent_address: str) -> List[Holding]:
     for i, (token_addr, symbol, decimals) in enumerate(ALL_TOKENS):
         balance = results[i] if not isinstance(results[i], Exception) else 0
         if balance > 0:
-            price = TOKEN_PRICES.get(symbol, 0)  # Default to 0 if no price (skip unknown)
+            price = _token_price(symbol)  # 0 if no price (skip unknown)
             if price > 0:
                 value = balance * price
                 if value >= MIN_VALUE_USD:  # Only show if worth >= $0.10
@@ -175,7 +201,7 @@ async def fetch_all_balances(agent_address: str) -> List[Holding]:
     # Process native ETH
     eth_balance = results[-1] if not isinstance(results[-1], Exception) else 0
     if eth_balance > 0:
-        eth_value = eth_balance * TOKEN_PRICES.get("ETH", 3300)
+        eth_value = eth_balance * _token_price("ETH")
         if eth_value >= MIN_VALUE_USD:
             holdings.append(Holding(
                 asset="ETH",
@@ -196,14 +222,14 @@ async def fetch_lp_positions(user_address: str, agent_address: str) -> List[Posi
         # Known Aerodrome LP tokens on Base with pool addresses for APY lookup
         LP_TOKENS = [
             {"name": "cbBTC/USDC", "address": "0x9c38b55f9a9aba91bbcedeb12bf4428f47a6a0b8", "protocol": "Aerodrome", 
-             "token0": "cbBTC", "token0_decimals": 8, "token0_price": 100000,
-             "token1": "USDC", "token1_decimals": 6, "token1_price": 1.0},
+             "token0": "cbBTC", "token0_decimals": 8,
+             "token1": "USDC", "token1_decimals": 6},
             {"name": "WETH/USDC", "address": "0xb4cb800910B228ED3d0834cF79D697127BBB00e5", "protocol": "Aerodrome",
-             "token0": "WETH", "token0_decimals": 18, "token0_price": 3300,
-             "token1": "USDC", "token1_decimals": 6, "token1_price": 1.0},
+             "token0": "WETH", "token0_decimals": 18,
+             "token1": "USDC", "token1_decimals": 6},
             {"name": "AERO/USDC", "address": "0x6cDcb1C4A4D1C3C6d054b27AC5B77e89eAFb971d", "protocol": "Aerodrome",
-             "token0": "AERO", "token0_decimals": 18, "token0_price": 1.5,
-             "token1": "USDC", "token1_decimals": 6, "token1_price": 1.0},
+             "token0": "AERO", "token0_decimals": 18,
+             "token1": "USDC", "token1_decimals": 6},
         ]
         
         # Get real APY from The Graph or DeFiLlama
@@ -6,10 +6,12 @@ Provides risk assessment, yield prediction, and conversational AI
 from fastapi import APIRouter, Query, HTTPException
 from typing import Optional, List
 import logging
+import re
 import time
 import asyncio
 
 from agents.risk_intelligence import risk_engine, get_pool_risk, get_bulk_risk
+from agents.verification_sweeper import verification_sweeper, api_data_from_defillama
 from artisan.data_sources import get_aggregated_pools
 from data_sources.onchain import onchain_client
 
@@ -929,8 +931,11 @@ async def verify_pool_onchain(
     
     Supports 10 protocols: Aave V3, Morpho Blue, Compound V3, Moonwell,
     Seamless, Aerodrome, Uniswap V3, Curve, Pendle, ERC-4626.
+    
+    Pools swept in the background (top TVL / most requested) or verified
+    within the last few minutes are served from the verification sweeper.
     """
-    from services.onchain_verifier import OnChainVerifier
+    from services.onchain_verifier import get_onchain_verifier
     
     start_time = time.time()
     pool_address_clean = pool_address.lower() if chain != "solana" else pool_address
@@ -938,34 +943,37 @@ async def verify_pool_onchain(
     logger.info(f"🔗 verify-onchain for {pool_address_clean} protocol={protocol} chain={chain}")
     
     try:
-        verifier = OnChainVerifier()
-        
-        # Auto-detect protocol from known pool addresses if "auto"
-        if protocol == "auto":
-            protocol = await _detect_protocol(pool_address_clean, chain)
-            logger.info(f"Auto-detected protocol: {protocol}")
-        
-        # Fetch DefiLlama data for comparison
-        api_data = None
-        try:
-            pools = await get_cached_defillama_pools()
-            chain_pools = [p for p in pools if chain.lower() in p.get("chain", "").lower()]
-            for p in chain_pools:
-                if pool_address_clean in p.get("pool", "").lower():
-                    api_data = {
-                        "tvl": p.get("tvlUsd", 0) or p.get("tvl", 0),
-                        "apy": p.get("apy", 0),
-                        "apy_base": p.get("apyBase", 0),
-                        "apy_reward": p.get("apyReward", 0),
-                        "project": p.get("project", ""),
-                        "symbol": p.get("symbol", ""),
-                    }
-                    break
-        except Exception as e:
-            logger.debug(f"DefiLlama comparison data fetch failed: {e}")
+        record = verification_sweeper.get(pool_address_clean, chain, protocol)
+        served = record is not None
+        if served:
+            protocol = record.protocol
+            result = record.result
+        else:
+            # Shared instance: concurrent requests share multicall batches
+            verifier = get_onchain_verifier()
+            
+            # Auto-detect protocol from known pool addresses if "auto"
+            if protocol == "auto":
+                protocol = await _detect_protocol(pool_address_clean, chain)
+                logger.info(f"Auto-detected protocol: {protocol}")
+            
+            # Fetch DefiLlama data for comparison
+            api_data = None
+            try:
+                pools = await get_cached_defillama_pools()
+                chain_pools = [p for p in pools if chain.lower() in p.get("chain", "").lower()]
+                for p in chain_pools:
+                    if pool_address_clean in p.get("pool", "").lower():
+                        api_data = api_data_from_defillama(p)
+                        break
+            except Exception as e:
+                logger.debug(f"DefiLlama comparison data fetch failed: {e}")
+            
+            # Run on-chain verification
+            result = await verifier.verify(pool_address_clean, protocol, api_data)
+            record = verification_sweeper.store(pool_address_clean, chain, protocol, result)
         
-        # Run on-chain verification
-        result = await verifier.verify(pool_address_clean, protocol, api_data)
+        verification_sweeper.record_interest(pool_address_clean, chain, protocol)
         
         # Get Moralis holder data for LP token
         holder_data = None
@@ -989,6 +997,8 @@ async def verify_pool_onchain(
             "rpc_time_ms": result.get("rpc_time_ms", 0),
             "total_time_ms": round(elapsed * 1000),
             "timestamp": result.get("timestamp"),
+            "block": record.block if record else None,
+            "served_from": record.source if served else "live",
             "error": result.get("error"),
         }
         
@@ -1004,78 +1014,38 @@ async def verify_pool_onchain(
 
 
 async def _detect_protocol(pool_address: str, chain: str) -> str:
-    """Auto-detect protocol from pool address by probing contract interfaces."""
-    from web3 import Web3
-    import os
-    
-    rpc_url = os.environ.get("ALCHEMY_RPC_URL", "https://base-mainnet.g.alchemy.com/v2/demo")
-    w3 = Web3(Web3.HTTPProvider(rpc_url))
-    addr = Web3.to_checksum_address(pool_address)
-    
-    # Try ERC-4626 (totalAssets)
-    try:
-        abi = [{"inputs": [], "name": "totalAssets", "outputs": [{"type": "uint256"}], "stateMutability": "view", "type": "function"}]
-        c = w3.eth.contract(address=addr, abi=abi)
-        c.functions.totalAssets().call()
-        return "erc4626"
-    except:
-        pass
+    """Auto-detect protocol from pool address by probing contract interfaces.
+
+    All probes go out as one multicall and the answer is cached (memory + disk)
+    by the protocol classifier - a contract's interface never changes.
+    """
+    from data_sources.protocol_classifier import protocol_classifier
     
-    # Try Aerodrome/Uniswap V2 (getReserves)
-    try:
-        abi = [{"inputs": [], "name": "getReserves", "outputs": [{"name": "r0", "type": "uint256"}, {"name": "r1", "type": "uint256"}, {"name": "ts", "type": "uint256"}], "stateMutability": "view", "type": "function"}]
-        c = w3.eth.contract(address=addr, abi=abi)
-        c.functions.getReserves().call()
-        # Check if Aerodrome (has stable() function)
-        try:
-            abi2 = [{"inputs": [], "name": "stable", "outputs": [{"type": "bool"}], "stateMutability": "view", "type": "function"}]
-            c2 = w3.eth.contract(address=addr, abi=abi2)
-            c2.functions.stable().call()
-            return "aerodrome"
-        except:
-            pass
-        return "aerodrome"  # V2-style pool
-    except:
-        pass
-    
-    # Try Uniswap V3 (slot0)
-    try:
-        abi = [{"inputs": [], "name": "slot0", "outputs": [{"name": "sqrtPriceX96", "type": "uint160"}, {"name": "tick", "type": "int24"}, {"name": "observationIndex", "type": "uint16"}, {"name": "observationCardinality", "type": "uint16"}, {"name": "observationCardinalityNext", "type": "uint16"}, {"name": "feeProtocol", "type": "uint8"}, {"name": "unlocked", "type": "bool"}], "stateMutability": "view", "type": "function"}]
-        c = w3.eth.contract(address=addr, abi=abi)
-        c.functions.slot0().call()
-        return "uniswap-v3"
-    except:
-        pass
-    
-    # Try Compound V3 (getUtilization)
-    try:
-        abi = [{"inputs": [], "name": "getUtilization", "outputs": [{"type": "uint256"}], "stateMutability": "view", "type": "function"}]
-        c = w3.eth.contract(address=addr, abi=abi)
-        c.functions.getUtilization().call()
-        return "compound-v3"
-    except:
-        pass
-    
-    # Try Moonwell mToken (exchangeRateStored)
-    try:
-        abi = [{"inputs": [], "name": "exchangeRateStored", "outputs": [{"type": "uint256"}], "stateMutability": "view", "type": "function"}]
-        c = w3.eth.contract(address=addr, abi=abi)
-        c.functions.exchangeRateStored().call()
-        return "moonwell"
-    except:
-        pass
-    
-    # Try Curve (get_virtual_price)
-    try:
-        abi = [{"inputs": [], "name": "get_virtual_price", "outputs": [{"type": "uint256"}], "stateMutability": "view", "type": "function"}]
-        c = w3.eth.contract(address=addr, abi=abi)
-        c.functions.get_virtual_price().call()
-        return "curve"
-    except:
-        pass
+    record = await protocol_classifier.classify(pool_address, chain)
     
     # Fallback
-    return "erc4626"
+    if record is None or record.protocol is None:
+        return "erc4626"
+    return record.protocol
+
+
+def _served_response(endpoint: str, key: str, chain: str) -> Optional[dict]:
+    """Recent response for the same pool from the verification sweeper (block-bounded)"""
+    cached = verification_sweeper.get_response(endpoint, key, chain)
+    if cached is None:
+        return None
+    logger.info(f"⚡ {endpoint}: served {key[:12]}... from sweeper cache")
+    return {**cached, "served_from": "cache"}
+
+
+def _remember_response(endpoint: str, key: str, chain: str, response: dict):
+    """Keep the response for repeat requests and count the pool towards the sweep set"""
+    if re.fullmatch(r"0x[0-9a-fA-F]{40}", key):
+        verification_sweeper.record_interest(key, chain)
+    # Sections that missed the SmartRouter budget must not be served as final
+    if (response.get("pool") or {}).get("pending_sections"):
+        return
+    verification_sweeper.store_response(endpoint, key, chain, response)
 
 
 # ============================================
@@ -1106,6 +1076,10 @@ async def verify_pool_rpc_first(
     
     logger.info(f"🔗 verify-rpc via SmartRouter for {pool_address} on {chain}")
     
+    cached = _served_response("verify-rpc", pool_address, chain)
+    if cached:
+        return cached
+    
     try:
         router = SmartRouter()
         result = await router.smart_route_pool_check(pool_address, chain)
@@ -1117,7 +1091,7 @@ async def verify_pool_rpc_first(
         if result.get("success"):
             pool_data = result.get("pool", {})
             pool_data["timings"] = {"total": elapsed}
-            return {
+            response = {
                 "success": True,
                 "pool": pool_data,
                 "data_quality": result.get("data_quality"),
@@ -1125,6 +1099,8 @@ async def verify_pool_rpc_first(
                 "chain": chain,
                 "timings": {"total": elapsed}
             }
+            _remember_response("verify-rpc", pool_address, chain, response)
+            return response
         else:
             return {
                 "success": False,
@@ -1552,30 +1528,8 @@ async def verify_pool_rpc_first(
 # SMART VERIFY (Intelligent Factory-Based Routing)
 # ============================================
 
-@router.get("/smart-verify")
-async def smart_verify_pool(
-    input: str = Query(..., description="Pool address or URL"),
-    chain: str = Query("base", description="Chain hint (auto-detected from URL if possible)")
-):
-    """
-    🧠 Smart Pool Verification with Factory-Based Protocol Detection.
-    
-    The "Brain" of the system that:
-    1. Parses input (address or URL)
-    2. Detects protocol via pool.factory() call
-    3. Routes to optimal adapter:
-       - Tier 1 (Premium): Aerodrome - Full APY, Gauge, Epoch
-       - Tier 2 (High): Uniswap V3 - Fee APY
-       - Tier 3 (Basic): Universal - TVL only
-    4. Patches with DefiLlama APY if needed
-    
-    Returns data quality tier indicator.
-    """
-    from api.smart_router import smart_router
-    
-    result = await smart_router.smart_route_pool_check(input, chain)
-    
-    # Add risk analysis if we have pool data
+def _add_smart_verify_risk(result: dict):
+    """Add risk analysis if we have pool data"""
     if result.get("success") and result.get("pool"):
         pool = result["pool"]
         
@@ -1615,10 +1569,85 @@ async def smart_verify_pool(
             "risk_level": risk_level,
             "risk_reasons": risk_reasons
         }
+
+
+@router.get("/smart-verify")
+async def smart_verify_pool(
+    input: str = Query(..., description="Pool address or URL"),
+    chain: str = Query("base", description="Chain hint (auto-detected from URL if possible)")
+):
+    """
+    🧠 Smart Pool Verification with Factory-Based Protocol Detection.
     
+    The "Brain" of the system that:
+    1. Parses input (address or URL)
+    2. Detects protocol via pool.factory() call
+    3. Routes to optimal adapter:
+       - Tier 1 (Premium): Aerodrome - Full APY, Gauge, Epoch
+       - Tier 2 (High): Uniswap V3 - Fee APY
+       - Tier 3 (Basic): Universal - TVL only
+    4. Patches with DefiLlama APY if needed
+    
+    Returns data quality tier indicator.
+    """
+    from api.smart_router import smart_router
+    
+    cached = _served_response("smart-verify", input, chain)
+    if cached:
+        return cached
+    
+    result = await smart_router.smart_route_pool_check(input, chain)
+    _add_smart_verify_risk(result)
+    
+    _remember_response("smart-verify", input, chain, result)
     return result
 
 
+@router.get("/smart-verify/stream")
+async def smart_verify_pool_stream(
+    input: str = Query(..., description="Pool address or URL"),
+    chain: str = Query("base", description="Chain hint (auto-detected from URL if possible)"),
+    format: str = Query("ndjson", description="ndjson or sse")
+):
+    """
+    🧠 Smart Pool Verification, streamed.
+    
+    Same result as /smart-verify, but Aerodrome pools first emit the base pool
+    data, then each enrichment section (OHLCV, APY, security, DexScreener, peg,
+    LP lock, whale) as soon as its source answers, then the full result.
+    Events: {"event": "pool" | "section" | "result", ...}; NDJSON by default,
+    format=sse for EventSource clients.
+    """
+    import json
+    from fastapi.responses import StreamingResponse
+    from api.smart_router import smart_router
+    
+    sse = format.lower() == "sse"
+    
+    def encode(event: dict) -> str:
+        data = json.dumps(event, default=str)
+        return f"event: {event['event']}\ndata: {data}\n\n" if sse else data + "\n"
+    
+    async def events():
+        cached = _served_response("smart-verify", input, chain)
+        if cached:
+            yield encode({"event": "result", **cached})
+            return
+        async for event in smart_router.stream_pool_check(input, chain):
+            if event["event"] == "result":
+                result = {k: v for k, v in event.items() if k != "event"}
+                _add_smart_verify_risk(result)
+                _remember_response("smart-verify", input, chain, result)
+                event = {"event": "result", **result}
+            yield encode(event)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/verify-any")
 async def verify_any_pool(
     pool_address: str = Query(..., description="Pool contract address"),
@@ -1629,13 +1658,25 @@ async def verify_any_pool(
     NOW USES SmartRouter with factory-based protocol detection.
     Fallback: GeckoTerminal -> DefiLlama -> On-chain RPC.
     Always returns risk analysis.
+    Recently verified pools are served from the verification sweeper.
     """
-    from api.smart_router import smart_router
-    
     chain = chain.lower()
     # Solana addresses are case-sensitive (base58), EVM addresses are not
     pool_address = pool_address if chain == "solana" else pool_address.lower()
     
+    cached = _served_response("verify-any", pool_address, chain)
+    if cached:
+        return cached
+    
+    response = await _verify_any_pool(pool_address, chain)
+    _remember_response("verify-any", pool_address, chain, response)
+    return response
+
+
+async def _verify_any_pool(pool_address: str, chain: str) -> dict:
+    """verify-any on demand (SmartRouter, then GeckoTerminal/DefiLlama/RPC fallbacks)"""
+    from api.smart_router import smart_router
+    
     logger.info(f"🧠 SmartRouter verify for {pool_address} on {chain}")
     
     # PRIMARY: Use SmartRouter (factory-based detection)
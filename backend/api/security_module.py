@@ -38,13 +38,6 @@ STABLECOINS = {
     }
 }
 
-# ERC20 ABI for symbol fetching
-ERC20_SYMBOL_ABI = [
-    {"constant": True, "inputs": [], "name": "symbol", "outputs": [{"type": "string"}], "type": "function"},
-    {"constant": True, "inputs": [], "name": "name", "outputs": [{"type": "string"}], "type": "function"},
-    {"constant": True, "inputs": [], "name": "decimals", "outputs": [{"type": "uint8"}], "type": "function"},
-]
-
 # RPC endpoints
 RPC_ENDPOINTS = {
     "base": "https://mainnet.base.org",
@@ -319,17 +312,31 @@ class SecurityChecker:
         
         return raw_symbol, False
     
+    @staticmethod
+    def _is_garbage_symbol(raw_symbol: str) -> bool:
+        """Symbols clean_symbol() replaces with the on-chain one"""
+        return (
+            not raw_symbol
+            or (raw_symbol.startswith("0x") and len(raw_symbol) > 10)
+            or raw_symbol in ["???", "UNKNOWN", ""]
+            or len(raw_symbol) > 20
+        )
+    
     async def _fetch_symbol_onchain(self, token_address: str, chain: str) -> str:
-        """Fetch token symbol directly from blockchain"""
+        """Fetch token symbol via the token registry (chain read only on first sight)"""
+        from data_sources.token_registry import token_registry
+        
+        meta = token_registry.cached_token(token_address, chain)
+        if meta and meta.symbol:
+            return meta.symbol
+        
         w3 = self._get_web3(chain)
         if not w3:
             return "???"
         
         try:
-            address = Web3.to_checksum_address(token_address)
-            contract = w3.eth.contract(address=address, abi=ERC20_SYMBOL_ABI)
-            symbol = contract.functions.symbol().call()
-            return symbol if symbol else "???"
+            meta = await token_registry.get_token(token_address, chain, w3=w3)
+            return meta.symbol if meta and meta.symbol else "???"
         except Exception as e:
             logger.debug(f"Symbol fetch failed for {token_address[:10]}: {e}")
             return "???"
@@ -346,6 +353,19 @@ class SecurityChecker:
         cleaned = pool_data.copy()
         warnings = []
         
+        # Resolve every token that needs an on-chain symbol in one registry lookup
+        tokens = [
+            pool_data[token] for token, symbol in (("token0", "symbol0"), ("token1", "symbol1"))
+            if pool_data.get(token) and self._is_garbage_symbol(pool_data.get(symbol, ""))
+        ]
+        w3 = self._get_web3(chain) if tokens else None
+        if w3:
+            from data_sources.token_registry import token_registry
+            try:
+                await token_registry.get_tokens(tokens, chain, w3=w3)
+            except Exception as e:
+                logger.debug(f"Token registry prefetch failed: {e}")
+        
         # Clean token0 symbol
         if pool_data.get("token0"):
             symbol0 = pool_data.get("symbol0", "")
@@ -9,9 +9,10 @@ Tiered Adapter System:
 """
 import asyncio
 import logging
+import os
 import re
 import time
-from typing import Optional, Dict, Any, Tuple, List
+from typing import Optional, Dict, Any, Tuple, List, AsyncIterator, Awaitable, Callable
 from web3 import Web3
 from enum import Enum
 
@@ -24,6 +25,7 @@ logger = logging.getLogger("SmartRouter")
 from data_sources.geckoterminal import gecko_client
 from data_sources.aerodrome import aerodrome_client
 from data_sources.dexscreener import dexscreener_client
+from agents.pool_analysis_store import pool_analysis_store
 
 # =============================================================================
 # APY CACHE - 2 minute TTL to avoid repeated slow RPC calls
@@ -89,6 +91,70 @@ def _set_cached_dexscreener(pool_address: str, data: Dict[str, Any]) -> None:
     key = pool_address.lower()
     _dexscreener_cache[key] = (data, time.time())
 
+# =============================================================================
+# ENRICHMENT LATENCY BUDGET
+# The Aerodrome fan-out (OHLCV, APY, GoPlus, DexScreener, peg, LP lock, whale)
+# waits at most this long; sections that miss it are filled from the pool's
+# last good result, else marked pending, instead of waiting on the slowest API
+# =============================================================================
+ENRICHMENT_BUDGET = float(os.getenv("SMART_ROUTER_BUDGET", "4"))            # seconds, plain response
+STREAM_BUDGET = float(os.getenv("SMART_ROUTER_STREAM_BUDGET", "15"))        # seconds, streamed response
+
+# Last good value per (pool, section) - 1 hour TTL, a stale section beats none.
+# Insertion-ordered (oldest write first) and capped at SECTION_CACHE_MAX entries
+_section_cache: Dict[Tuple[str, str], Tuple[Any, float]] = {}
+SECTION_CACHE_TTL = 3600
+SECTION_CACHE_MAX = 5000
+
+# Fetchers that missed the budget and are still running (refs keep them alive)
+_late_tasks: set = set()
+
+def _section_placeholder(name: str, state: str, reason: str = "") -> Any:
+    """Section value when its fetcher raised ("error") or missed the budget ("pending")"""
+    if name in ("ohlcv", "dexscreener"):
+        return None
+    if name == "apy":
+        return {"apy_status": state, "reason": reason} if reason else {"apy_status": state}
+    if name == "security":
+        return {"status": state, "tokens": {}}
+    if name == "peg":
+        return {}
+    if name == "lp_lock":
+        return {"has_lock": False, "source": state}
+    return {"source": state}
+
+def _get_cached_section(pool_address: str, name: str) -> Optional[Any]:
+    """Last good value of an enrichment section if still valid"""
+    key = (pool_address.lower(), name)
+    if key in _section_cache:
+        data, timestamp = _section_cache[key]
+        if time.time() - timestamp < SECTION_CACHE_TTL:
+            return data
+        del _section_cache[key]
+    return None
+
+def _set_cached_section(pool_address: str, name: str, data: Any) -> None:
+    """Remember a section result (empty and error results are not worth serving later)"""
+    if not data:
+        return
+    if isinstance(data, dict) and "error" in (data.get("status"), data.get("apy_status"), data.get("source")):
+        return
+    key = (pool_address.lower(), name)
+    now = time.time()
+    _section_cache.pop(key, None)
+    _section_cache[key] = (data, now)
+    if len(_section_cache) > SECTION_CACHE_MAX:
+        for old in [k for k, (_, ts) in _section_cache.items() if now - ts >= SECTION_CACHE_TTL]:
+            del _section_cache[old]
+        while len(_section_cache) > SECTION_CACHE_MAX:
+            del _section_cache[next(iter(_section_cache))]
+
+def _store_late_section(pool_address: str, name: str, task: asyncio.Task) -> None:
+    """Done-callback for a fetcher that missed the budget"""
+    _late_tasks.discard(task)
+    if not task.cancelled() and task.exception() is None:
+        _set_cached_section(pool_address, name, task.result())
+
 # Import security checker (GoPlus RugCheck)
 try:
     from api.security_module import security_checker
@@ -424,19 +490,23 @@ class SmartRouter:
         """
         Detect protocol by calling pool.factory() and matching against known factories.
         This is the core of the "factory check" strategy.
+        
+        factory() is read through the shared protocol classifier: one multicall
+        on first sight of a pool, cached in memory and on disk afterwards.
         """
+        from data_sources.protocol_classifier import protocol_classifier
+        
         w3 = self._get_web3(chain)
         if not w3:
             logger.warning(f"No RPC for chain {chain}")
             return Protocol.UNKNOWN
         
         try:
-            pool_address = Web3.to_checksum_address(pool_address)
-            pool = w3.eth.contract(address=pool_address, abi=FACTORY_ABI)
-            
-            # Call factory()
-            factory_address = pool.functions.factory().call()
-            factory_lower = factory_address.lower()
+            record = await protocol_classifier.classify(pool_address, chain, w3=w3)
+            if record is None or record.factory is None:
+                logger.debug(f"Factory detection failed for {pool_address}")
+                return Protocol.UNKNOWN
+            factory_lower = record.factory
             
             # Look up in known factories
             chain_factories = KNOWN_FACTORIES.get(chain.lower(), {})
@@ -460,7 +530,8 @@ class SmartRouter:
     async def smart_route_pool_check(
         self, 
         input_str: str, 
-        chain: Optional[str] = None
+        chain: Optional[str] = None,
+        budget: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Main entry point: Intelligently route to correct adapter based on factory detection.
@@ -468,6 +539,7 @@ class SmartRouter:
         Args:
             input_str: Pool address, URL, or vault ID
             chain: Optional chain hint (will be auto-detected from URL if possible)
+            budget: Enrichment latency budget in seconds (default ENRICHMENT_BUDGET)
         
         Returns:
             Unified pool data with quality tier indicator
@@ -484,48 +556,160 @@ class SmartRouter:
         
         chain = chain or parsed_chain or "base"
         
-        # Step 2: If we have a protocol hint from URL parsing, use it directly
-        if protocol_hint == Protocol.BEEFY:
-            logger.info(f"🐄 SmartRouter routing to Beefy: {parsed_address}")
-            return await self._route_beefy(parsed_address, chain)
+        # Step 2: Materialized analysis - a repeat view of a known pool is one dict read
+        materialized = pool_analysis_store.get(parsed_address, chain)
+        if materialized is not None:
+            logger.info(f"⚡ SmartRouter: materialized analysis for {parsed_address[:10]}...")
+            return materialized
         
-        if protocol_hint == Protocol.MOONWELL:
-            logger.info(f"🌙 SmartRouter routing to Moonwell: {parsed_address}")
-            return await self._route_moonwell(parsed_address, chain)
+        return await self.route_pool(parsed_address, chain, protocol_hint, budget)
+    
+    async def route_pool(
+        self,
+        pool_address: str,
+        chain: str,
+        hint: Optional[Protocol] = None,
+        budget: Optional[float] = None,
+        materialize: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Build the analysis for a parsed pool address / vault ID (no materialized read).
+        With materialize=True the result is stored in pool_analysis_store.
+        """
+        # Step 3: If we have a protocol hint from URL parsing, use it directly
+        if hint == Protocol.BEEFY:
+            logger.info(f"🐄 SmartRouter routing to Beefy: {pool_address}")
+            result = await self._route_beefy(pool_address, chain)
+        
+        elif hint == Protocol.MOONWELL:
+            logger.info(f"🌙 SmartRouter routing to Moonwell: {pool_address}")
+            result = await self._route_moonwell(pool_address, chain)
         
-        if protocol_hint == Protocol.YEARN:
+        elif hint == Protocol.YEARN:
             # TODO: Implement Yearn routing
             return {
                 "success": False,
                 "error": "Yearn vaults not yet supported",
-                "input": input_str
+                "input": pool_address
             }
         
-        # Step 3: For pool addresses, detect protocol via factory
-        logger.info(f"🧠 SmartRouter processing: {parsed_address[:10]}... on {chain}")
-        protocol = await self.detect_protocol(parsed_address, chain)
-        adapter_type = PROTOCOL_ADAPTERS.get(protocol, "universal")
-        
-        # Step 4: Route to appropriate adapter
-        if adapter_type == "aerodrome":
-            return await self._route_aerodrome(parsed_address, chain, protocol)
-        elif adapter_type == "uniswap_v3":
-            return await self._route_uniswap_v3(parsed_address, chain)
         else:
-            return await self._route_universal(parsed_address, chain, protocol)
+            # Step 4: For pool addresses, detect protocol via factory
+            logger.info(f"🧠 SmartRouter processing: {pool_address[:10]}... on {chain}")
+            protocol = await self.detect_protocol(pool_address, chain)
+            adapter_type = PROTOCOL_ADAPTERS.get(protocol, "universal")
+            
+            # Step 5: Route to appropriate adapter
+            if adapter_type == "aerodrome":
+                # Materializes its own sections so they can be refreshed one by one
+                return await self._route_aerodrome(pool_address, chain, protocol, budget, materialize)
+            elif adapter_type == "uniswap_v3":
+                result = await self._route_uniswap_v3(pool_address, chain)
+            else:
+                result = await self._route_universal(pool_address, chain, protocol)
+        
+        if materialize:
+            pool_analysis_store.materialize(pool_address, chain, result, route="full", hint=hint)
+        return result
     
     async def _route_aerodrome(
         self, 
         pool_address: str, 
         chain: str,
-        protocol: Protocol
+        protocol: Protocol,
+        budget: Optional[float] = None,
+        materialize: bool = True
     ) -> Dict[str, Any]:
         """
         Tier 1 (Premium): Full Aerodrome analysis.
         OPTIMIZED: Use GeckoTerminal first (no RPC), then minimal RPC for APY only.
         - GeckoTerminal: TVL, symbols, volume (API call, fast)
         - On-chain: Only gauge + rewardRate (3-5 RPC calls vs ~18 before)
+        - Enrichment runs under a latency budget (ENRICHMENT_BUDGET): sections
+          that miss it come from the pool's last good result or are marked pending
+        """
+        pool_data, source = await self._aerodrome_base(pool_address, chain)
+        if not pool_data:
+            # Fallback to universal scanner if all else fails
+            result = await self._route_universal(pool_address, chain, protocol)
+            if materialize:
+                pool_analysis_store.materialize(pool_address, chain, result, route="full")
+            return result
+        
+        base = dict(pool_data)
+        sections, states = {}, {}
+        async for name, data, state in self._run_sections(
+            pool_address,
+            self._aerodrome_fetchers(pool_data, pool_address, chain, protocol),
+            ENRICHMENT_BUDGET if budget is None else budget
+        ):
+            sections[name], states[name] = data, state
+        
+        result = self._finish_aerodrome(pool_data, sections, states, pool_address, chain, protocol, source)
+        if materialize:
+            pool_analysis_store.materialize(
+                pool_address, chain, result, route="aerodrome", protocol=protocol,
+                sections={"base": base, **sections}, states=states
+            )
+        return result
+    
+    async def stream_pool_check(
+        self,
+        input_str: str,
+        chain: Optional[str] = None,
+        budget: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
+        Progressive smart_route_pool_check() - yields events as data arrives.
+        
+        Aerodrome pools yield {"event": "pool"} with the GeckoTerminal base data,
+        then one {"event": "section"} per enrichment fetcher as it completes (or
+        is cut off by STREAM_BUDGET), then {"event": "result"} carrying the same
+        response smart_route_pool_check() returns. Other routes only yield the result.
+        """
+        parsed_address, parsed_chain, protocol_hint = self.parse_input(input_str)
+        chain = chain or parsed_chain or "base"
+        
+        materialized = pool_analysis_store.get(parsed_address, chain) if parsed_address else None
+        if materialized is not None:
+            yield {"event": "result", **materialized}
+            return
+        
+        protocol = None
+        if parsed_address and protocol_hint is None:
+            protocol = await self.detect_protocol(parsed_address, chain)
+        if protocol is None or PROTOCOL_ADAPTERS.get(protocol) != "aerodrome":
+            # detect_protocol() is cached, so the plain route does not re-probe
+            yield {"event": "result", **await self.smart_route_pool_check(input_str, chain, budget)}
+            return
+        
+        pool_data, source = await self._aerodrome_base(parsed_address, chain)
+        if not pool_data:
+            result = await self._route_universal(parsed_address, chain, protocol)
+            pool_analysis_store.materialize(parsed_address, chain, result, route="full")
+            yield {"event": "result", **result}
+            return
+        base = dict(pool_data)
+        yield {"event": "pool", "pool": base, "source": source, "chain": chain}
+        
+        sections, states = {}, {}
+        async for name, data, state in self._run_sections(
+            parsed_address,
+            self._aerodrome_fetchers(pool_data, parsed_address, chain, protocol),
+            STREAM_BUDGET if budget is None else budget
+        ):
+            sections[name], states[name] = data, state
+            yield {"event": "section", "section": name, "state": state, "data": data}
+        
+        result = self._finish_aerodrome(pool_data, sections, states, parsed_address, chain, protocol, source)
+        pool_analysis_store.materialize(
+            parsed_address, chain, result, route="aerodrome", protocol=protocol,
+            sections={"base": base, **sections}, states=states
+        )
+        yield {"event": "result", **result}
+    
+    async def _aerodrome_base(self, pool_address: str, chain: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        """GeckoTerminal pool data - the base every enrichment section is applied to"""
         pool_data = None
         source = "unknown"
         
@@ -540,323 +724,374 @@ class SmartRouter:
         except Exception as e:
             logger.warning(f"GeckoTerminal fetch failed: {e}")
         
-        # If we have data, enrich and return
-        if pool_data:
-            
-            # =========================================================
-            # PARALLEL ENRICHMENT: Run OHLCV + APY + Security together!
-            # This is the main performance optimization - saves ~15s
-            # =========================================================
-            
-            async def fetch_ohlcv():
-                try:
-                    return await gecko_client.get_pool_ohlcv(chain, pool_address, "day", 7)
-                except Exception as e:
-                    logger.debug(f"OHLCV enrichment failed: {e}")
-                    return None
+        return pool_data, source
+    
+    def _aerodrome_fetchers(
+        self,
+        pool_data: Dict[str, Any],
+        pool_address: str,
+        chain: str,
+        protocol: Protocol
+    ) -> Dict[str, Callable[[], Awaitable[Any]]]:
+        """
+        PARALLEL ENRICHMENT: OHLCV + APY + Security + Dex + Peg + Lock + Whale.
+        Section name -> fetcher; _run_sections() runs them together under a budget.
+        """
+        async def fetch_ohlcv():
+            try:
+                return await gecko_client.get_pool_ohlcv(chain, pool_address, "day", 7)
+            except Exception as e:
+                logger.debug(f"OHLCV enrichment failed: {e}")
+                return None
+        
+        async def fetch_apy():
+            # Check cache first (2 min TTL)
+            cached = _get_cached_apy(pool_address)
+            if cached:
+                return cached
             
-            async def fetch_apy():
-                # Check cache first (2 min TTL)
-                cached = _get_cached_apy(pool_address)
-                if cached:
-                    return cached
-                
-                current_apy = pool_data.get("apy", 0)
-                if current_apy and current_apy > 0:
-                    result = {"apy_status": "already_set", "apy": current_apy}
+            current_apy = pool_data.get("apy", 0)
+            if current_apy and current_apy > 0:
+                result = {"apy_status": "already_set", "apy": current_apy}
+                _set_cached_apy(pool_address, result)
+                return result
+            try:
+                pool_type_hint = "cl" if protocol == Protocol.AERODROME_SLIPSTREAM else "v2"
+                result = await aerodrome_client.get_real_time_apy_multicall(pool_address, pool_type_hint)
+                # Cache successful result
+                if result.get("apy_status") in ("ok", "requires_external_tvl", "requires_staked_tvl_conversion"):
                     _set_cached_apy(pool_address, result)
+                return result
+            except Exception as e:
+                logger.warning(f"Aerodrome APY call failed: {e}")
+                return {"apy_status": "error", "reason": str(e)}
+        
+        async def fetch_security():
+            if not SECURITY_CHECKER_AVAILABLE:
+                return {"status": "skipped", "tokens": {}}
+            try:
+                token0 = pool_data.get("token0")
+                token1 = pool_data.get("token1")
+                tokens_to_check = [t for t in [token0, token1] if t and t.startswith("0x")]
+                if tokens_to_check:
+                    # Check cache first
+                    cache_key = ",".join(sorted([t.lower() for t in tokens_to_check]))
+                    cached = _get_cached_security(cache_key)
+                    if cached:
+                        return cached
+                    # Fetch from GoPlus
+                    result = await security_checker.check_security(tokens_to_check, chain)
+                    _set_cached_security(cache_key, result)
                     return result
-                try:
-                    pool_type_hint = "cl" if protocol == Protocol.AERODROME_SLIPSTREAM else "v2"
-                    result = await aerodrome_client.get_real_time_apy_multicall(pool_address, pool_type_hint)
-                    # Cache successful result
-                    if result.get("apy_status") in ("ok", "requires_external_tvl", "requires_staked_tvl_conversion"):
-                        _set_cached_apy(pool_address, result)
-                    return result
-                except Exception as e:
-                    logger.warning(f"Aerodrome APY call failed: {e}")
-                    return {"apy_status": "error", "reason": str(e)}
-            
-            async def fetch_security():
-                if not SECURITY_CHECKER_AVAILABLE:
-                    return {"status": "skipped", "tokens": {}}
-                try:
-                    token0 = pool_data.get("token0")
-                    token1 = pool_data.get("token1")
-                    tokens_to_check = [t for t in [token0, token1] if t and t.startswith("0x")]
-                    if tokens_to_check:
-                        # Check cache first
-                        cache_key = ",".join(sorted([t.lower() for t in tokens_to_check]))
-                        cached = _get_cached_security(cache_key)
-                        if cached:
-                            return cached
-                        # Fetch from GoPlus
-                        result = await security_checker.check_security(tokens_to_check, chain)
-                        _set_cached_security(cache_key, result)
-                        return result
-                    return {"status": "no_tokens", "tokens": {}}
-                except Exception as e:
-                    logger.debug(f"Security check failed: {e}")
-                    return {"status": "error", "tokens": {}}
-            
-            async def fetch_dexscreener():
-                """Fetch per-token volatility from DexScreener"""
-                # Check cache first
-                cached = _get_cached_dexscreener(pool_address)
-                if cached:
-                    return cached
-                try:
-                    result = await dexscreener_client.get_token_volatility(chain, pool_address)
-                    if result:
-                        _set_cached_dexscreener(pool_address, result)
-                    return result
-                except Exception as e:
-                    logger.debug(f"DexScreener volatility failed: {e}")
-                    return None
-            
-            # === NEW: Peg, LP Lock, Whale - moved here for mega-parallel ===
-            async def fetch_peg():
-                if not SECURITY_CHECKER_AVAILABLE:
-                    return {}
-                try:
-                    return await security_checker.check_stablecoin_peg(pool_data, chain)
-                except:
-                    return {}
-            
-            async def fetch_lp_lock():
-                if not LIQUIDITY_LOCK_AVAILABLE:
-                    return {"has_lock": False, "source": "not_checked"}
-                try:
-                    return await liquidity_lock_checker.check_lp_lock(pool_address, chain)
-                except:
-                    return {"has_lock": False, "source": "error"}
-            
-            async def fetch_whale():
-                if not HOLDER_ANALYSIS_AVAILABLE:
-                    return {"source": "not_available"}
-                try:
-                    lp_analysis = await holder_analyzer.get_holder_analysis(pool_address, chain)
-                    if lp_analysis.get("top_10_percent") is not None:
-                        return {"lp_token": lp_analysis, "source": lp_analysis.get("source", "moralis")}
-                    WHITELISTED = {"0x833589fcd6edb6e08f4c7c32d4f71b54bda02913",
-                                   "0xd9aaec86b65d86f6a7b5b1b0c42ffa531710b6ca",
-                                   "0x4200000000000000000000000000000000000006"}
-                    t0 = pool_data.get("token0", "").lower()
-                    t1 = pool_data.get("token1", "").lower()
-                    target = t0 if t0 and t0 not in WHITELISTED else (t1 if t1 and t1 not in WHITELISTED else None)
-                    if target:
-                        ta = await holder_analyzer.get_holder_analysis(target, chain)
-                        if ta.get("top_10_percent") is not None:
-                            return {"token": ta, "lp_token": lp_analysis, "source": ta.get("source", "moralis")}
-                    return {"lp_token": lp_analysis, "source": "whitelisted_tokens"}
-                except:
-                    return {"source": "not_available"}
+                return {"status": "no_tokens", "tokens": {}}
+            except Exception as e:
+                logger.debug(f"Security check failed: {e}")
+                return {"status": "error", "tokens": {}}
+        
+        async def fetch_dexscreener():
+            """Fetch per-token volatility from DexScreener"""
+            # Check cache first
+            cached = _get_cached_dexscreener(pool_address)
+            if cached:
+                return cached
+            try:
+                result = await dexscreener_client.get_token_volatility(chain, pool_address)
+                if result:
+                    _set_cached_dexscreener(pool_address, result)
+                return result
+            except Exception as e:
+                logger.debug(f"DexScreener volatility failed: {e}")
+                return None
+        
+        # === NEW: Peg, LP Lock, Whale - moved here for mega-parallel ===
+        async def fetch_peg():
+            if not SECURITY_CHECKER_AVAILABLE:
+                return {}
+            try:
+                return await security_checker.check_stablecoin_peg(pool_data, chain)
+            except:
+                return {}
+        
+        async def fetch_lp_lock():
+            if not LIQUIDITY_LOCK_AVAILABLE:
+                return {"has_lock": False, "source": "not_checked"}
+            try:
+                return await liquidity_lock_checker.check_lp_lock(pool_address, chain)
+            except:
+                return {"has_lock": False, "source": "error"}
+        
+        async def fetch_whale():
+            if not HOLDER_ANALYSIS_AVAILABLE:
+                return {"source": "not_available"}
+            try:
+                lp_analysis = await holder_analyzer.get_holder_analysis(pool_address, chain)
+                if lp_analysis.get("top_10_percent") is not None:
+                    return {"lp_token": lp_analysis, "source": lp_analysis.get("source", "moralis")}
+                WHITELISTED = {"0x833589fcd6edb6e08f4c7c32d4f71b54bda02913",
+                               "0xd9aaec86b65d86f6a7b5b1b0c42ffa531710b6ca",
+                               "0x4200000000000000000000000000000000000006"}
+                t0 = pool_data.get("token0", "").lower()
+                t1 = pool_data.get("token1", "").lower()
+                target = t0 if t0 and t0 not in WHITELISTED else (t1 if t1 and t1 not in WHITELISTED else None)
+                if target:
+                    ta = await holder_analyzer.get_holder_analysis(target, chain)
+                    if ta.get("top_10_percent") is not None:
+                        return {"token": ta, "lp_token": lp_analysis, "source": ta.get("source", "moralis")}
+                return {"lp_token": lp_analysis, "source": "whitelisted_tokens"}
+            except:
+                return {"source": "not_available"}
+        
+        return {
+            "ohlcv": fetch_ohlcv,
+            "apy": fetch_apy,
+            "security": fetch_security,
+            "dexscreener": fetch_dexscreener,
+            "peg": fetch_peg,
+            "lp_lock": fetch_lp_lock,
+            "whale": fetch_whale,
+        }
+    
+    async def _run_sections(
+        self,
+        pool_address: str,
+        fetchers: Dict[str, Callable[[], Awaitable[Any]]],
+        budget: float
+    ) -> AsyncIterator[Tuple[str, Any, str]]:
+        """
+        Run section fetchers in parallel, yielding (name, data, state) as each finishes.
+        
+        state: "ok"; "error" (fetcher raised - data is the section's error value);
+        "cached" (missed the budget - data is the pool's last good result) or
+        "pending" (missed the budget with nothing cached). Late fetchers keep
+        running so their result refreshes the section cache for the next request.
+        """
+        logger.info(f"⚡ SmartRouter: Running {len(fetchers)}-way parallel ({'+'.join(fetchers)}), budget={budget:.1f}s...")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + budget
+        tasks = {asyncio.ensure_future(fetch()): name for name, fetch in fetchers.items()}
+        
+        pending = set(tasks)
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = tasks[task]
+                if task.exception() is not None:
+                    yield name, _section_placeholder(name, "error", str(task.exception())), "error"
+                else:
+                    _set_cached_section(pool_address, name, task.result())
+                    yield name, task.result(), "ok"
+        
+        if pending:
+            logger.info(f"⏱️ SmartRouter: {', '.join(tasks[t] for t in pending)} missed the {budget:.1f}s budget")
+        for task in pending:
+            name = tasks[task]
+            _late_tasks.add(task)
+            task.add_done_callback(lambda t, name=name: _store_late_section(pool_address, name, t))
+            cached = _get_cached_section(pool_address, name)
+            if cached is not None:
+                yield name, cached, "cached"
+            else:
+                yield name, _section_placeholder(name, "pending"), "pending"
+    
+    def _finish_aerodrome(
+        self,
+        pool_data: Dict[str, Any],
+        sections: Dict[str, Any],
+        states: Dict[str, str],
+        pool_address: str,
+        chain: str,
+        protocol: Protocol,
+        source: str
+    ) -> Dict[str, Any]:
+        """Apply the enrichment sections to the GeckoTerminal base and build the Tier 1 response"""
+        ohlcv_data = sections.get("ohlcv")
+        apy_data = sections.get("apy")
+        security_result = sections.get("security")
+        dexscreener_data = sections.get("dexscreener")
+        peg_status = sections.get("peg", {})
+        liquidity_lock = sections.get("lp_lock")
+        whale_analysis = sections.get("whale")
+        
+        # Set peg/lock/whale on pool_data immediately
+        pool_data["peg_status"] = peg_status
+        pool_data["liquidity_lock"] = liquidity_lock
+        pool_data["whale_analysis"] = whale_analysis
+        
+        # Which sections are live, served from cache or still pending
+        pool_data["enrichment"] = dict(states)
+        pool_data["pending_sections"] = [name for name, state in states.items() if state == "pending"]
+        
+        # Process DexScreener per-token volatility
+        if dexscreener_data:
+            pool_data["token0_volatility"] = dexscreener_data.get("token0", {})
+            pool_data["token1_volatility"] = dexscreener_data.get("token1", {})
+            t0 = dexscreener_data.get("token0", {})
+            t1 = dexscreener_data.get("token1", {})
+            pool_data["token0_volatility_1h"] = t0.get("price_change_1h", 0)
+            pool_data["token0_volatility_24h"] = t0.get("price_change_24h", 0)
+            pool_data["token1_volatility_1h"] = t1.get("price_change_1h", 0)
+            pool_data["token1_volatility_24h"] = t1.get("price_change_24h", 0)
+            pool_data["pair_price_change_24h"] = dexscreener_data.get("pair_price_change_24h", 0)
+            pool_data["pair_price_change_1h"] = dexscreener_data.get("pair_price_change_1h", 0)
+            logger.info(f"DexScreener: {t0.get('symbol', 'T0')} 24h={t0.get('price_change_24h', 0):.2f}%, {t1.get('symbol', 'T1')} 24h={t1.get('price_change_24h', 0):.2f}%")
+        
+        # Process OHLCV results
+        if ohlcv_data:
+            pool_data["tvl_change_24h"] = ohlcv_data.get("price_change_24h", 0)
+            pool_data["tvl_change_7d"] = ohlcv_data.get("price_change_7d", 0)
+            pool_data["volume_avg_7d"] = ohlcv_data.get("volume_avg_7d", 0)
+            pool_data["price_high_7d"] = ohlcv_data.get("price_high_7d", 0)
+            pool_data["price_low_7d"] = ohlcv_data.get("price_low_7d", 0)
             
-            # Run ALL SEVEN in parallel! (was 2 sequential gathers)
-            logger.info(f"⚡ SmartRouter: Running 7-way parallel (OHLCV+APY+Security+Dex+Peg+Lock+Whale)...")
-            (ohlcv_data, apy_data, security_result, dexscreener_data, 
-             peg_status, liquidity_lock, whale_analysis) = await asyncio.gather(
-                fetch_ohlcv(),
-                fetch_apy(),
-                fetch_security(),
-                fetch_dexscreener(),
-                fetch_peg(),
-                fetch_lp_lock(),
-                fetch_whale(),
-                return_exceptions=True
-            )
+            # IMPORTANT: These fields are used by analyze_volatility in security_module
+            pool_data["price_change_24h"] = ohlcv_data.get("price_change_24h", 0)
+            pool_data["priceChange24h"] = ohlcv_data.get("price_change_24h", 0)
+            pool_data["token_volatility_24h"] = abs(ohlcv_data.get("price_change_24h", 0))
+            pool_data["token_volatility_7d"] = abs(ohlcv_data.get("price_change_7d", 0))
             
-            # Handle exceptions from gather
-            if isinstance(ohlcv_data, Exception):
-                ohlcv_data = None
-            if isinstance(apy_data, Exception):
-                apy_data = {"apy_status": "error", "reason": str(apy_data)}
-            if isinstance(security_result, Exception):
-                security_result = {"status": "error", "tokens": {}}
-            if isinstance(dexscreener_data, Exception):
-                dexscreener_data = None
-            # NEW: Handle peg/lock/whale exceptions
-            if isinstance(peg_status, Exception):
-                peg_status = {}
-            if isinstance(liquidity_lock, Exception):
-                liquidity_lock = {"has_lock": False, "source": "error"}
-            if isinstance(whale_analysis, Exception):
-                whale_analysis = {"source": "error"}
+            change_7d = abs(ohlcv_data.get("price_change_7d", 0))
+            if change_7d < 5:
+                pool_data["tvl_stability"] = "Stable"
+            elif change_7d < 15:
+                pool_data["tvl_stability"] = "Moderate"
+            else:
+                pool_data["tvl_stability"] = "Volatile"
+            logger.info(f"OHLCV enriched: 24h={pool_data['tvl_change_24h']:.1f}%, 7d={pool_data['tvl_change_7d']:.1f}%")
+        
+        # Process APY results (from parallel fetch)
+        if apy_data and apy_data.get("apy_status") != "already_set":
+            apy_status = apy_data.get("apy_status", "unknown")
+            reason = apy_data.get("reason", "UNKNOWN")
             
-            # Set peg/lock/whale on pool_data immediately
-            pool_data["peg_status"] = peg_status
-            pool_data["liquidity_lock"] = liquidity_lock
-            pool_data["whale_analysis"] = whale_analysis
+            pool_data["pool_type"] = apy_data.get("pool_type", "unknown")
+            pool_data["has_gauge"] = apy_data.get("has_gauge", False)
             
-            # Process DexScreener per-token volatility
-            if dexscreener_data:
-                pool_data["token0_volatility"] = dexscreener_data.get("token0", {})
-                pool_data["token1_volatility"] = dexscreener_data.get("token1", {})
-                t0 = dexscreener_data.get("token0", {})
-                t1 = dexscreener_data.get("token1", {})
-                pool_data["token0_volatility_1h"] = t0.get("price_change_1h", 0)
-                pool_data["token0_volatility_24h"] = t0.get("price_change_24h", 0)
-                pool_data["token1_volatility_1h"] = t1.get("price_change_1h", 0)
-                pool_data["token1_volatility_24h"] = t1.get("price_change_24h", 0)
-                pool_data["pair_price_change_24h"] = dexscreener_data.get("pair_price_change_24h", 0)
-                pool_data["pair_price_change_1h"] = dexscreener_data.get("pair_price_change_1h", 0)
-                logger.info(f"DexScreener: {t0.get('symbol', 'T0')} 24h={t0.get('price_change_24h', 0):.2f}%, {t1.get('symbol', 'T1')} 24h={t1.get('price_change_24h', 0):.2f}%")
+            logger.info(f"APY Response: status={apy_status}, reason={reason}")
             
-            # Process OHLCV results
-            if ohlcv_data:
-                pool_data["tvl_change_24h"] = ohlcv_data.get("price_change_24h", 0)
-                pool_data["tvl_change_7d"] = ohlcv_data.get("price_change_7d", 0)
-                pool_data["volume_avg_7d"] = ohlcv_data.get("volume_avg_7d", 0)
-                pool_data["price_high_7d"] = ohlcv_data.get("price_high_7d", 0)
-                pool_data["price_low_7d"] = ohlcv_data.get("price_low_7d", 0)
+            if apy_status == "ok":
+                pool_data["apy"] = apy_data.get("apy", 0)
+                pool_data["apy_reward"] = apy_data.get("apy_reward", 0)
+                pool_data["apy_source"] = "aerodrome_v2_onchain"
+                pool_data["gauge_address"] = apy_data.get("gauge_address")
+                pool_data["epoch_remaining"] = apy_data.get("epoch_end")
+                pool_data["apy_status"] = "ok"
+                logger.info(f"✅ APY from on-chain: {pool_data['apy']:.2f}%")
                 
-                # IMPORTANT: These fields are used by analyze_volatility in security_module
-                pool_data["price_change_24h"] = ohlcv_data.get("price_change_24h", 0)
-                pool_data["priceChange24h"] = ohlcv_data.get("price_change_24h", 0)
-                pool_data["token_volatility_24h"] = abs(ohlcv_data.get("price_change_24h", 0))
-                pool_data["token_volatility_7d"] = abs(ohlcv_data.get("price_change_7d", 0))
+            elif apy_status in ("requires_external_tvl", "requires_staked_tvl_conversion"):
+                total_tvl = pool_data.get("tvl", 0) or pool_data.get("tvlUsd", 0)
+                yearly_rewards = apy_data.get("yearly_rewards_usd", 0)
+                pool_type = apy_data.get("pool_type", "unknown")
                 
-                change_7d = abs(ohlcv_data.get("price_change_7d", 0))
-                if change_7d < 5:
-                    pool_data["tvl_stability"] = "Stable"
-                elif change_7d < 15:
-                    pool_data["tvl_stability"] = "Moderate"
+                if total_tvl > 0 and yearly_rewards > 0:
+                    # BOTH V2 and CL pools: use staked_ratio for accurate APY
+                    # APY = yearly_rewards / (total_tvl * staked_ratio)
+                    # This matches Aerodrome's calculation
+                    staked_ratio = apy_data.get("staked_ratio", 1.0)
+                    staked_tvl = total_tvl * staked_ratio
+                    staker_apr = (yearly_rewards / staked_tvl) * 100 if staked_tvl > 0 else 0
+                    
+                    pool_data["apy"] = staker_apr
+                    pool_data["apy_reward"] = staker_apr
+                    pool_data["apy_source"] = f"aerodrome_{pool_type}_staker_apr"
+                    pool_data["apy_status"] = "ok"
+                    pool_data["staked_ratio"] = staked_ratio
+                    logger.info(f"✅ {pool_type.upper()} APR: {staker_apr:.2f}% (staked_ratio={staked_ratio:.2%})")
+                    
+                    pool_data["gauge_address"] = apy_data.get("gauge_address")
+                    pool_data["yearly_emissions_usd"] = yearly_rewards
+                    pool_data["epoch_remaining"] = apy_data.get("epoch_end")
                 else:
-                    pool_data["tvl_stability"] = "Volatile"
-                logger.info(f"OHLCV enriched: 24h={pool_data['tvl_change_24h']:.1f}%, 7d={pool_data['tvl_change_7d']:.1f}%")
+                    pool_data["apy_status"] = "unavailable"
+                    pool_data["apy_reason"] = f"TVL_ZERO"
+                    
+            elif apy_status == "unsupported":
+                pool_data["apy_status"] = "unsupported"
+                pool_data["apy_reason"] = reason
+            elif apy_status == "error":
+                pool_data["apy_status"] = "error"
+                pool_data["apy_reason"] = reason
+            elif apy_status == "pending":
+                pool_data["apy_status"] = "pending"
+        
+        # Process security results (from parallel fetch)
+        if security_result and security_result.get("status") == "success":
+            summary = security_result.get("summary", {})
+            if summary.get("has_critical"):
+                pool_data["security_status"] = "critical"
+                pool_data["is_honeypot"] = True
+                logger.warning(f"HONEYPOT DETECTED: {pool_address}")
+            elif summary.get("total_penalty", 0) > 40:
+                pool_data["security_status"] = "high_risk"
+            elif summary.get("total_penalty", 0) > 15:
+                pool_data["security_status"] = "medium_risk"
+            else:
+                pool_data["security_status"] = "safe"
             
-            # Process APY results (from parallel fetch)
-            if apy_data and apy_data.get("apy_status") != "already_set":
-                apy_status = apy_data.get("apy_status", "unknown")
-                reason = apy_data.get("reason", "UNKNOWN")
+            pool_data["security_penalty"] = summary.get("total_penalty", 0)
+            pool_data["security_risks"] = summary.get("all_risks", [])
+        
+        pool_data["security_result"] = security_result
+        
+        # =================================================================
+        # COMPREHENSIVE RISK ANALYSIS (IL, Volatility, Pool Age, Whale)
+        # NOTE: peg/lock/whale already set from 7-way parallel gather above
+        # =================================================================
+        if SECURITY_CHECKER_AVAILABLE:
+            try:
+                # Determine audit status from protocol (sync - fast)
+                audit_status = self._get_audit_status(pool_data, protocol)
+                pool_data["audit_status"] = audit_status
                 
-                pool_data["pool_type"] = apy_data.get("pool_type", "unknown")
-                pool_data["has_gauge"] = apy_data.get("has_gauge", False)
+                # Calculate full risk score (includes IL, volatility, age, audit, whale)
+                risk_analysis = security_checker.calculate_risk_score(
+                    pool_data, 
+                    security_result, 
+                    peg_status,
+                    pool_data.get("symbol_warnings"),
+                    audit_status=audit_status,
+                    liquidity_lock=liquidity_lock,
+                    whale_analysis=whale_analysis
+                )
                 
-                logger.info(f"APY Response: status={apy_status}, reason={reason}")
+                # Add all risk data to pool
+                pool_data["risk_score"] = risk_analysis.get("risk_score")
+                pool_data["risk_level"] = risk_analysis.get("risk_level")
+                pool_data["risk_reasons"] = risk_analysis.get("risk_reasons", [])
+                pool_data["risk_breakdown"] = risk_analysis.get("risk_breakdown", {})
+                pool_data["il_analysis"] = risk_analysis.get("il_analysis", {})
+                pool_data["volatility_analysis"] = risk_analysis.get("volatility_analysis", {})
+                pool_data["pool_age_analysis"] = risk_analysis.get("pool_age_analysis", {})
                 
-                if apy_status == "ok":
-                    pool_data["apy"] = apy_data.get("apy", 0)
-                    pool_data["apy_reward"] = apy_data.get("apy_reward", 0)
-                    pool_data["apy_source"] = "aerodrome_v2_onchain"
-                    pool_data["gauge_address"] = apy_data.get("gauge_address")
-                    pool_data["epoch_remaining"] = apy_data.get("epoch_end")
-                    pool_data["apy_status"] = "ok"
-                    logger.info(f"✅ APY from on-chain: {pool_data['apy']:.2f}%")
-                    
-                elif apy_status in ("requires_external_tvl", "requires_staked_tvl_conversion"):
-                    total_tvl = pool_data.get("tvl", 0) or pool_data.get("tvlUsd", 0)
-                    yearly_rewards = apy_data.get("yearly_rewards_usd", 0)
-                    pool_type = apy_data.get("pool_type", "unknown")
-                    
-                    if total_tvl > 0 and yearly_rewards > 0:
-                        # BOTH V2 and CL pools: use staked_ratio for accurate APY
-                        # APY = yearly_rewards / (total_tvl * staked_ratio)
-                        # This matches Aerodrome's calculation
-                        staked_ratio = apy_data.get("staked_ratio", 1.0)
-                        staked_tvl = total_tvl * staked_ratio
-                        staker_apr = (yearly_rewards / staked_tvl) * 100 if staked_tvl > 0 else 0
-                        
-                        pool_data["apy"] = staker_apr
-                        pool_data["apy_reward"] = staker_apr
-                        pool_data["apy_source"] = f"aerodrome_{pool_type}_staker_apr"
-                        pool_data["apy_status"] = "ok"
-                        pool_data["staked_ratio"] = staked_ratio
-                        logger.info(f"✅ {pool_type.upper()} APR: {staker_apr:.2f}% (staked_ratio={staked_ratio:.2%})")
-                        
-                        pool_data["gauge_address"] = apy_data.get("gauge_address")
-                        pool_data["yearly_emissions_usd"] = yearly_rewards
-                        pool_data["epoch_remaining"] = apy_data.get("epoch_end")
-                    else:
-                        pool_data["apy_status"] = "unavailable"
-                        pool_data["apy_reason"] = f"TVL_ZERO"
-                        
-                elif apy_status == "unsupported":
-                    pool_data["apy_status"] = "unsupported"
-                    pool_data["apy_reason"] = reason
-                elif apy_status == "error":
-                    pool_data["apy_status"] = "error"
-                    pool_data["apy_reason"] = reason
-            
-            # Process security results (from parallel fetch)
-            if security_result and security_result.get("status") == "success":
-                summary = security_result.get("summary", {})
-                if summary.get("has_critical"):
-                    pool_data["security_status"] = "critical"
-                    pool_data["is_honeypot"] = True
-                    logger.warning(f"HONEYPOT DETECTED: {pool_address}")
-                elif summary.get("total_penalty", 0) > 40:
-                    pool_data["security_status"] = "high_risk"
-                elif summary.get("total_penalty", 0) > 15:
-                    pool_data["security_status"] = "medium_risk"
-                else:
-                    pool_data["security_status"] = "safe"
+                # =========================================================
+                # MAP FIELDS FOR FRONTEND COMPATIBILITY
+                # Frontend expects: volatility_24h, tvl_change_24h, tvl_change_7d
+                # =========================================================
+                vol_analysis = pool_data.get("volatility_analysis", {})
+                pool_data["volatility_24h"] = abs(vol_analysis.get("price_change_24h", 0))
+                pool_data["token_volatility"] = abs(vol_analysis.get("price_change_24h", 0))
                 
-                pool_data["security_penalty"] = summary.get("total_penalty", 0)
-                pool_data["security_risks"] = summary.get("all_risks", [])
-            
-            pool_data["security_result"] = security_result
-            
-            # =================================================================
-            # COMPREHENSIVE RISK ANALYSIS (IL, Volatility, Pool Age, Whale)
-            # NOTE: peg/lock/whale already set from 7-way parallel gather above
-            # =================================================================
-            if SECURITY_CHECKER_AVAILABLE:
-                try:
-                    # Determine audit status from protocol (sync - fast)
-                    audit_status = self._get_audit_status(pool_data, protocol)
-                    pool_data["audit_status"] = audit_status
-                    
-                    # Calculate full risk score (includes IL, volatility, age, audit, whale)
-                    risk_analysis = security_checker.calculate_risk_score(
-                        pool_data, 
-                        security_result, 
-                        peg_status,
-                        pool_data.get("symbol_warnings"),
-                        audit_status=audit_status,
-                        liquidity_lock=liquidity_lock,
-                        whale_analysis=whale_analysis
-                    )
-                    
-                    # Add all risk data to pool
-                    pool_data["risk_score"] = risk_analysis.get("risk_score")
-                    pool_data["risk_level"] = risk_analysis.get("risk_level")
-                    pool_data["risk_reasons"] = risk_analysis.get("risk_reasons", [])
-                    pool_data["risk_breakdown"] = risk_analysis.get("risk_breakdown", {})
-                    pool_data["il_analysis"] = risk_analysis.get("il_analysis", {})
-                    pool_data["volatility_analysis"] = risk_analysis.get("volatility_analysis", {})
-                    pool_data["pool_age_analysis"] = risk_analysis.get("pool_age_analysis", {})
-                    
-                    # =========================================================
-                    # MAP FIELDS FOR FRONTEND COMPATIBILITY
-                    # Frontend expects: volatility_24h, tvl_change_24h, tvl_change_7d
-                    # =========================================================
-                    vol_analysis = pool_data.get("volatility_analysis", {})
-                    pool_data["volatility_24h"] = abs(vol_analysis.get("price_change_24h", 0))
-                    pool_data["token_volatility"] = abs(vol_analysis.get("price_change_24h", 0))
-                    
-                except Exception as e:
-                    logger.warning(f"Risk analysis failed: {e}")
-            
-            # Generate specific risk flags (now includes security info)
-            risk_flags = self._generate_risk_flags(pool_data, protocol)
-            
-            return {
-                "success": True,
-                "pool": {
-                    **pool_data,
-                    "protocol": protocol.value,
-                    "protocol_name": self._get_protocol_name(protocol),
-                    "risk_flags": risk_flags,  # Specific risk explanations
-                },
-                "data_quality": DataQuality.PREMIUM.value,
-                "quality_reason": "Aerodrome pool with verified factory",
-                "source": source,
-                "chain": chain
-            }
+            except Exception as e:
+                logger.warning(f"Risk analysis failed: {e}")
+        
+        # Generate specific risk flags (now includes security info)
+        risk_flags = self._generate_risk_flags(pool_data, protocol)
         
-        # Fallback to universal scanner if all else fails
-        return await self._route_universal(pool_address, chain, protocol)
+        return {
+            "success": True,
+            "pool": {
+                **pool_data,
+                "protocol": protocol.value,
+                "protocol_name": self._get_protocol_name(protocol),
+                "risk_flags": risk_flags,  # Specific risk explanations
+            },
+            "data_quality": DataQuality.PREMIUM.value,
+            "quality_reason": "Aerodrome pool with verified factory",
+            "source": source,
+            "chain": chain
+        }
     
     async def _route_beefy(
         self, 
@@ -3,60 +3,55 @@ WebSocket Router for Real-Time Portfolio Updates
 Provides live updates for positions, transactions, and agent status
 """
 
+import os
+
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Dict, Set, List, Any
-import asyncio
-import json
+from typing import Dict, Set, List, Any, Optional
 from datetime import datetime
 
+from infrastructure.ws_hub import ws_hub, wallet_topic, token_topic, allocation_topic
+
 router = APIRouter(tags=["WebSocket"])
 
+PORTFOLIO_POLL_INTERVAL = 10
+PRICE_POLL_INTERVAL = 2
+# Also send price ticks to every socket as price_update events (pre-topic clients)
+LEGACY_PRICE_BROADCAST = os.getenv("WS_LEGACY_PRICE_BROADCAST", "").lower() in ("1", "true", "yes")
+
 # Connection manager for WebSocket clients
+# Thin facade over ws_hub: one producer per wallet topic, per-socket
+# bounded queues instead of awaiting every send inline.
 class ConnectionManager:
-    def __init__(self):
-        # wallet_address -> set of WebSocket connections
-        self.active_connections: Dict[str, Set[WebSocket]] = {}
-        self.background_tasks: Dict[str, asyncio.Task] = {}
+    @property
+    def active_connections(self) -> Dict[str, Set[WebSocket]]:
+        """wallet_address -> set of WebSocket connections"""
+        return {
+            name.split(":", 1)[1]: {sub.websocket for sub in topic.subscribers}
+            for name, topic in ws_hub.topics.items()
+            if name.startswith(("wallet:", "allocation:"))
+        }
 
     async def connect(self, websocket: WebSocket, wallet: str):
+        """Allocation sockets only get events, never the portfolio producer"""
         await websocket.accept()
-        if wallet not in self.active_connections:
-            self.active_connections[wallet] = set()
-        self.active_connections[wallet].add(websocket)
+        await ws_hub.subscribe(websocket, allocation_topic(wallet))
         print(f"[WebSocket] Client connected: {wallet[:10]}...")
 
     def disconnect(self, websocket: WebSocket, wallet: str):
-        if wallet in self.active_connections:
-            self.active_connections[wallet].discard(websocket)
-            if not self.active_connections[wallet]:
-                del self.active_connections[wallet]
+        ws_hub.disconnect(websocket)
         print(f"[WebSocket] Client disconnected: {wallet[:10]}...")
 
     async def send_personal(self, message: dict, wallet: str):
         """Send message to all connections for a specific wallet"""
-        if wallet in self.active_connections:
-            disconnected = []
-            for connection in self.active_connections[wallet]:
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    disconnected.append(connection)
-            
-            # Clean up disconnected clients
-            for conn in disconnected:
-                self.active_connections[wallet].discard(conn)
+        ws_hub.send_event(wallet_topic(wallet), message)
+        ws_hub.send_event(allocation_topic(wallet), message)
 
     async def broadcast(self, message: dict):
         """Send message to all connected clients"""
-        for wallet, connections in self.active_connections.items():
-            for connection in connections.copy():
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    connections.discard(connection)
+        ws_hub.broadcast_event(message)
 
     def get_connection_count(self) -> int:
-        return sum(len(conns) for conns in self.active_connections.values())
+        return ws_hub.connection_count()
 
 
 manager = ConnectionManager()
@@ -72,104 +67,81 @@ async def websocket_portfolio(websocket: WebSocket, wallet: str):
     WebSocket endpoint for real-time portfolio updates.
     
     Sends:
-    - position_update: When position values change
+    - snapshot / patch: Topic state ("wallet:<addr>", "token:<SYM>", "prices")
+      as a full document, then JSON-patch deltas against `base` version
     - transaction: New transactions
     - agent_status: Agent state changes
-    - price_update: Token price changes
     - heartbeat: Every 30s to keep connection alive
     """
-    await manager.connect(websocket, wallet)
+    await websocket.accept()
+    ws_hub.send_direct(websocket, {
+        "type": "connected",
+        "wallet": wallet,
+        "timestamp": datetime.utcnow().isoformat()
+    })
+    # Portfolio snapshot is produced once per wallet, however many tabs are open
+    await ws_hub.subscribe(websocket, wallet_topic(wallet))
+    print(f"[WebSocket] Client connected: {wallet[:10]}...")
     
     try:
-        # Send initial state
-        await websocket.send_json({
-            "type": "connected",
-            "wallet": wallet,
-            "timestamp": datetime.utcnow().isoformat()
-        })
-        
-        # Start heartbeat task
-        heartbeat_task = asyncio.create_task(send_heartbeat(websocket, wallet))
-        
-        # Start portfolio polling task (checks for changes every 10s)
-        poll_task = asyncio.create_task(poll_portfolio_updates(websocket, wallet))
-        
-        try:
-            while True:
-                # Wait for messages from client
-                data = await websocket.receive_json()
-                
-                # Handle client messages
-                if data.get("type") == "subscribe":
-                    # Client subscribing to specific updates
-                    channels = data.get("channels", ["all"])
-                    await websocket.send_json({
-                        "type": "subscribed",
-                        "channels": channels
-                    })
-                    
-                elif data.get("type") == "ping":
-                    await websocket.send_json({"type": "pong"})
-                    
-                elif data.get("type") == "refresh":
-                    # Client requesting immediate refresh
-                    await send_portfolio_snapshot(websocket, wallet)
-                    
-        except WebSocketDisconnect:
-            heartbeat_task.cancel()
-            poll_task.cancel()
+        while True:
+            # Wait for messages from client
+            data = await websocket.receive_json()
             
+            # Handle client messages
+            if data.get("type") == "subscribe":
+                # Client subscribing to price topics: "prices" / "all" or "token:WETH"
+                channels = data.get("channels", ["all"])
+                for channel in channels:
+                    topic = _channel_topic(channel)
+                    if topic:
+                        await ws_hub.subscribe(websocket, topic)
+                ws_hub.send_direct(websocket, {
+                    "type": "subscribed",
+                    "channels": channels
+                })
+            
+            elif data.get("type") == "unsubscribe":
+                for channel in data.get("channels", []):
+                    topic = _channel_topic(channel)
+                    if topic and topic != wallet_topic(wallet):
+                        ws_hub.unsubscribe(websocket, topic)
+                
+            elif data.get("type") == "ping":
+                ws_hub.send_direct(websocket, {"type": "pong"})
+                
+            elif data.get("type") == "refresh":
+                # Client requesting full state (e.g. after a failed patch)
+                ws_hub.resync(websocket, data.get("topic") or wallet_topic(wallet))
+                
+    except WebSocketDisconnect:
+        pass
     finally:
         manager.disconnect(websocket, wallet)
 
 
-async def send_heartbeat(websocket: WebSocket, wallet: str):
-    """Send heartbeat every 30 seconds to keep connection alive"""
-    while True:
-        await asyncio.sleep(30)
-        try:
-            await websocket.send_json({
-                "type": "heartbeat",
-                "timestamp": datetime.utcnow().isoformat()
-            })
-        except Exception:
-            break
+def _channel_topic(channel: str):
+    if channel in ("all", "prices", "price_update"):
+        return "prices"
+    if channel.startswith(("token:", "price:")):
+        return token_topic(channel.split(":", 1)[1])
+    return None
 
 
-async def poll_portfolio_updates(websocket: WebSocket, wallet: str):
-    """Poll for portfolio changes every 10 seconds"""
-    last_hash = ""
-    
-    while True:
-        await asyncio.sleep(10)
-        try:
-            # Get current portfolio state
-            snapshot = await get_portfolio_snapshot(wallet)
-            
-            # Simple change detection using hash
-            current_hash = hash(json.dumps(snapshot, sort_keys=True, default=str))
-            
-            if current_hash != last_hash:
-                last_hash = current_hash
-                await websocket.send_json({
-                    "type": "portfolio_update",
-                    "data": snapshot,
-                    "timestamp": datetime.utcnow().isoformat()
-                })
-                
-        except Exception as e:
-            print(f"[WebSocket] Poll error for {wallet[:10]}: {e}")
-            break
+async def _token_state(token: str) -> Optional[dict]:
+    """Producer for "token:<SYM>" topics"""
+    from data_sources.price_snapshot import price_snapshots
+    price = price_snapshots.get_price(token)
+    if price is None:
+        return None
+    return {"token": token, "price": price}
 
 
-async def send_portfolio_snapshot(websocket: WebSocket, wallet: str):
-    """Send full portfolio snapshot"""
-    snapshot = await get_portfolio_snapshot(wallet)
-    await websocket.send_json({
-        "type": "snapshot",
-        "data": snapshot,
-        "timestamp": datetime.utcnow().isoformat()
-    })
+async def _all_prices(_: str) -> Optional[dict]:
+    """Producer for the "prices" topic: symbol -> USD price"""
+    from data_sources.price_snapshot import price_snapshots
+    snapshot = price_snapshots.snapshot
+    return dict(snapshot.symbols) if snapshot.version else None
 
 
 async def get_portfolio_snapshot(wallet: str) -> dict:
@@ -196,6 +168,11 @@ async def get_portfolio_snapshot(wallet: str) -> dict:
         }
 
 
+ws_hub.register_producer("wallet", get_portfolio_snapshot, PORTFOLIO_POLL_INTERVAL)
+ws_hub.register_producer("token", _token_state, PRICE_POLL_INTERVAL)
+ws_hub.register_producer("prices", _all_prices, PRICE_POLL_INTERVAL)
+
+
 # ============================================
 # BROADCAST FUNCTIONS (for other parts of app)
 # ============================================
@@ -220,13 +197,16 @@ async def broadcast_agent_status(wallet: str, agent_id: str, status: str):
 
 
 async def broadcast_price_update(token: str, price: float):
-    """Broadcast token price update to all clients"""
-    await manager.broadcast({
-        "type": "price_update",
-        "token": token,
-        "price": price,
-        "timestamp": datetime.utcnow().isoformat()
-    })
+    """Publish a token price to its topic (coalesced patch, subscribers only)"""
+    ws_hub.publish(token_topic(token), {"token": token.upper(), "price": price})
+    if LEGACY_PRICE_BROADCAST:
+        # Clients that predate topic subscriptions expect a price_update event
+        await manager.broadcast({
+            "type": "price_update",
+            "token": token,
+            "price": price,
+            "timestamp": datetime.utcnow().isoformat()
+        })
 
 
 async def broadcast_allocation(wallet: str, status: str, amount: float = 0, protocol: str = "", tx_hash: str = ""):
@@ -290,28 +270,20 @@ async def websocket_allocation(websocket: WebSocket, wallet: str):
     await manager.connect(websocket, wallet)
     
     try:
-        await websocket.send_json({
+        ws_hub.send_direct(websocket, {
             "type": "connected",
             "message": "Waiting for allocation...",
             "wallet": wallet,
             "timestamp": datetime.utcnow().isoformat()
         })
         
-        # Keep connection alive, wait for messages
+        # Keep connection alive, wait for messages (hub sends heartbeats)
         while True:
-            try:
-                # Wait for any client message (ping, etc)
-                data = await asyncio.wait_for(websocket.receive_json(), timeout=120)
-                
-                if data.get("type") == "ping":
-                    await websocket.send_json({"type": "pong"})
-                    
-            except asyncio.TimeoutError:
-                # Send heartbeat on timeout
-                await websocket.send_json({
-                    "type": "heartbeat",
-                    "timestamp": datetime.utcnow().isoformat()
-                })
+            # Wait for any client message (ping, etc)
+            data = await websocket.receive_json()
+            
+            if data.get("type") == "ping":
+                ws_hub.send_direct(websocket, {"type": "pong"})
                 
     except WebSocketDisconnect:
         pass
@@ -325,6 +297,7 @@ async def websocket_stats():
     """Get WebSocket connection statistics"""
     return {
         "active_connections": manager.get_connection_count(),
-        "wallets_connected": len(manager.active_connections),
+        "wallets_connected": ws_hub.topic_count("wallet:"),
+        "hub": ws_hub.get_stats(),
         "timestamp": datetime.utcnow().isoformat()
     }
@@ -10,6 +10,7 @@ from typing import Optional, Dict, Any
 from web3 import Web3
 import httpx
 from data_sources.multicall import Multicall3
+from data_sources.token_registry import token_registry
 
 logger = logging.getLogger("Aerodrome")
 
@@ -155,6 +156,16 @@ class AerodromeOnChain:
             abi=V2_FACTORY_ABI
         )
     
+    async def _pool_meta(self, pool_address: str):
+        """(pool, token0, token1) metadata from the token registry - read from chain once per pool"""
+        pool = await token_registry.get_pool(pool_address, w3=self.w3)
+        if pool is None:
+            raise ValueError(f"token0/token1 not readable on {pool_address}")
+        tokens = await token_registry.get_tokens([pool.token0, pool.token1], w3=self.w3)
+        if pool.token0 not in tokens or pool.token1 not in tokens:
+            raise ValueError(f"decimals() not readable for tokens of {pool_address}")
+        return pool, tokens[pool.token0], tokens[pool.token1]
+    
     # =========================================================================
     # PRICE FETCHERS (On-Chain)
     # =========================================================================
@@ -171,14 +182,11 @@ class AerodromeOnChain:
             )
             
             reserves = pool.functions.getReserves().call()
-            token0 = pool.functions.token0().call()
-            token1 = pool.functions.token1().call()
             
-            # Get decimals for both tokens
-            token0_contract = self.w3.eth.contract(address=token0, abi=ERC20_ABI)
-            token1_contract = self.w3.eth.contract(address=token1, abi=ERC20_ABI)
-            decimals0 = token0_contract.functions.decimals().call()
-            decimals1 = token1_contract.functions.decimals().call()
+            # Tokens and decimals (token registry)
+            pool_meta, meta0, meta1 = await self._pool_meta(AERO_USDC_POOL)
+            token0 = pool_meta.token0
+            decimals0, decimals1 = meta0.decimals, meta1.decimals
             
             # Convert reserves to human-readable
             reserve0 = reserves[0] / (10 ** decimals0)
@@ -249,7 +257,7 @@ class AerodromeOnChain:
             )
             
             reserves = pool.functions.getReserves().call()
-            token0 = pool.functions.token0().call()
+            token0 = (await self._pool_meta(weth_usdc))[0].token0
             
             reserve0 = reserves[0] / 1e18  # WETH
             reserve1 = reserves[1] / 1e6   # USDC
@@ -288,16 +296,13 @@ class AerodromeOnChain:
             pool = self.w3.eth.contract(address=pool_address, abi=POOL_ABI)
             
             # Get pool data
-            token0 = pool.functions.token0().call()
-            token1 = pool.functions.token1().call()
+            pool_meta, meta0, meta1 = await self._pool_meta(pool_address)
+            token0, token1 = pool_meta.token0, pool_meta.token1
             reserves = pool.functions.getReserves().call()
             total_supply = pool.functions.totalSupply().call()
             
-            # Get token decimals
-            token0_contract = self.w3.eth.contract(address=token0, abi=ERC20_ABI)
-            token1_contract = self.w3.eth.contract(address=token1, abi=ERC20_ABI)
-            decimals0 = token0_contract.functions.decimals().call()
-            decimals1 = token1_contract.functions.decimals().call()
+            # Token decimals (token registry)
+            decimals0, decimals1 = meta0.decimals, meta1.decimals
             
             # Calculate reserves in human-readable format
             reserve0 = reserves[0] / (10 ** decimals0)
@@ -809,16 +814,13 @@ class AerodromeOnChain:
             pool_address = Web3.to_checksum_address(pool_address)
             pool = self.w3.eth.contract(address=pool_address, abi=POOL_ABI)
             
-            # Get basic pool info
-            token0 = pool.functions.token0().call()
-            token1 = pool.functions.token1().call()
+            # Get basic pool info (immutable parts from the token registry)
+            pool_meta, meta0, meta1 = await self._pool_meta(pool_address)
+            token0, token1 = pool_meta.token0, pool_meta.token1
             reserves = pool.functions.getReserves().call()
             total_supply = pool.functions.totalSupply().call()
             
-            try:
-                stable = pool.functions.stable().call()
-            except:
-                stable = False
+            stable = bool(pool_meta.stable)
             
             try:
                 symbol = pool.functions.symbol().call()
@@ -826,13 +828,8 @@ class AerodromeOnChain:
                 symbol = "LP"
             
             # Get token info
-            token0_contract = self.w3.eth.contract(address=token0, abi=ERC20_ABI)
-            token1_contract = self.w3.eth.contract(address=token1, abi=ERC20_ABI)
-            
-            decimals0 = token0_contract.functions.decimals().call()
-            decimals1 = token1_contract.functions.decimals().call()
-            symbol0 = token0_contract.functions.symbol().call()
-            symbol1 = token1_contract.functions.symbol().call()
+            decimals0, decimals1 = meta0.decimals, meta1.decimals
+            symbol0, symbol1 = meta0.symbol or "???", meta1.symbol or "???"
             
             reserve0 = reserves[0] / (10 ** decimals0)
             reserve1 = reserves[1] / (10 ** decimals1)
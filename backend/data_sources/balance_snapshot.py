@@ -0,0 +1,307 @@
+"""
+Balance Snapshot - Every agent's token balances in a few Multicall3 calls
+
+WHY: DepositMonitor.get_balances() made 1 + len(TOKENS) RPC calls per agent
+per poll, and portfolio fetch_all_balances() spawned one thread-pool
+balanceOf per token in ALL_TOKENS plus eth_getBalance - per agent, every
+balance refresh. That is O(agents x tokens) RPC calls per cycle.
+
+DESIGN:
+- One snapshot covers every (agent address x tracked token) pair plus
+  Multicall3.getEthBalance for native ETH
+- Calldata is pre-encoded by hand (selector + padded address) - no web3
+  contract objects per call
+- Calls are chunked into aggregate3 batches (CHUNK_SIZE) fetched
+  concurrently and pinned to the same block
+- Snapshots are shared: any consumer asking within max_age reuses the last
+  one; concurrent requests wait on a single in-flight fetch
+- Address universe = all registered agents (+ addresses asked for within
+  EXTRA_TTL, at most MAX_EXTRA_ADDRESSES), so a full monitor cycle costs
+  1 eth_blockNumber + ceil(pairs / CHUNK_SIZE) calls
+- Only background cycles (refresh_all=True) refresh the whole universe. A
+  request-driven read that misses reads just the addresses it asked for
+  and merges them into the shared snapshot
+- Failed chunks leave addresses out of the snapshot; callers fall back to
+  their direct per-token reads for those
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from web3 import Web3
+
+from data_sources.multicall import MULTICALL3_ABI, MULTICALL3_ADDRESS
+from infrastructure.rpc import get_web3
+
+logger = logging.getLogger(__name__)
+
+# Tracked tokens on Base: symbol -> (address, decimals)
+# Union of portfolio ALL_TOKENS and DepositMonitor TOKENS
+TRACKED_TOKENS: Dict[str, Tuple[str, int]] = {
+    "USDC": ("0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913", 6),
+    "USDT": ("0xfde4C96c8593536E31F229EA8f37b2ADa2699bb2", 6),
+    "DAI": ("0x50c5725949A6F0c72E6C4a641F24049A917DB0Cb", 18),
+    "WETH": ("0x4200000000000000000000000000000000000006", 18),
+    "cbBTC": ("0xcbB7C0000aB88B473b1f5aFd9ef808440eed33Bf", 8),
+    "AERO": ("0x940181a94A35A4569E4529A3CDfB74e38FD98631", 18),
+    "wSOL": ("0x1C61629598e4a901136a81BC138E5828dc150d67", 9),
+    "VIRTUAL": ("0x0b3e328455c4059EEb9e3f84b5543F74E24e7E1b", 18),
+    "DEGEN": ("0x4ed4E862860beD51a9570b96d89aF5E1B0Efefed", 18),
+    "BRETT": ("0x532f27101965dd16442E59d40670FaF5eBB142E4", 18),
+    "TOSHI": ("0xAC1Bd2486aAf3B5C0fc3Fd868558b082a531B2B4", 18),
+    "HIGHER": ("0x0578d8A44db98B23BF096A382e016e29a5Ce0ffe", 18),
+}
+
+NATIVE = "ETH"
+
+BALANCE_OF_SELECTOR = bytes.fromhex("70a08231")      # balanceOf(address)
+GET_ETH_BALANCE_SELECTOR = bytes.fromhex("4d2301cc")  # Multicall3.getEthBalance(address)
+
+CHUNK_SIZE = 500      # calls per aggregate3
+DEFAULT_MAX_AGE = 10  # seconds a snapshot is reused
+EXTRA_TTL = 900       # seconds a non-agent address stays in the universe after its last request
+MAX_EXTRA_ADDRESSES = 1000
+
+
+def _encode_address_call(selector: bytes, address: str) -> bytes:
+    return selector + bytes(12) + bytes.fromhex(address[2:])
+
+
+@dataclass
+class BalanceSnapshot:
+    """Raw balances (smallest units) at one block"""
+    block: int
+    taken_at: float
+    # address (lowercase) -> {symbol or "ETH": raw balance}
+    balances: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    # Addresses whose chunk failed (attempted, but no data)
+    failed: set = field(default_factory=set)
+    # Addresses merged in later by a targeted read -> when they were read
+    read_at: Dict[str, float] = field(default_factory=dict)
+
+    def get(self, address: str) -> Optional[Dict[str, int]]:
+        return self.balances.get((address or "").lower())
+
+    def covers(self, addresses: Iterable[str]) -> bool:
+        return all(a in self.balances or a in self.failed for a in addresses)
+
+    def fresh_for(self, addresses: List[str], max_age: float) -> bool:
+        """Covers addresses, each read within max_age (the whole snapshot if none given)"""
+        now = time.time()
+        if not addresses:
+            return now - self.taken_at <= max_age
+        return self.covers(addresses) and all(
+            now - self.read_at.get(a, self.taken_at) <= max_age for a in addresses
+        )
+
+    def merge(self, other: "BalanceSnapshot"):
+        """Take over a targeted read of a few addresses"""
+        for address in other.balances:
+            self.balances[address] = other.balances[address]
+            self.failed.discard(address)
+            self.read_at[address] = other.taken_at
+        for address in other.failed:
+            self.balances.pop(address, None)
+            self.failed.add(address)
+            self.read_at[address] = other.taken_at
+
+
+class BalanceSnapshotService:
+    """
+    Usage:
+        balances = await balance_snapshots.get_balances(agent_address)
+        # {"ETH": wei, "USDC": 1_000_000, ...} or None if unavailable
+    """
+
+    def __init__(self, w3: Optional[Web3] = None, chunk_size: int = CHUNK_SIZE, max_age: float = DEFAULT_MAX_AGE):
+        self.w3 = w3
+        self.chunk_size = chunk_size
+        self.max_age = max_age
+        self.snapshot: Optional[BalanceSnapshot] = None
+
+        self._inflight: Optional[asyncio.Future] = None
+        self._partial_inflight: Dict[Tuple[str, ...], asyncio.Future] = {}
+        # Non-agent address -> last request time, least recent first
+        self._extra_addresses: "OrderedDict[str, float]" = OrderedDict()
+
+        self.stats = {"snapshots": 0, "partial_reads": 0, "rpc_calls": 0, "failed_chunks": 0, "hits": 0}
+
+    def _get_web3(self) -> Web3:
+        if not self.w3:
+            self.w3 = get_web3()
+        return self.w3
+
+    def _track(self, addresses: List[str]):
+        """Remember requested addresses for later full snapshots (bounded, expiring)"""
+        now = time.time()
+        for address in addresses:
+            self._extra_addresses[address] = now
+            self._extra_addresses.move_to_end(address)
+        while self._extra_addresses:
+            address, asked_at = next(iter(self._extra_addresses.items()))
+            if len(self._extra_addresses) <= MAX_EXTRA_ADDRESSES and now - asked_at <= EXTRA_TTL:
+                break
+            del self._extra_addresses[address]
+
+    def _universe(self) -> List[str]:
+        """Every registered agent address plus recently requested addresses"""
+        self._track([])
+        addresses = set(self._extra_addresses)
+        try:
+            from agents.agent_registry import agent_registry, agent_address_of
+            for _, agent in agent_registry.all_agents():
+                address = agent_address_of(agent)
+                if address and Web3.is_address(address):
+                    addresses.add(address)
+        except Exception as e:
+            logger.debug(f"[BalanceSnapshot] Agent registry unavailable: {e}")
+        return sorted(addresses)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def get_snapshot(
+        self, addresses: Iterable[str] = (), max_age: Optional[float] = None, refresh_all: bool = False
+    ) -> BalanceSnapshot:
+        """
+        Fresh-enough snapshot covering `addresses`.
+
+        Without addresses, or with refresh_all, a miss refreshes every agent
+        (background cycles). Otherwise a miss reads only `addresses`.
+        """
+        wanted = [a.lower() for a in addresses]
+        self._track(wanted)
+        max_age = self.max_age if max_age is None else max_age
+
+        snapshot = self.snapshot
+        if snapshot and snapshot.fresh_for(wanted, max_age):
+            self.stats["hits"] += 1
+            return snapshot
+
+        if not wanted or refresh_all:
+            # Coalesce concurrent refreshes into one fetch
+            if self._inflight is None or self._inflight.done():
+                self._inflight = asyncio.ensure_future(self._refresh())
+            snapshot = await asyncio.shield(self._inflight)
+
+            if not snapshot.covers(wanted):
+                # Address registered after the in-flight fetch started
+                self._inflight = asyncio.ensure_future(self._refresh())
+                snapshot = await asyncio.shield(self._inflight)
+            return snapshot
+
+        # Request-driven miss: a full refresh already running covers it, else read just these
+        if self._inflight is not None and not self._inflight.done():
+            snapshot = await asyncio.shield(self._inflight)
+            if snapshot.covers(wanted):
+                return snapshot
+
+        key = tuple(sorted(set(wanted)))
+        future = self._partial_inflight.get(key)
+        if future is None or future.done():
+            future = self._partial_inflight[key] = asyncio.ensure_future(self._read(list(key)))
+            future.add_done_callback(lambda _: self._partial_inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def get_balances(
+        self, address: str, max_age: Optional[float] = None, refresh_all: bool = False
+    ) -> Optional[Dict[str, int]]:
+        """Raw balances for one address, or None if its chunk failed"""
+        if not address or not Web3.is_address(address):
+            return None
+        snapshot = await self.get_snapshot([address], max_age=max_age, refresh_all=refresh_all)
+        return snapshot.get(address)
+
+    # ------------------------------------------------------------------
+    # Fetch
+    # ------------------------------------------------------------------
+
+    async def _refresh(self) -> BalanceSnapshot:
+        """Full snapshot of the address universe"""
+        self.snapshot = await self._fetch(self._universe())
+        self.stats["snapshots"] += 1
+        return self.snapshot
+
+    async def _read(self, addresses: List[str]) -> BalanceSnapshot:
+        """Targeted read merged into the shared snapshot"""
+        partial = await self._fetch(addresses)
+        self.stats["partial_reads"] += 1
+        if self.snapshot is None:
+            self.snapshot = partial
+        else:
+            self.snapshot.merge(partial)
+        return self.snapshot
+
+    async def _fetch(self, addresses: List[str]) -> BalanceSnapshot:
+        w3 = self._get_web3()
+        block = await asyncio.to_thread(lambda: w3.eth.block_number)
+        self.stats["rpc_calls"] += 1
+
+        calls: List[Tuple[str, str, dict]] = []  # (address, symbol, aggregate3 call)
+        multicall_address = Web3.to_checksum_address(MULTICALL3_ADDRESS)
+        for address in addresses:
+            calls.append((address, NATIVE, {
+                "target": multicall_address,
+                "allowFailure": True,
+                "callData": _encode_address_call(GET_ETH_BALANCE_SELECTOR, address),
+            }))
+            for symbol, (token, _) in TRACKED_TOKENS.items():
+                calls.append((address, symbol, {
+                    "target": Web3.to_checksum_address(token),
+                    "allowFailure": True,
+                    "callData": _encode_address_call(BALANCE_OF_SELECTOR, address),
+                }))
+
+        chunks = [calls[i:i + self.chunk_size] for i in range(0, len(calls), self.chunk_size)]
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self._aggregate, [c[2] for c in chunk], block) for chunk in chunks),
+            return_exceptions=True
+        )
+
+        balances: Dict[str, Dict[str, int]] = {}
+        failed: set = set()
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                self.stats["failed_chunks"] += 1
+                logger.warning(f"[BalanceSnapshot] aggregate3 chunk failed at block {block}: {result}")
+                failed.update(address for address, _, _ in chunk)
+                continue
+            for (address, symbol, _), (success, data) in zip(chunk, result):
+                value = int.from_bytes(data[:32], "big") if success and len(data) >= 32 else 0
+                balances.setdefault(address, {})[symbol] = value
+
+        # An address split across a failed chunk is incomplete - leave it out
+        for address in failed:
+            balances.pop(address, None)
+
+        self.stats["rpc_calls"] += len(chunks)
+        logger.debug(
+            f"[BalanceSnapshot] Block {block}: {len(balances)} addresses x "
+            f"{len(TRACKED_TOKENS) + 1} assets in {len(chunks)} aggregate3 calls"
+        )
+        return BalanceSnapshot(block=block, taken_at=time.time(), balances=balances, failed=failed)
+
+    def _aggregate(self, calls: List[dict], block: int) -> List[Tuple[bool, bytes]]:
+        multicall = self._get_web3().eth.contract(
+            address=Web3.to_checksum_address(MULTICALL3_ADDRESS),
+            abi=MULTICALL3_ABI
+        )
+        return multicall.functions.aggregate3(calls).call(block_identifier=block)
+
+    def get_stats(self) -> dict:
+        snapshot = self.snapshot
+        return {
+            **self.stats,
+            "block": snapshot.block if snapshot else None,
+            "addresses": len(snapshot.balances) if snapshot else 0,
+            "age_seconds": round(time.time() - snapshot.taken_at, 1) if snapshot else None,
+        }
+
+
+# Global instance
+balance_snapshots = BalanceSnapshotService()
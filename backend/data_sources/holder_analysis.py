@@ -1,7 +1,8 @@
 """
 Token Holder Analysis
 Analyzes token holder distribution and whale concentration.
-Uses Moralis API (primary), Covalent/GoldRush (fallback) for EVM chains, Helius for Solana.
+Uses the local Transfer-log holder index for watched Base tokens, then
+Moralis API (primary), Covalent/GoldRush (fallback) for EVM chains, Helius for Solana.
 """
 
 import httpx
@@ -14,6 +15,8 @@ from dotenv import load_dotenv
 # Load .env BEFORE accessing env vars
 load_dotenv()
 
+from data_sources.holder_tracker import holder_tracker
+
 logger = logging.getLogger(__name__)
 
 # API Configuration - loaded dynamically at runtime to ensure env vars are available
@@ -239,6 +242,11 @@ class HolderAnalysis:
         if chain.lower() == "solana":
             return await self._analyze_solana_holders(token_address)
         
+        # Watched tokens are answered from the local Transfer-log index
+        local = self.local_analysis(token_address, chain)
+        if local is not None:
+            return local
+        
         # EVM chains - try Moralis first (better free tier: 40K req/month)
         moralis_key = get_moralis_key()
         logger.warning(f"[DEBUG] Holder analysis for {token_address[:10]}... - Moralis key present: {bool(moralis_key)}, first 10 chars: {moralis_key[:10] if moralis_key else 'NONE'}")
@@ -423,6 +431,24 @@ class HolderAnalysis:
             "note": "Holder data estimated - API key not configured"
         }
     
+    def local_analysis(self, token_address: str, chain: str = "base") -> Optional[Dict[str, Any]]:
+        """
+        Holder analysis from the Transfer-log index (no network I/O).
+        None unless the token is watched and its index has caught up.
+        """
+        if chain.lower() != "base":
+            return None
+        snapshot = holder_tracker.snapshot(token_address)
+        if snapshot is None:
+            return None
+        
+        # Same whale/protocol rules as Moralis data, with the index's own holder count
+        analysis = self._process_moralis_holder_data(snapshot["holders"])
+        analysis["holder_count"] = snapshot["holder_count"]
+        analysis["source"] = "transfer_index"
+        analysis["as_of_block"] = snapshot["last_block"]
+        return analysis
+    
     def _process_moralis_holder_data(
         self,
         holders: List[Dict]
@@ -0,0 +1,456 @@
+"""
+Holder Tracker - Incremental ERC-20 holder balances from Transfer logs
+
+WHY: HolderAnalysis.get_holder_analysis asked Moralis, then Covalent, then
+fell back to a guess for every request. Each call is a slow, rate-limited
+HTTP round-trip, nothing is shared between processes, and without API keys
+the "analysis" is a hardcoded estimate.
+
+DESIGN:
+- Watched tokens get a holder book: balance per address, rebuilt from the
+  token's Transfer logs starting at its deployment block
+- Books are checkpointed by block. Books at the same block share one
+  eth_getLogs per range, and a lagging book's range stops where the next
+  book is, so backfilling books merge with the live ones
+- Ranges that the provider refuses (too many results / range too large)
+  are bisected; any other RPC error backs the whole tracker off
+- Holders are ranked in a sorted list of (-balance, address), so the top
+  100 is a slice and concentration reads are sub-millisecond
+- Top holders are probed once with eth_getCode, so contracts (gauges,
+  vaults, pools) stay out of the whale share, as Moralis' is_contract does
+- Balances, checkpoints and contract flags live in data/holder_index.db.
+  Each range is one transaction, so a restart resumes where it stopped.
+  Loaded books are not served until they reach the head again
+- A book is only served once it has caught up with the chain head and no
+  balance has gone negative (a negative balance means the start block was
+  after deployment)
+- When a served book's top WHALE_WATCH holders change (or it is first
+  served), the LP token's materialized pool analysis re-checks security
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from web3 import Web3
+
+from infrastructure.rpc import get_web3
+from infrastructure.scheduler import scheduler, PRIORITY_LOW
+
+logger = logging.getLogger(__name__)
+
+INDEX_DB = os.path.join(os.path.dirname(__file__), "..", "data", "holder_index.db")
+
+TRANSFER_TOPIC = Web3.keccak(text="Transfer(address,address,uint256)").hex()
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+POLL_INTERVAL = int(os.getenv("HOLDER_TRACKER_INTERVAL", "30"))   # seconds
+MAX_BLOCK_RANGE = 2000        # eth_getLogs block span per request
+RANGES_PER_TICK = 25          # backfill budget - ranges fetched per tick
+TOP_HOLDERS = 100             # holders handed to the analysis
+CONTRACT_PROBES = 20          # top holders checked with eth_getCode
+WHALE_WATCH = 10              # a change in these top holders re-checks the pool's security
+MAX_BACKOFF = 600             # seconds, cap for backing off after RPC errors
+
+# get_logs refusals that mean "ask for fewer blocks" - worth bisecting
+_RANGE_ERRORS = ("more than", "too many", "too large", "block range", "limit exceeded", "response size")
+
+
+def _hex(value) -> str:
+    return value if isinstance(value, str) else Web3.to_hex(value)
+
+
+def _topic_address(topic) -> str:
+    return "0x" + _hex(topic)[-40:].lower()
+
+
+def _uint(data) -> int:
+    """uint256 log data; empty data ("0x") is 0"""
+    data = _hex(data)
+    return int(data, 16) if data not in ("0x", "") else 0
+
+
+def _is_range_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in _RANGE_ERRORS)
+
+
+class HolderBook:
+    """Balances of one token with a sorted top-holder ranking"""
+
+    def __init__(self, token: str, start_block: int, last_block: Optional[int] = None):
+        self.token = token
+        self.start_block = start_block
+        self.last_block = start_block - 1 if last_block is None else last_block
+        self.balances: Dict[str, int] = {}
+        self.ranked: List[Tuple[int, str]] = []     # (-balance, address), richest first
+        self.supply = 0
+        self.negative = 0                           # holders below zero - book incomplete
+        self.synced = False                         # caught up with the head at least once
+        self.dirty: Dict[str, int] = {}             # address -> balance, unsaved
+
+    def transfer(self, sender: str, receiver: str, amount: int):
+        if sender == ZERO_ADDRESS:
+            self.supply += amount
+        else:
+            self.set_balance(sender, self.balances.get(sender, 0) - amount)
+        if receiver == ZERO_ADDRESS:
+            self.supply -= amount
+        else:
+            self.set_balance(receiver, self.balances.get(receiver, 0) + amount)
+
+    def set_balance(self, address: str, balance: int):
+        old = self.balances.get(address, 0)
+        if old == balance:
+            return
+        if old > 0:
+            del self.ranked[bisect_left(self.ranked, (-old, address))]
+        elif old < 0:
+            self.negative -= 1
+        if balance > 0:
+            insort(self.ranked, (-balance, address))
+            self.balances[address] = balance
+        elif balance < 0:
+            self.negative += 1
+            self.balances[address] = balance
+        else:
+            self.balances.pop(address, None)
+        self.dirty[address] = balance
+
+    def top(self, n: int = TOP_HOLDERS) -> List[Tuple[str, int]]:
+        return [(address, -balance) for balance, address in self.ranked[:n]]
+
+    @property
+    def holder_count(self) -> int:
+        return len(self.ranked)
+
+    @property
+    def ready(self) -> bool:
+        return self.synced and self.negative == 0 and self.supply > 0
+
+
+class HolderTracker:
+    """
+    Transfer-log holder index for watched tokens (Base).
+
+    Usage:
+        holder_tracker.watch(token, start_block=deployment_block)
+        holder_tracker.start()
+        snapshot = holder_tracker.snapshot(token)   # None until caught up
+    """
+
+    def __init__(self, path: Optional[str] = INDEX_DB):
+        self.path = path
+        self.confirmations = int(os.getenv("HOLDER_TRACKER_CONFIRMATIONS", "3"))
+        self.books: Dict[str, HolderBook] = {}
+        self.contracts: Dict[str, bool] = {}        # address -> has code
+        self.w3: Optional[Web3] = None
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._loaded = False
+        self.retry_at = 0.0                         # backing off after an RPC error until then
+        self.backoff = 0.0
+        self.stats = {"ticks": 0, "get_logs": 0, "logs": 0, "splits": 0, "code_probes": 0, "errors": 0}
+
+    # ------------------------------------------------------------------
+    # Setup
+    # ------------------------------------------------------------------
+
+    def watch(self, token: str, start_block: int = 0) -> HolderBook:
+        """Track a token from its deployment block (idempotent)"""
+        self.load()
+        token = token.lower()
+        book = self.books.get(token)
+        if book is None:
+            book = HolderBook(token, start_block)
+            self.books[token] = book
+            self._save_book(book)
+            logger.info(f"[HolderTracker] Watching {token[:10]}... from block {start_block}")
+        return book
+
+    def unwatch(self, token: str):
+        token = token.lower()
+        self.books.pop(token, None)
+        with self._lock:
+            conn = self._db()
+            if conn is not None:
+                conn.execute("DELETE FROM books WHERE token = ?", (token,))
+                conn.execute("DELETE FROM balances WHERE token = ?", (token,))
+
+    def start(self):
+        """Load persisted books, add HOLDER_TRACKER_TOKENS and poll on the shared scheduler"""
+        self.load()
+        for entry in filter(None, os.getenv("HOLDER_TRACKER_TOKENS", "").split(",")):
+            token, _, start_block = entry.strip().partition(":")
+            self.watch(token, int(start_block or 0))
+        scheduler.register("holder_tracker", self.tick, POLL_INTERVAL, priority=PRIORITY_LOW)
+        scheduler.start()
+
+    def stop(self):
+        scheduler.unregister("holder_tracker")
+
+    def _get_web3(self) -> Web3:
+        if not self.w3:
+            self.w3 = get_web3()
+        return self.w3
+
+    # ------------------------------------------------------------------
+    # Local reads
+    # ------------------------------------------------------------------
+
+    def snapshot(self, token: str, n: int = TOP_HOLDERS) -> Optional[dict]:
+        """
+        Top holders in Moralis' owner shape, or None while the book is not ready.
+
+        Returns:
+            {"holders": [{"owner_address", "balance", "percentage_relative_to_total_supply",
+                          "is_contract"}, ...], "holder_count": int, "last_block": int}
+        """
+        book = self.books.get(token.lower())
+        if book is None or not book.ready:
+            return None
+        holders = [
+            {
+                "owner_address": address,
+                "balance": str(balance),
+                "percentage_relative_to_total_supply": balance * 100 / book.supply,
+                "is_contract": self.contracts.get(address, False),
+            }
+            for address, balance in book.top(n)
+        ]
+        return {"holders": holders, "holder_count": book.holder_count, "last_block": book.last_block}
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "books": len(self.books),
+            "ready": sum(1 for b in self.books.values() if b.ready),
+        }
+
+    # ------------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------------
+
+    async def tick(self):
+        """Advance every book towards the head, lowest checkpoint first"""
+        if not self.books or time.time() < self.retry_at:
+            return
+        self.stats["ticks"] += 1
+
+        w3 = self._get_web3()
+        head = await asyncio.to_thread(lambda: w3.eth.block_number)
+        to_block = head - self.confirmations
+        tops = {token: self._top_addresses(book) for token, book in self.books.items() if book.synced}
+
+        for _ in range(RANGES_PER_TICK):
+            behind = [b for b in self.books.values() if b.last_block < to_block]
+            if not behind:
+                break
+            from_block = min(b.last_block for b in behind) + 1
+            group = [b for b in behind if b.last_block + 1 == from_block]
+            ahead = [b.last_block for b in behind if b.last_block + 1 > from_block]
+            # Stop at the next book's checkpoint so the two merge into one filter
+            end_block = min([from_block + MAX_BLOCK_RANGE - 1, to_block] + ahead)
+
+            try:
+                logs = await self._fetch_range([b.token for b in group], from_block, end_block)
+            except Exception as e:
+                self.stats["errors"] += 1
+                self.backoff = min(MAX_BACKOFF, max(POLL_INTERVAL, self.backoff * 2))
+                self.retry_at = time.time() + self.backoff
+                logger.warning(f"[HolderTracker] get_logs {from_block}-{end_block} failed, "
+                               f"backing off {self.backoff:.0f}s: {e}")
+                return
+            self.backoff = 0.0
+            self._apply(group, logs)
+            for book in group:
+                book.last_block = end_block
+            self._save_books(group)
+
+        for book in self.books.values():
+            if book.last_block >= to_block and not book.synced:
+                book.synced = True
+                if book.negative:
+                    logger.warning(f"[HolderTracker] {book.token[:10]}... has {book.negative} negative balances "
+                                   f"- start block {book.start_block} is after deployment, not serving")
+                else:
+                    logger.info(f"[HolderTracker] {book.token[:10]}... caught up: {book.holder_count} holders")
+
+        self._invalidate_analyses([
+            token for token, book in self.books.items()
+            if book.synced and not book.negative and tops.get(token) != self._top_addresses(book)
+        ])
+        await self._probe_contracts()
+
+    @staticmethod
+    def _top_addresses(book: HolderBook) -> List[str]:
+        return [address for address, _ in book.top(WHALE_WATCH)]
+
+    @staticmethod
+    def _invalidate_analyses(tokens: List[str]):
+        """Newly served or reshuffled books change the whale section of the pool's analysis"""
+        if not tokens:
+            return
+        from agents.pool_analysis_store import pool_analysis_store
+        for token in tokens:
+            pool_analysis_store.invalidate(token, "base", "security")
+
+    async def _fetch_range(self, tokens: List[str], from_block: int, to_block: int) -> List[dict]:
+        """Transfer logs of tokens in [from_block, to_block]; bisects ranges the provider rejects as too large"""
+        params = {
+            "address": [Web3.to_checksum_address(t) for t in tokens],
+            "topics": [TRANSFER_TOPIC],
+            "fromBlock": from_block,
+            "toBlock": to_block,
+        }
+        try:
+            logs = await asyncio.to_thread(self._get_web3().eth.get_logs, params)
+        except Exception as e:
+            if to_block <= from_block or not _is_range_error(e):
+                raise
+            self.stats["splits"] += 1
+            logger.debug(f"[HolderTracker] Splitting {from_block}-{to_block}: {e}")
+            middle = (from_block + to_block) // 2
+            return (await self._fetch_range(tokens, from_block, middle)
+                    + await self._fetch_range(tokens, middle + 1, to_block))
+        self.stats["get_logs"] += 1
+        self.stats["logs"] += len(logs)
+        return logs
+
+    def _apply(self, books: List[HolderBook], logs: List[dict]):
+        by_token = {book.token: book for book in books}
+        for log in logs:
+            topics = log.get("topics", [])
+            # ERC-721 Transfer shares the signature but indexes tokenId (4 topics)
+            if len(topics) != 3 or _hex(topics[0]) != TRANSFER_TOPIC:
+                continue
+            book = by_token.get((log.get("address") or "").lower())
+            if book is None:
+                continue
+            amount = _uint(log.get("data", "0x"))
+            book.transfer(_topic_address(topics[1]), _topic_address(topics[2]), amount)
+
+    async def _probe_contracts(self):
+        """eth_getCode for top holders not yet classified"""
+        unknown = list(dict.fromkeys(
+            address
+            for book in self.books.values() if book.synced
+            for address, _ in book.top(CONTRACT_PROBES)
+            if address not in self.contracts
+        ))
+        if not unknown:
+            return
+        w3 = self._get_web3()
+        results = await asyncio.gather(
+            *(asyncio.to_thread(w3.eth.get_code, Web3.to_checksum_address(a)) for a in unknown),
+            return_exceptions=True
+        )
+        found = {}
+        for address, code in zip(unknown, results):
+            if isinstance(code, Exception):
+                continue
+            found[address] = len(code) > 0
+        self.stats["code_probes"] += len(unknown)
+        self.contracts.update(found)
+        with self._lock:
+            conn = self._db()
+            if conn is not None and found:
+                conn.executemany("INSERT OR REPLACE INTO contracts VALUES (?, ?)",
+                                 [(a, int(c)) for a, c in found.items()])
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self) -> int:
+        """Load persisted books and contract flags (once)"""
+        if self._loaded:
+            return len(self.books)
+        self._loaded = True
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return 0
+            books = conn.execute("SELECT token, start_block, last_block, supply FROM books").fetchall()
+            balances = conn.execute("SELECT token, holder, balance FROM balances").fetchall()
+            contracts = conn.execute("SELECT address, is_contract FROM contracts").fetchall()
+
+        # synced starts False: the chain moved on while we were down, so a
+        # loaded book is not served until it reaches the head again
+        for token, start_block, last_block, supply in books:
+            book = HolderBook(token, start_block, last_block)
+            book.supply = int(supply)
+            self.books[token] = book
+        for token, holder, balance in balances:
+            book = self.books.get(token)
+            if book is not None:
+                book.set_balance(holder, int(balance))
+        for book in self.books.values():
+            book.dirty.clear()
+        self.contracts.update((address, bool(flag)) for address, flag in contracts)
+        logger.info(f"[HolderTracker] Loaded {len(books)} books, {len(balances)} balances")
+        return len(books)
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """Open the index file on first use, not at import"""
+        if self._conn is None and self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS books (token TEXT PRIMARY KEY, start_block INTEGER NOT NULL, "
+                "last_block INTEGER NOT NULL, supply TEXT NOT NULL)"
+            )
+            # Older index files kept a synced flag nothing reads - load() always resyncs
+            if "synced" in [row[1] for row in conn.execute("PRAGMA table_info(books)")]:
+                conn.execute("ALTER TABLE books DROP COLUMN synced")
+            # Balances are uint256 - stored as decimal text
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS balances (token TEXT NOT NULL, holder TEXT NOT NULL, "
+                "balance TEXT NOT NULL, PRIMARY KEY (token, holder))"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS contracts (address TEXT PRIMARY KEY, is_contract INTEGER NOT NULL)")
+            self._conn = conn
+        return self._conn
+
+    def _save_book(self, book: HolderBook):
+        self._save_books([book])
+
+    def _save_books(self, books: List[HolderBook]):
+        """Checkpoint and changed balances in one transaction"""
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                for book in books:
+                    book.dirty.clear()
+                return
+            conn.execute("BEGIN")
+            try:
+                for book in books:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO books VALUES (?, ?, ?, ?)",
+                        (book.token, book.start_block, book.last_block, str(book.supply))
+                    )
+                    conn.executemany(
+                        "DELETE FROM balances WHERE token = ? AND holder = ?",
+                        [(book.token, a) for a, balance in book.dirty.items() if balance == 0]
+                    )
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO balances VALUES (?, ?, ?)",
+                        [(book.token, a, str(balance)) for a, balance in book.dirty.items() if balance != 0]
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            for book in books:
+                book.dirty.clear()
+
+
+# Global instance
+holder_tracker = HolderTracker()
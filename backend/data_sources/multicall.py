@@ -4,11 +4,19 @@ Reduces 12s of sequential calls to ~1-2s.
 
 Multicall3 is deployed at the same address on all EVMs:
 0xcA11bde05977b3631167028862bE2a173976CA11
+
+MulticallBatcher is the async variant: an awaitable stand-in for
+ContractFunction.call() that merges every read awaited by any coroutine in
+the same short window into shared aggregate3 calls.
 """
 
+import asyncio
 import logging
 from typing import List, Tuple, Any, Optional
+from eth_abi import decode as abi_decode, encode as abi_encode
+from eth_utils import function_abi_to_4byte_selector
 from web3 import Web3
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError
 
 logger = logging.getLogger("Multicall")
 
@@ -160,6 +168,153 @@ class Multicall3:
         self.calls = []
 
 
+BATCH_WINDOW = 0.005      # seconds reads are collected before a flush
+BATCH_MAX_CALLS = 400     # calls per aggregate3
+
+
+class MulticallBatcher:
+    """
+    Awaitable, auto-batching ContractFunction.call().
+
+    Usage:
+        batcher = MulticallBatcher(w3)
+        # Reads awaited together - here or in other coroutines - share calls
+        decimals, symbol = await batcher.read(token.functions.decimals(), token.functions.symbol())
+        fee = await batcher.call(pool.functions.fee())
+
+    Results are decoded and normalized exactly like .call() (checksummed
+    addresses, single outputs unwrapped). A reverted read raises
+    ContractLogicError in the awaiting coroutine only; dependent reads simply
+    await the first round and land in the next shared batch.
+    """
+
+    def __init__(self, w3: Web3, window: float = BATCH_WINDOW, max_calls: int = BATCH_MAX_CALLS):
+        self.w3 = w3
+        self.window = window
+        self.max_calls = max_calls
+        self.multicall = w3.eth.contract(
+            address=Web3.to_checksum_address(MULTICALL3_ADDRESS),
+            abi=MULTICALL3_ABI
+        )
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self.stats = {"calls": 0, "batches": 0, "rpc_calls": 0, "failed": 0}
+
+    def call(self, fn) -> "asyncio.Future":
+        """Queue one bound ContractFunction; resolves to its decoded result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((fn, future))
+        self.stats["calls"] += 1
+        if self._flush_task is None:
+            # Held here so the pending flush can't be garbage-collected
+            self._flush_task = loop.create_task(self._flush_later())
+        return future
+
+    async def read(self, *fns, allow_failure: bool = False) -> List[Any]:
+        """
+        One round of independent reads. With allow_failure, failed reads
+        come back as None instead of raising.
+        """
+        results = await asyncio.gather(*(self.call(fn) for fn in fns), return_exceptions=allow_failure)
+        if allow_failure:
+            return [None if isinstance(r, Exception) else r for r in results]
+        return list(results)
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        # Reads queued from here on (next rounds) get their own flush
+        batch, self._pending = self._pending, []
+        self._flush_task = None
+        if not batch:
+            return
+        self.stats["batches"] += 1
+        chunks = [batch[i:i + self.max_calls] for i in range(0, len(batch), self.max_calls)]
+        await asyncio.gather(*(self._execute(chunk) for chunk in chunks))
+
+    async def _execute(self, chunk: List[Tuple[Any, asyncio.Future]]):
+        calls = []
+        for fn, future in chunk:
+            try:
+                calls.append({
+                    "target": fn.address,
+                    "allowFailure": True,
+                    "callData": _encode_call(fn)
+                })
+            except Exception as e:
+                calls.append(None)
+                future.set_exception(e)
+        live = [(call, item) for call, item in zip(calls, chunk) if call is not None]
+        if not live:
+            return
+
+        self.stats["rpc_calls"] += 1
+        try:
+            results = await asyncio.to_thread(self._aggregate, [call for call, _ in live])
+        except Exception as e:
+            logger.error(f"Multicall batch failed: {e}")
+            for _, (_, future) in live:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, (fn, future)), (success, data) in zip(live, results):
+            if future.done():
+                continue
+            if not success:
+                self.stats["failed"] += 1
+                future.set_exception(ContractLogicError(f"{fn.fn_name} reverted on {fn.address}"))
+                continue
+            try:
+                future.set_result(self._decode(fn, data))
+            except Exception as e:
+                self.stats["failed"] += 1
+                future.set_exception(BadFunctionCallOutput(f"Could not decode {fn.fn_name} on {fn.address}: {e}"))
+
+    def _decode(self, fn, data: bytes) -> Any:
+        """Same decoding/normalization as ContractFunction.call()"""
+        outputs = fn.abi.get("outputs", [])
+        decoded = abi_decode(_abi_types(outputs), data)
+        normalized = [_checksum(param, value) for param, value in zip(outputs, decoded)]
+        return normalized[0] if len(normalized) == 1 else normalized
+
+    def _aggregate(self, calls: List[dict]) -> List[Tuple[bool, bytes]]:
+        """One blocking aggregate3 (runs in a worker thread)"""
+        return self.multicall.functions.aggregate3(calls).call()
+
+
+def _abi_type(param: dict) -> str:
+    """ABI param -> canonical type string, tuples collapsed to "(a,b)[]" """
+    kind = param["type"]
+    if kind.startswith("tuple"):
+        return "(" + ",".join(_abi_types(param["components"])) + ")" + kind[len("tuple"):]
+    return kind
+
+
+def _abi_types(params: List[dict]) -> List[str]:
+    return [_abi_type(p) for p in params]
+
+
+def _checksum(param: dict, value: Any) -> Any:
+    """Checksum decoded addresses, including inside arrays and tuples"""
+    kind = param["type"]
+    if kind.endswith("]"):
+        inner = dict(param, type=kind[:kind.rindex("[")])
+        return type(value)(_checksum(inner, v) for v in value)
+    if kind == "tuple":
+        return tuple(_checksum(c, v) for c, v in zip(param["components"], value))
+    if kind == "address":
+        return Web3.to_checksum_address(value)
+    return value
+
+
+def _encode_call(fn) -> bytes:
+    """Selector + ABI-encoded args of a bound ContractFunction"""
+    inputs = fn.abi.get("inputs", [])
+    args = list(fn.args) + [fn.kwargs[p["name"]] for p in inputs[len(fn.args):]]
+    return function_abi_to_4byte_selector(fn.abi) + abi_encode(_abi_types(inputs), args)
+
+
 async def batch_aerodrome_calls(
     w3: Web3,
     pool_address: str,
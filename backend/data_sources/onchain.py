@@ -213,6 +213,17 @@ class OnChainClient:
         
         return None
     
+    async def _pool_meta(self, w3: Web3, chain: str, pool_address: str):
+        """(pool, token0, token1) metadata from the token registry - read from chain once per pool"""
+        from data_sources.token_registry import token_registry
+        pool = await token_registry.get_pool(pool_address, chain, w3=w3)
+        if pool is None:
+            raise ValueError(f"token0/token1 not readable on {pool_address}")
+        tokens = await token_registry.get_tokens([pool.token0, pool.token1], chain, w3=w3)
+        if pool.token0 not in tokens or pool.token1 not in tokens:
+            raise ValueError(f"decimals() not readable for tokens of {pool_address}")
+        return pool, tokens[pool.token0], tokens[pool.token1]
+    
     async def get_lp_reserves(self, chain: str, pool_address: str) -> Optional[Dict[str, Any]]:
         """
         Get LP pool reserves directly from on-chain
@@ -235,18 +246,12 @@ class OnChainClient:
             
             # Get reserves
             reserves = pool_contract.functions.getReserves().call()
-            token0 = pool_contract.functions.token0().call()
-            token1 = pool_contract.functions.token1().call()
-            
-            # Get token decimals
-            token0_contract = w3.eth.contract(address=token0, abi=ERC20_ABI)
-            token1_contract = w3.eth.contract(address=token1, abi=ERC20_ABI)
             
-            decimals0 = token0_contract.functions.decimals().call()
-            decimals1 = token1_contract.functions.decimals().call()
-            
-            symbol0 = token0_contract.functions.symbol().call()
-            symbol1 = token1_contract.functions.symbol().call()
+            # Tokens, decimals and symbols (token registry)
+            pool_meta, meta0, meta1 = await self._pool_meta(w3, chain, pool_address)
+            token0, token1 = pool_meta.token0, pool_meta.token1
+            decimals0, decimals1 = meta0.decimals, meta1.decimals
+            symbol0, symbol1 = meta0.symbol, meta1.symbol
             
             return {
                 "reserve0": reserves[0] / (10 ** decimals0),
@@ -323,9 +328,10 @@ class OnChainClient:
             pool_address = Web3.to_checksum_address(pool_address)
             pool_contract = w3.eth.contract(address=pool_address, abi=CL_POOL_ABI)
             
-            # Get basic pool info
-            token0 = pool_contract.functions.token0().call()
-            token1 = pool_contract.functions.token1().call()
+            # Get basic pool info (immutable parts from the token registry)
+            pool_meta, meta0, meta1 = await self._pool_meta(w3, chain, pool_address)
+            token0 = Web3.to_checksum_address(pool_meta.token0)
+            token1 = Web3.to_checksum_address(pool_meta.token1)
             liquidity = pool_contract.functions.liquidity().call()
             
             # Get slot0 for price info
@@ -338,19 +344,14 @@ class OnChainClient:
                 tick = 0
             
             # Get fee if available
-            try:
-                fee = pool_contract.functions.fee().call()
-            except:
-                fee = 0
+            fee = pool_meta.fee or 0
             
             # Get token info
             token0_contract = w3.eth.contract(address=token0, abi=ERC20_ABI)
             token1_contract = w3.eth.contract(address=token1, abi=ERC20_ABI)
             
-            decimals0 = token0_contract.functions.decimals().call()
-            decimals1 = token1_contract.functions.decimals().call()
-            symbol0 = token0_contract.functions.symbol().call()
-            symbol1 = token1_contract.functions.symbol().call()
+            decimals0, decimals1 = meta0.decimals, meta1.decimals
+            symbol0, symbol1 = meta0.symbol, meta1.symbol
             
             # Get token balances in pool (for TVL estimation)
             balance0 = token0_contract.functions.balanceOf(pool_address).call()
@@ -415,29 +416,16 @@ class OnChainClient:
             
             # Try to get at least token0/token1 from any pool type
             try:
-                # Generic token ABI attempt
-                generic_abi = [
-                    {"constant": True, "inputs": [], "name": "token0", 
-                     "outputs": [{"type": "address"}], "type": "function"},
-                    {"constant": True, "inputs": [], "name": "token1", 
-                     "outputs": [{"type": "address"}], "type": "function"},
-                ]
-                contract = w3.eth.contract(address=pool_address, abi=generic_abi)
-                token0 = contract.functions.token0().call()
-                token1 = contract.functions.token1().call()
-                
-                # Get token symbols
-                token0_c = w3.eth.contract(address=token0, abi=ERC20_ABI)
-                token1_c = w3.eth.contract(address=token1, abi=ERC20_ABI)
+                pool_meta, meta0, meta1 = await self._pool_meta(w3, chain, pool_address)
                 
                 return {
                     "pool_type": "unknown",
-                    "token0": token0.lower(),
-                    "token1": token1.lower(),
-                    "symbol0": token0_c.functions.symbol().call(),
-                    "symbol1": token1_c.functions.symbol().call(),
-                    "decimals0": token0_c.functions.decimals().call(),
-                    "decimals1": token1_c.functions.decimals().call(),
+                    "token0": pool_meta.token0,
+                    "token1": pool_meta.token1,
+                    "symbol0": meta0.symbol,
+                    "symbol1": meta1.symbol,
+                    "decimals0": meta0.decimals,
+                    "decimals1": meta1.decimals,
                 }
             except:
                 pass
@@ -0,0 +1,275 @@
+"""
+Pool Age - Deployment block and time of a contract, found once, kept forever
+
+WHY: PoolEnricher._get_pool_age asked for every Transfer log of the pool from
+block 1 to 0xF00000 just to read the first one. Providers often reject that
+range (or the result size), busy pools return thousands of logs, the
+hardcoded end block has been passed by Base since, and the answer only
+lived in a 30 minute memory cache - although a contract's creation never
+changes.
+
+DESIGN:
+- The deployment block is the first block where eth_getCode is non-empty.
+  That is monotonic, so it can be bisected
+- Each round probes PROBES_PER_ROUND blocks spread across the remaining
+  range, all sent as one JSON-RPC batch. Base's ~30M blocks take about 7
+  rounds instead of ~25 sequential calls, and one round serves every
+  address being looked up
+- The final round also reads the block timestamp
+- Results are stored in data/pool_age.db and never expire. Misses (no code
+  at head, RPC without historical state) are remembered for MISS_TTL only
+- Historical eth_getCode needs an archive RPC (Alchemy is); a pruned node
+  errors and the lookup is a miss, the same outcome as the old code. An
+  address whose probes fail is kept for PROBE_RETRIES more rounds first
+- Only Base is indexed (get_rpc_url() is the Base RPC); other chains
+  resolve nothing rather than being answered from Base
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from infrastructure.rpc import get_rpc_url
+
+logger = logging.getLogger(__name__)
+
+AGE_DB = os.path.join(os.path.dirname(__file__), "..", "data", "pool_age.db")
+
+PROBES_PER_ROUND = 16         # eth_getCode probes per address per round
+MAX_BATCH = 200               # JSON-RPC calls per HTTP request
+MISS_TTL = 1800               # seconds before a failed lookup is retried
+PROBE_RETRIES = 1             # extra rounds for an address whose getCode failed
+SUPPORTED_CHAIN = "base"      # the chain get_rpc_url() points at
+
+
+@dataclass(frozen=True)
+class Deployment:
+    address: str
+    block: int
+    timestamp: int            # unix seconds of the deployment block
+
+    @property
+    def age_days(self) -> int:
+        return max(0, int((time.time() - self.timestamp) // 86400))
+
+    @property
+    def deployed_at(self) -> str:
+        return datetime.fromtimestamp(self.timestamp, tz=timezone.utc).isoformat()
+
+
+def _probe_blocks(lo: int, hi: int, count: int) -> List[int]:
+    """Up to count blocks spread strictly between lo and hi"""
+    span = hi - lo - 1
+    if span <= count:
+        return list(range(lo + 1, hi))
+    return sorted({lo + (span * i) // (count + 1) + 1 for i in range(1, count + 1)})
+
+
+class PoolAgeService:
+    """Batched deployment-block bisection with a permanent SQLite cache"""
+
+    def __init__(self, path: Optional[str] = AGE_DB, rpc_url: Optional[str] = None):
+        self.path = path
+        self.rpc_url = rpc_url
+        self._memory: Dict[Tuple[str, str], Deployment] = {}
+        self._misses: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.stats = {"hits": 0, "lookups": 0, "rounds": 0, "rpc_requests": 0, "rpc_calls": 0, "misses": 0}
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def cached(self, address: str, chain: str = "base") -> Optional[Deployment]:
+        key = (chain.lower(), address.lower())
+        deployment = self._memory.get(key)
+        if deployment is None:
+            deployment = self._load_one(*key)
+            if deployment is not None:
+                self._memory[key] = deployment
+        return deployment
+
+    async def get_deployment(self, address: str, chain: str = "base") -> Optional[Deployment]:
+        return (await self.get_deployments([address], chain)).get(address.lower())
+
+    async def get_age_days(self, address: str, chain: str = "base") -> Optional[int]:
+        deployment = await self.get_deployment(address, chain)
+        return deployment.age_days if deployment else None
+
+    async def get_deployments(self, addresses: Iterable[str], chain: str = "base") -> Dict[str, Deployment]:
+        """address (lowercase) -> Deployment; unresolved addresses are left out"""
+        chain = chain.lower()
+        if chain != SUPPORTED_CHAIN:
+            logger.debug(f"[PoolAge] {chain} is not indexed, only {SUPPORTED_CHAIN}")
+            return {}
+        found, missing = {}, []
+        now = time.time()
+        for address in dict.fromkeys(a.lower() for a in addresses):
+            deployment = self.cached(address, chain)
+            if deployment is not None:
+                found[address] = deployment
+            elif now - self._misses.get((chain, address), 0) > MISS_TTL:
+                missing.append(address)
+        self.stats["hits"] += len(found)
+        if not missing:
+            return found
+
+        self.stats["lookups"] += len(missing)
+        try:
+            resolved = await self._bisect(missing)
+        except Exception as e:
+            logger.warning(f"[PoolAge] Deployment lookup failed for {len(missing)} addresses: {e}")
+            resolved = {}
+
+        for address in missing:
+            if address not in resolved:
+                self._misses[(chain, address)] = now
+                self.stats["misses"] += 1
+        if resolved:
+            self._store(chain, list(resolved.values()))
+        found.update(resolved)
+        return found
+
+    # ------------------------------------------------------------------
+    # Bisection
+    # ------------------------------------------------------------------
+
+    async def _bisect(self, addresses: List[str]) -> Dict[str, Deployment]:
+        async with httpx.AsyncClient(timeout=20) as client:
+            head = int((await self._batch(client, [("eth_blockNumber", [])]))[0], 16)
+
+            # Invariant per address: no code at lo (-1 = before genesis), code at hi
+            bounds = {address: (-1, head) for address in addresses}
+            unchecked = set(addresses)      # code at head not confirmed yet
+            retries: Dict[str, int] = {}
+            while True:
+                probes = []
+                for address, (lo, hi) in bounds.items():
+                    blocks = [hi] if address in unchecked else _probe_blocks(lo, hi, PROBES_PER_ROUND)
+                    probes.extend((address, block) for block in blocks)
+                if not probes:
+                    break
+
+                self.stats["rounds"] += 1
+                results = await self._batch(client, [("eth_getCode", [a, hex(b)]) for a, b in probes])
+                failed = set()
+                by_address: Dict[str, List[Tuple[int, bool]]] = {}
+                for (address, block), result in zip(probes, results):
+                    if isinstance(result, Exception):
+                        failed.add(address)
+                    else:
+                        by_address.setdefault(address, []).append((block, result not in (None, "0x", "0x0")))
+
+                for address in failed:
+                    retries[address] = retries.get(address, 0) + 1
+                    if retries[address] > PROBE_RETRIES:
+                        logger.debug(f"[PoolAge] getCode failed for {address[:10]}..., giving up")
+                        bounds.pop(address, None)
+                # Answers that did arrive still narrow the range (the rest is re-probed)
+                for address, answers in by_address.items():
+                    if address not in bounds:
+                        continue
+                    if address in unchecked:
+                        unchecked.discard(address)
+                        if not answers[0][1]:
+                            bounds.pop(address)  # No code at head: not a contract
+                        continue
+                    lo, hi = bounds[address]
+                    for block, has_code in sorted(answers):
+                        if has_code:
+                            hi = min(hi, block)
+                            break
+                        lo = block
+                    bounds[address] = (lo, hi)
+
+            # Narrowed to a single block: hi is the deployment block
+            deployed = {address: hi for address, (lo, hi) in bounds.items()}
+            blocks = sorted(set(deployed.values()))
+            headers = await self._batch(client, [("eth_getBlockByNumber", [hex(b), False]) for b in blocks])
+
+        timestamps = {
+            block: int(header["timestamp"], 16)
+            for block, header in zip(blocks, headers)
+            if isinstance(header, dict) and header.get("timestamp")
+        }
+        return {
+            address: Deployment(address=address, block=block, timestamp=timestamps[block])
+            for address, block in deployed.items() if block in timestamps
+        }
+
+    async def _batch(self, client: httpx.AsyncClient, calls: List[Tuple[str, list]]) -> list:
+        """JSON-RPC batch; each entry is the result or an Exception, in call order"""
+        results: list = []
+        for start in range(0, len(calls), MAX_BATCH):
+            chunk = calls[start:start + MAX_BATCH]
+            payload = [
+                {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+                for i, (method, params) in enumerate(chunk)
+            ]
+            resp = await client.post(self.rpc_url or get_rpc_url(), json=payload)
+            resp.raise_for_status()
+            self.stats["rpc_requests"] += 1
+            self.stats["rpc_calls"] += len(chunk)
+
+            body = resp.json()
+            if isinstance(body, dict):
+                # Some providers answer a rejected batch with a single error object
+                raise RuntimeError(body.get("error") or body)
+            by_id = {item.get("id"): item for item in body}
+            for i in range(len(chunk)):
+                item = by_id.get(i, {})
+                if "result" in item:
+                    results.append(item["result"])
+                else:
+                    results.append(RuntimeError(item.get("error", "missing response")))
+        return results
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """Open the age file on first use, not at import"""
+        if self._conn is None and self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS deployments (chain TEXT NOT NULL, address TEXT NOT NULL, "
+                "block INTEGER NOT NULL, timestamp INTEGER NOT NULL, PRIMARY KEY (chain, address))"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _load_one(self, chain: str, address: str) -> Optional[Deployment]:
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT block, timestamp FROM deployments WHERE chain = ? AND address = ?", (chain, address)
+            ).fetchone()
+        return Deployment(address, *row) if row else None
+
+    def _store(self, chain: str, records: List[Deployment]):
+        for record in records:
+            self._memory[(chain, record.address)] = record
+        with self._lock:
+            conn = self._db()
+            if conn is not None:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO deployments VALUES (?, ?, ?, ?)",
+                    [(chain, r.address, r.block, r.timestamp) for r in records]
+                )
+
+
+# Global instance
+pool_age_service = PoolAgeService()
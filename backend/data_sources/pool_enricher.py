@@ -5,7 +5,8 @@ Fetches additional pool metadata from multiple sources for LLM analysis.
 Sources:
 - Moralis: Holder count for LP tokens
 - DefiLlama: Historical APY data
-- Basescan: Contract creation date (pool age)
+- RPC: Contract deployment block (pool age)
+- Transfer-log index: LP token holders (Base pools are watched by holder_tracker)
 """
 import asyncio
 import os
@@ -42,6 +43,7 @@ class PoolEnricher:
     def __init__(self):
         self.cache: Dict[str, Dict] = {}
         self.cache_ttl = 1800  # 30 min cache
+        self._watch_tasks: Dict[str, asyncio.Task] = {}  # address -> deployment lookup (ref keeps it alive)
         
     async def enrich(self, pool: Dict) -> Dict:
         """
@@ -61,8 +63,45 @@ class PoolEnricher:
         enriched["il_risk"] = llama.get("il_risk", "unknown")
         enriched["prediction"] = llama.get("prediction", "unknown")
         
+        holder_count = self._watch_holders(pool)
+        if holder_count is not None:
+            enriched["holder_count"] = holder_count
+        
         return enriched
     
+    def _watch_holders(self, pool: Dict) -> Optional[int]:
+        """
+        Have holder_tracker index the LP token of a Base pool from its
+        deployment block. Returns the indexed holder count once caught up.
+        """
+        from data_sources.holder_tracker import holder_tracker
+        
+        address = (pool.get("address") or pool.get("pool_address") or "").lower()
+        chain = (pool.get("chain") or "base").lower()
+        if chain != "base" or not address.startswith("0x") or len(address) != 42:
+            return None
+        
+        if address in holder_tracker.books:
+            snapshot = holder_tracker.snapshot(address, n=0)
+            return snapshot["holder_count"] if snapshot else None
+        
+        # Deployment lookup may bisect over RPC - don't hold up enrichment
+        if address not in self._watch_tasks:
+            task = asyncio.create_task(self._watch_from_deployment(address))
+            self._watch_tasks[address] = task
+            task.add_done_callback(lambda _: self._watch_tasks.pop(address, None))
+        return None
+    
+    async def _watch_from_deployment(self, address: str):
+        try:
+            from data_sources.holder_tracker import holder_tracker
+            from data_sources.pool_age import pool_age_service
+            deployment = await pool_age_service.get_deployment(address)
+            if deployment is not None:
+                holder_tracker.watch(address, start_block=deployment.block)
+        except Exception as e:
+            print(f"[Enricher] Holder watch error: {e}")
+    
     async def _get_holder_count(self, token_address: str) -> int:
         """Get LP token holder count from Moralis"""
         if not MORALIS_API_KEY:
@@ -189,75 +228,16 @@ class PoolEnricher:
     
     async def _get_pool_age(self, contract_address: str) -> int:
         """
-        Get pool age in days using Alchemy RPC.
-        Uses eth_getLogs to find first Transfer event (pool creation).
+        Get pool age in days from its deployment block.
+        Found by batched eth_getCode bisection and stored permanently (see pool_age).
         """
         if not contract_address or contract_address == "unknown":
             return 0
         
-        # Check cache
-        cache_key = f"age_{contract_address}"
-        if cache_key in self.cache:
-            cached = self.cache[cache_key]
-            if (datetime.now().timestamp() - cached["time"]) < self.cache_ttl:
-                return cached["value"]
-        
-        alchemy_rpc = os.getenv("ALCHEMY_RPC_URL", "")
-        if not alchemy_rpc:
-            return 0
-        
         try:
-            async with httpx.AsyncClient(timeout=15) as client:
-                # Get first Transfer event (topic0 = Transfer signature)
-                transfer_topic = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
-                
-                resp = await client.post(
-                    alchemy_rpc,
-                    json={
-                        "jsonrpc": "2.0",
-                        "id": 1,
-                        "method": "eth_getLogs",
-                        "params": [{
-                            "address": contract_address,
-                            "topics": [transfer_topic],
-                            "fromBlock": "0x1",  # Base requires > 0x0
-                            "toBlock": "0xF00000"  # ~15M blocks, covers all Base history
-                        }]
-                    }
-                )
-                
-                if resp.status_code == 200:
-                    data = resp.json()
-                    logs = data.get("result", [])
-                    
-                    if logs and len(logs) > 0:
-                        # Get block number of first event
-                        first_block_hex = logs[0].get("blockNumber", "0x0")
-                        first_block = int(first_block_hex, 16)
-                        
-                        # Get block timestamp
-                        block_resp = await client.post(
-                            alchemy_rpc,
-                            json={
-                                "jsonrpc": "2.0",
-                                "id": 1,
-                                "method": "eth_getBlockByNumber",
-                                "params": [first_block_hex, False]
-                            }
-                        )
-                        
-                        if block_resp.status_code == 200:
-                            block_data = block_resp.json().get("result", {})
-                            timestamp_hex = block_data.get("timestamp", "0x0")
-                            timestamp = int(timestamp_hex, 16)
-                            
-                            created_date = datetime.fromtimestamp(timestamp)
-                            age_days = (datetime.now() - created_date).days
-                            
-                            # Cache
-                            self.cache[cache_key] = {"value": age_days, "time": datetime.now().timestamp()}
-                            return age_days
-                            
+            from data_sources.pool_age import pool_age_service
+            age_days = await pool_age_service.get_age_days(contract_address)
+            return age_days or 0
         except Exception as e:
             print(f"[Enricher] RPC pool age error: {e}")
         
@@ -0,0 +1,352 @@
+"""
+Price Snapshot - Every tracked price in one versioned, synchronously readable map
+
+WHY: PythOracle.get_all_prices() made one getPrice call per feed,
+portfolio_router valued holdings with a hardcoded TOKEN_PRICES table, and
+OnChainVerifier._get_token_price() guessed (wstETH = 1.15 x ETH,
+cbBTC = $95k) or hit CoinGecko once per token. Every valuation path had its
+own, differently wrong, notion of price.
+
+DESIGN:
+- One Multicall3 aggregate3 reads every Pyth feed (getPriceUnsafe, staleness
+  judged locally) together with every Chainlink fallback feed
+  (latestRoundData + decimals) - a full refresh of the oracle feeds is one
+  eth_call
+- Per feed: fresh Pyth -> fresh Chainlink -> freshest of the two (marked
+  stale) -> previous snapshot's value (marked stale)
+- Tokens map onto feeds (WETH -> ETH/USD, cbBTC -> BTC/USD, USDbC ->
+  USDC/USD); everything else is long tail, priced in batches through
+  GeckoTerminal get_token_prices (30 per request) with a single CoinGecko
+  simple/token_price call for what GeckoTerminal misses, refreshed every
+  LONG_TAIL_TTL and carried forward between refreshes. Requested long-tail
+  tokens are dropped LONG_TAIL_IDLE after they were last asked for
+- Each refresh publishes a new immutable PriceSnapshot with version + 1;
+  readers call price_snapshots.get_price(token) - a dict lookup, no I/O
+- Concurrent refreshes coalesce onto one in-flight fetch
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from eth_abi import decode
+from web3 import Web3
+
+from data_sources.multicall import MULTICALL3_ABI, MULTICALL3_ADDRESS
+from infrastructure.rpc import get_web3
+from infrastructure.scheduler import scheduler, PRIORITY_HIGH
+from services.price_oracle import PRICE_FEEDS, CHAINLINK_FEEDS, PYTH_CONTRACT_ADDRESS
+
+logger = logging.getLogger(__name__)
+
+PYTH_GET_PRICE_UNSAFE = Web3.keccak(text="getPriceUnsafe(bytes32)")[:4]
+CHAINLINK_LATEST_ROUND = Web3.keccak(text="latestRoundData()")[:4]
+CHAINLINK_DECIMALS = Web3.keccak(text="decimals()")[:4]
+
+PYTH_MAX_AGE = 60          # seconds before a Pyth price yields to Chainlink
+CHAINLINK_MAX_AGE = 3600   # Base ETH/USD heartbeat is 20 min
+REFRESH_INTERVAL = 10      # seconds between scheduled refreshes
+LONG_TAIL_TTL = 120        # seconds between long-tail (API) refreshes
+LONG_TAIL_IDLE = 3600      # seconds a requested long-tail token stays tracked after its last request
+GECKO_BATCH = 30           # GeckoTerminal addresses per request
+
+# Token address (lowercase) -> (symbol, oracle feed or None for long tail)
+TOKEN_FEEDS: Dict[str, Tuple[str, Optional[str]]] = {
+    "0x833589fcd6edb6e08f4c7c32d4f71b54bda02913": ("USDC", "USDC/USD"),
+    "0xd9aaec86b65d86f6a7b5b1b0c42ffa531710b6ca": ("USDbC", "USDC/USD"),
+    "0xfde4c96c8593536e31f229ea8f37b2ada2699bb2": ("USDT", "USDT/USD"),
+    "0x4200000000000000000000000000000000000006": ("WETH", "ETH/USD"),
+    "0xcbb7c0000ab88b473b1f5afd9ef808440eed33bf": ("cbBTC", "BTC/USD"),
+    "0x50c5725949a6f0c72e6c4a641f24049a917db0cb": ("DAI", None),
+    "0x2ae3f1ec7f1f5012cfeab0185bfc7aa3cf0dec22": ("cbETH", None),
+    "0xc1cba3fcea344f92d9239c08c0568f6f2f0ee452": ("wstETH", None),
+    "0xb6fe221fe9eef5aba221c348ba20a1bf5e73624c": ("rETH", None),
+    "0x940181a94a35a4569e4529a3cdfb74e38fd98631": ("AERO", None),
+    "0x1c61629598e4a901136a81bc138e5828dc150d67": ("wSOL", None),
+    "0x0b3e328455c4059eeb9e3f84b5543f74e24e7e1b": ("VIRTUAL", None),
+    "0x4ed4e862860bed51a9570b96d89af5e1b0efefed": ("DEGEN", None),
+    "0x532f27101965dd16442e59d40670faf5ebb142e4": ("BRETT", None),
+    "0xac1bd2486aaf3b5c0fc3fd868558b082a531b2b4": ("TOSHI", None),
+    "0x0578d8a44db98b23bf096a382e016e29a5ce0ffe": ("HIGHER", None),
+    "0xb79dd08ea68a908a97220c76d19a6aa9cbde4376": ("USD+", None),
+}
+
+# Symbols that are not ERC20s on Base but share a feed
+SYMBOL_FEEDS = {"ETH": "ETH/USD", "BTC": "BTC/USD"}
+
+
+@dataclass(frozen=True)
+class FeedPrice:
+    price: float
+    publish_time: int
+    source: str          # "pyth" | "chainlink"
+    is_stale: bool = False
+
+
+@dataclass(frozen=True)
+class PriceSnapshot:
+    version: int
+    taken_at: float
+    feeds: Dict[str, FeedPrice] = field(default_factory=dict)
+    # address (lowercase) -> USD
+    tokens: Dict[str, float] = field(default_factory=dict)
+    # SYMBOL (uppercase) -> USD
+    symbols: Dict[str, float] = field(default_factory=dict)
+
+    def get(self, token: str, default: Optional[float] = None) -> Optional[float]:
+        """Price by address or symbol (O(1))"""
+        key = (token or "").lower()
+        if key.startswith("0x"):
+            return self.tokens.get(key, default)
+        return self.symbols.get(key.upper(), default)
+
+
+class PriceSnapshotService:
+    """
+    Usage:
+        price_snapshots.start()                      # scheduled refreshes
+        price = price_snapshots.get_price("WETH")    # sync, O(1), None if unknown
+        price = price_snapshots.get_price("0x4200...0006")
+        snapshot = await price_snapshots.get_snapshot(max_age=1)
+    """
+
+    def __init__(self, w3: Optional[Web3] = None):
+        self.w3 = w3
+        self.snapshot = PriceSnapshot(version=0, taken_at=0.0)
+        self._inflight: Optional[asyncio.Future] = None
+        # Long-tail address -> last requested (known feed-less tokens never expire)
+        self._long_tail: Dict[str, float] = {a: float("inf") for a, (_, feed) in TOKEN_FEEDS.items() if feed is None}
+        self._long_tail_prices: Dict[str, float] = {}
+        self._long_tail_at = 0.0
+        self.stats = {"refreshes": 0, "rpc_calls": 0, "api_calls": 0, "fallbacks": 0, "errors": 0}
+
+    def _get_web3(self) -> Web3:
+        if not self.w3:
+            self.w3 = get_web3()
+        return self.w3
+
+    # ------------------------------------------------------------------
+    # Reads (synchronous)
+    # ------------------------------------------------------------------
+
+    def get_price(self, token: str, default: Optional[float] = None) -> Optional[float]:
+        key = (token or "").lower()
+        if key in self._long_tail:
+            self._touch(key)
+        return self.snapshot.get(token, default)
+
+    def get_feed(self, feed: str) -> Optional[FeedPrice]:
+        return self.snapshot.feeds.get(feed)
+
+    def _touch(self, address: str):
+        if self._long_tail[address] != float("inf"):
+            self._long_tail[address] = time.time()
+
+    def track(self, addresses: Iterable[str]) -> int:
+        """Price these long-tail tokens from the next refresh on; returns # new"""
+        added = 0
+        for address in addresses:
+            address = (address or "").lower()
+            if address in self._long_tail:
+                self._touch(address)
+            elif address.startswith("0x") and address not in TOKEN_FEEDS:
+                self._long_tail[address] = time.time()
+                added += 1
+        if added:
+            self._long_tail_at = 0.0  # fetch on the next refresh
+        return added
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+
+    async def get_snapshot(self, max_age: float = REFRESH_INTERVAL) -> PriceSnapshot:
+        """Current snapshot, refreshed first if older than max_age"""
+        if time.time() - self.snapshot.taken_at <= max_age:
+            return self.snapshot
+        return await self.refresh()
+
+    async def get_token_prices(self, addresses: Iterable[str]) -> Dict[str, Optional[float]]:
+        """Prices for addresses, tracking (and fetching) unknown long-tail ones"""
+        wanted = [a.lower() for a in addresses]
+        added = self.track(wanted)
+        missing = [a for a in wanted if a not in self.snapshot.tokens]
+        # Refresh only for newly tracked tokens (or no snapshot yet);
+        # unpriceable ones wait for the next scheduled long-tail round
+        if missing and (added or self.snapshot.version == 0):
+            await self.refresh()
+        return {a: self.snapshot.tokens.get(a) for a in wanted}
+
+    async def refresh(self) -> PriceSnapshot:
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._refresh())
+        return await asyncio.shield(self._inflight)
+
+    async def _refresh(self) -> PriceSnapshot:
+        previous = self.snapshot
+        try:
+            feeds = await asyncio.to_thread(self.read_feeds)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"[PriceSnapshot] Feed multicall failed: {e}")
+            feeds = {}
+
+        # Carry forward feeds we could not read at all
+        for name, old in previous.feeds.items():
+            if name not in feeds:
+                feeds[name] = FeedPrice(old.price, old.publish_time, old.source, is_stale=True)
+
+        if self._long_tail and time.time() - self._long_tail_at >= LONG_TAIL_TTL:
+            await self._refresh_long_tail()
+
+        tokens: Dict[str, float] = dict(self._long_tail_prices)
+        symbols: Dict[str, float] = {}
+        for address, (symbol, feed) in TOKEN_FEEDS.items():
+            price = feeds[feed].price if feed in feeds else tokens.get(address)
+            if price:
+                tokens[address] = price
+                symbols[symbol.upper()] = price
+        for symbol, feed in SYMBOL_FEEDS.items():
+            if feed in feeds:
+                symbols[symbol] = feeds[feed].price
+
+        self.stats["refreshes"] += 1
+        self.snapshot = PriceSnapshot(
+            version=previous.version + 1,
+            taken_at=time.time(),
+            feeds=feeds,
+            tokens=tokens,
+            symbols=symbols,
+        )
+        return self.snapshot
+
+    def read_feeds(self) -> Dict[str, FeedPrice]:
+        """Every Pyth feed + Chainlink fallback in one aggregate3 (blocking)"""
+        calls: List[Tuple[tuple, str, bytes]] = []
+        for name, feed_id in PRICE_FEEDS.items():
+            calls.append((("pyth", name), PYTH_CONTRACT_ADDRESS, PYTH_GET_PRICE_UNSAFE + bytes.fromhex(feed_id[2:])))
+        for name, address in CHAINLINK_FEEDS.items():
+            calls.append((("round", name), address, CHAINLINK_LATEST_ROUND))
+            calls.append((("decimals", name), address, CHAINLINK_DECIMALS))
+
+        results = self._aggregate([
+            {"target": Web3.to_checksum_address(target), "allowFailure": True, "callData": data}
+            for _, target, data in calls
+        ])
+        self.stats["rpc_calls"] += 1
+
+        raw = {key: data for (key, _, _), (success, data) in zip(calls, results) if success and data}
+        now = time.time()
+        feeds: Dict[str, FeedPrice] = {}
+        for name in set(PRICE_FEEDS) | set(CHAINLINK_FEEDS):
+            candidates = []
+            if ("pyth", name) in raw:
+                price, _, expo, publish_time = decode(["int64", "uint64", "int32", "uint256"], raw[("pyth", name)])
+                if price > 0:
+                    candidates.append((PYTH_MAX_AGE, FeedPrice(price * 10 ** expo, publish_time, "pyth")))
+            if ("round", name) in raw and ("decimals", name) in raw:
+                _, answer, _, updated_at, _ = decode(["uint80", "int256", "uint256", "uint256", "uint80"], raw[("round", name)])
+                (decimals,) = decode(["uint8"], raw[("decimals", name)])
+                if answer > 0:
+                    candidates.append((CHAINLINK_MAX_AGE, FeedPrice(answer / 10 ** decimals, updated_at, "chainlink")))
+            if not candidates:
+                continue
+
+            fresh = [c for max_age, c in candidates if now - c.publish_time <= max_age]
+            if fresh:
+                if fresh[0].source != "pyth":
+                    self.stats["fallbacks"] += 1
+                feeds[name] = fresh[0]
+            else:
+                newest = max((c for _, c in candidates), key=lambda c: c.publish_time)
+                feeds[name] = FeedPrice(newest.price, newest.publish_time, newest.source, is_stale=True)
+        return feeds
+
+    def _aggregate(self, calls: List[dict]) -> List[Tuple[bool, bytes]]:
+        multicall = self._get_web3().eth.contract(
+            address=Web3.to_checksum_address(MULTICALL3_ADDRESS),
+            abi=MULTICALL3_ABI
+        )
+        return multicall.functions.aggregate3(calls).call()
+
+    async def _refresh_long_tail(self):
+        """GeckoTerminal batches, one CoinGecko batch for the rest"""
+        self._long_tail_at = time.time()
+        idle = [a for a, asked_at in self._long_tail.items() if self._long_tail_at - asked_at > LONG_TAIL_IDLE]
+        for address in idle:
+            del self._long_tail[address]
+            self._long_tail_prices.pop(address, None)
+        addresses = sorted(self._long_tail)
+        if not addresses:
+            return
+        prices: Dict[str, float] = {}
+
+        try:
+            from data_sources.geckoterminal import gecko_client
+            batches = [addresses[i:i + GECKO_BATCH] for i in range(0, len(addresses), GECKO_BATCH)]
+            results = await asyncio.gather(
+                *(gecko_client.get_token_prices("base", batch) for batch in batches),
+                return_exceptions=True
+            )
+            self.stats["api_calls"] += len(batches)
+            for result in results:
+                if isinstance(result, dict):
+                    for address, info in result.items():
+                        if info and info.get("usd"):
+                            prices[address.lower()] = float(info["usd"])
+        except Exception as e:
+            logger.debug(f"[PriceSnapshot] GeckoTerminal batch failed: {e}")
+
+        missing = [a for a in addresses if a not in prices]
+        if missing:
+            try:
+                import httpx
+                async with httpx.AsyncClient(timeout=10) as client:
+                    resp = await client.get(
+                        "https://api.coingecko.com/api/v3/simple/token_price/base",
+                        params={"contract_addresses": ",".join(missing), "vs_currencies": "usd"}
+                    )
+                    self.stats["api_calls"] += 1
+                    for address, info in (resp.json() or {}).items():
+                        if isinstance(info, dict) and info.get("usd"):
+                            prices[address.lower()] = float(info["usd"])
+            except Exception as e:
+                logger.debug(f"[PriceSnapshot] CoinGecko batch failed: {e}")
+
+        # Keep the last known price for tokens this round could not price
+        self._long_tail_prices.update(prices)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def _tick(self):
+        await self.refresh()
+
+    def start(self):
+        """Refresh on the shared scheduler (idempotent)"""
+        scheduler.register("price_snapshot", self._tick, REFRESH_INTERVAL, priority=PRIORITY_HIGH, initial_delay=0)
+        scheduler.start()
+
+    def stop(self):
+        scheduler.unregister("price_snapshot")
+
+    def get_stats(self) -> dict:
+        snapshot = self.snapshot
+        return {
+            **self.stats,
+            "version": snapshot.version,
+            "age_seconds": round(time.time() - snapshot.taken_at, 1) if snapshot.taken_at else None,
+            "feeds": {
+                name: {"price": f.price, "source": f.source, "stale": f.is_stale}
+                for name, f in snapshot.feeds.items()
+            },
+            "tokens": len(snapshot.tokens),
+            "long_tail": len(self._long_tail),
+        }
+
+
+# Global instance
+price_snapshots = PriceSnapshotService()
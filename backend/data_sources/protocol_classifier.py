@@ -0,0 +1,252 @@
+"""
+Protocol Classifier - Which protocol a contract belongs to, probed once, kept forever
+
+WHY: scout_router._detect_protocol() built a fresh Web3 per request and
+probed totalAssets, getReserves, stable, slot0, getUtilization,
+exchangeRateStored and get_virtual_price one blocking eth_call at a time
+(up to 8 round-trips for a Curve pool), and SmartRouter.detect_protocol()
+made its own factory() call on top. A deployed contract's interface - and
+therefore its protocol - never changes, yet every verify request paid for
+the whole probe chain again.
+
+DESIGN:
+- On a miss, every probe (factory() included) goes out as one allow-failure
+  Multicall3 aggregate3 - a first lookup is a single eth_call
+- The label is decided from the combined result with the same precedence
+  _detect_protocol used: totalAssets -> getReserves -> slot0 ->
+  getUtilization -> exchangeRateStored -> get_virtual_price
+- The record keeps the factory address and the probes that answered, so
+  SmartRouter maps it through KNOWN_FACTORIES at read time (new factories
+  added in code apply to already-classified pools)
+- Records live in memory and in a SQLite file under data/ so restarts and
+  other workers start warm; concurrent misses on one address share a probe
+- Only answers are cached: an RPC failure, or an address where nothing
+  answered (no code yet), is re-probed next time
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from web3 import Web3
+
+from data_sources.multicall import MULTICALL3_ABI, MULTICALL3_ADDRESS
+from infrastructure.rpc import get_w3
+
+logger = logging.getLogger(__name__)
+
+CLASSIFIER_DB = os.path.join(os.path.dirname(__file__), "..", "data", "protocol_cache.db")
+
+# Probe name -> minimum return size for the answer to count
+PROBES: Dict[str, int] = {
+    "factory": 32,
+    "totalAssets": 32,
+    "getReserves": 96,
+    "stable": 32,
+    "slot0": 224,
+    "getUtilization": 32,
+    "exchangeRateStored": 32,
+    "get_virtual_price": 32,
+}
+PROBE_SELECTORS: Dict[str, bytes] = {name: Web3.keccak(text=f"{name}()")[:4] for name in PROBES}
+
+# First answering probe decides the label (same order _detect_protocol used)
+PRECEDENCE: List[Tuple[str, str]] = [
+    ("totalAssets", "erc4626"),
+    ("getReserves", "aerodrome"),
+    ("slot0", "uniswap-v3"),
+    ("getUtilization", "compound-v3"),
+    ("exchangeRateStored", "moonwell"),
+    ("get_virtual_price", "curve"),
+]
+
+
+@dataclass(frozen=True)
+class Classification:
+    address: str
+    chain: str
+    protocol: Optional[str]                 # scout label, None if no probe matched
+    factory: Optional[str] = None           # lowercase factory() answer
+    probes: Tuple[str, ...] = field(default_factory=tuple)
+    classified_at: float = 0.0
+
+
+def classify_probes(address: str, chain: str, results: Dict[str, bytes]) -> Classification:
+    """Decide the label from the probes that answered (name -> return data)"""
+    protocol = next((label for probe, label in PRECEDENCE if probe in results), None)
+    factory = None
+    if "factory" in results:
+        word = results["factory"][:32]
+        # A real address leaves the upper 12 bytes clear
+        if not any(word[:12]) and any(word[12:]):
+            factory = "0x" + word[12:].hex()
+    return Classification(
+        address=address,
+        chain=chain,
+        protocol=protocol,
+        factory=factory,
+        probes=tuple(name for name in PROBES if name in results),
+        classified_at=time.time(),
+    )
+
+
+class ProtocolClassifier:
+    """Memory + SQLite cache in front of a single-multicall probe"""
+
+    def __init__(self, path: Optional[str] = CLASSIFIER_DB):
+        self.path = path
+        self._memory: Dict[Tuple[str, str], Classification] = {}
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "rpc_calls": 0, "errors": 0}
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    async def classify(self, address: str, chain: str = "base", w3: Optional[Web3] = None) -> Optional[Classification]:
+        """Cached classification, probing on a miss. None if the probe itself failed."""
+        key = (chain.lower(), address.lower())
+        record = self.get_cached(*key)
+        if record is not None:
+            return record
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            record = await self._probe(key[1], key[0], w3)
+            if record is not None and record.probes:
+                self._store(record)
+            future.set_result(record)
+            return record
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            # Nobody else awaited it - don't leave an unretrieved exception behind
+            if future.done() and not future.cancelled():
+                future.exception()
+
+    def get_cached(self, chain: str, address: str) -> Optional[Classification]:
+        key = (chain.lower(), address.lower())
+        record = self._memory.get(key)
+        if record is not None:
+            self.stats["hits"] += 1
+            return record
+        record = self._load(*key)
+        if record is not None:
+            self.stats["disk_hits"] += 1
+            self._memory[key] = record
+        return record
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "cached": len(self._memory)}
+
+    # ------------------------------------------------------------------
+    # Probe
+    # ------------------------------------------------------------------
+
+    async def _probe(self, address: str, chain: str, w3: Optional[Web3]) -> Optional[Classification]:
+        self.stats["misses"] += 1
+        w3 = w3 or get_w3()
+        target = Web3.to_checksum_address(address)
+        calls = [
+            {"target": target, "allowFailure": True, "callData": PROBE_SELECTORS[name]}
+            for name in PROBES
+        ]
+        try:
+            self.stats["rpc_calls"] += 1
+            answers = await asyncio.to_thread(self._aggregate, w3, calls)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"[ProtocolClassifier] Probe of {address} on {chain} failed: {e}")
+            return None
+
+        results = {
+            name: bytes(data)
+            for (name, min_size), (success, data) in zip(PROBES.items(), answers)
+            if success and len(data) >= min_size
+        }
+        record = classify_probes(address, chain, results)
+        logger.info(
+            f"[ProtocolClassifier] {address[:10]}... on {chain} -> {record.protocol} "
+            f"(factory {record.factory}, probes {','.join(record.probes) or 'none'})"
+        )
+        return record
+
+    def _aggregate(self, w3: Web3, calls: List[dict]) -> List[Tuple[bool, bytes]]:
+        multicall = w3.eth.contract(
+            address=Web3.to_checksum_address(MULTICALL3_ADDRESS),
+            abi=MULTICALL3_ABI
+        )
+        return multicall.functions.aggregate3(calls).call()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """Open the cache file on first use, not at import"""
+        if self._conn is None and self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS classifications (
+                    chain TEXT NOT NULL, address TEXT NOT NULL, protocol TEXT, factory TEXT,
+                    probes TEXT NOT NULL, classified_at REAL NOT NULL, PRIMARY KEY (chain, address)
+                )
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def _store(self, record: Classification):
+        self._memory[(record.chain, record.address)] = record
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO classifications VALUES (?, ?, ?, ?, ?, ?)",
+                (record.chain, record.address, record.protocol, record.factory,
+                 json.dumps(list(record.probes)), record.classified_at)
+            )
+
+    def _load(self, chain: str, address: str) -> Optional[Classification]:
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT protocol, factory, probes, classified_at FROM classifications WHERE chain = ? AND address = ?",
+                (chain, address)
+            ).fetchone()
+        if row is None:
+            return None
+        protocol, factory, probes, classified_at = row
+        return Classification(
+            address=address,
+            chain=chain,
+            protocol=protocol,
+            factory=factory,
+            probes=tuple(json.loads(probes)),
+            classified_at=classified_at,
+        )
+
+
+# Global instance
+protocol_classifier = ProtocolClassifier()
@@ -0,0 +1,331 @@
+"""
+Token Registry - Immutable token and pool metadata, read from chain once
+
+WHY: decimals/symbol/name of a token and token0/token1/fee of a pool never
+change after deployment, yet OnChainVerifier handlers, UniversalScanner,
+SecurityChecker, DualSidedLPService and the Aerodrome/OnChain clients
+re-read them on every call - two to six blocking eth_calls per pool just to
+learn what the previous request already knew.
+
+DESIGN:
+- Known Base tokens are seeded in code (no I/O), everything seen since is
+  kept in data/token_registry.db and bulk-loaded into memory by preload()
+  at startup
+- Lookups are dict reads; misses for a whole list of addresses go out as
+  allow-failure Multicall3 aggregate3 calls (decimals + symbol + name per
+  token, token0 + token1 + fee + stable per pool) - one round-trip per
+  MAX_CALLS probes
+- cached_token()/cached_pool() never touch the network, for synchronous
+  callers; remember_token() lets readers that already batch their own
+  calls (OnChainVerifier's MulticallBatcher) fill the registry
+- A token whose decimals() fails, or a pool without token0/token1, is not
+  recorded - the caller sees None and falls back as before
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from eth_abi import decode
+from web3 import Web3
+
+from data_sources.multicall import MULTICALL3_ABI, MULTICALL3_ADDRESS
+from infrastructure.rpc import get_w3
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_DB = os.path.join(os.path.dirname(__file__), "..", "data", "token_registry.db")
+MAX_CALLS = 400   # probes per aggregate3
+
+SELECTORS = {
+    name: Web3.keccak(text=f"{name}()")[:4]
+    for name in ("decimals", "symbol", "name", "token0", "token1", "fee", "stable")
+}
+TOKEN_PROBES = ("decimals", "symbol", "name")
+POOL_PROBES = ("token0", "token1", "fee", "stable")
+
+# Base tokens every module uses: address -> (symbol, decimals)
+KNOWN_TOKENS: Dict[str, Tuple[str, int]] = {
+    "0x833589fcd6edb6e08f4c7c32d4f71b54bda02913": ("USDC", 6),
+    "0xd9aaec86b65d86f6a7b5b1b0c42ffa531710b6ca": ("USDbC", 6),
+    "0xfde4c96c8593536e31f229ea8f37b2ada2699bb2": ("USDT", 6),
+    "0x4200000000000000000000000000000000000006": ("WETH", 18),
+    "0x2ae3f1ec7f1f5012cfeab0185bfc7aa3cf0dec22": ("cbETH", 18),
+    "0xcbb7c0000ab88b473b1f5afd9ef808440eed33bf": ("cbBTC", 8),
+    "0xc1cba3fcea344f92d9239c08c0568f6f2f0ee452": ("wstETH", 18),
+    "0xb6fe221fe9eef5aba221c348ba20a1bf5e73624c": ("rETH", 18),
+    "0x940181a94a35a4569e4529a3cdfb74e38fd98631": ("AERO", 18),
+    "0x50c5725949a6f0c72e6c4a641f24049a917db0cb": ("DAI", 18),
+    "0xff8adec2221f9f4d8dfbafa6b9a297d17603493d": ("WELL", 18),
+    "0xb79dd08ea68a908a97220c76d19a6aa9cbde4376": ("USD+", 6),
+    "0x4ed4e862860bed51a9570b96d89af5e1b0efefed": ("DEGEN", 18),
+    "0x532f27101965dd16442e59d40670faf5ebb142e4": ("BRETT", 18),
+    "0xac1bd2486aaf3b5c0fc3fd868558b082a531b2b4": ("TOSHI", 18),
+    "0x0b3e328455c4059eeb9e3f84b5543f74e24e7e1b": ("VIRTUAL", 18),
+}
+
+
+@dataclass(frozen=True)
+class TokenMeta:
+    address: str
+    decimals: int
+    symbol: Optional[str] = None
+    name: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class PoolMeta:
+    address: str
+    token0: str
+    token1: str
+    fee: Optional[int] = None       # uint24 fee() where the pool has one
+    stable: Optional[bool] = None   # Aerodrome V2 stable() where the pool has one
+
+
+def _decode_string(data: bytes) -> Optional[str]:
+    """ABI string, or the bytes32 symbol some older tokens return"""
+    try:
+        value = decode(["string"], data)[0]
+    except Exception:
+        value = data[:32].rstrip(b"\x00").decode("utf-8", "ignore") if len(data) >= 32 else ""
+    return value or None
+
+
+def _decode_address(data: bytes) -> Optional[str]:
+    if len(data) < 32 or any(data[:12]):
+        return None
+    return "0x" + data[12:32].hex()
+
+
+class TokenRegistry:
+    """Memory + SQLite registry in front of batched metadata reads"""
+
+    def __init__(self, path: Optional[str] = REGISTRY_DB):
+        self.path = path
+        self._tokens: Dict[Tuple[str, str], TokenMeta] = {
+            ("base", address): TokenMeta(address=address, decimals=decimals, symbol=symbol)
+            for address, (symbol, decimals) in KNOWN_TOKENS.items()
+        }
+        self._pools: Dict[Tuple[str, str], PoolMeta] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._preloaded = False
+        self.stats = {"hits": 0, "misses": 0, "rpc_calls": 0, "errors": 0}
+
+    # ------------------------------------------------------------------
+    # Cached reads (no I/O beyond the local file)
+    # ------------------------------------------------------------------
+
+    def cached_token(self, address: str, chain: str = "base") -> Optional[TokenMeta]:
+        return self._cached(self._tokens, "tokens", chain, address)
+
+    def cached_pool(self, address: str, chain: str = "base") -> Optional[PoolMeta]:
+        return self._cached(self._pools, "pools", chain, address)
+
+    def remember_token(self, address: str, decimals: int, symbol: Optional[str] = None,
+                       name: Optional[str] = None, chain: str = "base") -> TokenMeta:
+        meta = TokenMeta(address=address.lower(), decimals=int(decimals), symbol=symbol, name=name)
+        self._store_tokens(chain.lower(), [meta])
+        return meta
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "tokens": len(self._tokens), "pools": len(self._pools)}
+
+    def _cached(self, memory: dict, table: str, chain: str, address: str):
+        key = (chain.lower(), address.lower())
+        record = memory.get(key)
+        if record is None and not self._preloaded:
+            record = self._load_one(table, *key)
+            if record is not None:
+                memory[key] = record
+        return record
+
+    # ------------------------------------------------------------------
+    # Lookups that fill misses from chain
+    # ------------------------------------------------------------------
+
+    async def get_token(self, address: str, chain: str = "base", w3: Optional[Web3] = None) -> Optional[TokenMeta]:
+        return (await self.get_tokens([address], chain, w3)).get(address.lower())
+
+    async def get_pool(self, address: str, chain: str = "base", w3: Optional[Web3] = None) -> Optional[PoolMeta]:
+        return (await self.get_pools([address], chain, w3)).get(address.lower())
+
+    async def get_tokens(self, addresses: Iterable[str], chain: str = "base",
+                         w3: Optional[Web3] = None) -> Dict[str, TokenMeta]:
+        """address (lowercase) -> TokenMeta; addresses that aren't tokens are left out"""
+        return await self._get_many(addresses, chain, w3, self.cached_token, TOKEN_PROBES, self._parse_token,
+                                    self._store_tokens)
+
+    async def get_pools(self, addresses: Iterable[str], chain: str = "base",
+                        w3: Optional[Web3] = None) -> Dict[str, PoolMeta]:
+        """address (lowercase) -> PoolMeta; addresses without token0/token1 are left out"""
+        return await self._get_many(addresses, chain, w3, self.cached_pool, POOL_PROBES, self._parse_pool,
+                                    self._store_pools)
+
+    async def _get_many(self, addresses, chain, w3, cached, probes, parse, store) -> dict:
+        chain = chain.lower()
+        found, missing = {}, []
+        for address in dict.fromkeys(a.lower() for a in addresses):
+            record = cached(address, chain)
+            if record is not None:
+                found[address] = record
+            else:
+                missing.append(address)
+        self.stats["hits"] += len(found)
+        if not missing:
+            return found
+
+        self.stats["misses"] += len(missing)
+        answers = await self._probe(missing, probes, w3 or get_w3())
+        fetched = [parse(address, results) for address, results in answers.items()]
+        fetched = [record for record in fetched if record is not None]
+        if fetched:
+            store(chain, fetched)
+        found.update((record.address, record) for record in fetched)
+        return found
+
+    async def _probe(self, addresses: List[str], probes: Tuple[str, ...], w3: Web3) -> Dict[str, Dict[str, bytes]]:
+        """address -> {probe: return data} for the probes that succeeded"""
+        calls = [
+            (address, probe, {
+                "target": Web3.to_checksum_address(address),
+                "allowFailure": True,
+                "callData": SELECTORS[probe],
+            })
+            for address in addresses for probe in probes
+        ]
+        chunks = [calls[i:i + MAX_CALLS] for i in range(0, len(calls), MAX_CALLS)]
+        self.stats["rpc_calls"] += len(chunks)
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self._aggregate, w3, [c[2] for c in chunk]) for chunk in chunks),
+            return_exceptions=True
+        )
+
+        answers: Dict[str, Dict[str, bytes]] = {}
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                self.stats["errors"] += 1
+                logger.warning(f"[TokenRegistry] aggregate3 failed for {len(chunk)} probes: {result}")
+                continue
+            for (address, probe, _), (success, data) in zip(chunk, result):
+                if success and data:
+                    answers.setdefault(address, {})[probe] = bytes(data)
+        return answers
+
+    def _aggregate(self, w3: Web3, calls: List[dict]) -> List[Tuple[bool, bytes]]:
+        multicall = w3.eth.contract(
+            address=Web3.to_checksum_address(MULTICALL3_ADDRESS),
+            abi=MULTICALL3_ABI
+        )
+        return multicall.functions.aggregate3(calls).call()
+
+    @staticmethod
+    def _parse_token(address: str, results: Dict[str, bytes]) -> Optional[TokenMeta]:
+        data = results.get("decimals", b"")
+        if len(data) < 32:
+            return None
+        decimals = int.from_bytes(data[:32], "big")
+        if decimals > 255:
+            return None
+        symbol = _decode_string(results["symbol"]) if "symbol" in results else None
+        name = _decode_string(results["name"]) if "name" in results else None
+        return TokenMeta(address=address, decimals=decimals, symbol=symbol, name=name)
+
+    @staticmethod
+    def _parse_pool(address: str, results: Dict[str, bytes]) -> Optional[PoolMeta]:
+        token0 = _decode_address(results.get("token0", b""))
+        token1 = _decode_address(results.get("token1", b""))
+        if not token0 or not token1:
+            return None
+        fee = int.from_bytes(results["fee"][:32], "big") if len(results.get("fee", b"")) >= 32 else None
+        stable = bool(int.from_bytes(results["stable"][:32], "big")) if len(results.get("stable", b"")) >= 32 else None
+        return PoolMeta(address=address, token0=token0, token1=token1, fee=fee, stable=stable)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def preload(self) -> int:
+        """Load every persisted record into memory; later misses skip the file"""
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return 0
+            tokens = conn.execute("SELECT chain, address, decimals, symbol, name FROM tokens").fetchall()
+            pools = conn.execute("SELECT chain, address, token0, token1, fee, stable FROM pools").fetchall()
+        for chain, address, decimals, symbol, name in tokens:
+            self._tokens[(chain, address)] = TokenMeta(address=address, decimals=decimals, symbol=symbol, name=name)
+        for chain, address, token0, token1, fee, stable in pools:
+            self._pools[(chain, address)] = PoolMeta(
+                address=address, token0=token0, token1=token1, fee=fee,
+                stable=None if stable is None else bool(stable)
+            )
+        self._preloaded = True
+        logger.info(f"[TokenRegistry] Preloaded {len(tokens)} tokens, {len(pools)} pools")
+        return len(tokens) + len(pools)
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """Open the registry file on first use, not at import"""
+        if self._conn is None and self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tokens (chain TEXT NOT NULL, address TEXT NOT NULL, "
+                "decimals INTEGER NOT NULL, symbol TEXT, name TEXT, PRIMARY KEY (chain, address))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pools (chain TEXT NOT NULL, address TEXT NOT NULL, "
+                "token0 TEXT NOT NULL, token1 TEXT NOT NULL, fee INTEGER, stable INTEGER, PRIMARY KEY (chain, address))"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _load_one(self, table: str, chain: str, address: str):
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return None
+            if table == "tokens":
+                row = conn.execute(
+                    "SELECT decimals, symbol, name FROM tokens WHERE chain = ? AND address = ?", (chain, address)
+                ).fetchone()
+                return TokenMeta(address, *row) if row else None
+            row = conn.execute(
+                "SELECT token0, token1, fee, stable FROM pools WHERE chain = ? AND address = ?", (chain, address)
+            ).fetchone()
+        if row is None:
+            return None
+        token0, token1, fee, stable = row
+        return PoolMeta(address, token0, token1, fee, None if stable is None else bool(stable))
+
+    def _store_tokens(self, chain: str, records: List[TokenMeta]):
+        for record in records:
+            self._tokens[(chain, record.address)] = record
+        with self._lock:
+            conn = self._db()
+            if conn is not None:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO tokens VALUES (?, ?, ?, ?, ?)",
+                    [(chain, r.address, r.decimals, r.symbol, r.name) for r in records]
+                )
+
+    def _store_pools(self, chain: str, records: List[PoolMeta]):
+        for record in records:
+            self._pools[(chain, record.address)] = record
+        with self._lock:
+            conn = self._db()
+            if conn is not None:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO pools VALUES (?, ?, ?, ?, ?, ?)",
+                    [(chain, r.address, r.token0, r.token1, r.fee, None if r.stable is None else int(r.stable))
+                     for r in records]
+                )
+
+
+# Global instance
+token_registry = TokenRegistry()
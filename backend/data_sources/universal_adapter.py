@@ -255,16 +255,12 @@ class UniversalScanner:
             sqrt_price_x96 = slot0[0]
             tick = slot0[1]
             
-            # Get tokens
-            token0 = pool_contract.functions.token0().call()
-            token1 = pool_contract.functions.token1().call()
+            # Get tokens and fee (token registry - fixed at deployment)
+            pool_meta = await self._get_pool_meta(w3, chain, address)
+            token0, token1 = pool_meta.token0, pool_meta.token1
             
-            # Get fee (might fail on some pools)
-            try:
-                fee = pool_contract.functions.fee().call()
-                fee_percent = fee / 10000
-            except:
-                fee_percent = 0.3  # Default
+            # Fee might be missing on some pools
+            fee_percent = pool_meta.fee / 10000 if pool_meta.fee is not None else 0.3  # Default
             
             # Get liquidity
             try:
@@ -273,8 +269,7 @@ class UniversalScanner:
                 liquidity = 0
             
             # Get token info
-            token0_info = await self._get_token_info(w3, token0)
-            token1_info = await self._get_token_info(w3, token1)
+            token0_info, token1_info = await self._get_token_infos(w3, chain, token0, token1)
             
             # Calculate price from sqrtPriceX96
             price = (sqrt_price_x96 / (2 ** 96)) ** 2
@@ -328,23 +323,19 @@ class UniversalScanner:
             reserve0_raw = reserves[0]
             reserve1_raw = reserves[1]
             
-            # Get tokens
-            token0 = pool_contract.functions.token0().call()
-            token1 = pool_contract.functions.token1().call()
+            # Get tokens (token registry - fixed at deployment)
+            pool_meta = await self._get_pool_meta(w3, chain, address)
+            token0, token1 = pool_meta.token0, pool_meta.token1
             
             # Get token info
-            token0_info = await self._get_token_info(w3, token0)
-            token1_info = await self._get_token_info(w3, token1)
+            token0_info, token1_info = await self._get_token_infos(w3, chain, token0, token1)
             
             # Convert reserves
             reserve0 = reserve0_raw / (10 ** token0_info['decimals'])
             reserve1 = reserve1_raw / (10 ** token1_info['decimals'])
             
             # Get pool type (stable/volatile)
-            try:
-                stable = pool_contract.functions.stable().call()
-            except:
-                stable = False
+            stable = bool(pool_meta.stable)
             
             # Get pool symbol
             try:
@@ -412,7 +403,7 @@ class UniversalScanner:
                 vault_name = "Unknown Vault"
             
             # Get asset info
-            asset_info = await self._get_token_info(w3, asset)
+            asset_info = await self._get_token_info(w3, asset, chain)
             
             # Convert total assets
             total_assets_human = total_assets / (10 ** asset_info['decimals'])
@@ -478,7 +469,7 @@ class UniversalScanner:
                 market_name = "Lending Market"
             
             # Get underlying info
-            underlying_info = await self._get_token_info(w3, underlying)
+            underlying_info = await self._get_token_info(w3, underlying, chain)
             
             # Calculate TVL
             underlying_decimals = underlying_info['decimals']
@@ -556,19 +547,36 @@ class UniversalScanner:
     # HELPER METHODS
     # =========================================================================
     
-    async def _get_token_info(self, w3: Web3, token_address: str) -> Dict[str, Any]:
+    async def _get_pool_meta(self, w3: Web3, chain: str, pool_address: str):
+        """token0/token1/fee/stable from the token registry; raises if the pool has no token0/token1"""
+        from data_sources.token_registry import token_registry
+        meta = await token_registry.get_pool(pool_address, chain, w3=w3)
+        if meta is None:
+            raise ValueError(f"token0/token1 not readable on {pool_address}")
+        return meta
+    
+    async def _get_token_info(self, w3: Web3, token_address: str, chain: str = "base") -> Dict[str, Any]:
         """Get token symbol and decimals"""
+        return (await self._get_token_infos(w3, chain, token_address))[0]
+    
+    async def _get_token_infos(self, w3: Web3, chain: str, *token_addresses: str) -> List[Dict[str, Any]]:
+        """Symbol and decimals per token from the token registry (one multicall for unseen tokens)"""
+        from data_sources.token_registry import token_registry
         try:
-            token_address = Web3.to_checksum_address(token_address)
-            contract = w3.eth.contract(address=token_address, abi=ERC20_ABI)
-            
-            symbol = contract.functions.symbol().call()
-            decimals = contract.functions.decimals().call()
-            
-            return {"symbol": symbol, "decimals": decimals}
+            found = await token_registry.get_tokens(token_addresses, chain, w3=w3)
         except Exception as e:
-            logger.debug(f"Token info failed for {token_address[:10]}: {e}")
-            return {"symbol": "???", "decimals": 18}
+            logger.debug(f"Token info failed for {len(token_addresses)} tokens: {e}")
+            found = {}
+        
+        infos = []
+        for token_address in token_addresses:
+            meta = found.get(token_address.lower())
+            if meta is None:
+                logger.debug(f"Token info failed for {token_address[:10]}")
+                infos.append({"symbol": "???", "decimals": 18})
+            else:
+                infos.append({"symbol": meta.symbol or "???", "decimals": meta.decimals})
+        return infos
     
     async def _get_token_price(self, token_address: str, chain: str) -> float:
         """Get token price in USD"""
@@ -0,0 +1,282 @@
+"""
+Agent State Store - Journaled, dirty-tracked persistence for DEPLOYED_AGENTS
+
+WHY: _save_agents() rewrote the whole deployed_agents.json (indent=2) on every
+router mutation and at the end of every StrategyExecutor cycle. The write was
+synchronous on the event loop and not atomic - a crash mid-write left a
+truncated file and lost every agent.
+
+DESIGN:
+- Snapshot file (deployed_agents.json) + append-only journal (.journal, JSONL)
+- Callers mark what they changed (mark_dirty(user, agent_id), or a whole
+  user for adds/removals); save() serializes only those agents and journals
+  the ones whose form differs from what was last persisted. Serialization
+  and disk writes scale with the number of changes, not the number of agents
+- Journal records are keyed by agent id, so replaying a del is idempotent
+- All file I/O runs on a single writer thread (ordered, off the event loop)
+- Compaction every COMPACT_EVERY journal records: the snapshot is rebuilt from
+  the already-serialized agents, written to a temp file, fsynced and swapped
+  in with os.replace (atomic), then the journal is truncated
+- Replay is idempotent, so a crash between swap and truncate is harmless;
+  a torn last journal line is skipped
+"""
+
+import atexit
+import json
+import logging
+import os
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Journal records before the snapshot is rewritten
+COMPACT_EVERY = 500
+
+
+def _agent_key(agent: dict) -> str:
+    """Stable journal key: the agent id (legacy id-less agents are given one)"""
+    if not agent.get("id"):
+        agent["id"] = f"legacy_{uuid.uuid4().hex[:12]}"
+    return agent["id"]
+
+
+def _serialize(agent: dict) -> str:
+    return json.dumps(agent, sort_keys=True, default=str)
+
+
+def _user_agents(value) -> list:
+    # Legacy entries stored a single agent dict per user
+    if isinstance(value, dict):
+        return [value]
+    return value if isinstance(value, list) else []
+
+
+class AgentStateStore:
+    """
+    Usage:
+        store = AgentStateStore(snapshot_file)
+        agents = store.load()
+        ...mutate agents[user][i]...
+        store.mark_dirty(user, agent_id)    # or mark_dirty(user) after add/remove
+        store.save(agents)      # journals only what changed, returns immediately
+        store.flush()           # wait for pending writes (tests / shutdown)
+    """
+
+    def __init__(self, snapshot_file: str, journal_file: Optional[str] = None, compact_every: int = COMPACT_EVERY):
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file or os.path.splitext(snapshot_file)[0] + ".journal"
+        self.compact_every = compact_every
+
+        # user -> {agent_id: serialized agent} as last handed to the writer
+        self._persisted: Dict[str, Dict[str, str]] = {}
+        # user -> agent ids changed since the last save (None = the whole list)
+        self._dirty: Dict[str, Optional[Set[str]]] = {}
+        self._journal_records = 0
+
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="agent-store")
+        self._last_write: Optional[Future] = None
+
+        self.stats = {"saves": 0, "records": 0, "compactions": 0, "write_errors": 0}
+
+    # ------------------------------------------------------------------
+    # Load
+    # ------------------------------------------------------------------
+
+    def load(self) -> dict:
+        """Snapshot + journal replay"""
+        agents: dict = {}
+        try:
+            if os.path.exists(self.snapshot_file):
+                with open(self.snapshot_file, "r") as f:
+                    agents = json.load(f)
+        except Exception as e:
+            logger.error(f"[AgentStore] Failed to load snapshot: {e}")
+
+        replayed = 0
+        if os.path.exists(self.journal_file):
+            try:
+                with open(self.journal_file, "r") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue  # torn write at crash time
+                        self._apply(agents, record)
+                        replayed += 1
+            except Exception as e:
+                logger.error(f"[AgentStore] Failed to replay journal: {e}")
+
+        self._persisted = {
+            user: {_agent_key(a): _serialize(a) for a in _user_agents(value)}
+            for user, value in agents.items()
+        }
+        self._dirty = {}
+        self._journal_records = replayed
+        if replayed:
+            logger.info(f"[AgentStore] Replayed {replayed} journal records")
+        return agents
+
+    @staticmethod
+    def _apply(agents: dict, record: dict):
+        op = record.get("op")
+        user = record.get("user")
+        if op == "drop_user":
+            agents.pop(user, None)
+            return
+
+        user_agents = _user_agents(agents.get(user))
+        key = record.get("key")
+        index = next((i for i, a in enumerate(user_agents) if a.get("id") == key), None)
+
+        if op == "put":
+            if index is None:
+                user_agents.append(record["agent"])
+            else:
+                user_agents[index] = record["agent"]
+            agents[user] = user_agents
+        elif op == "del" and index is not None:
+            user_agents.pop(index)
+            agents[user] = user_agents
+
+    # ------------------------------------------------------------------
+    # Save
+    # ------------------------------------------------------------------
+
+    def mark_dirty(self, user: str, agent_id: Optional[str] = None):
+        """Queue an agent (or, without agent_id, the user's whole list) for the next save"""
+        if agent_id is None:
+            self._dirty[user] = None
+            return
+        ids = self._dirty.setdefault(user, set())
+        if ids is not None:
+            ids.add(agent_id)
+
+    def save(self, agents: dict):
+        """Journal the dirty agents that changed; the write happens on the writer thread"""
+        self.stats["saves"] += 1
+        dirty, self._dirty = self._dirty, {}
+        records: List[str] = []
+
+        for user, ids in dirty.items():
+            if user not in agents:
+                if self._persisted.pop(user, None) is not None:
+                    records.append(json.dumps({"op": "drop_user", "user": user}))
+                continue
+
+            user_agents = _user_agents(agents[user])
+            persisted = self._persisted.setdefault(user, {})
+            seen = []
+            for agent in user_agents:
+                if ids is not None and agent.get("id") not in ids:
+                    continue
+                key = _agent_key(agent)
+                seen.append(key)
+                payload = _serialize(agent)
+                if persisted.get(key) != payload:
+                    persisted[key] = payload
+                    # Embed the already-serialized agent instead of encoding it twice
+                    records.append(json.dumps({"op": "put", "user": user, "key": key})[:-1] + f', "agent": {payload}}}')
+
+            removed = (persisted.keys() if ids is None else ids) - set(seen)
+            for key in removed:
+                if persisted.pop(key, None) is not None:
+                    records.append(json.dumps({"op": "del", "user": user, "key": key}))
+            if ids is None:
+                # Whole list rewritten: keep the snapshot in list order
+                self._persisted[user] = {key: persisted[key] for key in seen}
+
+        if not records:
+            return
+
+        self._journal_records += len(records)
+        self.stats["records"] += len(records)
+
+        if self._journal_records >= self.compact_every:
+            self._journal_records = 0
+            self._submit(self._write_snapshot, self._snapshot_payload(self._persisted))
+        else:
+            self._submit(self._append_journal, "\n".join(records) + "\n")
+
+    def compact(self):
+        """Rewrite the snapshot from persisted state and truncate the journal"""
+        self._journal_records = 0
+        self._submit(self._write_snapshot, self._snapshot_payload(self._persisted))
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until all submitted writes are on disk"""
+        if self._last_write:
+            self._last_write.result(timeout=timeout)
+
+    def close(self):
+        """Compact (if anything was journaled) and stop the writer (process shutdown)"""
+        try:
+            if self._journal_records:
+                self.compact()
+            self.flush(timeout=10)
+        except Exception as e:
+            logger.error(f"[AgentStore] Shutdown compaction failed: {e}")
+        self._writer.shutdown(wait=True)
+
+    def _submit(self, fn, payload: str):
+        try:
+            self._last_write = self._writer.submit(self._guarded, fn, payload)
+        except RuntimeError:
+            # Writer already shut down (interpreter exit) - write inline
+            self._guarded(fn, payload)
+
+    def _guarded(self, fn, payload: str):
+        try:
+            fn(payload)
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            logger.error(f"[AgentStore] Write failed: {e}")
+
+    @staticmethod
+    def _snapshot_payload(persisted: Dict[str, Dict[str, str]]) -> str:
+        # Agents are already serialized - assemble without re-encoding
+        users = [
+            f"{json.dumps(user)}: [{', '.join(payloads.values())}]"
+            for user, payloads in persisted.items()
+        ]
+        return "{" + ", ".join(users) + "}"
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def _append_journal(self, lines: str):
+        os.makedirs(os.path.dirname(self.journal_file) or ".", exist_ok=True)
+        with open(self.journal_file, "a") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write_snapshot(self, payload: str):
+        os.makedirs(os.path.dirname(self.snapshot_file) or ".", exist_ok=True)
+        tmp = self.snapshot_file + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_file)
+
+        # Snapshot now contains everything journaled so far
+        with open(self.journal_file, "w"):
+            pass
+        self.stats["compactions"] += 1
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "journal_records": self._journal_records,
+            "users": len(self._persisted),
+        }
+
+
+def create_store(snapshot_file: str) -> AgentStateStore:
+    """Store that compacts on interpreter exit"""
+    store = AgentStateStore(snapshot_file)
+    atexit.register(store.close)
+    return store
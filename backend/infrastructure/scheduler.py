@@ -0,0 +1,407 @@
+"""
+Deadline Scheduler - One scheduler for all background loops
+
+WHY: StrategyExecutor, PositionMonitor, ContractMonitor, DepositMonitor, the
+balance refresh job, CompoundScheduler and SmartLoopEngine each ran their own
+`while True: ...; sleep(n)` loop. Every loop woke up at the same moment and
+processed every agent in one burst, and cross-loop dedup (REM-2) was done by
+peeking at other services' timestamps.
+
+DESIGN:
+- Min-heap of (due_time, priority, seq) per task key = (task name, agent_id)
+- A key is queued at most once and never overlaps itself (structural dedup)
+- Every heap entry carries a token that is never reused, so entries left
+  behind by an unregistered task can't fire a later registration
+- trigger() during a run is remembered and reruns once the run finishes
+- Per-agent tasks get a stable phase inside their interval -> evenly spread
+- Jitter on every reschedule so tasks don't re-align over time
+- Per-task-name concurrency limits (asyncio.Semaphore)
+- Overrun detection: a run longer than its interval is counted and logged
+- record_run()/ran_within() let one service tell another "this agent's work
+  was just done" without sharing private state
+"""
+
+import asyncio
+import heapq
+import logging
+import random
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Lower value runs first when several tasks are due at the same time
+PRIORITY_CRITICAL = 0   # Liquidation protection, health factors
+PRIORITY_HIGH = 1       # Strategy execution, deposits
+PRIORITY_NORMAL = 5     # Position checks
+PRIORITY_LOW = 9        # Balance refresh, digests
+
+DEFAULT_JITTER = 0.05   # +/- 5% of the interval
+
+TaskKey = Tuple[str, Optional[str]]
+
+
+@dataclass
+class ScheduledTask:
+    """
+    One recurring unit of work.
+    WHY dataclass: Plain state record - the scheduler owns all behaviour.
+    """
+    name: str
+    func: Callable[..., Awaitable[Any]]
+    interval: float
+    agent_id: Optional[str] = None
+    priority: int = PRIORITY_NORMAL
+    jitter: float = DEFAULT_JITTER
+    daily_at: Optional[Tuple[int, int]] = None  # (hour, minute) UTC for daily jobs
+
+    next_due: float = 0.0
+    generation: int = 0   # Token of the live heap entry; stale entries are skipped
+    running: bool = False
+    pending: bool = False  # Triggered while running -> rerun right after
+    last_started: Optional[float] = None
+    last_finished: Optional[float] = None
+    last_duration: float = 0.0
+    runs: int = 0
+    errors: int = 0
+    overruns: int = 0
+
+    @property
+    def key(self) -> TaskKey:
+        return (self.name, self.agent_id)
+
+    @property
+    def label(self) -> str:
+        return f"{self.name}:{self.agent_id[:15]}" if self.agent_id else self.name
+
+
+def _seconds_until_utc(hour: int, minute: int) -> float:
+    """Seconds until the next HH:MM UTC wall-clock time"""
+    now = datetime.utcnow()
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+class DeadlineScheduler:
+    """
+    Runs every background task from a single min-heap of due times.
+
+    Usage:
+        scheduler.register("strategy_executor", executor.execute_all_agents, 600)
+        scheduler.sync_agents("position_check", agent_ids, monitor.check_agent, 60)
+        scheduler.start()
+    """
+
+    def __init__(self):
+        self._tasks: Dict[TaskKey, ScheduledTask] = {}
+        self._heap: List[Tuple[float, int, int, TaskKey, int]] = []
+        self._seq = 0
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._limit_sizes: Dict[str, int] = {}
+        self._last_runs: Dict[TaskKey, float] = {}
+        self._inflight: set = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        self.running = False
+
+        self._stats = {
+            "runs": 0,
+            "errors": 0,
+            "overruns": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def register(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        interval: float,
+        agent_id: Optional[str] = None,
+        priority: int = PRIORITY_NORMAL,
+        jitter: float = DEFAULT_JITTER,
+        initial_delay: Optional[float] = None,
+    ) -> ScheduledTask:
+        """
+        Register (or update) a recurring task.
+
+        Per-agent tasks call func(agent_id); global tasks call func().
+        Re-registering an existing key updates it but keeps its due time.
+
+        initial_delay=None spreads per-agent tasks across their interval by
+        a stable hash of the agent id, and runs global tasks immediately.
+        """
+        key = (name, agent_id)
+        existing = self._tasks.get(key)
+        if existing:
+            existing.func = func
+            existing.interval = interval
+            existing.priority = priority
+            existing.jitter = jitter
+            return existing
+
+        task = ScheduledTask(
+            name=name,
+            func=func,
+            interval=interval,
+            agent_id=agent_id,
+            priority=priority,
+            jitter=jitter,
+        )
+        self._tasks[key] = task
+
+        if initial_delay is None:
+            initial_delay = self._phase(task) if agent_id else 0.0
+        self._schedule(task, time.monotonic() + initial_delay)
+        return task
+
+    def register_daily(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        hour: int,
+        minute: int = 0,
+        priority: int = PRIORITY_LOW,
+    ) -> ScheduledTask:
+        """Register a task that runs once a day at HH:MM UTC"""
+        task = self.register(
+            name, func, 86400, priority=priority, jitter=0,
+            initial_delay=_seconds_until_utc(hour, minute)
+        )
+        task.daily_at = (hour, minute)
+        return task
+
+    def unregister(self, name: str, agent_id: Optional[str] = None):
+        """Remove a task; a run already in progress is allowed to finish"""
+        self._tasks.pop((name, agent_id), None)
+
+    def unregister_all(self, name: str):
+        """Remove a task name for every agent"""
+        for key in [k for k in self._tasks if k[0] == name]:
+            del self._tasks[key]
+
+    def sync_agents(
+        self,
+        name: str,
+        agent_ids: Iterable[str],
+        func: Callable[[str], Awaitable[Any]],
+        interval: float,
+        **kwargs
+    ) -> Tuple[int, int]:
+        """
+        Make the per-agent tasks for `name` match agent_ids exactly.
+
+        Returns:
+            (added, removed)
+        """
+        wanted = {a for a in agent_ids if a}
+        current = {k[1] for k in self._tasks if k[0] == name and k[1] is not None}
+
+        for agent_id in wanted - current:
+            self.register(name, func, interval, agent_id=agent_id, **kwargs)
+        for agent_id in current - wanted:
+            self.unregister(name, agent_id)
+
+        return len(wanted - current), len(current - wanted)
+
+    def set_concurrency(self, name: str, limit: int):
+        """Allow at most `limit` runs of task `name` (across agents) at once"""
+        self._limit_sizes[name] = limit
+        self._limits.pop(name, None)  # Recreated lazily inside the running loop
+
+    def trigger(self, name: str, agent_id: Optional[str] = None, delay: float = 0.0) -> bool:
+        """
+        Pull a task's next run forward (e.g. on an on-chain event).
+        A task that is already running reruns once, right after the current
+        run; a task already due sooner is left alone.
+        """
+        task = self._tasks.get((name, agent_id))
+        if not task:
+            return False
+        if task.running:
+            task.pending = True
+            return True
+        due = time.monotonic() + delay
+        if due < task.next_due:
+            self._schedule(task, due)
+        return True
+
+    def record_run(self, name: str, agent_id: Optional[str] = None):
+        """Record that the work behind (name, agent_id) was just done elsewhere"""
+        self._last_runs[(name, agent_id)] = time.monotonic()
+
+    def ran_within(self, name: str, agent_id: Optional[str], seconds: float) -> bool:
+        """True if (name, agent_id) completed within the last `seconds`"""
+        last = self._last_runs.get((name, agent_id))
+        return last is not None and (time.monotonic() - last) < seconds
+
+    # ------------------------------------------------------------------
+    # Heap management
+    # ------------------------------------------------------------------
+
+    def _phase(self, task: ScheduledTask) -> float:
+        """Stable offset inside the interval, so N agents spread out evenly"""
+        bucket = zlib.crc32(f"{task.name}:{task.agent_id}".encode()) / 0xFFFFFFFF
+        return bucket * task.interval
+
+    def _schedule(self, task: ScheduledTask, due: float):
+        # Scheduler-wide sequence, not per task: a re-registered key starts a
+        # new ScheduledTask and must not match its predecessor's heap entries
+        self._seq += 1
+        task.generation = self._seq
+        task.next_due = due
+        heapq.heappush(self._heap, (due, task.priority, self._seq, task.key, task.generation))
+        if self._wakeup:
+            self._wakeup.set()
+
+    def _next_due_after_run(self, task: ScheduledTask) -> float:
+        now = time.monotonic()
+        if task.daily_at:
+            return now + _seconds_until_utc(*task.daily_at)
+
+        due = task.last_started + task.interval
+        if task.jitter:
+            due += random.uniform(-task.jitter, task.jitter) * task.interval
+        return max(due, now)
+
+    def _get_limit(self, name: str) -> Optional[asyncio.Semaphore]:
+        size = self._limit_sizes.get(name)
+        if not size:
+            return None
+        if name not in self._limits:
+            self._limits[name] = asyncio.Semaphore(size)
+        return self._limits[name]
+
+    # ------------------------------------------------------------------
+    # Run loop
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the run loop (idempotent, needs a running event loop)"""
+        if self._runner and not self._runner.done():
+            return
+        self.running = True
+        self._wakeup = asyncio.Event()
+        self._runner = asyncio.create_task(self._run_loop())
+        logger.info(f"[Scheduler] Started with {len(self._tasks)} tasks")
+
+    async def stop(self):
+        """Stop the run loop and wait for in-flight runs"""
+        self.running = False
+        if self._wakeup:
+            self._wakeup.set()
+        if self._runner:
+            await asyncio.gather(self._runner, return_exceptions=True)
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        logger.info("[Scheduler] Stopped")
+
+    async def _run_loop(self):
+        while self.running:
+            if not self._heap:
+                await self._sleep(None)
+                continue
+
+            due, _, _, key, generation = self._heap[0]
+            task = self._tasks.get(key)
+            if task is None or task.generation != generation:
+                heapq.heappop(self._heap)  # Unregistered or rescheduled
+                continue
+
+            delay = due - time.monotonic()
+            if delay > 0:
+                await self._sleep(delay)
+                continue
+
+            heapq.heappop(self._heap)
+            task.running = True
+            run = asyncio.create_task(self._execute(task))
+            self._inflight.add(run)
+            run.add_done_callback(self._inflight.discard)
+
+    async def _sleep(self, timeout: Optional[float]):
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _execute(self, task: ScheduledTask):
+        limit = self._get_limit(task.name)
+        try:
+            if limit:
+                await limit.acquire()
+            task.last_started = time.monotonic()
+            try:
+                if task.agent_id is not None:
+                    await task.func(task.agent_id)
+                else:
+                    await task.func()
+                self._last_runs[task.key] = time.monotonic()
+            except Exception as e:
+                task.errors += 1
+                self._stats["errors"] += 1
+                logger.error(f"[Scheduler] {task.label} failed: {e}")
+            finally:
+                if limit:
+                    limit.release()
+        finally:
+            task.running = False
+            task.runs += 1
+            self._stats["runs"] += 1
+            task.last_finished = time.monotonic()
+            task.last_duration = task.last_finished - (task.last_started or task.last_finished)
+
+            if task.last_duration > task.interval:
+                task.overruns += 1
+                self._stats["overruns"] += 1
+                logger.warning(
+                    f"[Scheduler] {task.label} overran: {task.last_duration:.1f}s > {task.interval:.0f}s interval"
+                )
+
+            # Reschedule only if still registered (not unregistered mid-run)
+            if self._tasks.get(task.key) is task and self.running:
+                if task.pending:
+                    task.pending = False
+                    self._schedule(task, time.monotonic())
+                else:
+                    self._schedule(task, self._next_due_after_run(task))
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict:
+        """Scheduler and per-task-name statistics"""
+        by_name: Dict[str, Dict[str, Any]] = {}
+        for task in self._tasks.values():
+            s = by_name.setdefault(task.name, {
+                "tasks": 0, "running": 0, "runs": 0, "errors": 0, "overruns": 0,
+                "interval": task.interval, "max_duration": 0.0,
+            })
+            s["tasks"] += 1
+            s["running"] += int(task.running)
+            s["runs"] += task.runs
+            s["errors"] += task.errors
+            s["overruns"] += task.overruns
+            s["max_duration"] = round(max(s["max_duration"], task.last_duration), 3)
+
+        return {
+            **self._stats,
+            "registered": len(self._tasks),
+            "queued": len(self._heap),
+            "in_flight": len(self._inflight),
+            "tasks": by_name,
+        }
+
+
+# Global scheduler instance
+scheduler = DeadlineScheduler()
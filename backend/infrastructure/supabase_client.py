@@ -235,6 +235,34 @@ class SupabaseClient:
         )
         return result or []
     
+    async def get_all_active_positions(self, page_size: int = 1000) -> Optional[List[dict]]:
+        """
+        All active positions for all users - one query per page instead of
+        one per user. Returns None if any page failed.
+
+        Keyset-paginated on the primary key (id > last id) until a page comes
+        back empty: a short page may only mean PostgREST's max-rows is below
+        page_size, and offsets over a non-unique order can skip or repeat rows.
+        """
+        rows: List[dict] = []
+        last_id = None
+        while True:
+            params = {
+                "status": "eq.active",
+                "select": "*",
+                "order": "id.asc",
+                "limit": page_size
+            }
+            if last_id is not None:
+                params["id"] = f"gt.{last_id}"
+            page = await self._request("GET", "user_positions", params=params)
+            if page is None:
+                return None
+            if not page:
+                return rows
+            rows.extend(page)
+            last_id = page[-1]["id"]
+    
     async def update_user_position_value(
         self,
         user_address: str,
@@ -0,0 +1,320 @@
+"""
+Work Leases - Shard ownership so several backend replicas can share agents
+
+WHY: Two backend instances both ran StrategyExecutor, PositionMonitor and
+ContractMonitor over the full agent set - every allocation, exit and
+rebalance would execute twice.
+
+DESIGN:
+- Users hash into NUM_SHARDS fixed shards (all agents of a user stay on one
+  replica, so per-user wallet nonces never race across replicas)
+- Each shard is owned through a time-bounded lease (LEASE_TTL); the owner
+  renews every TTL/3 on the shared scheduler
+- Replicas heartbeat through their own "replica:<id>" lease; each replica
+  targets ceil(shards / live_replicas) shards, grabs free or expired ones
+  and releases its surplus, so a dead replica's shards are taken over within
+  one TTL and load spreads again when it returns
+- Backends:
+  * SQLiteLeaseBackend - single host, several processes (default)
+  * RedisLeaseBackend  - multi-node (LEASE_BACKEND=redis, REDIS_URL)
+  * anything implementing LeaseBackend
+- Fail-safe: if renewals stop (stalled loop, backend down) ownership lapses
+  locally at the lease expiry, before another replica can take the shard
+- Until start() runs the partitioner owns everything (tests, scripts,
+  single-process tools behave exactly as before)
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from infrastructure.scheduler import scheduler, PRIORITY_CRITICAL
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+NUM_SHARDS = int(os.getenv("AGENT_SHARDS", "16"))
+LEASE_TTL = float(os.getenv("AGENT_LEASE_TTL", "30"))
+LEASE_DB = os.path.join(os.path.dirname(__file__), "..", "data", "work_leases.db")
+
+REPLICA_PREFIX = "replica:"
+SHARD_PREFIX = "shard:"
+
+
+def shard_of(key: str, num_shards: int = NUM_SHARDS) -> int:
+    """Stable shard for a user address (process-independent, unlike hash())"""
+    digest = hashlib.blake2b((key or "").lower().encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % num_shards
+
+
+class LeaseBackend:
+    """Lease storage. try_acquire() also renews a lease the owner already holds."""
+
+    def try_acquire(self, key: str, owner: str, ttl: float) -> bool:
+        raise NotImplementedError
+
+    def release(self, key: str, owner: str):
+        raise NotImplementedError
+
+    def holders(self, prefix: str) -> Dict[str, str]:
+        """Unexpired leases under prefix: key -> owner"""
+        raise NotImplementedError
+
+
+class SQLiteLeaseBackend(LeaseBackend):
+    """Leases in a local SQLite file (WAL) shared by processes on one host"""
+
+    def __init__(self, path: str = LEASE_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def try_acquire(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            # Single atomic upsert: insert, renew own lease, or steal an expired one
+            cursor = self._conn.execute(
+                """
+                INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE leases.owner = excluded.owner OR leases.expires_at < ?
+                """,
+                (key, owner, now + ttl, now)
+            )
+            return cursor.rowcount == 1
+
+    def release(self, key: str, owner: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def holders(self, prefix: str) -> Dict[str, str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, owner FROM leases WHERE key LIKE ? AND expires_at >= ?",
+                (prefix + "%", time.time())
+            ).fetchall()
+        return dict(rows)
+
+
+class RedisLeaseBackend(LeaseBackend):
+    """Leases as Redis keys with PX expiry, shared by replicas on any host"""
+
+    # Renew if we hold it, otherwise SET NX
+    _ACQUIRE = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    end
+    if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+        return 1
+    end
+    return 0
+    """
+    _RELEASE = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, url: Optional[str] = None, namespace: str = "techne:leases:"):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis package not installed")
+        self.namespace = namespace
+        self._client = redis.Redis.from_url(url or os.getenv("REDIS_URL", "redis://localhost:6379/0"), decode_responses=True)
+        self._acquire = self._client.register_script(self._ACQUIRE)
+        self._release = self._client.register_script(self._RELEASE)
+
+    def try_acquire(self, key: str, owner: str, ttl: float) -> bool:
+        return bool(self._acquire(keys=[self.namespace + key], args=[owner, int(ttl * 1000)]))
+
+    def release(self, key: str, owner: str):
+        self._release(keys=[self.namespace + key], args=[owner])
+
+    def holders(self, prefix: str) -> Dict[str, str]:
+        keys = list(self._client.scan_iter(match=self.namespace + prefix + "*", count=500))
+        if not keys:
+            return {}
+        owners = self._client.mget(keys)
+        return {
+            k[len(self.namespace):]: owner
+            for k, owner in zip(keys, owners) if owner is not None
+        }
+
+
+def create_backend() -> Optional[LeaseBackend]:
+    """Backend from LEASE_BACKEND env: sqlite (default), redis, none"""
+    kind = os.getenv("LEASE_BACKEND", "sqlite").lower()
+    if kind == "none":
+        return None
+    if kind == "redis":
+        return RedisLeaseBackend()
+    return SQLiteLeaseBackend()
+
+
+class WorkPartitioner:
+    """
+    Shard ownership for this replica.
+
+    Usage:
+        work_partitioner.start()
+        if work_partitioner.owns(user_address): ...
+        if work_partitioner.owns_agent(agent_id): ...
+    """
+
+    def __init__(
+        self,
+        backend: Optional[LeaseBackend] = None,
+        num_shards: int = NUM_SHARDS,
+        lease_ttl: float = LEASE_TTL,
+        replica_id: Optional[str] = None
+    ):
+        self.backend = backend
+        self.num_shards = num_shards
+        self.lease_ttl = lease_ttl
+        self.replica_id = replica_id or os.getenv("REPLICA_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+        self.active = False
+        self.owned: Set[int] = set()
+        self._valid_until = 0.0
+        self.stats = {"rebalances": 0, "acquired": 0, "released": 0, "lost": 0, "errors": 0}
+
+    # ------------------------------------------------------------------
+    # Ownership checks
+    # ------------------------------------------------------------------
+
+    def owns_shard(self, shard: int) -> bool:
+        if not self.active:
+            return True
+        # Leases lapse locally before anyone else may steal them
+        return shard in self.owned and time.time() < self._valid_until
+
+    def owns(self, user_address: str) -> bool:
+        """True if this replica should process work for this user"""
+        return self.owns_shard(shard_of(user_address, self.num_shards))
+
+    def owns_agent(self, agent_id: str) -> bool:
+        """True if this replica owns the agent's user (agents shard by owner)"""
+        if not self.active:
+            return True
+        from agents.agent_registry import agent_registry
+        owner = agent_registry.get_owner(agent_id)
+        return self.owns(owner or agent_id)
+
+    # ------------------------------------------------------------------
+    # Lease maintenance
+    # ------------------------------------------------------------------
+
+    def _shard_key(self, shard: int) -> str:
+        return f"{SHARD_PREFIX}{shard}"
+
+    def rebalance(self):
+        """Heartbeat, renew owned shards, take free/expired ones up to fair share"""
+        backend = self.backend
+        started = time.time()
+        self.stats["rebalances"] += 1
+
+        backend.try_acquire(REPLICA_PREFIX + self.replica_id, self.replica_id, self.lease_ttl)
+        replicas = set(backend.holders(REPLICA_PREFIX).values()) | {self.replica_id}
+        target = math.ceil(self.num_shards / len(replicas))
+
+        # Renew what we hold; a failed renewal means someone stole an expired lease
+        for shard in sorted(self.owned):
+            if not backend.try_acquire(self._shard_key(shard), self.replica_id, self.lease_ttl):
+                self.owned.discard(shard)
+                self.stats["lost"] += 1
+
+        # Give back surplus so newly joined replicas can pick it up
+        while len(self.owned) > target:
+            shard = max(self.owned)
+            backend.release(self._shard_key(shard), self.replica_id)
+            self.owned.discard(shard)
+            self.stats["released"] += 1
+
+        if len(self.owned) < target:
+            held = backend.holders(SHARD_PREFIX)
+            # Start at a replica-specific offset so joiners don't all race for shard 0
+            offset = shard_of(self.replica_id, self.num_shards)
+            for i in range(self.num_shards):
+                if len(self.owned) >= target:
+                    break
+                shard = (offset + i) % self.num_shards
+                if shard in self.owned or self._shard_key(shard) in held:
+                    continue
+                if backend.try_acquire(self._shard_key(shard), self.replica_id, self.lease_ttl):
+                    self.owned.add(shard)
+                    self.stats["acquired"] += 1
+
+        self._valid_until = started + self.lease_ttl
+
+    async def _tick(self):
+        try:
+            await asyncio.to_thread(self.rebalance)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"[WorkLeases] Lease renewal failed: {e}")
+
+    def start(self):
+        """Acquire the initial shards and keep leases renewed (idempotent)"""
+        if self.active:
+            return
+        if self.backend is None:
+            self.backend = create_backend()
+            if self.backend is None:
+                logger.info("[WorkLeases] Partitioning disabled (LEASE_BACKEND=none)")
+                return
+
+        self.rebalance()
+        self.active = True
+        scheduler.register(
+            "work_leases",
+            self._tick,
+            self.lease_ttl / 3,
+            priority=PRIORITY_CRITICAL,
+            jitter=0,
+            initial_delay=self.lease_ttl / 3
+        )
+        scheduler.start()
+        logger.info(f"[WorkLeases] {self.replica_id} owns {len(self.owned)}/{self.num_shards} shards")
+
+    def stop(self):
+        """Release all leases so other replicas take over immediately"""
+        scheduler.unregister("work_leases")
+        if self.active and self.backend:
+            for shard in list(self.owned):
+                try:
+                    self.backend.release(self._shard_key(shard), self.replica_id)
+                except Exception as e:
+                    logger.warning(f"[WorkLeases] Release failed for shard {shard}: {e}")
+            self.backend.release(REPLICA_PREFIX + self.replica_id, self.replica_id)
+        self.owned.clear()
+        self.active = False
+
+    def get_stats(self) -> dict:
+        return {
+            "replica_id": self.replica_id,
+            "active": self.active,
+            "owned_shards": sorted(self.owned),
+            "num_shards": self.num_shards,
+            "lease_valid_for": max(0.0, round(self._valid_until - time.time(), 1)) if self.active else None,
+            **self.stats,
+        }
+
+
+# Global instance
+work_partitioner = WorkPartitioner()
@@ -0,0 +1,421 @@
+"""
+WebSocket Hub - Topic pub/sub with coalesced JSON-patch fan-out
+
+WHY: /ws/portfolio ran its own 10s poll loop per socket - two tabs on the same
+wallet built the same snapshot twice - and shipped the whole document every
+time anything in it changed. broadcast_price_update() awaited send_json() on
+every open socket in turn, so one slow client stalled the broadcast for
+everybody, and price ticks went to sockets that never asked for them.
+
+DESIGN:
+- Topics are plain strings: "wallet:<address>", "token:<SYMBOL>", "prices",
+  "allocation:<address>" (events only)
+- One producer task per topic (register_producer by prefix), started by the
+  first subscriber and cancelled with the last - N sockets, one poll
+- publish() only stores the latest document; one flush per COALESCE_INTERVAL
+  diffs it against the last published state and fans out a single JSON-patch
+  message (RFC 6902 add/remove/replace), serialized once for all sockets
+- Every message carries (base, version); a new subscriber - or one whose
+  queue dropped a patch - gets a full snapshot instead of a patch it can't
+  apply, so clients never diverge
+- Each socket has a bounded queue drained by its own sender task. A full
+  queue drops the oldest message, so a slow client only ever delays itself
+- Events (transactions, position exits) bypass coalescing but share the queue
+"""
+
+import asyncio
+import json
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+COALESCE_INTERVAL = 0.25   # seconds between flushes of one topic
+MAX_QUEUE = 64             # messages buffered per socket
+HEARTBEAT_INTERVAL = 30
+
+_UNSET = object()
+
+
+def wallet_topic(wallet: str) -> str:
+    return f"wallet:{wallet.lower()}"
+
+
+def token_topic(token: str) -> str:
+    return f"token:{token.upper()}"
+
+
+def allocation_topic(wallet: str) -> str:
+    """Event-only topic for /ws/allocation sockets (no producer)"""
+    return f"allocation:{wallet.lower()}"
+
+
+# ============================================
+# JSON PATCH
+# ============================================
+
+def _escape(key: str) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def json_diff(old: Any, new: Any, path: str = "") -> List[dict]:
+    """RFC 6902 operations turning `old` into `new`"""
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(json_diff(old[key], value, child))
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        ops = []
+        for i, (a, b) in enumerate(zip(old, new)):
+            ops.extend(json_diff(a, b, f"{path}/{i}"))
+        return ops
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply_patch(doc: Any, ops: List[dict]) -> Any:
+    """Apply json_diff() output (add/remove/replace only)"""
+    for op in ops:
+        tokens = [_unescape(t) for t in op["path"].split("/")[1:]]
+        if not tokens:
+            doc = op.get("value")
+            continue
+        parent = doc
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+        if isinstance(parent, list):
+            if op["op"] == "remove":
+                del parent[int(last)]
+            elif op["op"] == "add":
+                parent.insert(int(last) if last != "-" else len(parent), op["value"])
+            else:
+                parent[int(last)] = op["value"]
+        elif op["op"] == "remove":
+            del parent[last]
+        else:
+            parent[last] = op["value"]
+    return doc
+
+
+# ============================================
+# TOPICS AND SUBSCRIBERS
+# ============================================
+
+class Topic:
+    def __init__(self, name: str):
+        self.name = name
+        self.subscribers: Set["Subscriber"] = set()
+        self.doc: Any = None
+        self.version = 0
+        self.pending: Any = _UNSET
+        self.flush_task: Optional[asyncio.Task] = None
+        self.producer_task: Optional[asyncio.Task] = None
+
+    def snapshot_message(self) -> str:
+        return json.dumps({
+            "type": "snapshot",
+            "topic": self.name,
+            "version": self.version,
+            "data": self.doc,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+
+
+class Subscriber:
+    """One socket: bounded drop-oldest queue drained by a single sender task"""
+
+    def __init__(self, hub: "WebSocketHub", websocket: WebSocket, max_queue: int):
+        self.hub = hub
+        self.websocket = websocket
+        # (topic or None, base version or None, version or None, payload)
+        self.queue: Deque[Tuple[Optional[str], Optional[int], Optional[int], str]] = deque()
+        self.max_queue = max_queue
+        self.wakeup = asyncio.Event()
+        self.topics: Set[str] = set()
+        self.versions: Dict[str, int] = {}   # topic -> version the client holds
+        self.sent = 0
+        self.dropped = 0
+        self.task = asyncio.create_task(self._run())
+
+    def offer(self, payload: str, topic: Optional[str] = None, base: Optional[int] = None, version: Optional[int] = None):
+        if len(self.queue) >= self.max_queue:
+            self.queue.popleft()
+            self.dropped += 1
+        self.queue.append((topic, base, version, payload))
+        self.wakeup.set()
+
+    async def _run(self):
+        try:
+            while True:
+                if not self.queue:
+                    self.wakeup.clear()
+                    await self.wakeup.wait()
+                    continue
+                topic, base, version, payload = self.queue.popleft()
+                if topic is not None:
+                    payload = self._resolve(topic, base, version, payload)
+                    if payload is None:
+                        continue
+                await self.websocket.send_text(payload)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"[WSHub] Send failed, dropping socket: {e}")
+            self.hub.disconnect(self.websocket)
+
+    def _resolve(self, topic: str, base: Optional[int], version: int, payload: str) -> Optional[str]:
+        """Patch, resync snapshot or nothing - depending on what the client holds"""
+        held = self.versions.get(topic)
+        if held is not None and version <= held:
+            return None   # Already covered by a later snapshot
+        if base is None or base == held:
+            self.versions[topic] = version
+            return payload
+        # Gap (dropped patch or joined mid-stream): send current state instead
+        state = self.hub.topics.get(topic)
+        if state is None or state.doc is None:
+            return None
+        self.versions[topic] = state.version
+        return state.snapshot_message()
+
+
+class WebSocketHub:
+    """
+    Usage:
+        ws_hub.register_producer("wallet", get_portfolio_snapshot, interval=10)
+        await ws_hub.subscribe(websocket, wallet_topic(wallet))
+        ws_hub.publish(token_topic("WETH"), {"token": "WETH", "price": 3012.5})
+        ws_hub.send_event(wallet_topic(wallet), {"type": "transaction", ...})
+        ws_hub.disconnect(websocket)
+    """
+
+    def __init__(self, coalesce_interval: float = COALESCE_INTERVAL, max_queue: int = MAX_QUEUE):
+        self.coalesce_interval = coalesce_interval
+        self.max_queue = max_queue
+        self.topics: Dict[str, Topic] = {}
+        self.subscribers: Dict[WebSocket, Subscriber] = {}
+        # topic prefix -> (async producer(key) -> document, interval)
+        self.producers: Dict[str, Tuple[Callable[[str], Awaitable[Any]], float]] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.stats = {"published": 0, "flushes": 0, "patches": 0, "snapshots": 0, "events": 0, "producer_errors": 0}
+
+    def register_producer(self, prefix: str, producer: Callable[[str], Awaitable[Any]], interval: float):
+        self.producers[prefix] = (producer, interval)
+
+    # ------------------------------------------------------------------
+    # Connections
+    # ------------------------------------------------------------------
+
+    def attach(self, websocket: WebSocket) -> Subscriber:
+        sub = self.subscribers.get(websocket)
+        if sub is None:
+            sub = self.subscribers[websocket] = Subscriber(self, websocket, self.max_queue)
+            if self._heartbeat_task is None or self._heartbeat_task.done():
+                self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        return sub
+
+    async def subscribe(self, websocket: WebSocket, topic_name: str):
+        sub = self.attach(websocket)
+        if topic_name in sub.topics:
+            return
+        topic = self.topics.get(topic_name)
+        if topic is None:
+            topic = self.topics[topic_name] = Topic(topic_name)
+        topic.subscribers.add(sub)
+        sub.topics.add(topic_name)
+
+        if topic.doc is not None:
+            self.resync(websocket, topic_name)
+        if topic.producer_task is None:
+            self._start_producer(topic)
+
+    def unsubscribe(self, websocket: WebSocket, topic_name: str):
+        sub = self.subscribers.get(websocket)
+        topic = self.topics.get(topic_name)
+        if sub is None or topic is None:
+            return
+        sub.topics.discard(topic_name)
+        sub.versions.pop(topic_name, None)
+        topic.subscribers.discard(sub)
+        if not topic.subscribers:
+            self._drop_topic(topic)
+
+    def disconnect(self, websocket: WebSocket):
+        sub = self.subscribers.pop(websocket, None)
+        if sub is None:
+            return
+        for topic_name in list(sub.topics):
+            topic = self.topics.get(topic_name)
+            if topic:
+                topic.subscribers.discard(sub)
+                if not topic.subscribers:
+                    self._drop_topic(topic)
+        if sub.task is not asyncio.current_task():
+            sub.task.cancel()
+        if not self.subscribers and self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+
+    def _drop_topic(self, topic: Topic):
+        for task in (topic.producer_task, topic.flush_task):
+            if task and task is not asyncio.current_task():
+                task.cancel()
+        self.topics.pop(topic.name, None)
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    def publish(self, topic_name: str, doc: Any):
+        """Set a topic's state; subscribers get one patch per coalesce window"""
+        topic = self.topics.get(topic_name)
+        if topic is None:
+            return   # Nobody listening
+        self.stats["published"] += 1
+        # Round-trip: private copy, datetimes -> strings, stable diffs
+        topic.pending = json.loads(json.dumps(doc, default=str))
+        if topic.flush_task is None or topic.flush_task.done():
+            topic.flush_task = asyncio.create_task(self._flush_later(topic))
+
+    async def _flush_later(self, topic: Topic):
+        await asyncio.sleep(self.coalesce_interval)
+        self.flush(topic.name)
+
+    def flush(self, topic_name: str):
+        topic = self.topics.get(topic_name)
+        if topic is None or topic.pending is _UNSET:
+            return
+        doc, topic.pending = topic.pending, _UNSET
+        self.stats["flushes"] += 1
+
+        if topic.doc is None:
+            topic.doc, topic.version = doc, topic.version + 1
+            payload = topic.snapshot_message()
+            self.stats["snapshots"] += 1
+            for sub in topic.subscribers:
+                sub.offer(payload, topic.name, None, topic.version)
+            return
+
+        ops = json_diff(topic.doc, doc)
+        if not ops:
+            return
+        base = topic.version
+        topic.doc, topic.version = doc, base + 1
+        payload = json.dumps({
+            "type": "patch",
+            "topic": topic.name,
+            "base": base,
+            "version": topic.version,
+            "ops": ops,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        self.stats["patches"] += 1
+        for sub in topic.subscribers:
+            sub.offer(payload, topic.name, base, topic.version)
+
+    def resync(self, websocket: WebSocket, topic_name: str):
+        """Queue a full snapshot of the topic for one socket"""
+        sub = self.subscribers.get(websocket)
+        topic = self.topics.get(topic_name)
+        if sub is None or topic is None or topic.doc is None:
+            return
+        self.stats["snapshots"] += 1
+        sub.offer(topic.snapshot_message(), topic.name, None, topic.version)
+
+    def send_event(self, topic_name: str, message: dict):
+        """Uncoalesced one-off message to a topic's subscribers"""
+        topic = self.topics.get(topic_name)
+        if topic is None or not topic.subscribers:
+            return
+        self.stats["events"] += 1
+        payload = json.dumps(message, default=str)
+        for sub in topic.subscribers:
+            sub.offer(payload)
+
+    def send_direct(self, websocket: WebSocket, message: dict):
+        """Message to one socket, ordered with its topic traffic"""
+        sub = self.subscribers.get(websocket) or self.attach(websocket)
+        sub.offer(json.dumps(message, default=str))
+
+    def broadcast_event(self, message: dict):
+        payload = json.dumps(message, default=str)
+        self.stats["events"] += 1
+        for sub in self.subscribers.values():
+            sub.offer(payload)
+
+    # ------------------------------------------------------------------
+    # Producers
+    # ------------------------------------------------------------------
+
+    def _start_producer(self, topic: Topic):
+        prefix, _, key = topic.name.partition(":")
+        entry = self.producers.get(prefix)
+        if entry:
+            producer, interval = entry
+            topic.producer_task = asyncio.create_task(self._produce(topic, producer, key, interval))
+
+    async def _produce(self, topic: Topic, producer: Callable[[str], Awaitable[Any]], key: str, interval: float):
+        first = True
+        while True:
+            try:
+                doc = await producer(key)
+                if doc is not None:
+                    self.publish(topic.name, doc)
+                    if first:
+                        # New subscribers shouldn't wait a coalesce window for state
+                        self.flush(topic.name)
+                first = False
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["producer_errors"] += 1
+                logger.warning(f"[WSHub] Producer {topic.name} failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            self.broadcast_event({"type": "heartbeat", "timestamp": datetime.utcnow().isoformat()})
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+
+    def connection_count(self) -> int:
+        return len(self.subscribers)
+
+    def topic_count(self, prefix: str = "") -> int:
+        return sum(1 for name in self.topics if name.startswith(prefix))
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "connections": len(self.subscribers),
+            "topics": len(self.topics),
+            "producers": sum(1 for t in self.topics.values() if t.producer_task and not t.producer_task.done()),
+            "queued": sum(len(s.queue) for s in self.subscribers.values()),
+            "dropped": sum(s.dropped for s in self.subscribers.values()),
+        }
+
+
+# Global instance
+ws_hub = WebSocketHub()
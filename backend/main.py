@@ -237,6 +237,55 @@ async def startup_event():
     import asyncio
     print("[Startup] Initializing background services...")
     
+    # Lease agent shards first so every loop below only runs its own users
+    try:
+        from infrastructure.work_leases import work_partitioner
+        work_partitioner.start()
+        print(f"[Startup] ✅ Work leases: {len(work_partitioner.owned)}/{work_partitioner.num_shards} shards owned")
+    except Exception as e:
+        print(f"[Startup] Work leases failed (processing all agents): {e}")
+    
+    # Shared price snapshot (Pyth/Chainlink multicall + long-tail batches) for all valuation
+    try:
+        from data_sources.price_snapshot import price_snapshots
+        price_snapshots.start()
+        print("[Startup] ✅ Price snapshot service started (every 10s)")
+    except Exception as e:
+        print(f"[Startup] Price snapshot service failed: {e}")
+    
+    # Token/pool metadata registry (decimals, symbols, token0/token1) from disk
+    try:
+        from data_sources.token_registry import token_registry
+        loaded = token_registry.preload()
+        print(f"[Startup] ✅ Token registry preloaded ({loaded} records)")
+    except Exception as e:
+        print(f"[Startup] Token registry preload failed: {e}")
+    
+    # Background verification of top-TVL / most-requested pools (served by verify endpoints)
+    try:
+        from agents.verification_sweeper import verification_sweeper, SWEEP_BLOCKS
+        from api.scout_router import get_cached_defillama_pools
+        verification_sweeper.start(get_cached_defillama_pools)
+        print(f"[Startup] ✅ Verification sweeper started (every {SWEEP_BLOCKS} blocks)")
+    except Exception as e:
+        print(f"[Startup] Verification sweeper failed: {e}")
+    
+    # Materialized SmartRouter analyses, refreshed by popularity (served by smart_route_pool_check)
+    try:
+        from agents.pool_analysis_store import pool_analysis_store
+        pool_analysis_store.start()
+        print("[Startup] ✅ Pool analysis store refresh started")
+    except Exception as e:
+        print(f"[Startup] Pool analysis store failed: {e}")
+    
+    # Holder balances from Transfer logs for watched tokens (served by HolderAnalysis)
+    try:
+        from data_sources.holder_tracker import holder_tracker
+        holder_tracker.start()
+        print(f"[Startup] ✅ Holder tracker started ({len(holder_tracker.books)} watched tokens)")
+    except Exception as e:
+        print(f"[Startup] Holder tracker failed: {e}")
+    
     # Start CONTRACT monitor (V4.3.2 - watches Deposited events)
     try:
         from agents.contract_monitor import start_contract_monitoring
@@ -269,18 +318,26 @@ async def startup_event():
     except Exception as e:
         print(f"[Startup] Position monitor failed: {e}")
     
+    # Health-factor sweeps for Aave/Morpho leverage loops (auto-deleverage near liquidation)
+    try:
+        from agents.leverage_monitor import leverage_monitor, TICK_INTERVAL
+        leverage_monitor.start()
+        print(f"[Startup] ✅ Leverage monitor started (risk-tiered, every {TICK_INTERVAL}s tick)")
+    except Exception as e:
+        print(f"[Startup] Leverage monitor failed: {e}")
+    
     # Start API Metrics persistence (every 5 minutes)
-    async def metrics_persistence_loop():
-        """Background task to persist API metrics to Supabase"""
-        while True:
-            await asyncio.sleep(300)  # 5 minutes
-            try:
-                from infrastructure.api_metrics import api_metrics
-                await api_metrics.persist_to_supabase()
-            except Exception as e:
-                print(f"[Metrics] Persistence error: {e}")
+    async def persist_metrics():
+        """Persist API metrics to Supabase"""
+        try:
+            from infrastructure.api_metrics import api_metrics
+            await api_metrics.persist_to_supabase()
+        except Exception as e:
+            print(f"[Metrics] Persistence error: {e}")
     
-    asyncio.create_task(metrics_persistence_loop())
+    from infrastructure.scheduler import scheduler, PRIORITY_LOW
+    scheduler.register("metrics_persistence", persist_metrics, 300, priority=PRIORITY_LOW, initial_delay=300)
+    scheduler.start()
     print("[Startup] ✅ API Metrics persistence started (every 5 min → Supabase)")
     
     # Start Balance Refresh job (every 10 min - saves RPC calls)
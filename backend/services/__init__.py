@@ -6,6 +6,8 @@ Real-time detection, AI analysis, and predictive models
 from .price_oracle import PythOracle, get_oracle, is_price_stale
 from .pool_discovery import PoolDiscovery, get_discovery
 from .scam_detector import ScamDetector, get_detector
+from .contract_embedder import ContractEmbedder, get_embedder
+from .fingerprint_index import FingerprintIndex, get_fingerprint_index
 from .wash_detector import WashTradingDetector, get_wash_detector
 from .il_predictor import ILDivergencePredictor, get_il_predictor
 from .apy_predictor import APYPredictor, get_apy_predictor
@@ -25,6 +27,10 @@ __all__ = [
     # Scam Detection
     "ScamDetector",
     "get_detector",
+    "ContractEmbedder",
+    "get_embedder",
+    "FingerprintIndex",
+    "get_fingerprint_index",
     
     # Wash Trading
     "WashTradingDetector",
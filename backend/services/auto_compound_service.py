@@ -26,6 +26,7 @@ from datetime import datetime, timedelta
 from integrations.cow_swap import cow_client, TOKENS
 from services.aerodrome_lp import get_aerodrome_lp, LPResult
 from services.dual_lp_service import get_dual_lp_service
+from infrastructure.scheduler import scheduler, PRIORITY_LOW
 
 
 # Aerodrome contract addresses
@@ -483,54 +484,72 @@ class CompoundScheduler:
             "key": private_key,
             "last_compound": None
         }
+        if self.running:
+            self._schedule_agent(agent_address)
         print(f"[Scheduler] Registered {agent_address[:10]}... for auto-compound")
     
     def unregister(self, agent_address: str):
         """Unregister an agent"""
         if agent_address in self.agents:
             del self.agents[agent_address]
+            scheduler.unregister("auto_compound", agent_address)
             print(f"[Scheduler] Unregistered {agent_address[:10]}...")
     
+    def _schedule_agent(self, agent_address: str):
+        # Per-agent due time; first compound runs right away like run_once()
+        scheduler.register(
+            "auto_compound",
+            self.compound_agent,
+            self.interval.total_seconds(),
+            agent_id=agent_address,
+            priority=PRIORITY_LOW,
+            initial_delay=0
+        )
+    
+    async def compound_agent(self, address: str):
+        """Compound all registered gauges for one agent"""
+        info = self.agents.get(address)
+        if not info:
+            return
+        
+        print(f"[Scheduler] Compounding for {address[:10]}...")
+        
+        results = await self.service.compound_all_positions(
+            gauge_addresses=info["gauges"],
+            agent_address=address,
+            private_key=info["key"]
+        )
+        
+        info["last_compound"] = datetime.utcnow()
+        
+        # Log results
+        successful = sum(1 for r in results if r.success)
+        print(f"[Scheduler] Completed {successful}/{len(results)} compounds")
+    
     async def run_once(self):
-        """Run one round of compounding for all agents"""
+        """Run one round of compounding for all agents that are due"""
         now = datetime.utcnow()
         
-        for address, info in self.agents.items():
+        for address, info in list(self.agents.items()):
             last = info.get("last_compound")
             
             # Check if due for compound
             if last is None or (now - last) >= self.interval:
-                print(f"[Scheduler] Compounding for {address[:10]}...")
-                
-                results = await self.service.compound_all_positions(
-                    gauge_addresses=info["gauges"],
-                    agent_address=address,
-                    private_key=info["key"]
-                )
-                
-                info["last_compound"] = now
-                
-                # Log results
-                successful = sum(1 for r in results if r.success)
-                print(f"[Scheduler] Completed {successful}/{len(results)} compounds")
+                await self.compound_agent(address)
     
     async def start(self):
-        """Start the scheduler loop"""
+        """Register every agent with the shared scheduler"""
         self.running = True
         print(f"[Scheduler] Started with {len(self.agents)} agents, interval {self.interval}")
         
-        while self.running:
-            try:
-                await self.run_once()
-            except Exception as e:
-                print(f"[Scheduler] Error: {e}")
-            
-            # Sleep for 1 hour between checks
-            await asyncio.sleep(3600)
+        for address in self.agents:
+            self._schedule_agent(address)
+        scheduler.start()
     
     def stop(self):
         """Stop the scheduler"""
         self.running = False
+        scheduler.unregister_all("auto_compound")
         print("[Scheduler] Stopped")
 
 
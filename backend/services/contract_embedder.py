@@ -0,0 +1,202 @@
+"""
+Contract Embedder
+Resident embedding worker for scam fingerprint similarity
+
+Features:
+- Loads the sentence-transformers model once, on a dedicated thread
+- Micro-batches encode requests (up to MAX_BATCH per model call)
+- Hashed n-gram vectorizer fallback when the model is unavailable - fast
+  enough to fingerprint contracts in bulk
+- Same dimension (384) either way; every vector says which model made it
+"""
+
+import asyncio
+import math
+import os
+import queue
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+EMBEDDING_MODEL = os.getenv("SCAM_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+HASHED_MODEL = "hashed-ngram-384"
+EMBEDDING_DIM = 384              # all-MiniLM-L6-v2 output size
+MAX_BATCH = 32                   # texts per model.encode() call
+BATCH_WINDOW = 0.01              # seconds to wait for more requests before encoding
+
+_FUNCTION_RE = re.compile(r'function\s+\w+\s*\([^)]*\)')
+_REQUIRE_RE = re.compile(r'require\s*\([^)]+\)')
+_MAPPING_RE = re.compile(r'mapping\s*\([^)]+\)')
+_TOKEN_RE = re.compile(r'\w+|[^\w\s]')
+
+
+@dataclass(frozen=True)
+class Embedding:
+    vector: List[float]
+    model: str                   # EMBEDDING_MODEL or HASHED_MODEL - vectors only compare within a model
+
+
+def embedding_text(source_code: str) -> str:
+    """Key code patterns to embed: function signatures, requires and mappings."""
+    patterns = []
+    patterns.extend(_FUNCTION_RE.findall(source_code))
+    patterns.extend(_REQUIRE_RE.findall(source_code))
+    patterns.extend(_MAPPING_RE.findall(source_code))
+
+    text = ' '.join(patterns[:50])  # Limit to 50 patterns
+    if not text:
+        text = source_code[:2000]  # Fallback to raw code
+    return text
+
+
+def hashed_embedding(text: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """
+    Signed feature-hashing vector (unit length) of tokens, token bigrams and
+    in-token character trigrams. crc32 keeps it stable across processes.
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    for token in tokens:
+        padded = f"#{token}#"
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    if not features:
+        return [0.0] * dim
+
+    hashes = np.fromiter((zlib.crc32(f.encode()) for f in features), dtype=np.uint64, count=len(features))
+    signs = np.where(hashes & 0x80000000, 1.0, -1.0)
+    vector = np.bincount((hashes % dim).astype(np.int64), weights=signs, minlength=dim)
+    norm = math.sqrt(float(vector @ vector)) or 1.0
+    return (vector / norm).tolist()
+
+
+class ContractEmbedder:
+    """
+    Embeds contract sources on one resident worker thread.
+
+    Usage:
+        embedder = get_embedder()
+        embedding = await embedder.embed(source)            # Embedding(vector, model)
+        embeddings = await embedder.embed_many(sources)     # bulk, batched
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, max_batch: int = MAX_BATCH,
+                 batch_window: float = BATCH_WINDOW):
+        self.model_name = model_name
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.model = None
+        self.backend: Optional[str] = None      # set once the worker has tried to load the model
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "batches": 0, "model_encoded": 0, "hashed": 0}
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    def submit(self, source_code: str) -> Future:
+        """Queue a source; the Future resolves to an Embedding"""
+        future: Future = Future()
+        self._ensure_worker()
+        self.stats["requests"] += 1
+        self._queue.put((source_code, future))
+        return future
+
+    def embed_sync(self, source_code: str) -> Embedding:
+        return self.submit(source_code).result()
+
+    async def embed(self, source_code: str) -> Embedding:
+        return await asyncio.wrap_future(self.submit(source_code))
+
+    async def embed_many(self, sources: List[str]) -> List[Embedding]:
+        """Queue every source at once so the worker encodes them in full batches"""
+        futures = [self.submit(source) for source in sources]
+        return list(await asyncio.gather(*(asyncio.wrap_future(f) for f in futures)))
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "backend": self.backend, "queued": self._queue.qsize()}
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="contract-embedder", daemon=True)
+                self._thread.start()
+
+    def _load_model(self):
+        try:
+            from sentence_transformers import SentenceTransformer
+            self.model = SentenceTransformer(self.model_name)
+            self.backend = self.model_name
+            print(f"[ContractEmbedder] Loaded {self.model_name}")
+        except ImportError:
+            self.backend = HASHED_MODEL
+            print("[ContractEmbedder] sentence-transformers not installed, using hashed n-gram embeddings")
+        except Exception as e:
+            self.backend = HASHED_MODEL
+            print(f"[ContractEmbedder] Model load failed ({e}), using hashed n-gram embeddings")
+
+    def _run(self):
+        self._load_model()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            self._encode(batch)
+
+    def _encode(self, batch: List[Tuple[str, Future]]):
+        self.stats["batches"] += 1
+        try:
+            texts = [embedding_text(source) for source, _ in batch]
+            embeddings = None
+            if self.model is not None:
+                try:
+                    vectors = self.model.encode(texts, batch_size=len(texts))
+                    embeddings = [Embedding([float(x) for x in v], self.model_name) for v in vectors]
+                    self.stats["model_encoded"] += len(texts)
+                except Exception as e:
+                    print(f"[ContractEmbedder] Encode failed ({e}), using hashed n-gram embeddings")
+            if embeddings is None:
+                embeddings = [Embedding(hashed_embedding(text), HASHED_MODEL) for text in texts]
+                self.stats["hashed"] += len(texts)
+            results = list(zip(batch, embeddings))
+        except Exception as e:
+            for _, future in batch:
+                self._resolve(future, error=e)
+            return
+        for (_, future), embedding in results:
+            self._resolve(future, result=embedding)
+
+    @staticmethod
+    def _resolve(future: Future, result: Optional[Embedding] = None, error: Optional[Exception] = None):
+        try:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass  # caller gave up (cancelled)
+
+
+# Global instance
+_embedder_instance = None
+
+def get_embedder() -> ContractEmbedder:
+    global _embedder_instance
+    if _embedder_instance is None:
+        _embedder_instance = ContractEmbedder()
+    return _embedder_instance
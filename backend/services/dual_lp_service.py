@@ -72,8 +72,12 @@ class DualSidedLPService:
         }
     
     def _get_decimals(self, token: str) -> int:
-        """Get decimals for a token"""
+        """Get decimals for a token (addresses via the token registry, no RPC)"""
         if token.startswith("0x"):
+            from data_sources.token_registry import token_registry
+            meta = token_registry.cached_token(token)
+            if meta:
+                return meta.decimals
             # Try to find by address
             for symbol, addr in TOKENS.items():
                 if addr.lower() == token.lower():
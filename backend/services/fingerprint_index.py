@@ -0,0 +1,199 @@
+"""
+Fingerprint Index
+In-process cosine similarity over known scam fingerprints
+
+Features:
+- float16 matrix of unit vectors, brute-force dot products in float32 chunks
+- Incremental sync from Supabase scam_fingerprints (created_at cursor)
+- Top-k queries, single or batched (a whole page of pools in one matmul)
+- One index per embedding model - MiniLM and hashed vectors never mix
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from services.contract_embedder import EMBEDDING_DIM, EMBEDDING_MODEL
+
+SYNC_INTERVAL = int(os.getenv("FINGERPRINT_SYNC_INTERVAL", "300"))  # seconds between Supabase syncs
+SYNC_PAGE = 1000                 # rows per Supabase request
+QUERY_CHUNK = 8192               # matrix rows upcast to float32 at a time
+INITIAL_CAPACITY = 1024
+
+META_FIELDS = ("contract_address", "risk_score", "risk_level", "is_scam")
+
+
+def _as_vector(embedding: Any) -> Optional[np.ndarray]:
+    """pgvector comes back from PostgREST as a '[0.1,...]' string"""
+    if embedding is None:
+        return None
+    if isinstance(embedding, str):
+        embedding = json.loads(embedding)
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    if vector.shape != (EMBEDDING_DIM,) or norm == 0:
+        return None
+    return vector / norm
+
+
+class FingerprintIndex:
+    """
+    Brute-force cosine index over one embedding model's vectors.
+
+    Usage:
+        index = get_fingerprint_index()
+        await index.refresh()
+        matches = index.search(vector, k=1, threshold=0.95)
+    """
+
+    def __init__(self, model: str = EMBEDDING_MODEL, dim: int = EMBEDDING_DIM):
+        self.model = model
+        self.dim = dim
+        self.matrix = np.zeros((INITIAL_CAPACITY, dim), dtype=np.float16)
+        self.size = 0
+        self.meta: List[Dict[str, Any]] = []
+        self.positions: Dict[str, int] = {}     # contract_address -> row
+        self.cursor: Optional[str] = None       # newest created_at seen
+        self.synced_at = 0.0
+        self._sync_lock = asyncio.Lock()
+        self._sync_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def add(self, address: str, embedding: Any, meta: Optional[Dict[str, Any]] = None) -> bool:
+        """Insert or replace one fingerprint. Returns False for unusable vectors."""
+        vector = _as_vector(embedding)
+        if vector is None:
+            return False
+        address = address.lower()
+        entry = {field: (meta or {}).get(field) for field in META_FIELDS}
+        entry["contract_address"] = address
+
+        row = self.positions.get(address)
+        if row is None:
+            if self.size == len(self.matrix):
+                grown = np.zeros((len(self.matrix) * 2, self.dim), dtype=np.float16)
+                grown[:self.size] = self.matrix[:self.size]
+                self.matrix = grown
+            row = self.size
+            self.size += 1
+            self.positions[address] = row
+            self.meta.append(entry)
+        else:
+            self.meta[row] = entry
+        self.matrix[row] = vector
+        return True
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def search(self, embedding: Any, k: int = 1, threshold: float = 0.0) -> List[Dict[str, Any]]:
+        return self.search_many([embedding], k, threshold)[0]
+
+    def search_many(self, embeddings: List[Any], k: int = 1, threshold: float = 0.0) -> List[List[Dict[str, Any]]]:
+        """Top-k matches (similarity >= threshold) per query, best first"""
+        results: List[List[Dict[str, Any]]] = [[] for _ in embeddings]
+        vectors = [_as_vector(e) for e in embeddings]
+        valid = [i for i, v in enumerate(vectors) if v is not None]
+        if not valid or self.size == 0 or k <= 0:
+            return results
+
+        queries = np.stack([vectors[i] for i in valid])             # (q, dim)
+        scores = np.empty((len(valid), self.size), dtype=np.float32)
+        for start in range(0, self.size, QUERY_CHUNK):
+            end = min(start + QUERY_CHUNK, self.size)
+            scores[:, start:end] = queries @ self.matrix[start:end].astype(np.float32).T
+
+        k = min(k, self.size)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        for q, i in enumerate(valid):
+            for row in sorted(top[q], key=lambda r: -scores[q, r]):
+                similarity = float(scores[q, row])
+                if similarity >= threshold:
+                    results[i].append({**self.meta[row], "similarity": similarity})
+        return results
+
+    # ------------------------------------------------------------------
+    # Supabase sync
+    # ------------------------------------------------------------------
+
+    async def refresh(self):
+        """Sync on first use; afterwards stale indexes resync in the background"""
+        if self.model != EMBEDDING_MODEL:
+            return  # Supabase only holds model vectors
+        if not self.synced_at:
+            await self.sync()
+        elif time.time() - self.synced_at > SYNC_INTERVAL and (self._sync_task is None or self._sync_task.done()):
+            self._sync_task = asyncio.create_task(self.sync())
+
+    async def sync(self) -> int:
+        """Pull fingerprints newer than the cursor. Returns rows added or replaced."""
+        supabase_url = os.getenv("SUPABASE_URL")
+        supabase_key = os.getenv("SUPABASE_ANON_KEY")
+        if not supabase_url or not supabase_key:
+            self.synced_at = time.time()
+            return 0
+
+        async with self._sync_lock:
+            added = 0
+            try:
+                async with httpx.AsyncClient(timeout=30) as client:
+                    while True:
+                        params = {
+                            "select": ",".join(META_FIELDS + ("embedding", "created_at")),
+                            "embedding": "not.is.null",
+                            "order": "created_at.asc",
+                            "limit": SYNC_PAGE,
+                        }
+                        if self.cursor:
+                            # gte: rows sharing the cursor timestamp are re-read and replaced in place
+                            params["created_at"] = f"gte.{self.cursor}"
+                        response = await client.get(
+                            f"{supabase_url}/rest/v1/scam_fingerprints",
+                            params=params,
+                            headers={
+                                "apikey": supabase_key,
+                                "Authorization": f"Bearer {supabase_key}"
+                            }
+                        )
+                        if response.status_code != 200:
+                            print(f"[FingerprintIndex] Sync failed: {response.status_code}")
+                            break
+
+                        rows = response.json()
+                        for row in rows:
+                            if self.add(row["contract_address"], row.get("embedding"), row):
+                                added += 1
+                        if rows:
+                            newest = rows[-1].get("created_at")
+                            advanced = newest and newest != self.cursor
+                            self.cursor = newest or self.cursor
+                        if len(rows) < SYNC_PAGE or not advanced:
+                            break
+            except Exception as e:
+                print(f"[FingerprintIndex] Sync error: {e}")
+
+            self.synced_at = time.time()
+            if added:
+                print(f"[FingerprintIndex] Synced {added} fingerprints ({self.size} indexed)")
+            return added
+
+
+# Global instances (one per embedding model)
+_indexes: Dict[str, FingerprintIndex] = {}
+
+def get_fingerprint_index(model: str = EMBEDDING_MODEL) -> FingerprintIndex:
+    if model not in _indexes:
+        _indexes[model] = FingerprintIndex(model)
+    return _indexes[model]
@@ -20,6 +20,12 @@ Usage:
     verifier = OnChainVerifier()
     result = await verifier.verify("0x...", "aave-v3")
     # → {"tvl": 12345678, "apy": 4.23, "price": 1.0001, "verified": True, ...}
+
+Reads never block the event loop: handlers await their reads in rounds
+(_read / _token_meta) on a shared MulticallBatcher, so verify_batch() turns
+N pools x M reads into one aggregate3 per round instead of N x M eth_calls.
+Token decimals/symbol come from the token registry once seen, so the
+metadata round is skipped entirely for known tokens.
 """
 
 import asyncio
@@ -686,7 +692,11 @@ class OnChainVerifier:
     def __init__(self, rpc_url: str = None):
         self.rpc_url = rpc_url or RPC_URL
         self.w3 = Web3(Web3.HTTPProvider(self.rpc_url))
-        self._price_cache: Dict[str, Tuple[float, float]] = {}  # addr → (price, timestamp)
+        from data_sources.multicall import MulticallBatcher
+        from data_sources.token_registry import token_registry
+        self.batcher = MulticallBatcher(self.w3)
+        self.registry = token_registry
+        self._erc20_factory = self.w3.eth.contract(abi=ERC20_ABI)
         print(f"[OnChainVerifier] Initialized, connected: {self.w3.is_connected()}")
 
     # ============================================
@@ -771,7 +781,10 @@ class OnChainVerifier:
         self,
         pools: List[Dict],
     ) -> List[Dict]:
-        """Verify multiple pools concurrently."""
+        """
+        Verify multiple pools concurrently. Handlers advance in lockstep, so
+        each read round of every pool goes out in shared multicalls.
+        """
         tasks = [
             self.verify(p["address"], p["protocol"], p.get("api_data"))
             for p in pools
@@ -798,20 +811,17 @@ class OnChainVerifier:
         asset = Web3.to_checksum_address(asset_or_pool)
 
         try:
-            reserve = pool_contract.functions.getReserveData(asset).call()
+            reserve = await self._call(pool_contract.functions.getReserveData(asset))
         except ContractLogicError:
-            # Maybe it's an aToken — try known assets
-            for token_info in TOKENS.values():
-                try:
-                    reserve = pool_contract.functions.getReserveData(
-                        Web3.to_checksum_address(token_info["address"])
-                    ).call()
-                    a_token_addr = reserve[8]  # aTokenAddress
-                    if a_token_addr.lower() == asset_or_pool.lower():
-                        asset = Web3.to_checksum_address(token_info["address"])
-                        break
-                except:
-                    continue
+            # Maybe it's an aToken — read every known asset's reserve in one round
+            known = [Web3.to_checksum_address(t["address"]) for t in TOKENS.values()]
+            reserves = await self._read(
+                *(pool_contract.functions.getReserveData(a) for a in known), allow_failure=True
+            )
+            for token_addr, candidate in zip(known, reserves):
+                if candidate and candidate[8].lower() == asset_or_pool.lower():  # aTokenAddress
+                    asset, reserve = token_addr, candidate
+                    break
             else:
                 raise ValueError(f"Cannot resolve Aave asset: {asset_or_pool}")
 
@@ -820,12 +830,10 @@ class OnChainVerifier:
         a_token_address = reserve[8]
 
         # Get aToken total supply = TVL
-        a_token = self.w3.eth.contract(
-            address=Web3.to_checksum_address(a_token_address),
-            abi=ERC20_ABI,
+        a_token = self._erc20(a_token_address)
+        total_supply, decimals = await self._read(
+            a_token.functions.totalSupply(), a_token.functions.decimals()
         )
-        total_supply = a_token.functions.totalSupply().call()
-        decimals = a_token.functions.decimals().call()
 
         tvl_raw = total_supply / (10 ** decimals)
         # APY from liquidity rate (RAY precision)
@@ -862,8 +870,10 @@ class OnChainVerifier:
         else:
             market_id_bytes = bytes.fromhex(market_id.ljust(64, '0'))
 
-        market_data = morpho.functions.market(market_id_bytes).call()
-        market_params = morpho.functions.idToMarketParams(market_id_bytes).call()
+        market_data, market_params = await self._read(
+            morpho.functions.market(market_id_bytes),
+            morpho.functions.idToMarketParams(market_id_bytes),
+        )
 
         total_supply = market_data[0]  # totalSupplyAssets
         total_borrow = market_data[2]  # totalBorrowAssets
@@ -871,11 +881,7 @@ class OnChainVerifier:
         loan_token = market_params[0]
 
         # Get token decimals
-        token = self.w3.eth.contract(
-            address=Web3.to_checksum_address(loan_token),
-            abi=ERC20_ABI,
-        )
-        decimals = token.functions.decimals().call()
+        decimals = await self._call(self._erc20(loan_token).functions.decimals())
 
         tvl_raw = total_supply / (10 ** decimals)
         price = await self._get_token_price(loan_token)
@@ -908,17 +914,15 @@ class OnChainVerifier:
             abi=COMET_ABI,
         )
 
-        total_supply = comet.functions.totalSupply().call()
-        utilization = comet.functions.getUtilization().call()
-        supply_rate = comet.functions.getSupplyRate(utilization).call()
-        base_token = comet.functions.baseToken().call()
-
-        # Get decimals
-        token = self.w3.eth.contract(
-            address=Web3.to_checksum_address(base_token),
-            abi=ERC20_ABI,
+        total_supply, utilization, base_token = await self._read(
+            comet.functions.totalSupply(),
+            comet.functions.getUtilization(),
+            comet.functions.baseToken(),
+        )
+        supply_rate, decimals = await self._read(
+            comet.functions.getSupplyRate(utilization),
+            self._erc20(base_token).functions.decimals(),
         )
-        decimals = token.functions.decimals().call()
 
         tvl_raw = total_supply / (10 ** decimals)
         price = await self._get_token_price(base_token)
@@ -948,20 +952,19 @@ class OnChainVerifier:
             abi=MTOKEN_ABI,
         )
 
-        total_supply = mtoken.functions.totalSupply().call()
-        exchange_rate = mtoken.functions.exchangeRateStored().call()
-        supply_rate = mtoken.functions.supplyRatePerTimestamp().call()
-        underlying_addr = mtoken.functions.underlying().call()
-        cash = mtoken.functions.getCash().call()
-        borrows = mtoken.functions.totalBorrows().call()
-        reserves = mtoken.functions.totalReserves().call()
+        (total_supply, exchange_rate, supply_rate, underlying_addr,
+         cash, borrows, reserves) = await self._read(
+            mtoken.functions.totalSupply(),
+            mtoken.functions.exchangeRateStored(),
+            mtoken.functions.supplyRatePerTimestamp(),
+            mtoken.functions.underlying(),
+            mtoken.functions.getCash(),
+            mtoken.functions.totalBorrows(),
+            mtoken.functions.totalReserves(),
+        )
 
         # Get underlying decimals
-        underlying = self.w3.eth.contract(
-            address=Web3.to_checksum_address(underlying_addr),
-            abi=ERC20_ABI,
-        )
-        decimals = underlying.functions.decimals().call()
+        decimals = await self._call(self._erc20(underlying_addr).functions.decimals())
 
         # TVL = cash + totalBorrows - totalReserves
         tvl_raw = (cash + borrows - reserves) / (10 ** decimals)
@@ -992,53 +995,44 @@ class OnChainVerifier:
             abi=AERO_POOL_ABI,
         )
 
-        reserves = pool.functions.getReserves().call()
-        token0_addr = pool.functions.token0().call()
-        token1_addr = pool.functions.token1().call()
-
-        try:
-            is_stable = pool.functions.stable().call()
-        except:
-            is_stable = False
-
-        # Get token decimals
-        t0 = self.w3.eth.contract(address=Web3.to_checksum_address(token0_addr), abi=ERC20_ABI)
-        t1 = self.w3.eth.contract(address=Web3.to_checksum_address(token1_addr), abi=ERC20_ABI)
-        d0 = t0.functions.decimals().call()
-        d1 = t1.functions.decimals().call()
-        s0 = t0.functions.symbol().call()
-        s1 = t1.functions.symbol().call()
+        # Round 1: pool state (stable/gauge may not exist on every pool)
+        (reserves, token0_addr, token1_addr), (is_stable, gauge_addr) = await asyncio.gather(
+            self._read(pool.functions.getReserves(), pool.functions.token0(), pool.functions.token1()),
+            self._read(pool.functions.stable(), pool.functions.gauge(), allow_failure=True),
+        )
+        is_stable = bool(is_stable)
+
+        # Round 2: token metadata + gauge rewards
+        gauge = None
+        if gauge_addr and gauge_addr != "0x0000000000000000000000000000000000000000":
+            gauge = self.w3.eth.contract(
+                address=Web3.to_checksum_address(gauge_addr),
+                abi=AERO_GAUGE_ABI,
+            )
+        ((d0, s0), (d1, s1)), (reward_rate, gauge_supply) = await asyncio.gather(
+            self._token_meta(token0_addr, token1_addr),
+            self._read(gauge.functions.rewardRate(), gauge.functions.totalSupply(), allow_failure=True)
+            if gauge else asyncio.sleep(0, result=[None, None]),
+        )
 
-        p0 = await self._get_token_price(token0_addr)
-        p1 = await self._get_token_price(token1_addr)
+        # AERO price only matters with a gauge
+        price_tokens = [token0_addr, token1_addr] + ([TOKENS["AERO"]["address"]] if gauge else [])
+        p0, p1, *aero = await self._prices(*price_tokens)
+        aero_price = aero[0] if aero else 0.0
 
         r0 = reserves[0] / (10 ** d0)
         r1 = reserves[1] / (10 ** d1)
 
         tvl = r0 * p0 + r1 * p1
 
-        # Try to get gauge for APY
+        # Gauge APY
         apy = 0.0
-        gauge_addr = None
-        try:
-            gauge_addr = pool.functions.gauge().call()
-            if gauge_addr and gauge_addr != "0x0000000000000000000000000000000000000000":
-                gauge = self.w3.eth.contract(
-                    address=Web3.to_checksum_address(gauge_addr),
-                    abi=AERO_GAUGE_ABI,
-                )
-                reward_rate = gauge.functions.rewardRate().call()
-                gauge_supply = gauge.functions.totalSupply().call()
-
-                # AERO price
-                aero_price = await self._get_token_price(TOKENS["AERO"]["address"])
-
-                if gauge_supply > 0 and tvl > 0:
-                    # Rewards per year in USD
-                    rewards_per_year = (reward_rate / 1e18) * SECONDS_PER_YEAR * aero_price
-                    apy = (rewards_per_year / tvl) * 100
-        except Exception as e:
-            print(f"[OnChainVerifier] Gauge query error for {pool_address}: {e}")
+        if gauge and (reward_rate is None or gauge_supply is None):
+            print(f"[OnChainVerifier] Gauge query error for {pool_address}: rewardRate/totalSupply failed")
+        elif gauge and gauge_supply > 0 and tvl > 0:
+            # Rewards per year in USD
+            rewards_per_year = (reward_rate / 1e18) * SECONDS_PER_YEAR * aero_price
+            apy = (rewards_per_year / tvl) * 100
 
         # Price = ratio between tokens
         price = (r0 * p0) / (r1 * p1) if r1 * p1 > 0 else 0
@@ -1068,29 +1062,33 @@ class OnChainVerifier:
             abi=UNIV3_POOL_ABI,
         )
 
-        slot0 = pool.functions.slot0().call()
-        liquidity = pool.functions.liquidity().call()
-        fee_tier = pool.functions.fee().call()
-        token0_addr = pool.functions.token0().call()
-        token1_addr = pool.functions.token1().call()
+        # Round 1: pool state + fee growth (optional) in the same multicall
+        (slot0, liquidity, fee_tier, token0_addr, token1_addr), (fg0, fg1) = await asyncio.gather(
+            self._read(
+                pool.functions.slot0(),
+                pool.functions.liquidity(),
+                pool.functions.fee(),
+                pool.functions.token0(),
+                pool.functions.token1(),
+            ),
+            self._read(
+                pool.functions.feeGrowthGlobal0X128(),
+                pool.functions.feeGrowthGlobal1X128(),
+                allow_failure=True,
+            ),
+        )
 
         sqrt_price_x96 = slot0[0]
         tick = slot0[1]
 
-        # Get token info
-        t0 = self.w3.eth.contract(address=Web3.to_checksum_address(token0_addr), abi=ERC20_ABI)
-        t1 = self.w3.eth.contract(address=Web3.to_checksum_address(token1_addr), abi=ERC20_ABI)
-        d0 = t0.functions.decimals().call()
-        d1 = t1.functions.decimals().call()
-        s0 = t0.functions.symbol().call()
-        s1 = t1.functions.symbol().call()
+        # Round 2: token info
+        (d0, s0), (d1, s1) = await self._token_meta(token0_addr, token1_addr)
 
         # Price from sqrtPriceX96
         price_raw = (sqrt_price_x96 / (2 ** 96)) ** 2
         price_adjusted = price_raw * (10 ** d0) / (10 ** d1)
 
-        p0 = await self._get_token_price(token0_addr)
-        p1 = await self._get_token_price(token1_addr)
+        p0, p1 = await self._prices(token0_addr, token1_addr)
 
         # TVL estimation from liquidity (simplified — around active tick)
         # For concentrated liquidity, TVL = 2 * sqrt(L) * sqrt(P) * token_price
@@ -1107,8 +1105,8 @@ class OnChainVerifier:
         fee_pct = fee_tier / 1_000_000 * 100  # e.g., 3000 → 0.3%
         apy = None
         try:
-            fg0 = pool.functions.feeGrowthGlobal0X128().call()
-            fg1 = pool.functions.feeGrowthGlobal1X128().call()
+            if fg0 is None or fg1 is None:
+                raise ValueError("feeGrowthGlobal not available")
             # feeGrowthGlobal = cumulative fees per unit of liquidity in Q128
             # Estimate annual fees: fees_usd = feeGrowth / 2^128 * price * liquidity
             if liquidity > 0 and tvl > 0:
@@ -1154,27 +1152,28 @@ class OnChainVerifier:
             abi=CURVE_POOL_ABI,
         )
 
-        virtual_price = pool.functions.get_virtual_price().call()
+        # Round 1: virtual price + up to 4 coins/balances (most Curve pools have 2-4 coins)
+        virtual_price, coin_addrs, balances = await asyncio.gather(
+            self._call(pool.functions.get_virtual_price()),
+            self._read(*(pool.functions.coins(i) for i in range(4)), allow_failure=True),
+            self._read(*(pool.functions.balances(i) for i in range(4)), allow_failure=True),
+        )
+        n = 0
+        while n < 4 and coin_addrs[n] is not None and balances[n] is not None:
+            n += 1
+
+        # Round 2: coin metadata
+        meta = await self._token_meta(*coin_addrs[:n], allow_failure=True)
+        count = next((i for i, (d, s) in enumerate(meta) if d is None or s is None), n)
+        prices = await self._prices(*coin_addrs[:count])
 
-        # Enumerate coins and balances (most Curve pools have 2-4 coins)
         tvl = 0.0
         coins = []
-        for i in range(4):
-            try:
-                coin_addr = pool.functions.coins(i).call()
-                balance = pool.functions.balances(i).call()
-
-                token = self.w3.eth.contract(
-                    address=Web3.to_checksum_address(coin_addr), abi=ERC20_ABI)
-                decimals = token.functions.decimals().call()
-                symbol = token.functions.symbol().call()
-
-                bal = balance / (10 ** decimals)
-                price = await self._get_token_price(coin_addr)
-                tvl += bal * price
-                coins.append({"symbol": symbol, "balance": round(bal, 4), "price": price})
-            except:
-                break
+        for i in range(count):
+            decimals, symbol = meta[i]
+            bal = balances[i] / (10 ** decimals)
+            tvl += bal * prices[i]
+            coins.append({"symbol": symbol, "balance": round(bal, 4), "price": prices[i]})
 
         # Estimate fee APY from virtual price growth (Curve pools accrue fees via virtual price)
         # virtual_price starts at 1e18 and grows with fees
@@ -1205,9 +1204,11 @@ class OnChainVerifier:
             abi=PENDLE_MARKET_ABI,
         )
 
-        state = market.functions.readState().call()
-        sy_addr = market.functions.SY().call()
-        expiry = market.functions.expiry().call()
+        state, sy_addr, expiry = await self._read(
+            market.functions.readState(),
+            market.functions.SY(),
+            market.functions.expiry(),
+        )
 
         total_pt = state[0]
         total_sy = state[1]
@@ -1215,9 +1216,7 @@ class OnChainVerifier:
         last_ln_implied_rate = state[8]
 
         # Get SY token info for TVL
-        sy_token = self.w3.eth.contract(
-            address=Web3.to_checksum_address(sy_addr), abi=ERC20_ABI)
-        sy_decimals = sy_token.functions.decimals().call()
+        sy_decimals = await self._call(self._erc20(sy_addr).functions.decimals())
 
         sy_raw = total_sy / (10 ** sy_decimals)
         pt_raw = total_pt / (10 ** sy_decimals)
@@ -1263,27 +1262,25 @@ class OnChainVerifier:
             abi=ERC4626_ABI,
         )
 
-        total_assets = vault.functions.totalAssets().call()
-        total_supply = vault.functions.totalSupply().call()
-        asset_addr = vault.functions.asset().call()
-        vault_decimals = vault.functions.decimals().call()
+        total_assets, total_supply, asset_addr, vault_decimals = await self._read(
+            vault.functions.totalAssets(),
+            vault.functions.totalSupply(),
+            vault.functions.asset(),
+            vault.functions.decimals(),
+        )
 
-        # Share price
+        # Round 2: share price + underlying token info
         one_share = 10 ** vault_decimals
+        (converted,), [(asset_decimals, asset_symbol)] = await asyncio.gather(
+            self._read(vault.functions.convertToAssets(one_share), allow_failure=True)
+            if total_supply > 0 else asyncio.sleep(0, result=[None]),
+            self._token_meta(asset_addr),
+        )
         if total_supply > 0:
-            try:
-                assets_per_share = vault.functions.convertToAssets(one_share).call()
-            except:
-                assets_per_share = total_assets * one_share // total_supply
+            assets_per_share = converted if converted is not None else total_assets * one_share // total_supply
         else:
             assets_per_share = one_share
 
-        # Get underlying token info
-        asset_token = self.w3.eth.contract(
-            address=Web3.to_checksum_address(asset_addr), abi=ERC20_ABI)
-        asset_decimals = asset_token.functions.decimals().call()
-        asset_symbol = asset_token.functions.symbol().call()
-
         tvl_raw = total_assets / (10 ** asset_decimals)
         price = await self._get_token_price(asset_addr)
         share_price = assets_per_share / one_share
@@ -1326,33 +1323,29 @@ class OnChainVerifier:
             abi=BALANCER_VAULT_ABI,
         )
 
-        pool_id = pool.functions.getPoolId().call()
-        tokens_data = vault.functions.getPoolTokens(pool_id).call()
+        pool_id, (swap_fee_raw,) = await asyncio.gather(
+            self._call(pool.functions.getPoolId()),
+            self._read(pool.functions.getSwapFeePercentage(), allow_failure=True),
+        )
+        tokens_data = await self._call(vault.functions.getPoolTokens(pool_id))
         token_addrs = tokens_data[0]
         balances = tokens_data[1]
 
         # Get swap fee
-        try:
-            swap_fee_raw = pool.functions.getSwapFeePercentage().call()
-            swap_fee_pct = swap_fee_raw / 1e18 * 100
-        except:
-            swap_fee_pct = 0
+        swap_fee_pct = swap_fee_raw / 1e18 * 100 if swap_fee_raw is not None else 0
+
+        # Calculate TVL (tokens whose metadata can't be read are skipped)
+        meta = await self._token_meta(*token_addrs, allow_failure=True)
+        valid = [i for i, (d, s) in enumerate(meta) if d is not None and s is not None]
+        prices = await self._prices(*(token_addrs[i] for i in valid))
 
-        # Calculate TVL
         tvl = 0.0
         tokens_info = []
-        for i, addr in enumerate(token_addrs):
-            try:
-                token = self.w3.eth.contract(
-                    address=Web3.to_checksum_address(addr), abi=ERC20_ABI)
-                decimals = token.functions.decimals().call()
-                symbol = token.functions.symbol().call()
-                bal = balances[i] / (10 ** decimals)
-                price = await self._get_token_price(addr)
-                tvl += bal * price
-                tokens_info.append({"symbol": symbol, "balance": round(bal, 4), "price": price})
-            except:
-                continue
+        for i, price in zip(valid, prices):
+            decimals, symbol = meta[i]
+            bal = balances[i] / (10 ** decimals)
+            tvl += bal * price
+            tokens_info.append({"symbol": symbol, "balance": round(bal, 4), "price": price})
 
         # Estimate fee APY: swap_fee_pct * ~365 (assuming TVL turns over ~1x/day — rough)
         bal_fee_apy = None
@@ -1383,32 +1376,22 @@ class OnChainVerifier:
             abi=V2_PAIR_ABI,
         )
 
-        reserves = pair.functions.getReserves().call()
-        t0 = pair.functions.token0().call()
-        t1 = pair.functions.token1().call()
-
-        tk0 = self.w3.eth.contract(address=Web3.to_checksum_address(t0), abi=ERC20_ABI)
-        tk1 = self.w3.eth.contract(address=Web3.to_checksum_address(t1), abi=ERC20_ABI)
+        (reserves, t0, t1), (factory,) = await asyncio.gather(
+            self._read(pair.functions.getReserves(), pair.functions.token0(), pair.functions.token1()),
+            self._read(pair.functions.factory(), allow_failure=True),
+        )
+        # Detect factory
+        factory = factory or "unknown"
 
-        d0 = tk0.functions.decimals().call()
-        d1 = tk1.functions.decimals().call()
-        s0 = tk0.functions.symbol().call()
-        s1 = tk1.functions.symbol().call()
+        (d0, s0), (d1, s1) = await self._token_meta(t0, t1)
 
         r0 = reserves[0] / (10 ** d0)
         r1 = reserves[1] / (10 ** d1)
 
-        p0 = await self._get_token_price(t0)
-        p1 = await self._get_token_price(t1)
+        p0, p1 = await self._prices(t0, t1)
 
         tvl = r0 * p0 + r1 * p1
 
-        # Detect factory
-        try:
-            factory = pair.functions.factory().call()
-        except:
-            factory = "unknown"
-
         # Estimate fee APY: V2 pairs charge 0.3% per swap
         # Conservative: assume ~5% daily volume/TVL ratio
         v2_fee_apy = None
@@ -1440,24 +1423,19 @@ class OnChainVerifier:
             abi=STARGATE_POOL_ABI,
         )
 
-        total_liquidity = pool.functions.totalLiquidity().call()
-        total_supply = pool.functions.totalSupply().call()
-        token_addr = pool.functions.token().call()
+        (total_liquidity, total_supply, token_addr), (convert_rate,) = await asyncio.gather(
+            self._read(pool.functions.totalLiquidity(), pool.functions.totalSupply(), pool.functions.token()),
+            self._read(pool.functions.convertRate(), allow_failure=True),
+        )
+        # Convert rate (Stargate internal scaling)
+        if convert_rate is None:
+            convert_rate = 1
 
-        token = self.w3.eth.contract(
-            address=Web3.to_checksum_address(token_addr), abi=ERC20_ABI)
-        decimals = token.functions.decimals().call()
-        symbol = token.functions.symbol().call()
+        [(decimals, symbol)] = await self._token_meta(token_addr)
 
         tvl_raw = total_liquidity / (10 ** decimals)
         price = await self._get_token_price(token_addr)
 
-        # Convert rate (Stargate internal scaling)
-        try:
-            convert_rate = pool.functions.convertRate().call()
-        except:
-            convert_rate = 1
-
         # Estimate share price growth APY
         sg_apy = None
         if total_supply > 0 and total_liquidity > 0:
@@ -1487,32 +1465,23 @@ class OnChainVerifier:
             abi=EXACTLY_MARKET_ABI,
         )
 
-        total_assets = market.functions.totalAssets().call()
-        asset_addr = market.functions.asset().call()
-        decimals = market.functions.decimals().call()
-
-        # Borrow data
-        try:
-            total_borrow = market.functions.totalFloatingBorrowAssets().call()
-        except:
+        (total_assets, asset_addr, decimals), (total_borrow, total_deposit, floating_rate) = await asyncio.gather(
+            self._read(market.functions.totalAssets(), market.functions.asset(), market.functions.decimals()),
+            # Borrow data + rate (optional)
+            self._read(
+                market.functions.totalFloatingBorrowAssets(),
+                market.functions.totalFloatingDepositAssets(),
+                market.functions.floatingRate(),
+                allow_failure=True,
+            ),
+        )
+        if total_borrow is None:
             total_borrow = 0
-
-        try:
-            total_deposit = market.functions.totalFloatingDepositAssets().call()
-        except:
+        if total_deposit is None:
             total_deposit = total_assets
+        apy = (floating_rate / 1e18) * 100 if floating_rate is not None else None
 
-        # Rate
-        try:
-            floating_rate = market.functions.floatingRate().call()
-            apy = (floating_rate / 1e18) * 100
-        except:
-            apy = None
-
-        token = self.w3.eth.contract(
-            address=Web3.to_checksum_address(asset_addr), abi=ERC20_ABI)
-        asset_decimals = token.functions.decimals().call()
-        symbol = token.functions.symbol().call()
+        [(asset_decimals, symbol)] = await self._token_meta(asset_addr)
 
         tvl_raw = total_assets / (10 ** asset_decimals)
         price = await self._get_token_price(asset_addr)
@@ -1543,14 +1512,22 @@ class OnChainVerifier:
             abi=IONIC_CTOKEN_ABI,
         )
 
-        total_supply = ctoken.functions.totalSupply().call()
-        exchange_rate = ctoken.functions.exchangeRateStored().call()
-        underlying_addr = ctoken.functions.underlying().call()
+        (total_supply, exchange_rate, underlying_addr), (supply_rate, cash, borrows, reserves) = await asyncio.gather(
+            self._read(
+                ctoken.functions.totalSupply(),
+                ctoken.functions.exchangeRateStored(),
+                ctoken.functions.underlying(),
+            ),
+            self._read(
+                ctoken.functions.supplyRatePerBlock(),
+                ctoken.functions.getCash(),
+                ctoken.functions.totalBorrows(),
+                ctoken.functions.totalReserves(),
+                allow_failure=True,
+            ),
+        )
 
-        token = self.w3.eth.contract(
-            address=Web3.to_checksum_address(underlying_addr), abi=ERC20_ABI)
-        decimals = token.functions.decimals().call()
-        symbol = token.functions.symbol().call()
+        [(decimals, symbol)] = await self._token_meta(underlying_addr)
 
         # TVL = totalSupply * exchangeRate / 1e18 / 10^decimals
         tvl_raw = (total_supply * exchange_rate) / 1e18 / (10 ** decimals)
@@ -1559,7 +1536,6 @@ class OnChainVerifier:
         # APY from supplyRatePerBlock
         # Base: ~2 second blocks → 15_768_000 blocks/year
         try:
-            supply_rate = ctoken.functions.supplyRatePerBlock().call()
             blocks_per_year = 15_768_000
             apy = ((1 + supply_rate / 1e18) ** blocks_per_year - 1) * 100
         except:
@@ -1567,9 +1543,6 @@ class OnChainVerifier:
 
         # Utilization
         try:
-            cash = ctoken.functions.getCash().call()
-            borrows = ctoken.functions.totalBorrows().call()
-            reserves = ctoken.functions.totalReserves().call()
             utilization = borrows / (cash + borrows - reserves) * 100 if (cash + borrows - reserves) > 0 else 0
         except:
             utilization = 0
@@ -1594,20 +1567,13 @@ class OnChainVerifier:
             abi=DHEDGE_POOL_ABI,
         )
 
-        token_price = pool.functions.tokenPrice().call()
-        total_fund_value = pool.functions.totalFundValue().call()
-        total_supply = pool.functions.totalSupply().call()
-
-        try:
-            manager = pool.functions.managerName().call()
-        except:
+        (token_price, total_fund_value, total_supply), (manager, creation) = await asyncio.gather(
+            self._read(pool.functions.tokenPrice(), pool.functions.totalFundValue(), pool.functions.totalSupply()),
+            self._read(pool.functions.managerName(), pool.functions.creationTime(), allow_failure=True),
+        )
+        if manager is None:
             manager = "Unknown"
-
-        try:
-            creation = pool.functions.creationTime().call()
-            days_live = (int(time.time()) - creation) / 86400
-        except:
-            days_live = 0
+        days_live = (int(time.time()) - creation) / 86400 if creation is not None else 0
 
         # dHEDGE values are in 18 decimals, denominated in USD
         tvl = total_fund_value / 1e18
@@ -1644,26 +1610,22 @@ class OnChainVerifier:
             abi=HOP_AMM_ABI,
         )
 
-        virtual_price = amm.functions.getVirtualPrice().call()
-        canonical_token = amm.functions.l2CanonicalToken().call()
-        h_token = amm.functions.hToken().call()
+        (virtual_price, canonical_token, h_token), (swap_storage,) = await asyncio.gather(
+            self._read(amm.functions.getVirtualPrice(), amm.functions.l2CanonicalToken(), amm.functions.hToken()),
+            self._read(amm.functions.swapStorage(), allow_failure=True),
+        )
 
-        # Get LP token total supply from swapStorage
-        try:
-            swap_storage = amm.functions.swapStorage().call()
-            lp_token_addr = swap_storage[6]
-            lp_token = self.w3.eth.contract(
-                address=Web3.to_checksum_address(lp_token_addr), abi=ERC20_ABI)
-            lp_supply = lp_token.functions.totalSupply().call()
-            swap_fee = swap_storage[4]
-        except:
+        # Round 2: canonical token info + LP token total supply from swapStorage
+        [(decimals, symbol)], (lp_supply,) = await asyncio.gather(
+            self._token_meta(canonical_token),
+            self._read(self._erc20(swap_storage[6]).functions.totalSupply(), allow_failure=True)
+            if swap_storage else asyncio.sleep(0, result=[None]),
+        )
+        if lp_supply is None:
             lp_supply = 0
             swap_fee = 0
-
-        token = self.w3.eth.contract(
-            address=Web3.to_checksum_address(canonical_token), abi=ERC20_ABI)
-        decimals = token.functions.decimals().call()
-        symbol = token.functions.symbol().call()
+        else:
+            swap_fee = swap_storage[4]
 
         price = await self._get_token_price(canonical_token)
 
@@ -1673,12 +1635,11 @@ class OnChainVerifier:
             tvl = tvl_raw * price
         else:
             # Fallback: check balances of canonical + hToken
-            bal_c = self.w3.eth.contract(
-                address=Web3.to_checksum_address(canonical_token), abi=ERC20_ABI
-            ).functions.balanceOf(Web3.to_checksum_address(amm_address)).call()
-            bal_h = self.w3.eth.contract(
-                address=Web3.to_checksum_address(h_token), abi=ERC20_ABI
-            ).functions.balanceOf(Web3.to_checksum_address(amm_address)).call()
+            amm_checksum = Web3.to_checksum_address(amm_address)
+            bal_c, bal_h = await self._read(
+                self._erc20(canonical_token).functions.balanceOf(amm_checksum),
+                self._erc20(h_token).functions.balanceOf(amm_checksum),
+            )
             tvl_raw = (bal_c + bal_h) / (10 ** decimals)
             tvl = tvl_raw * price
 
@@ -1704,30 +1665,22 @@ class OnChainVerifier:
         """
         Overnight Finance (USD+): ERC20 totalSupply for TVL (1 USD+ = 1 USD)
         """
-        token = self.w3.eth.contract(
-            address=Web3.to_checksum_address(token_address),
-            abi=ERC20_ABI,
+        token = self._erc20(token_address)
+        # Fees from the exchange, if available
+        exchange = self.w3.eth.contract(
+            address=Web3.to_checksum_address(CONTRACTS["overnight_exchange"]),
+            abi=OVERNIGHT_EXCHANGE_ABI,
         )
 
-        total_supply = token.functions.totalSupply().call()
-        decimals = token.functions.decimals().call()
-        symbol = token.functions.symbol().call()
+        (total_supply, decimals, symbol), (buy_fee, redeem_fee) = await asyncio.gather(
+            self._read(token.functions.totalSupply(), token.functions.decimals(), token.functions.symbol()),
+            self._read(exchange.functions.buyFee(), exchange.functions.redeemFee(), allow_failure=True),
+        )
+        buy_fee = buy_fee or 0
+        redeem_fee = redeem_fee or 0
 
         tvl = total_supply / (10 ** decimals)  # USD+ is pegged to $1
 
-        # Get fees from exchange if available
-        buy_fee = 0
-        redeem_fee = 0
-        try:
-            exchange = self.w3.eth.contract(
-                address=Web3.to_checksum_address(CONTRACTS["overnight_exchange"]),
-                abi=OVERNIGHT_EXCHANGE_ABI,
-            )
-            buy_fee = exchange.functions.buyFee().call()
-            redeem_fee = exchange.functions.redeemFee().call()
-        except:
-            pass
-
         return {
             "tvl": round(tvl, 2),
             "apy": 5.0,  # USD+ typical daily rebase ~5% APY
@@ -1752,18 +1705,16 @@ class OnChainVerifier:
                 abi=BEEFY_VAULT_ABI,
             )
 
-            total_balance = vault.functions.balance().call()
-            ppfs = vault.functions.getPricePerFullShare().call()
-            want_addr = vault.functions.want().call()
-            vault_decimals = vault.functions.decimals().call()
-
-            total_supply = vault.functions.totalSupply().call()
+            total_balance, ppfs, want_addr, vault_decimals, total_supply = await self._read(
+                vault.functions.balance(),
+                vault.functions.getPricePerFullShare(),
+                vault.functions.want(),
+                vault.functions.decimals(),
+                vault.functions.totalSupply(),
+            )
 
             # Get want token info
-            want_token = self.w3.eth.contract(
-                address=Web3.to_checksum_address(want_addr), abi=ERC20_ABI)
-            want_decimals = want_token.functions.decimals().call()
-            want_symbol = want_token.functions.symbol().call()
+            [(want_decimals, want_symbol)] = await self._token_meta(want_addr)
 
             tvl_raw = total_balance / (10 ** want_decimals)
             price = await self._get_token_price(want_addr)
@@ -1809,16 +1760,15 @@ class OnChainVerifier:
             reserve_id = 0  # default
 
         try:
-            reserve = lending.functions.getReserveData(reserve_id).call()
+            reserve = await self._call(lending.functions.getReserveData(reserve_id))
         except Exception:
-            # If fails, try iterating reserves 0-10
-            for rid in range(10):
-                try:
-                    reserve = lending.functions.getReserveData(rid).call()
-                    if reserve[0].lower() != "0x" + "0" * 40:
-                        break
-                except:
-                    continue
+            # If fails, read reserves 0-10 in one round and take the first live one
+            candidates = await self._read(
+                *(lending.functions.getReserveData(rid) for rid in range(10)), allow_failure=True
+            )
+            for reserve in candidates:
+                if reserve and reserve[0].lower() != "0x" + "0" * 40:
+                    break
             else:
                 raise ValueError("Cannot find valid Extra Finance reserve")
 
@@ -1827,10 +1777,7 @@ class OnChainVerifier:
         total_borrows = reserve[4]
         deposit_rate = reserve[6]
 
-        token = self.w3.eth.contract(
-            address=Web3.to_checksum_address(underlying_addr), abi=ERC20_ABI)
-        decimals = token.functions.decimals().call()
-        symbol = token.functions.symbol().call()
+        [(decimals, symbol)] = await self._token_meta(underlying_addr)
 
         tvl_raw = total_liquidity / (10 ** decimals)
         price = await self._get_token_price(underlying_addr)
@@ -1857,23 +1804,19 @@ class OnChainVerifier:
             abi=MAVERICK_V2_POOL_ABI,
         )
 
-        state = pool.functions.getState().call()
-        tokenA = pool.functions.tokenA().call()
-        tokenB = pool.functions.tokenB().call()
-        fee = pool.functions.fee().call()
+        state, tokenA, tokenB, fee = await self._read(
+            pool.functions.getState(),
+            pool.functions.tokenA(),
+            pool.functions.tokenB(),
+            pool.functions.fee(),
+        )
 
-        tkA = self.w3.eth.contract(address=Web3.to_checksum_address(tokenA), abi=ERC20_ABI)
-        tkB = self.w3.eth.contract(address=Web3.to_checksum_address(tokenB), abi=ERC20_ABI)
-        dA = tkA.functions.decimals().call()
-        dB = tkB.functions.decimals().call()
-        sA = tkA.functions.symbol().call()
-        sB = tkB.functions.symbol().call()
+        (dA, sA), (dB, sB) = await self._token_meta(tokenA, tokenB)
 
         rA = state[0] / (10 ** dA)
         rB = state[1] / (10 ** dB)
 
-        pA = await self._get_token_price(tokenA)
-        pB = await self._get_token_price(tokenB)
+        pA, pB = await self._prices(tokenA, tokenB)
 
         tvl = rA * pA + rB * pB
 
@@ -1907,36 +1850,36 @@ class OnChainVerifier:
             abi=SILO_ABI,
         )
 
-        assets = silo.functions.getAssets().call()
+        assets = await self._call(silo.functions.getAssets())
+        listed = [Web3.to_checksum_address(a) for a in assets[:4]]  # Limit to 4 max
+
+        # Round 2: storage and token metadata for every asset together
+        storages, meta = await asyncio.gather(
+            self._read(*(silo.functions.assetStorage(a) for a in listed), allow_failure=True),
+            self._token_meta(*listed, allow_failure=True),
+        )
+        valid = [
+            i for i in range(len(listed))
+            if storages[i] is not None and meta[i][0] is not None and meta[i][1] is not None
+        ]
+        prices = await self._prices(*(listed[i] for i in valid))
+
         tvl = 0.0
         assets_info = []
+        for i, price in zip(valid, prices):
+            total_deposits = storages[i][3]
+            total_borrows = storages[i][5]
+            decimals, symbol = meta[i]
 
-        for asset_addr in assets[:4]:  # Limit to 4 max
-            try:
-                storage = silo.functions.assetStorage(
-                    Web3.to_checksum_address(asset_addr)
-                ).call()
-
-                total_deposits = storage[3]
-                total_borrows = storage[5]
-
-                token = self.w3.eth.contract(
-                    address=Web3.to_checksum_address(asset_addr), abi=ERC20_ABI)
-                decimals = token.functions.decimals().call()
-                symbol = token.functions.symbol().call()
-
-                dep = total_deposits / (10 ** decimals)
-                price = await self._get_token_price(asset_addr)
-                tvl += dep * price
-
-                assets_info.append({
-                    "symbol": symbol,
-                    "deposits": round(dep, 4),
-                    "borrows": round(total_borrows / (10 ** decimals), 4),
-                    "price": price,
-                })
-            except:
-                continue
+            dep = total_deposits / (10 ** decimals)
+            tvl += dep * price
+
+            assets_info.append({
+                "symbol": symbol,
+                "deposits": round(dep, 4),
+                "borrows": round(total_borrows / (10 ** decimals), 4),
+                "price": price,
+            })
 
         # Estimate Silo APY from utilization (interest rate increases with utilization)
         silo_apy = None
@@ -1977,74 +1920,72 @@ class OnChainVerifier:
     # HELPERS
     # ============================================
 
+    async def _call(self, fn) -> Any:
+        """One contract read, merged into the shared multicall batch"""
+        return await self.batcher.call(fn)
+
+    async def _read(self, *fns, allow_failure: bool = False) -> List[Any]:
+        """
+        One round of independent reads. Rounds awaited concurrently - by
+        this handler or by other pools in verify_batch() - share multicalls.
+        """
+        return await self.batcher.read(*fns, allow_failure=allow_failure)
+
+    def _erc20(self, address: str):
+        return self._erc20_factory(address=Web3.to_checksum_address(address))
+
+    async def _token_meta(self, *addresses: str, allow_failure: bool = False) -> List[Tuple[Any, Any]]:
+        """(decimals, symbol) for each token - token registry first, one round for the rest"""
+        cached = [self.registry.cached_token(address) for address in addresses]
+        missing = [address for address, meta in zip(addresses, cached) if meta is None or meta.symbol is None]
+        fetched = {}
+        if missing:
+            fns = []
+            for address in missing:
+                token = self._erc20(address)
+                fns += [token.functions.decimals(), token.functions.symbol()]
+            results = await self._read(*fns, allow_failure=allow_failure)
+            for i, address in enumerate(missing):
+                decimals, symbol = results[2 * i], results[2 * i + 1]
+                fetched[address] = (decimals, symbol)
+                if decimals is not None and symbol is not None:
+                    self.registry.remember_token(address, decimals, symbol)
+        return [
+            fetched[address] if address in fetched else (meta.decimals, meta.symbol)
+            for address, meta in zip(addresses, cached)
+        ]
+
+    async def _prices(self, *addresses: str) -> List[float]:
+        return list(await asyncio.gather(*(self._get_token_price(a) for a in addresses)))
+
     async def _get_token_price(self, token_address: str) -> float:
         """
-        Get USD price for a token. Uses cache + simple heuristics:
-        - Stablecoins → $1.00
-        - WETH → ETH price from Pyth or hardcoded
-        - Others → attempt Pyth oracle or fallback
+        Get USD price for a token from the shared price snapshot
+        (data_sources/price_snapshot.py): Pyth/Chainlink feeds for majors,
+        batched GeckoTerminal/CoinGecko for the long tail.
+        Stablecoins → $1.00 without a lookup.
         """
         addr = token_address.lower()
 
-        # Check cache (5 min TTL)
-        if addr in self._price_cache:
-            price, ts = self._price_cache[addr]
-            if time.time() - ts < 300:
-                return price
-
         # Stablecoins
         if addr in STABLECOIN_ADDRESSES:
-            self._price_cache[addr] = (1.0, time.time())
             return 1.0
 
-        # WETH
-        if addr == TOKENS["WETH"]["address"].lower():
-            price = await self._get_eth_price()
-            self._price_cache[addr] = (price, time.time())
-            return price
-
-        # wstETH (approximately 1.15x ETH)
-        if addr == TOKENS["wstETH"]["address"].lower():
-            eth_price = await self._get_eth_price()
-            price = eth_price * 1.15  # rough estimate
-            self._price_cache[addr] = (price, time.time())
-            return price
-
-        # cbETH (approximately 1.05x ETH)
-        if addr == TOKENS["cbETH"]["address"].lower():
-            eth_price = await self._get_eth_price()
-            price = eth_price * 1.05
-            self._price_cache[addr] = (price, time.time())
-            return price
-
-        # cbBTC (approximately BTC price — hardcode rough estimate)
-        if addr == TOKENS["cbBTC"]["address"].lower():
-            self._price_cache[addr] = (95000.0, time.time())
-            return 95000.0
-
-        # AERO token — try to get from Aerodrome pool vs USDC
-        if addr == TOKENS["AERO"]["address"].lower():
-            price = await self._get_aero_price()
-            self._price_cache[addr] = (price, time.time())
-            return price
-
-        # Fallback: try fetch from CoinGecko API
         try:
-            import httpx
-            async with httpx.AsyncClient(timeout=5) as client:
-                resp = await client.get(
-                    f"https://api.coingecko.com/api/v3/simple/token_price/base?"
-                    f"contract_addresses={addr}&vs_currencies=usd"
-                )
-                data = resp.json()
-                if addr in data:
-                    price = data[addr]["usd"]
-                    self._price_cache[addr] = (price, time.time())
-                    return price
-        except:
-            pass
+            from data_sources.price_snapshot import price_snapshots
+            price = price_snapshots.get_price(addr)
+            if price is None:
+                # First sighting: tracked from now on, fetched in the next batch
+                price = (await price_snapshots.get_token_prices([addr])).get(addr)
+            if price:
+                return price
+        except Exception as e:
+            print(f"[OnChainVerifier] Price snapshot error: {e}")
+
+        # WETH: read the Uniswap pool directly if the snapshot has nothing
+        if addr == TOKENS["WETH"]["address"].lower():
+            return await self._get_eth_price()
 
-        # Final fallback: return 0
         print(f"[OnChainVerifier] ⚠️ Cannot get price for {token_address}")
         return 0.0
 
@@ -2055,20 +1996,19 @@ class OnChainVerifier:
                 address=Web3.to_checksum_address(CONTRACTS["uniswap_v3_factory"]),
                 abi=UNIV3_FACTORY_ABI,
             )
-            pool_addr = factory.functions.getPool(
+            pool_addr = await self._call(factory.functions.getPool(
                 Web3.to_checksum_address(TOKENS["WETH"]["address"]),
                 Web3.to_checksum_address(TOKENS["USDC"]["address"]),
                 500,  # 0.05% fee tier
-            ).call()
+            ))
 
             pool = self.w3.eth.contract(
                 address=Web3.to_checksum_address(pool_addr),
                 abi=UNIV3_POOL_ABI,
             )
-            slot0 = pool.functions.slot0().call()
-            sqrt_price = slot0[0] / (2 ** 96)
             # WETH is token0, USDC is token1 (depends on sort order)
-            token0 = pool.functions.token0().call()
+            slot0, token0 = await self._read(pool.functions.slot0(), pool.functions.token0())
+            sqrt_price = slot0[0] / (2 ** 96)
 
             if token0.lower() == TOKENS["WETH"]["address"].lower():
                 # price = sqrt^2 * 10^(d0-d1) = sqrt^2 * 10^(18-6) = sqrt^2 * 10^12
@@ -2081,24 +2021,6 @@ class OnChainVerifier:
             print(f"[OnChainVerifier] ETH price fallback: {e}")
             return 2700.0  # conservative fallback
 
-    async def _get_aero_price(self) -> float:
-        """Get AERO price from Aerodrome AERO/USDC pool"""
-        try:
-            # Known AERO/USDC pool on Aerodrome
-            import httpx
-            async with httpx.AsyncClient(timeout=5) as client:
-                resp = await client.get(
-                    f"https://api.coingecko.com/api/v3/simple/token_price/base?"
-                    f"contract_addresses={TOKENS['AERO']['address'].lower()}&vs_currencies=usd"
-                )
-                data = resp.json()
-                addr = TOKENS["AERO"]["address"].lower()
-                if addr in data:
-                    return data[addr]["usd"]
-        except:
-            pass
-        return 0.80  # fallback
-
     def _compute_delta(self, onchain: Dict, api_data: Dict) -> Dict:
         """Compute % deviation between on-chain and API data."""
         delta = {}
@@ -333,7 +333,34 @@ class PythOracle:
     def get_all_prices(self) -> Dict[str, Dict]:
         """
         Get all tracked prices at once.
+        
+        One Multicall3 read of every Pyth feed + Chainlink fallback
+        (data_sources/price_snapshot.py); per-feed calls only if that fails.
         """
+        try:
+            from data_sources.price_snapshot import price_snapshots
+            feeds = price_snapshots.read_feeds()
+            now = int(time.time())
+            prices = {}
+            for symbol in PRICE_FEEDS.keys():
+                feed = feeds.get(symbol)
+                if not feed:
+                    prices[symbol] = {"symbol": symbol, "error": "No price", "is_stale": True}
+                    continue
+                age_seconds = now - feed.publish_time
+                prices[symbol] = {
+                    "symbol": symbol,
+                    "price": round(feed.price, 6),
+                    "publish_time": feed.publish_time,
+                    "age_seconds": round(age_seconds, 1),
+                    "is_stale": feed.is_stale or age_seconds > MAX_PRICE_AGE_SECONDS,
+                    "max_age": MAX_PRICE_AGE_SECONDS,
+                    "source": feed.source
+                }
+            return prices
+        except Exception as e:
+            print(f"[PythOracle] Batched price read failed, reading per feed: {e}")
+        
         prices = {}
         for symbol in PRICE_FEEDS.keys():
             prices[symbol] = self.get_price(symbol)
@@ -0,0 +1,179 @@
+"""
+Rule Compiler - ConditionalRules compiled into NumPy mask programs
+
+WHY: RulesEngine.find_matching_rule() sorts the rules and re-interprets
+every RuleCondition field against one position dict; RuleCondition.matches()
+does the same per pool. Run per position on every monitor cycle, an agent
+with dozens of rules paid rules x rows Python attribute lookups, lowercasing
+and list building. The interpreter stays for one-off checks; the position
+monitor evaluates each agent's positions as one table per cycle through
+RulesEngine.evaluate_many().
+
+DESIGN:
+- A condition compiles once into a tuple of predicates (op, column, value),
+  preserving the interpreter's semantics (falsy bounds are ignored,
+  missing tvl/apy count as 0, string fields compare case-insensitively)
+- Rows (pools, or positions' pool_info) are loaded once into a RowTable:
+  float64 columns for tvl/apy, lowercase string columns compared with
+  NumPy, and an asset -> row-mask index for membership tests
+- A RuleProgram evaluates every rule over the table in one pass; predicate
+  masks are memoized per program run, so rules sharing a bound cost one
+  comparison. first_match() returns the first rule (priority order, stable)
+  matching each row, or -1
+- Programs are cached by rule content - API/DB rules are rebuilt from dicts
+  on every read, so identity caching would never hit
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .conditional_rules import ConditionalRule, RuleCondition
+
+# (op, column, value)
+Predicate = Tuple[str, str, object]
+
+PROGRAM_CACHE_SIZE = 256
+
+
+def compile_condition(condition: RuleCondition) -> Tuple[Predicate, ...]:
+    """Predicates equivalent to RuleCondition.matches()"""
+    predicates: List[Predicate] = []
+    if condition.tvl_min:
+        predicates.append(("ge", "tvl", float(condition.tvl_min)))
+    if condition.tvl_max:
+        predicates.append(("le", "tvl", float(condition.tvl_max)))
+    if condition.protocol:
+        predicates.append(("eq", "protocol", condition.protocol.lower()))
+    if condition.pool_type:
+        predicates.append(("eq", "pool_type", condition.pool_type.lower()))
+    if condition.asset:
+        predicates.append(("has", "assets", condition.asset.upper()))
+    if condition.apy_min:
+        predicates.append(("ge", "apy", float(condition.apy_min)))
+    if condition.apy_max:
+        predicates.append(("le", "apy", float(condition.apy_max)))
+    return tuple(predicates)
+
+
+class RowTable:
+    """Columnar view of pool dicts for rule evaluation"""
+
+    def __init__(self, pools: Sequence[dict]):
+        n = len(pools)
+        self.size = n
+        self.numeric: Dict[str, np.ndarray] = {
+            "tvl": np.fromiter((p.get("tvl", 0) or 0 for p in pools), dtype=np.float64, count=n),
+            "apy": np.fromiter((p.get("apy", 0) or 0 for p in pools), dtype=np.float64, count=n),
+        }
+        self.strings: Dict[str, np.ndarray] = {
+            "protocol": np.array([(p.get("protocol") or "").lower() for p in pools], dtype=object),
+            "pool_type": np.array([(p.get("pool_type") or "").lower() for p in pools], dtype=object),
+        }
+        # asset -> rows holding it
+        self._assets: Dict[str, List[int]] = {}
+        for i, p in enumerate(pools):
+            for asset in p.get("assets", []) or []:
+                self._assets.setdefault(str(asset).upper(), []).append(i)
+
+    def asset_mask(self, asset: str) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        rows = self._assets.get(asset)
+        if rows:
+            mask[rows] = True
+        return mask
+
+    def predicate_mask(self, predicate: Predicate) -> np.ndarray:
+        op, column, value = predicate
+        if op == "ge":
+            return self.numeric[column] >= value
+        if op == "le":
+            return self.numeric[column] <= value
+        if op == "eq":
+            return self.strings[column] == value
+        if op == "has":
+            return self.asset_mask(value)
+        raise ValueError(f"Unknown predicate op: {op}")
+
+
+class RuleProgram:
+    """
+    Usage:
+        program = compile_rules(rules)
+        idx = program.first_match(RowTable(pools))   # rule index per row, -1 = none
+        rule = program.rules[idx[i]]
+    """
+
+    def __init__(self, rules: Sequence[ConditionalRule], compiled: Optional[Tuple[List[int], List[tuple]]] = None):
+        if compiled is None:
+            # Same order as find_matching_rule(): highest priority first, stable
+            order = sorted(range(len(rules)), key=lambda i: -rules[i].priority)
+            compiled = (order, [compile_condition(rules[i].condition) for i in order])
+        self.compiled = compiled
+        self.rules: List[ConditionalRule] = [rules[i] for i in compiled[0]]
+        self.conditions: List[Tuple[Predicate, ...]] = compiled[1]
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def matrix(self, table: RowTable) -> np.ndarray:
+        """bool[rules, rows]: rule r matches row i"""
+        out = np.ones((len(self.rules), table.size), dtype=bool)
+        masks: Dict[Predicate, np.ndarray] = {}
+        for r, predicates in enumerate(self.conditions):
+            for predicate in predicates:
+                mask = masks.get(predicate)
+                if mask is None:
+                    mask = masks[predicate] = table.predicate_mask(predicate)
+                out[r] &= mask
+        return out
+
+    def first_match(self, table: RowTable) -> np.ndarray:
+        """Index of the first matching rule per row, -1 if none"""
+        if not self.rules or table.size == 0:
+            return np.full(table.size, -1, dtype=np.int64)
+        matrix = self.matrix(table)
+        first = matrix.argmax(axis=0)
+        return np.where(matrix.any(axis=0), first, -1)
+
+
+def _rules_key(rules: Iterable[ConditionalRule]) -> str:
+    return json.dumps(
+        [(r.priority, r.name, r.condition.to_dict(), r.action.to_dict()) for r in rules],
+        sort_keys=True, default=str
+    )
+
+
+# rule content -> (priority order, compiled conditions)
+_compiled: Dict[str, Tuple[List[int], List[tuple]]] = {}
+
+
+def compile_rules(rules: Sequence[ConditionalRule]) -> RuleProgram:
+    """Program over these rule objects; compilation is cached by rule content"""
+    rules = list(rules)
+    key = _rules_key(rules)
+    compiled = _compiled.get(key)
+    if compiled is None:
+        if len(_compiled) >= PROGRAM_CACHE_SIZE:
+            _compiled.pop(next(iter(_compiled)))
+        program = RuleProgram(rules)
+        _compiled[key] = program.compiled
+        return program
+    return RuleProgram(rules, compiled)
+
+
+def filter_pools(pools: Sequence[dict], condition: RuleCondition) -> List[dict]:
+    """Pools matching one condition (vectorized RuleCondition.matches)"""
+    table = RowTable(pools)
+    mask = np.ones(table.size, dtype=bool)
+    for predicate in compile_condition(condition):
+        mask &= table.predicate_mask(predicate)
+    return [pools[i] for i in np.flatnonzero(mask)]
+
+
+def match_rules(pools: Sequence[dict], rules: Sequence[ConditionalRule]) -> List[Optional[ConditionalRule]]:
+    """First matching rule (priority order) for each pool, None if none"""
+    program = compile_rules(rules)
+    first = program.first_match(RowTable(pools))
+    return [program.rules[i] if i >= 0 else None for i in first]
@@ -6,7 +6,20 @@ Handles trailing stop loss, duration limits, take profit, and other exit conditi
 from typing import List, Dict, Optional, Any
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
+
+import numpy as np
+
 from .conditional_rules import ConditionalRule, RuleAction, PositionState
+from .rule_compiler import RowTable, compile_rules
+
+# Exit checks in evaluation order: (RuleAction field, reason code)
+EXIT_CHECKS = [
+    ("trailing_stop_percent", "TRAILING_STOP"),
+    ("stop_loss_percent", "STOP_LOSS"),
+    ("take_profit_percent", "TAKE_PROFIT"),
+    ("max_duration_hours", "MAX_DURATION"),
+    ("exit_if_apy_below", "APY_LOW"),
+]
 
 
 @dataclass
@@ -39,61 +52,22 @@ class RulesEngine:
         Find the first matching rule for a position.
         Rules are checked in priority order (highest first).
         """
-        sorted_rules = sorted(rules, key=lambda r: -r.priority)
-        
-        for rule in sorted_rules:
-            if self._matches_condition(position, rule.condition):
+        for rule in sorted(rules, key=lambda r: -r.priority):
+            if rule.condition.matches(position.pool_info):
                 return rule
-        
         return None
     
-    def _matches_condition(self, position: PositionState, condition) -> bool:
-        """Check if position matches rule condition"""
-        pool = position.pool_info
-        
-        # TVL check
-        tvl = pool.get('tvl', 0)
-        if condition.tvl_min and tvl < condition.tvl_min:
-            return False
-        if condition.tvl_max and tvl > condition.tvl_max:
-            return False
-        
-        # Protocol check
-        if condition.protocol:
-            pool_protocol = pool.get('protocol', '').lower()
-            if pool_protocol != condition.protocol.lower():
-                return False
-        
-        # Pool type check
-        if condition.pool_type:
-            pool_type = pool.get('pool_type', '').lower()
-            if pool_type != condition.pool_type.lower():
-                return False
-        
-        # Asset check
-        if condition.asset:
-            assets = [a.upper() for a in pool.get('assets', [])]
-            if condition.asset.upper() not in assets:
-                return False
-        
-        # APY range check
-        apy = pool.get('apy', 0)
-        if condition.apy_min and apy < condition.apy_min:
-            return False
-        if condition.apy_max and apy > condition.apy_max:
-            return False
-        
-        return True
-    
     def evaluate(self, position: PositionState, rules: List[ConditionalRule]) -> RuleEvaluation:
         """
         Evaluate all rules against position and determine if exit is needed.
         
+        Interpreted path for one-off checks; cycle callers evaluating many
+        positions use evaluate_many().
+        
         Returns:
             RuleEvaluation with matched_rule, should_exit, and exit_reason
         """
         matched_rule = self.find_matching_rule(position, rules)
-        
         if not matched_rule:
             return RuleEvaluation()
         
@@ -102,54 +76,108 @@ class RulesEngine:
         
         # Update peak value for trailing stop
         pos_id = position.position_id
-        current_peak = self.peak_values.get(pos_id, position.entry_value)
-        if position.current_value > current_peak:
+        if position.current_value > self.peak_values.get(pos_id, position.entry_value):
             self.peak_values[pos_id] = position.current_value
-            current_peak = position.current_value
-        
-        # Check exit conditions
         
-        # 1. Trailing Stop
-        if action.trailing_stop_percent:
-            drawdown = position.drawdown_from_peak()
-            if drawdown >= action.trailing_stop_percent:
+        profit = position.profit_percent()
+        metrics = {
+            "TRAILING_STOP": position.drawdown_from_peak(),
+            "STOP_LOSS": -profit if profit < 0 else 0,
+            "TAKE_PROFIT": profit,
+            "MAX_DURATION": position.hours_held(),
+            "APY_LOW": position.pool_info.get('apy', 0) or 0,
+        }
+        for field_name, code in EXIT_CHECKS:
+            limit = getattr(action, field_name)
+            if not limit:
+                continue
+            value = metrics[code]
+            if (value < limit) if code == "APY_LOW" else (value >= limit):
                 result.should_exit = True
-                result.exit_reason = f"TRAILING_STOP: {drawdown:.1f}% drop from peak (limit: {action.trailing_stop_percent}%)"
+                result.exit_reason = self._exit_reason(code, value, limit)
                 return result
+        return result
+    
+    def evaluate_many(self, positions: List[PositionState], rules: List[ConditionalRule]) -> List[RuleEvaluation]:
+        """
+        Evaluate one rule set against many positions in a single pass.
         
-        # 2. Stop Loss
-        if action.stop_loss_percent:
-            loss = -position.profit_percent() if position.profit_percent() < 0 else 0
-            if loss >= action.stop_loss_percent:
-                result.should_exit = True
-                result.exit_reason = f"STOP_LOSS: {loss:.1f}% loss (limit: {action.stop_loss_percent}%)"
-                return result
+        Rules are compiled once (services/rule_compiler.py); matching and the
+        exit checks run as NumPy masks over position columns. Same results as
+        evaluating each position on its own, in the same check order.
+        """
+        n = len(positions)
+        if n == 0:
+            return []
         
-        # 3. Take Profit
-        if action.take_profit_percent:
-            profit = position.profit_percent()
-            if profit >= action.take_profit_percent:
-                result.should_exit = True
-                result.exit_reason = f"TAKE_PROFIT: {profit:.1f}% profit (target: {action.take_profit_percent}%)"
-                return result
+        program = compile_rules(rules)
+        matched = program.first_match(RowTable([p.pool_info for p in positions]))
+        has_rule = matched >= 0
         
-        # 4. Max Duration
-        if action.max_duration_hours:
-            hours_held = position.hours_held()
-            if hours_held >= action.max_duration_hours:
-                result.should_exit = True
-                result.exit_reason = f"MAX_DURATION: Held {hours_held:.1f}h (limit: {action.max_duration_hours}h)"
-                return result
+        # Update peak values for trailing stop (matched positions only)
+        for i in np.flatnonzero(has_rule):
+            position = positions[i]
+            if position.current_value > self.peak_values.get(position.position_id, position.entry_value):
+                self.peak_values[position.position_id] = position.current_value
         
-        # 5. APY Threshold
-        if action.exit_if_apy_below:
-            current_apy = position.pool_info.get('apy', 0)
-            if current_apy < action.exit_if_apy_below:
-                result.should_exit = True
-                result.exit_reason = f"APY_LOW: Current {current_apy:.1f}% < threshold {action.exit_if_apy_below}%"
-                return result
+        entry = np.fromiter((p.entry_value for p in positions), dtype=np.float64, count=n)
+        current = np.fromiter((p.current_value for p in positions), dtype=np.float64, count=n)
+        peak = np.fromiter((p.peak_value for p in positions), dtype=np.float64, count=n)
+        now = datetime.utcnow()
         
-        return result
+        # Same zero guards as PositionState.profit_percent() / drawdown_from_peak()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            profit = np.where(entry == 0, 0.0, (current - entry) / entry * 100)
+            drawdown = np.where(peak == 0, 0.0, (peak - current) / peak * 100)
+        metrics = {
+            "TRAILING_STOP": drawdown,
+            "PROFIT": profit,
+            "MAX_DURATION": np.fromiter(
+                ((now - p.entry_time).total_seconds() / 3600 for p in positions), dtype=np.float64, count=n
+            ),
+            "APY_LOW": np.fromiter((p.pool_info.get('apy', 0) or 0 for p in positions), dtype=np.float64, count=n),
+        }
+        metrics["STOP_LOSS"] = np.maximum(-metrics["PROFIT"], 0)
+        metrics["TAKE_PROFIT"] = metrics["PROFIT"]
+        
+        # Per-position limit of its matched rule; NaN = check disabled (never fires)
+        rule_row = np.where(has_rule, matched, 0)
+        exit_check = np.full(n, -1, dtype=np.int64)
+        for c, (field_name, code) in enumerate(EXIT_CHECKS):
+            limits = np.array(
+                [getattr(r.action, field_name) or np.nan for r in program.rules] or [np.nan], dtype=np.float64
+            )[rule_row]
+            if code == "APY_LOW":
+                fired = metrics[code] < limits
+            else:
+                fired = metrics[code] >= limits
+            exit_check = np.where((exit_check < 0) & has_rule & fired, c, exit_check)
+        
+        results = []
+        for i in range(n):
+            if not has_rule[i]:
+                results.append(RuleEvaluation())
+                continue
+            rule = program.rules[matched[i]]
+            result = RuleEvaluation(matched_rule=rule, action=rule.action)
+            if exit_check[i] >= 0:
+                field_name, code = EXIT_CHECKS[exit_check[i]]
+                result.should_exit = True
+                result.exit_reason = self._exit_reason(code, metrics[code][i], getattr(rule.action, field_name))
+            results.append(result)
+        return results
+    
+    @staticmethod
+    def _exit_reason(code: str, value: float, limit: float) -> str:
+        if code == "TRAILING_STOP":
+            return f"TRAILING_STOP: {value:.1f}% drop from peak (limit: {limit}%)"
+        if code == "STOP_LOSS":
+            return f"STOP_LOSS: {value:.1f}% loss (limit: {limit}%)"
+        if code == "TAKE_PROFIT":
+            return f"TAKE_PROFIT: {value:.1f}% profit (target: {limit}%)"
+        if code == "MAX_DURATION":
+            return f"MAX_DURATION: Held {value:.1f}h (limit: {limit}h)"
+        return f"APY_LOW: Current {value:.1f}% < threshold {limit}%"
     
     def clear_position_state(self, position_id: str):
         """Clear tracked state for a position (call after exit)"""
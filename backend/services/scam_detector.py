@@ -4,18 +4,26 @@ AI-powered contract analysis and fingerprinting
 
 Features:
 - Fetch verified source code from Basescan
-- Pattern matching for scam signatures
+- Pattern matching for scam signatures (single pass, cached by source hash)
 - Risk scoring (0-100)
 - Supabase pgvector integration for fingerprint storage
+- Local fingerprint index for similarity checks (synced from Supabase)
+- Embeddings from the resident ContractEmbedder (batched, hashed fallback)
 """
 
 import os
 import re
+import asyncio
 import httpx
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Set, Tuple
 from datetime import datetime
 import hashlib
 
+from services.contract_embedder import Embedding, EMBEDDING_MODEL, get_embedder
+from services.fingerprint_index import get_fingerprint_index
+
 # Basescan API
 BASESCAN_API = "https://api.basescan.org/api"
 BASESCAN_API_KEY = os.getenv("BASESCAN_API_KEY", "")
@@ -114,6 +122,199 @@ SAFE_PATTERNS = {
 }
 
 
+# Analysis cache / worker tuning
+ANALYSIS_CACHE_SIZE = 512                 # analyzed sources kept (LRU, by source hash)
+WORKER_THRESHOLD = 256 * 1024             # chars - larger sources are scanned in a worker process
+SCAN_WORKERS = int(os.getenv("SCAM_SCAN_WORKERS", "2"))
+MIN_TRIGGER = 3                           # shortest leading literal worth triggering on
+
+# Characters whose IGNORECASE match differs from str.lower() (Kelvin sign, long s, dotted/dotless i)
+_EXOTIC_CASE = re.compile("[\u0130\u0131\u017f\u212a]")
+
+
+def _leading_literal(pattern: str) -> str:
+    """
+    Literal text every match of `pattern` must start with ("" if there is none).
+
+    Stops at the first regex construct; a char followed by ?, * or {} is
+    optional and dropped. Patterns with a top-level alternation have no
+    single leading literal.
+    """
+    depth, i, in_class = 0, 0, False
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = c != "]"
+        elif c == "[":
+            in_class = True
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "|" and depth == 0:
+            return ""
+        i += 1
+
+    literal, i = [], 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                break                      # \s, \d, \b ... are classes, not literals
+            c, step = pattern[i + 1], 2
+        elif c in ".^$*+?{}[]()|":
+            break
+        else:
+            step = 1
+        following = pattern[i + step:i + step + 1]
+        if following in ("?", "*", "{"):
+            break
+        literal.append(c)
+        if following == "+":
+            break
+        i += step
+    return "".join(literal)
+
+
+class PatternScanner:
+    """
+    Scans a source once for every pattern group (each group matches if any of its regexes does).
+
+    Python's re has no multi-pattern automaton and a plain combined
+    alternation tries every branch at every offset (slower than separate
+    searches), so the single pass runs over the lowercased source with one
+    alternation of the patterns' leading literals - a cheap literal scan -
+    and the full IGNORECASE regexes are only tried, anchored, where their
+    literal occurs. Patterns without a usable literal get a normal search.
+    Results are exactly what re.search(pattern, source, re.IGNORECASE) per
+    pattern would give.
+    """
+
+    def __init__(self, groups: Dict[str, List[str]]):
+        self.groups = list(groups)
+        self.compiled: Dict[str, List[re.Pattern]] = {
+            key: [re.compile(p, re.IGNORECASE) for p in patterns] for key, patterns in groups.items()
+        }
+        self.by_literal: Dict[str, List[Tuple[str, re.Pattern]]] = {}
+        self.unanchored: List[Tuple[str, re.Pattern]] = []
+        for key, patterns in groups.items():
+            for pattern, compiled in zip(patterns, self.compiled[key]):
+                literal = _leading_literal(pattern).lower()
+                if len(literal) >= MIN_TRIGGER:
+                    self.by_literal.setdefault(literal, []).append((key, compiled))
+                else:
+                    self.unanchored.append((key, compiled))
+
+        literals = sorted(self.by_literal, key=len, reverse=True)
+        self.trigger = re.compile("|".join(re.escape(l) for l in literals)) if literals else None
+        # finditer() doesn't overlap: for each literal, the (offset, literal) pairs
+        # that can start inside it and would otherwise be skipped
+        self.overlaps: Dict[str, List[Tuple[int, str]]] = {
+            hit: [(k, other) for k in range(len(hit)) for other in literals
+                  if other != hit and (hit[k:].startswith(other) or other.startswith(hit[k:]))]
+            for hit in literals
+        }
+
+    def scan(self, source: str) -> Set[str]:
+        """Keys of the groups with at least one matching pattern"""
+        found: Set[str] = set()
+        lowered = source.lower()
+        if len(lowered) != len(source) or (not source.isascii() and _EXOTIC_CASE.search(source)):
+            # Offsets or case folding differ from the lowered copy - plain searches
+            for key, compiled_patterns in self.compiled.items():
+                if any(compiled.search(source) for compiled in compiled_patterns):
+                    found.add(key)
+            return found
+
+        for key, compiled in self.unanchored:
+            if key not in found and compiled.search(source):
+                found.add(key)
+        if self.trigger is None:
+            return found
+
+        for match in self.trigger.finditer(lowered):
+            start, hit = match.start(), match.group()
+            self._check(source, start, hit, found)
+            for offset, other in self.overlaps[hit]:
+                if lowered.startswith(other, start + offset):
+                    self._check(source, start + offset, other, found)
+            if len(found) == len(self.groups):
+                break
+        return found
+
+    def _check(self, source: str, pos: int, literal: str, found: Set[str]):
+        for key, compiled in self.by_literal[literal]:
+            if key not in found and compiled.match(source, pos):
+                found.add(key)
+
+
+SCANNER = PatternScanner({
+    **{f"risk:{name}": data["patterns"] for name, data in SCAM_PATTERNS.items()},
+    **{f"safe:{name}": data["patterns"] for name, data in SAFE_PATTERNS.items()},
+})
+
+
+def scan_source(source_code: str) -> Dict[str, Any]:
+    """Pattern analysis of one source (module-level so a worker process can run it)"""
+    matched = SCANNER.scan(source_code)
+    findings = []
+    risk_score = 0
+
+    # Scam patterns - counted once per pattern type
+    for pattern_name, pattern_data in SCAM_PATTERNS.items():
+        if f"risk:{pattern_name}" in matched:
+            findings.append({
+                "type": "risk",
+                "name": pattern_name,
+                "description": pattern_data["description"],
+                "weight": pattern_data["risk_weight"]
+            })
+            risk_score += pattern_data["risk_weight"]
+
+    # Safe patterns (reduce risk)
+    for pattern_name, pattern_data in SAFE_PATTERNS.items():
+        if f"safe:{pattern_name}" in matched:
+            findings.append({
+                "type": "safe",
+                "name": pattern_name,
+                "description": pattern_data["description"],
+                "weight": -pattern_data["risk_reduction"]
+            })
+            risk_score -= pattern_data["risk_reduction"]
+
+    # Clamp score to 0-100
+    risk_score = max(0, min(100, risk_score))
+
+    return {
+        "risk_score": risk_score,
+        "findings": findings,
+        "source_length": len(source_code)
+    }
+
+
+def source_hash(source_code: str) -> str:
+    return hashlib.sha256(source_code.encode()).hexdigest()
+
+
+_worker_pool: Optional[ProcessPoolExecutor] = None
+
+
+async def _scan_in_worker(source_code: str) -> Dict[str, Any]:
+    """scan_source() in the worker pool; a thread if processes are unavailable"""
+    global _worker_pool
+    try:
+        if _worker_pool is None:
+            _worker_pool = ProcessPoolExecutor(max_workers=SCAN_WORKERS)
+        return await asyncio.get_running_loop().run_in_executor(_worker_pool, scan_source, source_code)
+    except Exception as e:
+        print(f"[ScamDetector] Worker scan failed ({e}), scanning in a thread")
+        _worker_pool = None
+        return await asyncio.to_thread(scan_source, source_code)
+
+
 class ScamDetector:
     """
     AI-powered scam detection for smart contracts.
@@ -129,6 +330,7 @@ class ScamDetector:
     def __init__(self):
         self.client = httpx.AsyncClient(timeout=30.0)
         self.cache: Dict[str, Dict] = {}
+        self.analysis_cache: "OrderedDict[str, Dict]" = OrderedDict()
     
     async def fetch_contract_source(self, address: str) -> Optional[str]:
         """Fetch verified source code from Basescan."""
@@ -154,44 +356,38 @@ class ScamDetector:
             return None
     
     def analyze_source(self, source_code: str) -> Dict[str, Any]:
-        """Analyze source code for scam patterns."""
-        findings = []
-        risk_score = 0
-        
-        # Check scam patterns
-        for pattern_name, pattern_data in SCAM_PATTERNS.items():
-            for regex in pattern_data["patterns"]:
-                if re.search(regex, source_code, re.IGNORECASE):
-                    findings.append({
-                        "type": "risk",
-                        "name": pattern_name,
-                        "description": pattern_data["description"],
-                        "weight": pattern_data["risk_weight"]
-                    })
-                    risk_score += pattern_data["risk_weight"]
-                    break  # Only count once per pattern type
-        
-        # Check safe patterns (reduce risk)
-        for pattern_name, pattern_data in SAFE_PATTERNS.items():
-            for regex in pattern_data["patterns"]:
-                if re.search(regex, source_code, re.IGNORECASE):
-                    findings.append({
-                        "type": "safe",
-                        "name": pattern_name,
-                        "description": pattern_data["description"],
-                        "weight": -pattern_data["risk_reduction"]
-                    })
-                    risk_score -= pattern_data["risk_reduction"]
-                    break
-        
-        # Clamp score to 0-100
-        risk_score = max(0, min(100, risk_score))
-        
-        return {
-            "risk_score": risk_score,
-            "findings": findings,
-            "source_length": len(source_code)
-        }
+        """Analyze source code for scam patterns (one pass, cached by source hash)."""
+        key = source_hash(source_code)
+        cached = self._cached_analysis(key)
+        if cached is not None:
+            return cached
+        return self._remember_analysis(key, scan_source(source_code))
+    
+    async def analyze_source_async(self, source_code: str, key: Optional[str] = None) -> Dict[str, Any]:
+        """analyze_source() for the event loop - large sources are scanned in a worker process."""
+        key = key or source_hash(source_code)
+        cached = self._cached_analysis(key)
+        if cached is not None:
+            return cached
+        if len(source_code) >= WORKER_THRESHOLD:
+            analysis = await _scan_in_worker(source_code)
+        else:
+            analysis = scan_source(source_code)
+        return self._remember_analysis(key, analysis)
+    
+    def _cached_analysis(self, key: str) -> Optional[Dict[str, Any]]:
+        analysis = self.analysis_cache.get(key)
+        if analysis is None:
+            return None
+        self.analysis_cache.move_to_end(key)
+        # Callers extend findings - hand out copies
+        return {**analysis, "findings": [dict(f) for f in analysis["findings"]]}
+    
+    def _remember_analysis(self, key: str, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        self.analysis_cache[key] = analysis
+        while len(self.analysis_cache) > ANALYSIS_CACHE_SIZE:
+            self.analysis_cache.popitem(last=False)
+        return {**analysis, "findings": [dict(f) for f in analysis["findings"]]}
     
     async def analyze_contract(self, address: str) -> Dict[str, Any]:
         """
@@ -248,10 +444,11 @@ class ScamDetector:
                 return result
             
             result["is_verified"] = True
-            analysis = self.analyze_source(source)
+            key = source_hash(source)
+            analysis = await self.analyze_source_async(source, key)
             result["risk_score"] = analysis["risk_score"]
             result["findings"] = analysis["findings"]
-            result["source_hash"] = hashlib.sha256(source.encode()).hexdigest()[:16]
+            result["source_hash"] = key[:16]
         else:
             # Unverified contracts are suspicious
             result["risk_score"] = 60
@@ -324,39 +521,32 @@ class ScamDetector:
     def get_embedding(self, source_code: str) -> Optional[List[float]]:
         """
         Generate embedding vector for similarity search.
-        Uses sentence-transformers all-MiniLM-L6-v2 (384 dimensions).
-        Falls back to hash-based pseudo-embedding if transformer unavailable.
+        Uses sentence-transformers all-MiniLM-L6-v2 (384 dimensions) on the
+        resident embedder; hashed n-gram vector if the model is unavailable.
         """
         try:
-            from sentence_transformers import SentenceTransformer
-            
-            # Extract key code patterns for embedding
-            # Focus on function signatures and critical logic
-            patterns = []
-            patterns.extend(re.findall(r'function\s+\w+\s*\([^)]*\)', source_code))
-            patterns.extend(re.findall(r'require\s*\([^)]+\)', source_code))
-            patterns.extend(re.findall(r'mapping\s*\([^)]+\)', source_code))
-            
-            text = ' '.join(patterns[:50])  # Limit to 50 patterns
-            if not text:
-                text = source_code[:2000]  # Fallback to raw code
-            
-            model = SentenceTransformer('all-MiniLM-L6-v2')
-            embedding = model.encode(text).tolist()
-            return embedding
-            
-        except ImportError:
-            print("[ScamDetector] sentence-transformers not installed, using hash-based embedding")
-            return None
+            return get_embedder().embed_sync(source_code).vector
         except Exception as e:
             print(f"[ScamDetector] Embedding error: {e}")
             return None
     
+    async def get_embeddings(self, sources: List[str]) -> List[Embedding]:
+        """Bulk embeddings - the embedder batches them into few model calls."""
+        return await get_embedder().embed_many(sources)
+    
     async def store_fingerprint(self, address: str, result: Dict[str, Any], source_code: str) -> bool:
-        """Store contract fingerprint in Supabase for future similarity matching."""
+        """Store contract fingerprint locally and in Supabase for future similarity matching."""
         try:
             import httpx
             
+            # Generate embedding and index it locally straight away
+            embedding = await get_embedder().embed(source_code)
+            get_fingerprint_index(embedding.model).add(address, embedding.vector, {
+                "risk_score": result.get("risk_score", 50),
+                "risk_level": result.get("risk_level", "UNKNOWN"),
+                "is_scam": result.get("risk_score", 0) >= 70
+            })
+            
             supabase_url = os.getenv("SUPABASE_URL")
             supabase_key = os.getenv("SUPABASE_ANON_KEY")
             
@@ -364,14 +554,12 @@ class ScamDetector:
                 print("[ScamDetector] Supabase not configured, skipping fingerprint storage")
                 return False
             
-            # Generate embedding
-            embedding = self.get_embedding(source_code)
-            
             data = {
                 "contract_address": address.lower(),
                 "chain": "base",
                 "source_hash": self.get_fingerprint(source_code),
-                "embedding": embedding,
+                # pgvector column holds model vectors only; hashed fallback vectors stay local
+                "embedding": embedding.vector if embedding.model == EMBEDDING_MODEL else None,
                 "risk_score": result.get("risk_score", 50),
                 "risk_level": result.get("risk_level", "UNKNOWN"),
                 "is_scam": result.get("risk_score", 0) >= 70,
@@ -406,52 +594,38 @@ class ScamDetector:
     
     async def find_similar_scam(self, source_code: str, threshold: float = 0.95) -> Optional[Dict]:
         """
-        Check if contract is similar to known scams using pgvector similarity search.
+        Check if contract is similar to known scams using the local fingerprint index.
         
         Returns matching scam info if similarity > threshold, else None.
         """
+        return (await self.find_similar_scams([source_code], threshold))[0]
+    
+    async def find_similar_scams(self, sources: List[str], threshold: float = 0.95) -> List[Optional[Dict]]:
+        """
+        Batch similarity screen: one embedding batch and one matrix product per
+        embedding model. The index syncs incrementally from scam_fingerprints.
+        """
+        matches: List[Optional[Dict]] = [None] * len(sources)
         try:
-            import httpx
+            embeddings = await get_embedder().embed_many(sources)
             
-            supabase_url = os.getenv("SUPABASE_URL")
-            supabase_key = os.getenv("SUPABASE_ANON_KEY")
-            
-            if not supabase_url or not supabase_key:
-                return None
+            by_model: Dict[str, List[int]] = {}
+            for i, embedding in enumerate(embeddings):
+                by_model.setdefault(embedding.model, []).append(i)
             
-            embedding = self.get_embedding(source_code)
-            if not embedding:
-                return None
-            
-            # Call Supabase RPC function
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{supabase_url}/rest/v1/rpc/find_similar_scams",
-                    json={
-                        "query_embedding": embedding,
-                        "similarity_threshold": threshold,
-                        "max_results": 1
-                    },
-                    headers={
-                        "apikey": supabase_key,
-                        "Authorization": f"Bearer {supabase_key}",
-                        "Content-Type": "application/json"
-                    }
-                )
-                
-                if response.status_code == 200:
-                    results = response.json()
-                    if results and len(results) > 0:
-                        match = results[0]
-                        if match.get("is_scam"):
-                            print(f"[ScamDetector] ⚠️ Similar to known scam: {match['contract_address'][:10]}... (similarity: {match['similarity']:.2%})")
-                            return match
-                
-                return None
-                
+            for model, positions in by_model.items():
+                index = get_fingerprint_index(model)
+                await index.refresh()
+                results = index.search_many([embeddings[i].vector for i in positions], k=1, threshold=threshold)
+                for i, found in zip(positions, results):
+                    if found and found[0].get("is_scam"):
+                        match = found[0]
+                        print(f"[ScamDetector] ⚠️ Similar to known scam: {match['contract_address'][:10]}... (similarity: {match['similarity']:.2%})")
+                        matches[i] = match
+                        
         except Exception as e:
             print(f"[ScamDetector] Similarity search error: {e}")
-            return None
+        return matches
     
     async def close(self):
         await self.client.aclose()
@@ -6,12 +6,20 @@ Features:
 - Analyze swap patterns from The Graph
 - Detect concentrated volume (few wallets = fake)
 - Flag pools with "Fake Yield"
+- Batch screening: many pools per aliased GraphQL request, swaps cached
+  incrementally by timestamp cursor, metrics vectorized across all pools
+- Concurrent calls for the same pool share one in-flight refresh
+
+Callers: UnifiedPoolAnalyzer.analyze() screens one pool per call through
+analyze_pool(); no pool-list refresh calls analyze_pools() yet.
 """
 
 import asyncio
+import time
 import httpx
-from typing import Dict, Any, List
-from collections import defaultdict
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Set, Tuple
 from datetime import datetime, timedelta
 
 # Subgraph endpoints
@@ -55,6 +63,115 @@ AERODROME_SWAPS_QUERY = """
 """
 
 
+# Batched swap queries: kind -> (subgraph, pool filter field, receiver field)
+SWAP_QUERY_FIELDS = {
+    "aerodrome": (AERODROME_SUBGRAPH, "pair", "to"),
+    "uniswap_v3": (UNISWAP_SUBGRAPH, "pool", "recipient"),
+}
+
+PAGE_SIZE = 1000          # swaps per alias per request (subgraph maximum)
+MAX_ALIASES = 25          # pools per GraphQL request
+MAX_PAGES = 5             # pagination rounds per call - busy pools catch up on later calls
+MIN_REFRESH = 60          # seconds before a cached pool is queried again
+
+
+@dataclass
+class SwapWindow:
+    """Swaps of one pool since covered_since, fetched up to cursor"""
+    covered_since: int
+    cursor: int                                         # timestamp_gte of the next fetch
+    cursor_ids: Set[str] = field(default_factory=set)   # ids already seen at cursor
+    timestamps: List[int] = field(default_factory=list)
+    senders: List[str] = field(default_factory=list)
+    amounts: List[float] = field(default_factory=list)
+    fetched_at: float = 0
+    complete: bool = False                              # caught up with the latest swap
+
+    def add(self, swaps: List[Dict[str, Any]]):
+        for swap in swaps:
+            ts = int(swap.get("timestamp", 0) or 0)
+            swap_id = swap.get("id", "")
+            if ts < self.cursor or (ts == self.cursor and swap_id in self.cursor_ids):
+                continue  # Already in the window
+            if ts > self.cursor:
+                self.cursor, self.cursor_ids = ts, set()
+            self.cursor_ids.add(swap_id)
+            self.timestamps.append(ts)
+            self.senders.append((swap.get("sender") or "").lower())
+            self.amounts.append(float(swap.get("amountUSD", 0) or 0))
+
+    def prune(self, since: int):
+        """Drop swaps at or before since (the window moves forward)"""
+        self.covered_since = max(self.covered_since, since)
+        keep = next((i for i, ts in enumerate(self.timestamps) if ts > since), len(self.timestamps))
+        if keep:
+            del self.timestamps[:keep], self.senders[:keep], self.amounts[:keep]
+
+
+def _query_kind(protocol: str) -> str:
+    """SWAP_QUERY_FIELDS key - same routing as analyze_pool always used"""
+    return "aerodrome" if protocol == "aerodrome" else "uniswap_v3"
+
+
+def build_swaps_query(requests: List[Tuple[str, str, int]], kind: str) -> str:
+    """One GraphQL document with an aliased swaps() field per (alias, pool, cursor)"""
+    _, pool_field, receiver_field = SWAP_QUERY_FIELDS[kind]
+    fields = [
+        f'  {alias}: swaps(first: {PAGE_SIZE}, where: {{ {pool_field}: "{pool}", timestamp_gte: {cursor} }}, '
+        f'orderBy: timestamp, orderDirection: asc) {{ id sender {receiver_field} amountUSD timestamp }}'
+        for alias, pool, cursor in requests
+    ]
+    return "{\n" + "\n".join(fields) + "\n}"
+
+
+def concentration_metrics(pool_index: np.ndarray, senders: np.ndarray, amounts: np.ndarray,
+                          num_pools: int) -> Dict[str, np.ndarray]:
+    """
+    Per-pool trader concentration over the combined swap arrays of many pools.
+    Only swaps with a sender and a positive amount count (as in analyze_pool).
+    """
+    valid = (senders != "") & (amounts > 0)
+    pool_index, senders, amounts = pool_index[valid], senders[valid], amounts[valid]
+
+    trades = np.bincount(pool_index, minlength=num_pools)
+    volume = np.bincount(pool_index, weights=amounts, minlength=num_pools)
+
+    # (pool, sender) groups
+    _, sender_ids = np.unique(senders, return_inverse=True)
+    stride = len(senders) + 1
+    pair_keys, pair_ids = np.unique(pool_index * stride + sender_ids, return_inverse=True)
+    pair_pool = pair_keys // stride
+    pair_volume = np.bincount(pair_ids, weights=amounts, minlength=len(pair_keys))
+    pair_trades = np.bincount(pair_ids, minlength=len(pair_keys))
+
+    unique_traders = np.bincount(pair_pool, minlength=num_pools)
+    max_trades = np.zeros(num_pools, dtype=np.int64)
+    np.maximum.at(max_trades, pair_pool, pair_trades)
+
+    # Rank traders inside each pool by volume; top-1 / top-3 shares
+    order = np.lexsort((-pair_volume, pair_pool))
+    ranked_pool, ranked_volume = pair_pool[order], pair_volume[order]
+    rank = np.arange(len(order)) - np.searchsorted(ranked_pool, ranked_pool, side="left")
+    top_1 = np.bincount(ranked_pool, weights=np.where(rank < 1, ranked_volume, 0), minlength=num_pools)
+    top_3 = np.bincount(ranked_pool, weights=np.where(rank < 3, ranked_volume, 0), minlength=num_pools)
+
+    # Coefficient of variation of trade sizes (population std / mean)
+    mean = np.divide(volume, trades, out=np.zeros(num_pools), where=trades > 0)
+    variance = np.bincount(pool_index, weights=(amounts - mean[pool_index]) ** 2, minlength=num_pools)
+    std = np.sqrt(np.divide(variance, trades, out=np.zeros(num_pools), where=trades > 0))
+    cv = np.divide(std, mean, out=np.zeros(num_pools), where=mean > 0)
+
+    return {
+        "trades": trades,
+        "volume": volume,
+        "unique_traders": unique_traders,
+        "top_1_volume": top_1,
+        "top_3_volume": top_3,
+        "max_trades": max_trades,
+        "cv": cv,
+    }
+
+
 class WashTradingDetector:
     """
     Detects wash trading (fake volume) in liquidity pools.
@@ -68,6 +185,9 @@ class WashTradingDetector:
     
     def __init__(self):
         self.client = httpx.AsyncClient(timeout=30.0)
+        self.swap_cache: Dict[Tuple[str, str], SwapWindow] = {}
+        self._refreshing: Dict[Tuple[str, str], asyncio.Future] = {}   # key -> in-flight refresh
+        self.stats = {"requests": 0, "pages": 0, "swaps_fetched": 0}
     
     async def query_subgraph(self, url: str, query: str) -> Dict[str, Any]:
         """Execute GraphQL query."""
@@ -102,23 +222,146 @@ class WashTradingDetector:
                 "red_flags": [...]
             }
         """
-        # Calculate timestamp for lookback
+        return (await self.analyze_pools([(pool_address, protocol)], hours))[0]
+    
+    async def analyze_pools(
+        self,
+        pools: List[Tuple[str, str]],
+        hours: int = 24
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze many (pool_address, protocol) pairs at once.
+        
+        Swaps come from aliased GraphQL requests (MAX_ALIASES pools each, one
+        per subgraph and page round) and only the swaps since each pool's cursor
+        are fetched. Results are in input order, same shape as analyze_pool.
+        """
         since = int((datetime.utcnow() - timedelta(hours=hours)).timestamp())
+        keys = [(address.lower(), _query_kind(protocol)) for address, protocol in pools]
         
-        # Select query based on protocol
-        if protocol == "aerodrome":
-            query = AERODROME_SWAPS_QUERY % (pool_address.lower(), since)
-            subgraph = AERODROME_SUBGRAPH
-            sender_key = "sender"
-        else:
-            query = UNISWAP_SWAPS_QUERY % (pool_address.lower(), since)
-            subgraph = UNISWAP_SUBGRAPH
-            sender_key = "sender"
+        await self._refresh_swaps(list(dict.fromkeys(keys)), since)
         
-        result = await self.query_subgraph(subgraph, query)
-        swaps = result.get("data", {}).get("swaps", [])
+        # Combined arrays over every pool's window
+        pool_index, senders, amounts, swap_counts = [], [], [], []
+        for i, key in enumerate(keys):
+            window = self.swap_cache.get(key)
+            if window is None:
+                swap_counts.append(0)
+                continue
+            window.prune(since)
+            pool_index.append(np.full(len(window.amounts), i, dtype=np.int64))
+            senders.extend(window.senders)
+            amounts.append(np.asarray(window.amounts, dtype=np.float64))
+            swap_counts.append(len(window.amounts))
         
-        if not swaps:
+        metrics = concentration_metrics(
+            np.concatenate(pool_index) if pool_index else np.zeros(0, dtype=np.int64),
+            np.asarray(senders, dtype=str),
+            np.concatenate(amounts) if amounts else np.zeros(0),
+            len(keys)
+        )
+        
+        results = []
+        for i, (address, protocol) in enumerate(pools):
+            window = self.swap_cache.get(keys[i])
+            result = self._verdict(address, protocol, hours, swap_counts[i], {
+                name: values[i].item() for name, values in metrics.items()
+            })
+            if window is not None and window.fetched_at and not window.complete:
+                result["partial"] = True  # Busy pool still paging through its window
+            results.append(result)
+        return results
+    
+    async def _refresh_swaps(self, keys: List[Tuple[str, str]], since: int):
+        """Page new swaps into swap_cache for every (pool, kind) that is due"""
+        # Let refreshes already running for these pools finish, then only
+        # fetch what they left (usually nothing - the windows are fresh)
+        while True:
+            busy = {self._refreshing[key] for key in keys if key in self._refreshing}
+            if not busy:
+                break
+            await asyncio.gather(*(asyncio.shield(f) for f in busy))
+        
+        now = time.time()
+        pending: Dict[Tuple[str, str], SwapWindow] = {}
+        for key in keys:
+            window = self.swap_cache.get(key)
+            if window is None or window.covered_since > since:
+                # New pool, or a longer lookback than cached - fetch the whole window
+                window = SwapWindow(covered_since=since, cursor=since + 1)
+                self.swap_cache[key] = window
+            elif window.complete and now - window.fetched_at < MIN_REFRESH:
+                continue
+            pending[key] = window
+        if not pending:
+            return
+        
+        done = asyncio.get_running_loop().create_future()
+        owned = list(pending)
+        for key in owned:
+            self._refreshing[key] = done
+        try:
+            await self._page_swaps(pending, now)
+        finally:
+            for key in owned:
+                self._refreshing.pop(key, None)
+            done.set_result(None)
+    
+    async def _page_swaps(self, pending: Dict[Tuple[str, str], SwapWindow], now: float):
+        """Up to MAX_PAGES aliased request rounds over the pending windows"""
+        for _ in range(MAX_PAGES):
+            if not pending:
+                break
+            requests = []
+            for kind in SWAP_QUERY_FIELDS:
+                group = [key for key in pending if key[1] == kind]
+                for start in range(0, len(group), MAX_ALIASES):
+                    requests.append((kind, group[start:start + MAX_ALIASES]))
+            
+            responses = await asyncio.gather(*(
+                self.query_subgraph(
+                    SWAP_QUERY_FIELDS[kind][0],
+                    build_swaps_query(
+                        [(f"p{j}", key[0], pending[key].cursor) for j, key in enumerate(chunk)], kind
+                    )
+                )
+                for kind, chunk in requests
+            ))
+            self.stats["requests"] += len(requests)
+            self.stats["pages"] += 1
+            
+            for (kind, chunk), response in zip(requests, responses):
+                data = response.get("data") or {}
+                for j, key in enumerate(chunk):
+                    window = pending[key]
+                    swaps = data.get(f"p{j}")
+                    if swaps is None:
+                        # Query failed - keep the cache as is and retry on the next call
+                        pending.pop(key)
+                        continue
+                    cursor = window.cursor
+                    window.add(swaps)
+                    window.fetched_at = now
+                    self.stats["swaps_fetched"] += len(swaps)
+                    if len(swaps) < PAGE_SIZE:
+                        window.complete = True
+                        pending.pop(key)
+                    else:
+                        window.complete = False
+                        if window.cursor == cursor:
+                            # A full page inside one second - step past it
+                            window.cursor, window.cursor_ids = cursor + 1, set()
+    
+    def _verdict(
+        self,
+        pool_address: str,
+        protocol: str,
+        hours: int,
+        total_trades: int,
+        m: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Turn one pool's concentration metrics into the analyze_pool result"""
+        if not total_trades:
             return {
                 "pool": pool_address,
                 "is_wash_trading": False,
@@ -130,25 +373,8 @@ class WashTradingDetector:
                 "total_volume_usd": 0
             }
         
-        # Analyze volume distribution
-        volume_by_address: Dict[str, float] = defaultdict(float)
-        trade_count_by_address: Dict[str, int] = defaultdict(int)
-        trade_sizes: List[float] = []
-        
-        total_volume = 0
-        
-        for swap in swaps:
-            sender = swap.get(sender_key, "").lower()
-            amount = float(swap.get("amountUSD", 0) or 0)
-            
-            if sender and amount > 0:
-                volume_by_address[sender] += amount
-                trade_count_by_address[sender] += 1
-                trade_sizes.append(amount)
-                total_volume += amount
-        
-        # Calculate metrics
-        unique_traders = len(volume_by_address)
+        total_volume = m["volume"]
+        unique_traders = m["unique_traders"]
         
         if total_volume == 0 or unique_traders == 0:
             return {
@@ -162,15 +388,9 @@ class WashTradingDetector:
                 "total_volume_usd": 0
             }
         
-        # Sort by volume
-        sorted_volumes = sorted(volume_by_address.values(), reverse=True)
-        
-        # Top 3 concentration
-        top_3_volume = sum(sorted_volumes[:3])
-        top_3_pct = (top_3_volume / total_volume) * 100
-        
-        # Top 1 concentration
-        top_1_pct = (sorted_volumes[0] / total_volume) * 100 if sorted_volumes else 0
+        # Top 3 / top 1 concentration
+        top_3_pct = (m["top_3_volume"] / total_volume) * 100
+        top_1_pct = (m["top_1_volume"] / total_volume) * 100
         
         # Concentration score (0-1)
         concentration = top_3_pct / 100
@@ -188,17 +408,11 @@ class WashTradingDetector:
             red_flags.append(f"Only {unique_traders} unique traders in {hours}h")
         
         # Check for consistent trade sizes (bot behavior)
-        if trade_sizes:
-            avg_size = sum(trade_sizes) / len(trade_sizes)
-            variance = sum((s - avg_size) ** 2 for s in trade_sizes) / len(trade_sizes)
-            std_dev = variance ** 0.5
-            cv = std_dev / avg_size if avg_size > 0 else 0
-            
-            if cv < 0.1:  # Very consistent sizes
-                red_flags.append("Trade sizes suspiciously consistent (bot pattern)")
+        if m["cv"] < 0.1:  # Very consistent sizes
+            red_flags.append("Trade sizes suspiciously consistent (bot pattern)")
         
         # Check for high frequency from same addresses
-        max_trades = max(trade_count_by_address.values()) if trade_count_by_address else 0
+        max_trades = m["max_trades"]
         if max_trades > 50:
             red_flags.append(f"Single address made {max_trades} trades")
         
@@ -218,7 +432,7 @@ class WashTradingDetector:
             "is_wash_trading": is_wash,
             "concentration_score": round(concentration, 4),
             "unique_traders": unique_traders,
-            "total_trades": len(swaps),
+            "total_trades": total_trades,
             "top_1_volume_pct": round(top_1_pct, 2),
             "top_3_volume_pct": round(top_3_pct, 2),
             "total_volume_usd": round(total_volume, 2),
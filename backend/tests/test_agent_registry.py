@@ -0,0 +1,123 @@
+"""
+Agent Registry Tests
+Indexed lookups over DEPLOYED_AGENTS, lazy rebuilds and change counters.
+
+Run: python -m pytest tests/test_agent_registry.py -v
+"""
+
+from agents.agent_registry import AgentRegistry
+
+
+def make_agents():
+    return {
+        "0xuserA": [
+            {"id": "agent_a1", "is_active": True, "agent_address": "0xAAA1"},
+            {"id": "agent_a2", "is_active": False, "agent_address": "0xAAA2"},
+        ],
+        "0xuserb": [
+            {"id": "agent_b1", "is_active": True, "address": "0xBBB1"},
+        ],
+    }
+
+
+def make_registry(agents):
+    holder = {"agents": agents}
+    registry = AgentRegistry(source=lambda: holder["agents"], ttl=3600)
+    return registry, holder
+
+
+class TestAgentRegistry:
+
+    def test_lookups_are_case_insensitive(self):
+        registry, _ = make_registry(make_agents())
+
+        assert registry.get_primary_agent("0xUSERA")["id"] == "agent_a1"
+        assert [a["id"] for a in registry.get_user_agents("0xUserB")] == ["agent_b1"]
+        assert registry.get_user_agents("0xunknown") == []
+        assert registry.get_by_address("0xbbb1")[1]["id"] == "agent_b1"
+        assert registry.get_owner("agent_a2") == "0xuserA"
+
+    def test_active_index(self):
+        registry, _ = make_registry(make_agents())
+
+        assert sorted(registry.active_ids()) == ["agent_a1", "agent_b1"]
+        assert len(registry.all_agents()) == 3
+        assert not registry.is_active("agent_a2")
+
+    def test_no_rebuild_without_change(self):
+        registry, _ = make_registry(make_agents())
+        for _ in range(10):
+            registry.get_agent("agent_a1")
+            registry.active_agents()
+
+        assert registry.stats["rebuilds"] == 1
+
+    def test_invalidate_picks_up_in_place_edits(self):
+        agents = make_agents()
+        registry, _ = make_registry(agents)
+        assert "agent_a2" not in registry.active_ids()
+
+        agents["0xuserA"][1]["is_active"] = True
+        # Unsaved in-place edit reaches the active index once invalidated (or TTL)
+        assert "agent_a2" not in registry.active_ids()
+
+        registry.invalidate()
+        assert "agent_a2" in registry.active_ids()
+
+    def test_new_user_and_replaced_source_detected(self):
+        agents = make_agents()
+        registry, holder = make_registry(agents)
+        registry.active_ids()
+
+        agents["0xuserc"] = [{"id": "agent_c1", "is_active": True}]
+        assert "agent_c1" in registry.active_ids()
+
+        holder["agents"] = {"0xuserd": [{"id": "agent_d1", "is_active": True}]}
+        assert registry.active_ids() == ["agent_d1"]
+        assert registry.get_agent("agent_a1") is None
+
+    def test_changed_since_returns_only_dirty_agents(self):
+        agents = make_agents()
+        registry, _ = make_registry(agents)
+
+        changed, version = registry.changed_since(0)
+        assert sorted(a["id"] for _, a in changed) == ["agent_a1", "agent_b1"]
+
+        # Nothing changed: empty set, same version
+        registry.invalidate()
+        changed, same_version = registry.changed_since(version)
+        assert changed == [] and same_version == version
+
+        agents["0xuserb"][0]["allocations"] = [{"pool_address": "0xpool"}]
+        registry.invalidate()
+        changed, new_version = registry.changed_since(version)
+        assert [a["id"] for _, a in changed] == ["agent_b1"]
+        assert new_version > version
+
+    def test_legacy_single_dict_entries(self):
+        registry, _ = make_registry({"0xlegacy": {"id": "agent_l", "is_active": True}})
+        assert registry.active_ids() == ["agent_l"]
+
+    def test_only_dirty_agents_are_fingerprinted(self, monkeypatch):
+        import agents.agent_registry as module
+        agents = make_agents()
+        registry, _ = make_registry(agents)
+        registry.active_ids()
+
+        hashed = []
+        real = module._fingerprint
+        monkeypatch.setattr(module, "_fingerprint", lambda agent: hashed.append(agent["id"]) or real(agent))
+
+        agents["0xuserb"][0]["allocations"] = [{"pool_address": "0xpool"}]
+        registry.invalidate(agent_id="agent_b1")
+        changed, _ = registry.changed_since(1)
+        assert hashed == ["agent_b1"] and [a["id"] for _, a in changed] == ["agent_b1"]
+
+        # A TTL rebuild re-indexes without serializing anyone
+        hashed.clear()
+        registry.refresh(force=True)
+        assert hashed == []
+
+        registry.invalidate(user_address="0xUSERA")
+        registry.refresh()
+        assert sorted(hashed) == ["agent_a1", "agent_a2"]
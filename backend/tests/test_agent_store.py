@@ -0,0 +1,128 @@
+"""
+Agent State Store Tests
+Dirty-marked journaling, replay, compaction and crash tolerance.
+
+Run: python -m pytest tests/test_agent_store.py -v
+"""
+
+import json
+
+import infrastructure.agent_store as agent_store
+from infrastructure.agent_store import AgentStateStore
+
+
+def make_store(tmp_path, compact_every=500):
+    return AgentStateStore(str(tmp_path / "agents.json"), compact_every=compact_every)
+
+
+def journal_lines(store):
+    with open(store.journal_file) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class TestAgentStateStore:
+
+    def test_only_changed_agents_are_journaled(self, tmp_path):
+        store = make_store(tmp_path)
+        agents = {"0xu": [{"id": "a1", "is_active": True}, {"id": "a2", "is_active": True}]}
+        store.mark_dirty("0xu")
+        store.save(agents)
+        store.flush()
+        assert len(journal_lines(store)) == 2
+
+        agents["0xu"][1]["is_active"] = False
+        store.mark_dirty("0xu", "a2")
+        store.mark_dirty("0xu", "a1")   # marked but unchanged: not journaled
+        store.save(agents)
+        store.save(agents)  # no-op: nothing marked since last save
+        store.flush()
+
+        lines = journal_lines(store)
+        assert len(lines) == 3
+        assert lines[-1]["key"] == "a2" and lines[-1]["agent"]["is_active"] is False
+
+    def test_unmarked_agents_are_not_serialized(self, tmp_path, monkeypatch):
+        store = make_store(tmp_path)
+        agents = {f"0x{u}": [{"id": f"a{u}"}] for u in range(50)}
+        for user in agents:
+            store.mark_dirty(user)
+        store.save(agents)
+
+        serialized = []
+        monkeypatch.setattr(agent_store, "_serialize", lambda agent: serialized.append(agent["id"]) or json.dumps(agent))
+        agents["0x7"][0]["value"] = 1
+        store.mark_dirty("0x7", "a7")
+        store.save(agents)
+        assert serialized == ["a7"]
+
+    def test_replay_restores_state(self, tmp_path):
+        store = make_store(tmp_path)
+        agents = {
+            "0xu": [{"id": "a1"}, {"id": "a2"}],
+            "0xv": [{"id": "b1"}],
+        }
+        store.mark_dirty("0xu")
+        store.mark_dirty("0xv")
+        store.save(agents)
+        agents["0xu"] = [{"id": "a2", "value": 5}]
+        del agents["0xv"]
+        store.mark_dirty("0xu")
+        store.mark_dirty("0xv")
+        store.save(agents)
+        store.flush()
+
+        assert make_store(tmp_path).load() == {"0xu": [{"id": "a2", "value": 5}]}
+
+    def test_replaying_deletes_twice_is_harmless(self, tmp_path):
+        store = make_store(tmp_path)
+        agents = {"0xu": [{"id": "a1"}, {"id": "a2"}, {"id": "a3"}]}
+        store.mark_dirty("0xu")
+        store.save(agents)
+        agents["0xu"].pop(0)
+        store.mark_dirty("0xu", "a1")
+        store.save(agents)
+        store.flush()
+
+        # The journal is replayed on top of a snapshot that already has the delete
+        with open(store.snapshot_file, "w") as f:
+            json.dump({"0xu": [{"id": "a2"}, {"id": "a3"}]}, f)
+        assert make_store(tmp_path).load() == {"0xu": [{"id": "a2"}, {"id": "a3"}]}
+
+    def test_compaction_writes_snapshot_and_truncates_journal(self, tmp_path):
+        store = make_store(tmp_path, compact_every=3)
+        agents = {"0xu": [{"id": "a1"}, {"id": "a2"}]}
+        store.mark_dirty("0xu")
+        store.save(agents)
+        agents["0xu"].append({"id": "a3"})
+        store.mark_dirty("0xu", "a3")
+        store.save(agents)
+        store.flush()
+
+        assert journal_lines(store) == []
+        with open(store.snapshot_file) as f:
+            assert json.load(f) == agents
+        assert store.get_stats()["compactions"] == 1
+        assert make_store(tmp_path, compact_every=3).load() == agents
+
+    def test_torn_journal_line_is_skipped(self, tmp_path):
+        store = make_store(tmp_path)
+        store.mark_dirty("0xu")
+        store.save({"0xu": [{"id": "a1"}]})
+        store.flush()
+        with open(store.journal_file, "a") as f:
+            f.write('{"op": "put", "user": "0xu", "key": "a2", "ag')
+
+        assert make_store(tmp_path).load() == {"0xu": [{"id": "a1"}]}
+
+    def test_loaded_state_is_not_rewritten(self, tmp_path):
+        with open(tmp_path / "agents.json", "w") as f:
+            json.dump({"0xu": [{"id": "a1"}]}, f)
+
+        store = make_store(tmp_path)
+        agents = store.load()
+        store.mark_dirty("0xu")
+        store.save(agents)
+        store.close()
+
+        assert store.get_stats()["records"] == 0
+        assert not (tmp_path / "agents.journal").exists()
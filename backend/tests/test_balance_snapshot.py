@@ -0,0 +1,146 @@
+"""
+Balance Snapshot Tests
+Cross-agent Multicall balance batching, chunking, sharing, targeted reads
+and failure handling.
+
+Run: python -m pytest tests/test_balance_snapshot.py -v
+"""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import data_sources.balance_snapshot as balance_snapshot
+from data_sources.balance_snapshot import (
+    BalanceSnapshotService,
+    TRACKED_TOKENS,
+    BALANCE_OF_SELECTOR,
+    GET_ETH_BALANCE_SELECTOR,
+)
+
+AGENT_1 = "0x" + "11" * 20
+AGENT_2 = "0x" + "22" * 20
+USDC = TRACKED_TOKENS["USDC"][0].lower()
+
+
+def fake_aggregate(calls, block):
+    """balanceOf -> 1 USDC for USDC, 0 otherwise; getEthBalance -> 1 ETH"""
+    results = []
+    for call in calls:
+        data = call["callData"]
+        if data[:4] == GET_ETH_BALANCE_SELECTOR:
+            value = 10 ** 18
+        elif data[:4] == BALANCE_OF_SELECTOR and call["target"].lower() == USDC:
+            value = 1_000_000
+        else:
+            value = 0
+        results.append((True, value.to_bytes(32, "big")))
+    return results
+
+
+def make_service(chunk_size=500):
+    w3 = MagicMock()
+    w3.eth.block_number = 123
+    service = BalanceSnapshotService(w3=w3, chunk_size=chunk_size)
+    service._aggregate = MagicMock(side_effect=fake_aggregate)
+    return service
+
+
+def run(coro):
+    with patch.object(BalanceSnapshotService, "_universe", lambda self: sorted(self._extra_addresses)):
+        return asyncio.run(coro)
+
+
+class TestBalanceSnapshot:
+
+    def test_balances_decoded_per_address(self):
+        service = make_service()
+
+        balances = run(service.get_balances(AGENT_1))
+
+        assert balances["USDC"] == 1_000_000
+        assert balances["ETH"] == 10 ** 18
+        assert balances["WETH"] == 0
+        assert service.snapshot.block == 123
+
+    def test_all_agents_in_chunked_calls(self):
+        service = make_service(chunk_size=10)
+        service._extra_addresses.update({AGENT_1: time.time(), AGENT_2: time.time()})
+
+        snapshot = run(service.get_snapshot())
+
+        pairs = 2 * (len(TRACKED_TOKENS) + 1)
+        assert service._aggregate.call_count == -(-pairs // 10)
+        assert snapshot.covers([AGENT_1, AGENT_2])
+        # Every chunk pinned to the same block
+        assert {c.args[1] for c in service._aggregate.call_args_list} == {123}
+
+    def test_snapshot_shared_within_max_age(self):
+        service = make_service()
+
+        async def main():
+            await service.get_snapshot([AGENT_1, AGENT_2], refresh_all=True)
+            await service.get_balances(AGENT_1)
+            await service.get_balances(AGENT_2)
+
+        run(main())
+        assert service.stats["snapshots"] == 1
+        assert service.stats["hits"] == 2
+
+    def test_concurrent_requests_coalesce(self):
+        service = make_service()
+        service._extra_addresses.update({AGENT_1: time.time(), AGENT_2: time.time()})
+
+        async def main():
+            background = asyncio.gather(*(service.get_balances(AGENT_1, refresh_all=True) for _ in range(5)))
+            requests = asyncio.gather(*(service.get_balances(AGENT_2, max_age=0) for _ in range(5)))
+            return await background + await requests
+
+        results = run(main())
+        assert service.stats["snapshots"] == 1
+        assert service.stats["partial_reads"] <= 1
+        assert all(r["USDC"] == 1_000_000 for r in results)
+
+    def test_request_miss_reads_only_that_address(self):
+        service = make_service()
+        agents = ["0x" + f"{i:040x}" for i in range(1, 30)]
+        service._extra_addresses.update({a: time.time() for a in agents})
+
+        balances = run(service.get_balances(AGENT_1))
+
+        assert balances["USDC"] == 1_000_000
+        assert service.stats["snapshots"] == 0 and service.stats["partial_reads"] == 1
+        assert service._aggregate.call_count == 1
+        assert len(service._aggregate.call_args.args[0]) == len(TRACKED_TOKENS) + 1
+
+        # Served from the merged read within max_age
+        run(service.get_balances(AGENT_1))
+        assert service._aggregate.call_count == 1
+
+    def test_requested_addresses_expire_and_are_capped(self, monkeypatch):
+        monkeypatch.setattr(balance_snapshot, "MAX_EXTRA_ADDRESSES", 3)
+        service = make_service()
+        service._track(["0x" + f"{i:040x}" for i in range(5)])
+        assert list(service._extra_addresses) == ["0x" + f"{i:040x}" for i in range(2, 5)]
+
+        stale = "0x" + f"{2:040x}"
+        service._extra_addresses[stale] -= balance_snapshot.EXTRA_TTL + 1
+        service._extra_addresses.move_to_end(stale, last=False)
+        service._track([])
+        assert stale not in service._extra_addresses
+
+    def test_failed_chunk_leaves_address_out(self):
+        service = make_service(chunk_size=len(TRACKED_TOKENS) + 1)
+        service._extra_addresses.update({AGENT_1: time.time(), AGENT_2: time.time()})
+
+        def flaky(calls, block):
+            if any(AGENT_2[2:] in c["callData"].hex() for c in calls):
+                raise RuntimeError("execution reverted")
+            return fake_aggregate(calls, block)
+
+        service._aggregate.side_effect = flaky
+        snapshot = run(service.get_snapshot())
+
+        assert snapshot.get(AGENT_1)["USDC"] == 1_000_000
+        assert snapshot.get(AGENT_2) is None
+        assert service.stats["failed_chunks"] == 1
@@ -0,0 +1,100 @@
+"""
+Contract Embedder Tests
+Resident model loaded once, micro-batched encodes and the hashed n-gram
+fallback used when sentence-transformers is unavailable.
+
+Run: python -m pytest tests/test_contract_embedder.py -v
+"""
+
+import asyncio
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from services.contract_embedder import (
+    ContractEmbedder, EMBEDDING_DIM, HASHED_MODEL, embedding_text, hashed_embedding
+)
+
+TOKEN = """
+contract Token {
+    mapping(address => uint256) balances;
+    function transfer(address to, uint256 amount) public returns (bool) {
+        require(balances[msg.sender] >= amount);
+    }
+}
+"""
+HONEYPOT = TOKEN.replace("require(balances[msg.sender] >= amount)", "require(msg.sender == owner)")
+VAULT = """
+contract Vault {
+    function deposit(uint256 assets, address receiver) external returns (uint256 shares) {}
+    function withdraw(uint256 assets) external {}
+}
+"""
+
+
+class FakeModel:
+    instances = 0
+
+    def __init__(self, name):
+        FakeModel.instances += 1
+        self.calls = []
+
+    def encode(self, texts, batch_size=32):
+        self.calls.append(list(texts))
+        return np.ones((len(texts), EMBEDDING_DIM), dtype=np.float32)
+
+
+@pytest.fixture
+def fake_transformers(monkeypatch):
+    FakeModel.instances = 0
+    module = types.ModuleType("sentence_transformers")
+    module.SentenceTransformer = FakeModel
+    monkeypatch.setitem(sys.modules, "sentence_transformers", module)
+    return module
+
+
+def cosine(a, b):
+    return float(np.dot(a, b))
+
+
+class TestHashedEmbedding:
+
+    def test_deterministic_unit_vectors(self):
+        vector = hashed_embedding(embedding_text(TOKEN))
+        assert len(vector) == EMBEDDING_DIM
+        assert vector == hashed_embedding(embedding_text(TOKEN))
+        assert np.linalg.norm(vector) == pytest.approx(1.0)
+        assert hashed_embedding("") == [0.0] * EMBEDDING_DIM
+
+    def test_similar_contracts_score_higher(self):
+        token, honeypot, vault = (hashed_embedding(embedding_text(s)) for s in (TOKEN, HONEYPOT, VAULT))
+        assert cosine(token, honeypot) > cosine(token, vault)
+
+
+class TestContractEmbedder:
+
+    def test_falls_back_to_hashed_without_model(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "sentence_transformers", None)
+        embedder = ContractEmbedder()
+
+        embedding = embedder.embed_sync(TOKEN)
+        assert embedding.model == HASHED_MODEL
+        assert embedding.vector == hashed_embedding(embedding_text(TOKEN))
+        assert embedder.get_stats()["backend"] == HASHED_MODEL
+
+    def test_model_loaded_once_and_requests_batched(self, fake_transformers):
+        embedder = ContractEmbedder(model_name="fake-model", batch_window=0.2)
+        embedder.embed_sync(VAULT)
+
+        embeddings = asyncio.run(embedder.embed_many([TOKEN, HONEYPOT, VAULT] * 3))
+
+        assert FakeModel.instances == 1
+        assert [len(call) for call in embedder.model.calls] == [1, 9]
+        assert all(e.model == "fake-model" and len(e.vector) == EMBEDDING_DIM for e in embeddings)
+
+    def test_batches_are_capped(self, fake_transformers):
+        embedder = ContractEmbedder(model_name="fake-model", max_batch=4, batch_window=0.2)
+        asyncio.run(embedder.embed_many([TOKEN] * 10))
+        assert [len(call) for call in embedder.model.calls] == [4, 4, 2]
@@ -0,0 +1,132 @@
+"""
+Fingerprint Index Tests
+Local cosine top-k over scam fingerprints, batched queries, incremental
+Supabase sync and the ScamDetector batch screen built on it.
+
+Run: python -m pytest tests/test_fingerprint_index.py -v
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+import services.fingerprint_index as fingerprint_index
+from services.contract_embedder import EMBEDDING_DIM, EMBEDDING_MODEL, HASHED_MODEL
+from services.fingerprint_index import FingerprintIndex
+from services.scam_detector import ScamDetector
+
+RNG = np.random.default_rng(7)
+
+
+def unit(vector):
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def random_vectors(n):
+    return [unit(v) for v in RNG.standard_normal((n, EMBEDDING_DIM))]
+
+
+def address(i):
+    return "0x" + f"{i:040x}"
+
+
+def supabase_row(i, vector, created_at, is_scam=True):
+    return {"contract_address": address(i), "risk_score": 90, "risk_level": "CRITICAL", "is_scam": is_scam,
+            "embedding": json.dumps(vector), "created_at": created_at}
+
+
+class TestSearch:
+
+    def test_top_k_matches_brute_force(self):
+        index = FingerprintIndex()
+        vectors = random_vectors(3000)  # forces matrix growth past the initial capacity
+        for i, vector in enumerate(vectors):
+            assert index.add(address(i), vector, {"is_scam": True})
+
+        queries = random_vectors(5) + [vectors[42]]
+        results = index.search_many(queries, k=3)
+
+        exact = np.asarray(queries) @ np.asarray(vectors).T
+        for q, found in enumerate(results):
+            expected = [address(i) for i in np.argsort(-exact[q])[:3]]
+            assert [m["contract_address"] for m in found] == expected
+            assert found[0]["similarity"] == pytest.approx(exact[q].max(), abs=1e-3)
+        assert results[-1][0]["contract_address"] == address(42)
+
+    def test_threshold_replace_and_bad_vectors(self):
+        index = FingerprintIndex()
+        vector = random_vectors(1)[0]
+        index.add(address(1).upper().replace("0X", "0x"), vector, {"risk_score": 40, "is_scam": False})
+        index.add(address(1), vector, {"risk_score": 95, "is_scam": True})
+
+        assert len(index) == 1
+        assert index.search(vector, threshold=0.95)[0]["risk_score"] == 95
+        assert index.search([-x for x in vector], threshold=0.95) == []
+        assert not index.add(address(2), [0.0] * EMBEDDING_DIM)
+        assert not index.add(address(3), [1.0, 2.0])
+        assert index.search_many([None, vector])[0] == []
+
+
+class TestSync:
+
+    def test_incremental_sync_uses_cursor(self, monkeypatch):
+        monkeypatch.setenv("SUPABASE_URL", "https://supabase.test")
+        monkeypatch.setenv("SUPABASE_ANON_KEY", "key")
+        monkeypatch.setattr(fingerprint_index, "SYNC_PAGE", 2)
+        vectors = random_vectors(4)
+        pages = [
+            [supabase_row(0, vectors[0], "t1"), supabase_row(1, vectors[1], "t2")],
+            [supabase_row(1, vectors[1], "t2")],
+            [supabase_row(1, vectors[1], "t2"), supabase_row(2, vectors[2], "t3")],
+            [supabase_row(2, vectors[2], "t3")],
+        ]
+        calls = []
+
+        async def get(url, params=None, headers=None):
+            calls.append(dict(params))
+            return MagicMock(status_code=200, json=MagicMock(return_value=pages[len(calls) - 1]))
+
+        client = MagicMock(get=AsyncMock(side_effect=get))
+        client.__aenter__ = AsyncMock(return_value=client)
+        client.__aexit__ = AsyncMock(return_value=False)
+        index = FingerprintIndex()
+
+        with patch.object(fingerprint_index.httpx, "AsyncClient", return_value=client):
+            asyncio.run(index.sync())
+            assert len(index) == 2 and "created_at" not in calls[0]
+            assert calls[1]["created_at"] == "gte.t2"
+
+            asyncio.run(index.sync())
+        assert len(index) == 3 and index.cursor == "t3"
+        assert calls[2]["created_at"] == "gte.t2"
+
+    def test_hashed_indexes_never_sync(self):
+        index = FingerprintIndex(HASHED_MODEL)
+        index.sync = AsyncMock()
+        asyncio.run(index.refresh())
+        index.sync.assert_not_awaited()
+
+
+class TestDetectorScreen:
+
+    def test_batch_screen_flags_known_scams(self, monkeypatch):
+        monkeypatch.setattr(fingerprint_index, "_indexes", {})
+        index = FingerprintIndex()
+        index.refresh = AsyncMock()
+        fingerprint_index._indexes[EMBEDDING_MODEL] = index
+
+        scam, clean, other = random_vectors(3)
+        index.add(address(1), scam, {"risk_score": 90, "is_scam": True})
+        index.add(address(2), clean, {"risk_score": 10, "is_scam": False})
+
+        embeddings = [MagicMock(vector=v, model=EMBEDDING_MODEL) for v in (scam, clean, other)]
+        embedder = MagicMock(embed_many=AsyncMock(return_value=embeddings))
+        with patch("services.scam_detector.get_embedder", return_value=embedder):
+            matches = asyncio.run(ScamDetector().find_similar_scams(["a", "b", "c"]))
+
+        assert matches[0]["contract_address"] == address(1) and matches[0]["similarity"] > 0.99
+        assert matches[1:] == [None, None]
+        index.refresh.assert_awaited_once()
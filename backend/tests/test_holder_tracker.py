@@ -0,0 +1,233 @@
+"""
+Holder Tracker Tests
+Transfer-log holder books: sorted top-holder ranking, block-checkpointed
+ingestion shared across tokens, persistence and HolderAnalysis serving.
+
+Run: python -m pytest tests/test_holder_tracker.py -v
+"""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from data_sources.holder_tracker import (
+    HolderBook, HolderTracker, TRANSFER_TOPIC, ZERO_ADDRESS, MAX_BLOCK_RANGE
+)
+from data_sources.holder_analysis import HolderAnalysis
+
+TOKEN = "0x" + "7a" * 20
+OTHER = "0x" + "7b" * 20
+ALICE, BOB, CAROL, GAUGE = ("0x" + c * 40 for c in "abc9")
+
+
+def topic(address):
+    return "0x" + "0" * 24 + address[2:]
+
+
+def transfer(token, sender, receiver, amount, block):
+    return {"address": token, "topics": [TRANSFER_TOPIC, topic(sender), topic(receiver)],
+            "data": hex(amount), "blockNumber": block}
+
+
+class FakeEth:
+    """get_logs over an in-memory log list, optionally refusing wide ranges"""
+
+    def __init__(self, logs, head, max_span=None):
+        self.logs = logs
+        self.block_number = head
+        self.max_span = max_span
+        self.calls = []
+
+    def get_logs(self, params):
+        self.calls.append((tuple(a.lower() for a in params["address"]), params["fromBlock"], params["toBlock"]))
+        if self.max_span and params["toBlock"] - params["fromBlock"] + 1 > self.max_span:
+            raise ValueError("query returned more than 10000 results")
+        addresses = {a.lower() for a in params["address"]}
+        return [log for log in self.logs
+                if log["address"] in addresses and params["fromBlock"] <= log["blockNumber"] <= params["toBlock"]]
+
+    def get_code(self, address):
+        return b"\x60\x80" if address.lower() == GAUGE else b""
+
+
+def make_tracker(logs, head, path=None, max_span=None):
+    tracker = HolderTracker(path=path)
+    tracker.confirmations = 0
+    tracker.w3 = MagicMock(eth=FakeEth(logs, head, max_span))
+    return tracker
+
+
+HISTORY = [
+    transfer(TOKEN, ZERO_ADDRESS, ALICE, 1000, 10),
+    transfer(TOKEN, ALICE, BOB, 300, 20),
+    transfer(TOKEN, ALICE, GAUGE, 500, 30),
+    transfer(TOKEN, BOB, CAROL, 100, 40),
+    transfer(TOKEN, CAROL, ZERO_ADDRESS, 100, 50),   # burn
+]
+
+
+class TestHolderBook:
+
+    def test_ranking_follows_balances(self):
+        book = HolderBook(TOKEN, 0)
+        for log in HISTORY:
+            book.transfer("0x" + log["topics"][1][-40:], "0x" + log["topics"][2][-40:], int(log["data"], 16))
+
+        assert book.top() == [(GAUGE, 500), (ALICE, 200), (BOB, 200)]
+        assert book.supply == 900 and book.holder_count == 3
+        assert CAROL not in book.balances
+
+        book.transfer(GAUGE, ALICE, 450)
+        assert book.top(1) == [(ALICE, 650)]
+
+    def test_negative_balance_marks_book_incomplete(self):
+        book = HolderBook(TOKEN, 0)
+        book.synced = True
+        book.transfer(ZERO_ADDRESS, ALICE, 10)
+        book.transfer(BOB, ALICE, 5)      # BOB's mint happened before start_block
+        assert book.negative == 1 and not book.ready
+        book.transfer(ZERO_ADDRESS, BOB, 5)
+        assert book.negative == 0 and book.ready
+
+
+class TestIngestion:
+
+    def test_backfill_merges_books_and_splits_ranges(self):
+        late = transfer(OTHER, ZERO_ADDRESS, ALICE, 7, 2 * MAX_BLOCK_RANGE + 5)
+        tracker = make_tracker(HISTORY + [late], head=3 * MAX_BLOCK_RANGE, max_span=MAX_BLOCK_RANGE // 2)
+        tracker.watch(TOKEN, start_block=1)
+        tracker.watch(OTHER, start_block=MAX_BLOCK_RANGE + 1)
+
+        asyncio.run(tracker.tick())
+
+        calls = tracker.w3.eth.calls
+        # TOKEN alone until it reaches OTHER's checkpoint, then one filter for both
+        assert calls[0][0] == (TOKEN,) and set(calls[-1][0]) == {TOKEN, OTHER}
+        assert max(c[2] for c in calls if c[0] == (TOKEN,)) == MAX_BLOCK_RANGE
+        assert tracker.stats["splits"] > 0
+        assert all(book.last_block == 3 * MAX_BLOCK_RANGE and book.synced for book in tracker.books.values())
+        assert tracker.books[OTHER].top() == [(ALICE, 7)]
+
+    def test_top_holder_changes_invalidate_pool_analysis(self):
+        from unittest.mock import patch
+        tracker = make_tracker(HISTORY[:2], head=25)
+        tracker.watch(TOKEN, start_block=1)
+
+        with patch("agents.pool_analysis_store.pool_analysis_store") as store:
+            asyncio.run(tracker.tick())          # first served
+            asyncio.run(tracker.tick())          # nothing moved
+            tracker.w3.eth.logs = HISTORY
+            tracker.w3.eth.block_number = 60     # GAUGE joins the top holders
+            asyncio.run(tracker.tick())
+
+        assert [c.args for c in store.invalidate.call_args_list] == [(TOKEN, "base", "security")] * 2
+
+    def test_snapshot_flags_contracts(self):
+        tracker = make_tracker(HISTORY, head=100)
+        tracker.watch(TOKEN, start_block=1)
+        assert tracker.snapshot(TOKEN) is None
+
+        asyncio.run(tracker.tick())
+        snapshot = tracker.snapshot(TOKEN)
+
+        assert snapshot["holder_count"] == 3 and snapshot["last_block"] == 100
+        top = snapshot["holders"][0]
+        assert top["owner_address"] == GAUGE and top["is_contract"] is True
+        assert top["percentage_relative_to_total_supply"] == pytest.approx(500 * 100 / 900)
+
+    def test_restart_resumes_from_checkpoint(self, tmp_path):
+        path = str(tmp_path / "holders.db")
+        tracker = make_tracker(HISTORY[:3], head=35, path=path)
+        tracker.watch(TOKEN, start_block=1)
+        asyncio.run(tracker.tick())
+
+        restarted = make_tracker(HISTORY, head=100, path=path)
+        restarted.load()
+        assert restarted.books[TOKEN].last_block == 35 and restarted.contracts[GAUGE] is True
+        # Caught up before the restart, but not served until it reaches the head again
+        assert tracker.books[TOKEN].synced and restarted.snapshot(TOKEN) is None
+
+        asyncio.run(restarted.tick())
+        assert restarted.w3.eth.calls[0][1] == 36
+        assert restarted.books[TOKEN].balances == {ALICE: 200, BOB: 200, GAUGE: 500}
+        assert restarted.snapshot(TOKEN) is not None
+
+    def test_old_index_without_synced_column(self, tmp_path):
+        import sqlite3
+        path = str(tmp_path / "holders.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE books (token TEXT PRIMARY KEY, start_block INTEGER NOT NULL, "
+                     "last_block INTEGER NOT NULL, supply TEXT NOT NULL, synced INTEGER NOT NULL)")
+        conn.execute("INSERT INTO books VALUES (?, 1, 35, '1000', 1)", (TOKEN,))
+        conn.commit()
+        conn.close()
+
+        tracker = make_tracker(HISTORY, head=100, path=path)
+        assert tracker.load() == 1 and not tracker.books[TOKEN].synced
+        asyncio.run(tracker.tick())
+        assert tracker.books[TOKEN].last_block == 100
+
+    def test_rpc_errors_back_off_instead_of_splitting(self):
+        tracker = make_tracker(HISTORY + [{**transfer(TOKEN, ALICE, BOB, 0, 60), "data": "0x"}], head=100)
+        tracker.watch(TOKEN, start_block=1)
+        tracker.w3.eth.get_logs = MagicMock(side_effect=ConnectionError("503 Service Unavailable"))
+
+        asyncio.run(tracker.tick())
+        assert tracker.w3.eth.get_logs.call_count == 1 and tracker.stats["splits"] == 0
+        assert tracker.books[TOKEN].last_block == 0 and tracker.retry_at > 0
+
+        # Backing off: the next tick doesn't touch the RPC
+        asyncio.run(tracker.tick())
+        assert tracker.w3.eth.get_logs.call_count == 1
+
+        del tracker.w3.eth.get_logs
+        tracker.retry_at = 0
+        asyncio.run(tracker.tick())
+        # A zero-value transfer with empty data ("0x") is applied, not a crash
+        assert tracker.books[TOKEN].last_block == 100 and tracker.backoff == 0
+
+
+class TestHolderAnalysisServing:
+
+    def test_watched_token_served_locally(self, monkeypatch):
+        tracker = make_tracker(HISTORY, head=100)
+        tracker.watch(TOKEN, start_block=1)
+        asyncio.run(tracker.tick())
+        monkeypatch.setattr("data_sources.holder_analysis.holder_tracker", tracker)
+
+        analyzer = HolderAnalysis()
+        analysis = asyncio.run(analyzer.get_holder_analysis(TOKEN, "base"))
+
+        assert analysis["source"] == "transfer_index" and analysis["holder_count"] == 3
+        # The gauge contract is a protocol holding, not a whale
+        assert analysis["protocol_staked_percent"] == pytest.approx(55.56, abs=0.01)
+        assert analysis["top_1_holder_percent"] == pytest.approx(22.22, abs=0.01)
+        assert "Medium Risk (44.4%)" in analyzer.get_concentration_badge(analysis)
+        assert analyzer.local_analysis(OTHER, "base") is None
+
+    def test_enrichment_watches_base_pools(self, monkeypatch):
+        from data_sources.pool_enricher import PoolEnricher
+        from data_sources.pool_age import Deployment
+        import data_sources.pool_age as pool_age
+
+        tracker = make_tracker(HISTORY, head=100)
+        monkeypatch.setattr("data_sources.holder_tracker.holder_tracker", tracker)
+        lookup = MagicMock(return_value=Deployment(TOKEN, 1, 0))
+        age_service = MagicMock(get_deployment=lambda address: asyncio.sleep(0, lookup(address)))
+        monkeypatch.setattr(pool_age, "pool_age_service", age_service)
+
+        enricher = PoolEnricher()
+        monkeypatch.setattr(enricher, "_get_defillama_data", lambda pool: asyncio.sleep(0, {}))
+
+        async def run():
+            await enricher.enrich({"address": TOKEN.upper().replace("0X", "0x"), "chain": "Base"})
+            await enricher.enrich({"address": OTHER, "chain": "Ethereum"})
+            await asyncio.sleep(0.01)
+            await tracker.tick()
+            return await enricher.enrich({"address": TOKEN, "chain": "base"})
+
+        enriched = asyncio.run(run())
+        lookup.assert_called_once_with(TOKEN)
+        assert list(tracker.books) == [TOKEN] and tracker.books[TOKEN].start_block == 1
+        assert enriched["holder_count"] == 3
@@ -0,0 +1,119 @@
+"""
+Leverage Monitor Tests
+Batched Aave/Morpho health-factor reads, risk tiers and auto-deleverage.
+
+Run: python -m pytest tests/test_leverage_monitor.py -v
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from eth_abi import encode
+
+from agents.leverage_monitor import (
+    LeverageMonitor,
+    WatchedPosition,
+    GET_USER_ACCOUNT_DATA,
+    MORPHO_POSITION,
+    MORPHO_MARKET,
+    ORACLE_PRICE,
+    morpho_deleverage_hf,
+    poll_interval_for,
+)
+from agents.smart_loop_engine import smart_loop_engine
+
+USERS = {
+    "0x" + "11" * 20: 1.15,   # below deleverage threshold
+    "0x" + "22" * 20: 1.6,
+    "0x" + "33" * 20: 3.0,
+}
+ORACLE = "0x" + "44" * 20
+MARKET_PARAMS = ("0x" + "aa" * 20, "0x" + "bb" * 20, ORACLE, "0x" + "cc" * 20, 860000000000000000)
+
+
+def fake_aggregate(calls):
+    results = []
+    for call in calls:
+        data = call["callData"]
+        selector = data[:4]
+        if selector == GET_USER_ACCOUNT_DATA:
+            user = "0x" + data[-20:].hex()
+            hf = int(USERS[user] * 1e18)
+            results.append((True, encode(["uint256"] * 6, [0, 0, 0, 0, 0, hf])))
+        elif selector == MORPHO_POSITION:
+            # 1000 borrow shares, 2 collateral units
+            results.append((True, encode(["uint256", "uint128", "uint128"], [0, 1000 * 10 ** 6, 2])))
+        elif selector == MORPHO_MARKET:
+            # 1:1 assets per share (ignoring virtual offsets)
+            results.append((True, encode(["uint128"] * 6, [0, 0, 10 ** 9, 10 ** 15, 0, 0])))
+        elif selector == ORACLE_PRICE:
+            # 1 collateral = 1000 loan units, scaled 1e36
+            results.append((True, encode(["uint256"], [1000 * 10 ** 36])))
+        else:
+            results.append((False, b""))
+    return results
+
+
+def make_monitor():
+    monitor = LeverageMonitor(w3=MagicMock())
+    monitor._aggregate = MagicMock(side_effect=fake_aggregate)
+    return monitor
+
+
+class TestLeverageMonitor:
+
+    def test_tiers_by_distance_from_threshold(self):
+        assert poll_interval_for(None, 1.2) == 5
+        assert poll_interval_for(1.25, 1.2) == 5
+        assert poll_interval_for(1.6, 1.2) == 15
+        assert poll_interval_for(3.0, 1.2) == 60
+
+    def test_aave_batch_read_and_deleverage(self):
+        monitor = make_monitor()
+        positions = {user: MagicMock() for user in USERS}
+
+        with patch.object(smart_loop_engine, "positions", positions), \
+             patch.object(smart_loop_engine, "deleverage", AsyncMock()) as deleverage:
+            health = asyncio.run(monitor.check())
+
+        # One aggregate3 call for all users
+        assert monitor._aggregate.call_count == 1
+        assert sorted(round(hf, 2) for hf in health.values()) == [1.15, 1.6, 3.0]
+        deleverage.assert_awaited_once_with("0x" + "11" * 20, 1.5)
+
+    def test_healthy_positions_not_polled_until_due(self):
+        monitor = make_monitor()
+        positions = {user: MagicMock() for user in USERS}
+
+        with patch.object(smart_loop_engine, "positions", positions), \
+             patch.object(smart_loop_engine, "deleverage", AsyncMock()):
+            asyncio.run(monitor.check())
+            # Only the deleveraged position is due again right away
+            second = asyncio.run(monitor.check())
+
+        assert list(second) == ["aave:" + "0x" + "11" * 20]
+        assert monitor.get_stats()["tiers"] == {"5s": 1, "15s": 1, "60s": 1}
+
+    def test_morpho_health_factor(self):
+        monitor = make_monitor()
+        position = WatchedPosition(
+            key="morpho:0xuser:usdc_weth",
+            protocol="morpho",
+            user="0x" + "55" * 20,
+            market_key="usdc_weth",
+            market_params=MARKET_PARAMS,
+            threshold=morpho_deleverage_hf(MARKET_PARAMS[4]),
+        )
+
+        health = asyncio.run(monitor.read_health_factors([position]))
+
+        # collateral 2 * 1000 * 0.86 LLTV = 1720 max borrow vs ~1000 borrowed
+        assert abs(health[position.key] - 1.72) < 0.01
+
+    def test_morpho_threshold_follows_market_lltv(self):
+        # Engine max LTV = LLTV - 10%: 86% -> 76%, 77% -> 67%
+        assert morpho_deleverage_hf(860000000000000000) == pytest.approx(0.86 / 0.76)
+        assert morpho_deleverage_hf(770000000000000000) == pytest.approx(0.77 / 0.67)
+        assert morpho_deleverage_hf(50000000000000000) == float("inf")
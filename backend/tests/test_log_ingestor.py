@@ -0,0 +1,163 @@
+"""
+Log Ingestor Tests
+Transfer/pool logs -> coalesced per-agent evaluations, checkpointed by block.
+
+Run: python -m pytest tests/test_log_ingestor.py -v
+"""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from agents.log_ingestor import (
+    LogIngestor,
+    TRANSFER_TOPIC,
+    POSITION_EVENT_TOPICS,
+    MAX_BLOCK_RANGE,
+    address_to_topic,
+    topic_to_address,
+)
+
+USDC = "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913"
+AGENT_ADDR = "0x5E047DeB5eb22F4E4A7f2207087369468575e3EF"
+POOL = "0xcDAC0d6c6C59727a65F871236188350531885C43"
+NOTIFY_TOPIC = next(t for t, kind in POSITION_EVENT_TOPICS.items() if kind == "reward_notify")
+
+AGENTS = {
+    "0xuser": [{
+        "id": "agent_1",
+        "is_active": True,
+        "agent_address": AGENT_ADDR,
+        "allocations": [{"pool_address": POOL, "protocol": "aerodrome"}],
+    }]
+}
+
+
+def transfer_log(amount: int, block: int):
+    return {
+        "address": USDC,
+        "topics": [TRANSFER_TOPIC, address_to_topic("0x" + "11" * 20), address_to_topic(AGENT_ADDR)],
+        "data": hex(amount),
+        "blockNumber": block,
+        "transactionHash": "0x" + f"{block:064x}",
+    }
+
+
+def make_ingestor(tmp_path, head: int, logs: list):
+    ingestor = LogIngestor(checkpoint_file=str(tmp_path / "checkpoint.json"))
+    w3 = MagicMock()
+    w3.eth.block_number = head
+    w3.eth.get_logs.side_effect = lambda params: [
+        log for log in logs if params["fromBlock"] <= log["blockNumber"] <= params["toBlock"]
+        and log["topics"][0] in (params["topics"][0] if isinstance(params["topics"][0], list) else [params["topics"][0]])
+    ]
+    ingestor.w3 = w3
+    return ingestor, w3
+
+
+class TestLogIngestor:
+
+    def test_topic_roundtrip(self):
+        assert topic_to_address(address_to_topic(AGENT_ADDR)) == AGENT_ADDR.lower()
+
+    def test_first_tick_only_sets_checkpoint(self, tmp_path):
+        ingestor, w3 = make_ingestor(tmp_path, head=1000, logs=[])
+        ingestor.on_event("deposit", MagicMock())
+
+        asyncio.run(ingestor.tick())
+
+        assert ingestor.last_block == 1000
+        w3.eth.get_logs.assert_not_called()
+        # Checkpoint survives a restart
+        assert LogIngestor(checkpoint_file=str(tmp_path / "checkpoint.json")).last_block == 1000
+
+    def test_deposits_coalesced_per_agent(self, tmp_path):
+        logs = [transfer_log(5_000_000, 1001), transfer_log(7_000_000, 1002)]
+        ingestor, w3 = make_ingestor(tmp_path, head=1002, logs=logs)
+        ingestor.last_block = 1000
+        calls = []
+
+        async def on_deposit(agent, deposits):
+            calls.append((agent["id"], deposits))
+
+        ingestor.on_event("deposit", on_deposit)
+
+        async def run():
+            with patch("api.agent_config_router.DEPLOYED_AGENTS", AGENTS):
+                await ingestor.tick()
+                await asyncio.sleep(0)
+                await asyncio.gather(*ingestor._workers.values())
+
+        asyncio.run(run())
+
+        assert len(calls) == 1
+        agent_id, deposits = calls[0]
+        assert agent_id == "agent_1"
+        assert [d["formatted"] for d in deposits] == ["5.0000", "7.0000"]
+        assert ingestor.last_block == 1002
+
+    def test_position_events_and_block_chunking(self, tmp_path):
+        head = 1000 + MAX_BLOCK_RANGE + 10
+        logs = [{
+            "address": POOL,
+            "topics": [NOTIFY_TOPIC, address_to_topic(POOL)],
+            "data": "0x",
+            "blockNumber": head,
+            "transactionHash": "0x" + "ab" * 32,
+        }]
+        ingestor, w3 = make_ingestor(tmp_path, head=head, logs=logs)
+        ingestor.last_block = 1000
+        events = []
+
+        async def on_position(agent, payloads):
+            events.extend(payloads)
+
+        ingestor.on_event("position_event", on_position)
+
+        async def run():
+            with patch("api.agent_config_router.DEPLOYED_AGENTS", AGENTS):
+                await ingestor.tick()
+                await asyncio.gather(*ingestor._workers.values())
+
+        asyncio.run(run())
+
+        assert [e["event"] for e in events] == ["reward_notify"]
+        # 2 block ranges x (transfer filter + position filter)
+        assert w3.eth.get_logs.call_count == 4
+        assert ingestor.last_block == head
+
+    def test_rpc_error_keeps_checkpoint(self, tmp_path):
+        ingestor, w3 = make_ingestor(tmp_path, head=1100, logs=[])
+        ingestor.last_block = 1000
+        ingestor.on_event("deposit", MagicMock())
+        w3.eth.get_logs.side_effect = RuntimeError("range too large")
+
+        async def run():
+            with patch("api.agent_config_router.DEPLOYED_AGENTS", AGENTS):
+                try:
+                    await ingestor.tick()
+                except RuntimeError:
+                    pass
+
+        asyncio.run(run())
+        assert ingestor.last_block == 1000
+
+    def test_all_deposit_tokens_and_empty_data(self, tmp_path):
+        dai = "0x50c5725949A6F0c72E6C4a641F24049A917DB0Cb"
+        logs = [dict(transfer_log(3 * 10 ** 18, 1001), address=dai), dict(transfer_log(0, 1002), data="0x")]
+        ingestor, w3 = make_ingestor(tmp_path, head=1002, logs=logs)
+        ingestor.last_block = 1000
+        calls = []
+
+        async def on_deposit(agent, deposits):
+            calls.extend(deposits)
+
+        ingestor.on_event("deposit", on_deposit)
+
+        async def run():
+            with patch("api.agent_config_router.DEPLOYED_AGENTS", AGENTS):
+                await ingestor.tick()
+                await asyncio.gather(*ingestor._workers.values())
+
+        asyncio.run(run())
+        assert [(d["token"], d["amount"]) for d in calls] == [("DAI", 3 * 10 ** 18), ("USDC", 0)]
+        assert ingestor.last_block == 1002
@@ -0,0 +1,216 @@
+"""
+OnChain Verifier Tests
+Handlers read through the shared MulticallBatcher: one aggregate3 per read
+round for the whole batch, optional reads that revert don't fail the pool.
+
+Run: python -m pytest tests/test_onchain_verifier.py -v
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from eth_abi import encode
+from hexbytes import HexBytes
+from web3 import Web3
+from web3._utils.abi import get_abi_output_types
+from web3.exceptions import ContractLogicError
+
+from data_sources.multicall import MulticallBatcher
+from data_sources.token_registry import TokenRegistry
+from services.onchain_verifier import (
+    OnChainVerifier,
+    UNIV3_POOL_ABI,
+    AERO_POOL_ABI,
+    AERO_GAUGE_ABI,
+    CURVE_POOL_ABI,
+    ERC20_ABI,
+    SECONDS_PER_YEAR,
+)
+
+TOKEN_A = "0x" + "a1" * 20
+TOKEN_B = "0x" + "b2" * 20
+
+
+def addr(n: int) -> str:
+    return Web3.to_checksum_address("0x" + f"{n:040x}")
+
+
+class FakeChain:
+    """aggregate3 stand-in answering pre-registered (target, calldata) reads"""
+
+    def __init__(self):
+        self.w3 = Web3()
+        self.responses = {}
+        self.batches = []
+
+    def set(self, abi, address, fn_name, value, args=()):
+        fn = self.w3.eth.contract(address=Web3.to_checksum_address(address), abi=abi).functions[fn_name](*args)
+        types = get_abi_output_types(fn.abi)
+        values = list(value) if len(types) > 1 else [value]
+        self.responses[(address.lower(), bytes(HexBytes(fn._encode_transaction_data())))] = encode(types, values)
+
+    def token(self, address, decimals, symbol):
+        self.set(ERC20_ABI, address, "decimals", decimals)
+        self.set(ERC20_ABI, address, "symbol", symbol)
+
+    def aggregate(self, calls):
+        self.batches.append(len(calls))
+        results = []
+        for call in calls:
+            data = self.responses.get((call["target"].lower(), bytes(HexBytes(call["callData"]))))
+            results.append((data is not None, data or b""))
+        return results
+
+
+def make_verifier(chain):
+    with patch.object(Web3, "is_connected", return_value=False):
+        verifier = OnChainVerifier(rpc_url="http://localhost:0")
+    verifier.batcher._aggregate = chain.aggregate
+    verifier.registry = TokenRegistry(path=None)
+    verifier._get_token_price = AsyncMock(return_value=1.0)
+    return verifier
+
+
+def add_univ3_pool(chain, pool, fee_growth=True):
+    chain.set(UNIV3_POOL_ABI, pool, "slot0", (2 ** 96, 0, 0, 1, 1, 0, True))
+    chain.set(UNIV3_POOL_ABI, pool, "liquidity", 10 ** 20)
+    chain.set(UNIV3_POOL_ABI, pool, "fee", 500)
+    chain.set(UNIV3_POOL_ABI, pool, "token0", TOKEN_A)
+    chain.set(UNIV3_POOL_ABI, pool, "token1", TOKEN_B)
+    if fee_growth:
+        chain.set(UNIV3_POOL_ABI, pool, "feeGrowthGlobal0X128", 2 ** 128)
+        chain.set(UNIV3_POOL_ABI, pool, "feeGrowthGlobal1X128", 2 ** 128)
+
+
+class TestMulticallBatcher:
+
+    def test_decodes_like_call_and_isolates_reverts(self):
+        chain = FakeChain()
+        chain.set(UNIV3_POOL_ABI, addr(1), "token0", TOKEN_A)
+        chain.set(UNIV3_POOL_ABI, addr(1), "slot0", (2 ** 96, -5, 0, 1, 1, 0, True))
+        batcher = MulticallBatcher(chain.w3, max_calls=2)
+        batcher._aggregate = chain.aggregate
+        pool = chain.w3.eth.contract(address=addr(1), abi=UNIV3_POOL_ABI)
+
+        async def run():
+            token0, slot0, fee = await batcher.read(
+                pool.functions.token0(), pool.functions.slot0(), pool.functions.fee(), allow_failure=True
+            )
+            with pytest.raises(ContractLogicError):
+                await batcher.call(pool.functions.fee())
+            return token0, slot0, fee
+
+        token0, slot0, fee = asyncio.run(run())
+        assert token0 == Web3.to_checksum_address(TOKEN_A)
+        assert slot0[:2] == [2 ** 96, -5]
+        assert fee is None
+        # 3 calls over max_calls=2 -> one batch, two aggregate3 calls
+        assert chain.batches[:2] == [2, 1]
+        assert batcher.stats["batches"] == 2
+
+    def test_encodes_like_contract_and_holds_flush_task(self):
+        from data_sources.multicall import _encode_call
+        abi = [{"name": "f", "type": "function", "stateMutability": "view", "outputs": [],
+                "inputs": [{"name": "p", "type": "tuple", "components": [
+                    {"name": "a", "type": "address"}, {"name": "b", "type": "uint256[]"}]},
+                    {"name": "c", "type": "bytes32"}]}]
+        chain = FakeChain()
+        contract = chain.w3.eth.contract(address=addr(1), abi=abi)
+        args = ((addr(2), [1, 2]), b"\x01" * 32)
+        assert "0x" + _encode_call(contract.functions.f(*args)).hex() == contract.encodeABI("f", args)
+
+        batcher = MulticallBatcher(chain.w3)
+        batcher._aggregate = chain.aggregate
+
+        async def run():
+            future = batcher.call(contract.functions.f(*args))
+            assert batcher._flush_task is not None and not batcher._flush_task.done()
+            await asyncio.gather(future, return_exceptions=True)
+            assert batcher._flush_task is None
+        asyncio.run(run())
+
+
+class TestOnChainVerifier:
+
+    def test_batch_shares_one_multicall_per_round(self):
+        chain = FakeChain()
+        pools = [addr(10 + i) for i in range(3)]
+        for i, pool in enumerate(pools):
+            add_univ3_pool(chain, pool, fee_growth=i != 0)
+        chain.token(TOKEN_A, 18, "WETH")
+        chain.token(TOKEN_B, 18, "USDC")
+        verifier = make_verifier(chain)
+
+        results = asyncio.run(verifier.verify_batch([{"address": p, "protocol": "uniswap-v3"} for p in pools]))
+
+        # Round 1: 3 pools x 7 reads, round 2: token metadata for every pool
+        assert chain.batches == [21, 12]
+        assert all(r["error"] is None and r["verified"] for r in results)
+        assert results[0]["onchain"]["details"]["token0"] == "WETH"
+        assert results[0]["onchain"]["price"] == 1.0
+        # Missing feeGrowthGlobal only drops the fee APY for that pool
+        assert results[0]["onchain"]["apy"] is None
+        assert results[1]["onchain"]["apy"] is not None
+
+    def test_aerodrome_optional_reads(self):
+        chain = FakeChain()
+        with_gauge, broken_gauge, gauge = addr(20), addr(21), addr(22)
+        for pool in (with_gauge, broken_gauge):
+            chain.set(AERO_POOL_ABI, pool, "getReserves", (1000 * 10 ** 6, 1000 * 10 ** 6, 0))
+            chain.set(AERO_POOL_ABI, pool, "token0", TOKEN_A)
+            chain.set(AERO_POOL_ABI, pool, "token1", TOKEN_B)
+        chain.set(AERO_POOL_ABI, with_gauge, "stable", True)
+        chain.set(AERO_POOL_ABI, with_gauge, "gauge", gauge)
+        chain.set(AERO_POOL_ABI, broken_gauge, "gauge", addr(23))   # rewardRate reverts
+        chain.set(AERO_GAUGE_ABI, gauge, "rewardRate", 10 ** 18)
+        chain.set(AERO_GAUGE_ABI, gauge, "totalSupply", 1)
+        chain.token(TOKEN_A, 6, "USDC")
+        chain.token(TOKEN_B, 6, "USDbC")
+        verifier = make_verifier(chain)
+
+        good, broken = asyncio.run(verifier.verify_batch([
+            {"address": with_gauge, "protocol": "aerodrome"},
+            {"address": broken_gauge, "protocol": "aerodrome"},
+        ]))
+
+        assert len(chain.batches) == 2
+        assert good["onchain"]["tvl"] == 2000.0
+        assert good["onchain"]["apy"] == round(SECONDS_PER_YEAR / 2000 * 100, 4)
+        assert good["onchain"]["details"]["stable"] is True
+        assert broken["verified"] and broken["onchain"]["apy"] == 0.0
+        assert broken["onchain"]["details"]["stable"] is False
+
+    def test_curve_counts_coins_until_revert(self):
+        chain = FakeChain()
+        pool = addr(30)
+        chain.set(CURVE_POOL_ABI, pool, "get_virtual_price", 10 ** 18)
+        for i, (token, balance) in enumerate([(TOKEN_A, 5 * 10 ** 6), (TOKEN_B, 7 * 10 ** 6)]):
+            chain.set(CURVE_POOL_ABI, pool, "coins", token, args=(i,))
+            chain.set(CURVE_POOL_ABI, pool, "balances", balance, args=(i,))
+        chain.token(TOKEN_A, 6, "USDC")
+        chain.token(TOKEN_B, 6, "USDT")
+        verifier = make_verifier(chain)
+
+        result = asyncio.run(verifier.verify(pool, "curve"))
+
+        coins = result["onchain"]["details"]["coins"]
+        assert [c["symbol"] for c in coins] == ["USDC", "USDT"]
+        assert result["onchain"]["tvl"] == 12.0
+        assert chain.batches == [9, 4]
+
+    def test_known_tokens_skip_metadata_round(self):
+        chain = FakeChain()
+        pool = addr(40)
+        add_univ3_pool(chain, pool)
+        chain.token(TOKEN_A, 18, "WETH")
+        chain.token(TOKEN_B, 6, "USDC")
+        verifier = make_verifier(chain)
+
+        first = asyncio.run(verifier.verify(pool, "uniswap-v3"))
+        second = asyncio.run(verifier.verify(pool, "uniswap-v3"))
+
+        # Round 1 + token metadata, then round 1 only (token registry)
+        assert chain.batches == [7, 4, 7]
+        assert second["onchain"]["details"] == first["onchain"]["details"]
+        assert verifier.registry.cached_token(TOKEN_B).decimals == 6
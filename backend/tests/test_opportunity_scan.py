@@ -0,0 +1,112 @@
+"""
+Shared Opportunity Scan Tests
+Per-agent masks over one shared Scout scan must match the old per-agent filtering.
+
+Run: python -m pytest tests/test_opportunity_scan.py -v
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from agents.opportunity_scan import OpportunityScan, OpportunityScanner, normalize_chain
+
+
+POOLS = [
+    {"id": "aero-weth-usdc", "symbol": "WETH-USDC", "project": "aerodrome-v1", "apy": 62.5, "tvl": 12_000_000, "risk_score": "Medium"},
+    {"id": "aave-usdc", "symbol": "USDC", "project": "aave-v3", "apy": 8.2, "tvl": 45_000_000, "risk_score": "Low", "stablecoin": True},
+    {"id": "aave-weth", "symbol": "WETH", "project": "aave-v3", "apy": 3.5, "tvl": 120_000_000, "risk_score": "Low"},
+    {"id": "extra-usdc", "symbol": "USDC", "project": "extrafi", "apy": 55.0, "tvl": 800_000, "risk_score": "High"},
+    {"id": "tiny-lp", "symbol": "WETH-USDC", "project": "baseswap", "apy": 250.0, "tvl": 90_000, "risk_score": "High"},
+    {"id": "curve-usdc-usdt", "symbol": "USDC-USDT", "project": "curve-dex", "apy": 4.8, "tvl": 40_000_000, "risk_score": "Low", "stablecoin": True},
+]
+
+
+def ids(pools):
+    return [p["id"] for p in pools]
+
+
+@pytest.fixture
+def scan():
+    return OpportunityScan("Base", POOLS, min_tvl=50_000)
+
+
+class TestOpportunityScanMasks:
+
+    def test_default_agent_uses_scout_bounds(self, scan):
+        # min_pool_tvl 500k and Scout's 100M cap
+        assert ids(scan.select({})) == ["aero-weth-usdc", "aave-usdc", "extra-usdc", "curve-usdc-usdt"]
+
+    def test_protocols_and_assets(self, scan):
+        agent = {"protocols": ["aave"], "preferred_assets": ["USDC"]}
+        assert ids(scan.select(agent)) == ["aave-usdc"]
+
+    def test_pool_type(self, scan):
+        assert ids(scan.select({"pool_type": "single"})) == ["aave-usdc", "extra-usdc"]
+        assert ids(scan.select({"pool_type": "dual"})) == ["aero-weth-usdc", "curve-usdc-usdt"]
+        assert ids(scan.select({"pool_type": "stablecoin"})) == ["aave-usdc", "curve-usdc-usdt"]
+
+    def test_max_tvl_and_apy_bounds(self, scan):
+        agent = {"max_pool_tvl": 20_000_000, "min_apy": 5, "max_apy": 60}
+        assert ids(scan.select(agent)) == ["extra-usdc"]
+
+    def test_risk_and_audit(self, scan):
+        assert "extra-usdc" not in ids(scan.select({"risk_level": "low"}))
+        assert ids(scan.select({"only_audited": True})) == ["aero-weth-usdc", "aave-usdc", "curve-usdc-usdt"]
+
+    def test_avoid_il_with_fallback(self, scan):
+        assert ids(scan.select({"avoid_il": True})) == ["aave-usdc"]
+        # No IL-safe pool left -> top 3 of the matching pools
+        agent = {"avoid_il": True, "pool_type": "dual", "min_pool_tvl": 0}
+        assert ids(scan.select(agent)) == ["aero-weth-usdc", "tiny-lp", "curve-usdc-usdt"]
+
+    def test_substring_masks_are_shared(self, scan):
+        scan.select({"protocols": ["aave"]})
+        scan.select({"protocols": ["aave", "curve"]})
+        assert set(scan._project_masks) == {"aave", "curve"}
+
+
+class TestOpportunityScanner:
+
+    def test_normalize_chain(self):
+        assert normalize_chain("base") == "Base"
+        assert normalize_chain(None) == "Base"
+        assert normalize_chain("optimism") == "Optimism"
+
+    def test_one_scan_per_chain_per_cycle(self):
+        scanner = OpportunityScanner()
+        mock_scout = AsyncMock()
+        mock_scout.scan_all_protocols.return_value = list(POOLS)
+
+        agents = [
+            {"chain": "base", "min_pool_tvl": 1_000_000},
+            {"chain": "base", "min_pool_tvl": 100_000},
+            {"chain": "Base"},
+        ]
+
+        async def run():
+            scanner.begin_cycle()
+            await scanner.prepare(agents)
+            for agent in agents:
+                await scanner.get_scan(normalize_chain(agent.get("chain")), agent.get("min_pool_tvl", 500_000))
+
+        with patch("agents.opportunity_scan.scout_agent", mock_scout):
+            asyncio.run(run())
+
+        # Superset scan with the lowest min_tvl, reused by every agent
+        mock_scout.scan_all_protocols.assert_awaited_once_with("Base", 100_000)
+        assert scanner.stats == {"scans": 1, "reused": 3}
+
+    def test_higher_coverage_request_rescans(self):
+        scanner = OpportunityScanner()
+        mock_scout = AsyncMock()
+        mock_scout.scan_all_protocols.return_value = list(POOLS)
+
+        async def run():
+            await scanner.get_scan("Base", 500_000)
+            await scanner.get_scan("Base", 10_000)
+
+        with patch("agents.opportunity_scan.scout_agent", mock_scout):
+            asyncio.run(run())
+
+        assert mock_scout.scan_all_protocols.await_count == 2
@@ -0,0 +1,134 @@
+"""
+Pool Age Tests
+Deployment block found by batched eth_getCode bisection, shared rounds
+across addresses and the permanent SQLite cache.
+
+Run: python -m pytest tests/test_pool_age.py -v
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+import data_sources.pool_age as pool_age
+from data_sources.pool_age import PoolAgeService, _probe_blocks
+
+HEAD = 30_000_000
+GENESIS_TIME = 1_686_789_347
+DEPLOYED = {
+    "0x" + "a0" * 20: 17_654_321,
+    "0x" + "b0" * 20: 0,               # predeploy, code since genesis
+    "0x" + "c0" * 20: HEAD,            # deployed in the head block
+}
+EOA = "0x" + "e0" * 20
+
+
+class FakeChain:
+    """JSON-RPC batch endpoint over DEPLOYED"""
+
+    def __init__(self, archive=True):
+        self.archive = archive
+        self.flaky = {}                # address -> getCode calls left to fail
+        self.requests = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        calls = json.loads(request.content)
+        self.requests.append(calls)
+        return httpx.Response(200, json=[self.answer(call) for call in calls])
+
+    def answer(self, call):
+        method, params = call["method"], call["params"]
+        if method == "eth_blockNumber":
+            return {"id": call["id"], "result": hex(HEAD)}
+        if method == "eth_getBlockByNumber":
+            block = int(params[0], 16)
+            return {"id": call["id"], "result": {"number": params[0], "timestamp": hex(GENESIS_TIME + 2 * block)}}
+        address, block = params[0], int(params[1], 16)
+        if not self.archive and block < HEAD:
+            return {"id": call["id"], "error": {"code": -32000, "message": "missing trie node"}}
+        if self.flaky.get(address):
+            self.flaky[address] -= 1
+            return {"id": call["id"], "error": {"code": 429, "message": "rate limited"}}
+        deployed = DEPLOYED.get(address)
+        code = "0x6080604052" if deployed is not None and block >= deployed else "0x"
+        return {"id": call["id"], "result": code}
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    fake = FakeChain()
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(pool_age.httpx, "AsyncClient",
+                        lambda **kwargs: real_client(transport=httpx.MockTransport(fake.handle), **kwargs))
+    return fake
+
+
+def make_service(path=None):
+    return PoolAgeService(path=path, rpc_url="https://rpc.test")
+
+
+class TestProbeBlocks:
+
+    def test_probes_stay_inside_the_open_range(self):
+        blocks = _probe_blocks(-1, HEAD, 16)
+        assert len(blocks) == 16 and blocks == sorted(blocks)
+        assert 0 <= blocks[0] and blocks[-1] < HEAD
+        assert _probe_blocks(10, 14, 16) == [11, 12, 13]
+        assert _probe_blocks(10, 11, 16) == []
+
+
+class TestPoolAge:
+
+    def test_bisection_finds_deployment_blocks(self, chain):
+        service = make_service()
+        found = asyncio.run(service.get_deployments(list(DEPLOYED) + [EOA]))
+
+        assert {a: d.block for a, d in found.items()} == DEPLOYED
+        assert found["0x" + "a0" * 20].timestamp == GENESIS_TIME + 2 * 17_654_321
+        assert EOA not in found
+
+        # All addresses share each round: head + code-at-head + ~7 bisection rounds + timestamps
+        assert len(chain.requests) <= 10
+        assert service.stats["rounds"] <= 8
+
+    def test_results_persist_and_misses_expire(self, chain, tmp_path):
+        path = str(tmp_path / "age.db")
+        pool = "0x" + "a0" * 20
+        deployment = asyncio.run(make_service(path).get_deployment(pool.upper().replace("0X", "0x")))
+        assert deployment.block == DEPLOYED[pool] and deployment.age_days > 0
+
+        requests = len(chain.requests)
+        restarted = make_service(path)
+        assert asyncio.run(restarted.get_deployment(pool)) == deployment
+        assert asyncio.run(restarted.get_age_days(EOA)) is None
+        after_miss = len(chain.requests)
+        assert after_miss > requests
+
+        # A miss is not retried until MISS_TTL has passed
+        assert asyncio.run(restarted.get_age_days(EOA)) is None
+        assert len(chain.requests) == after_miss
+        restarted._misses = {k: time.time() - pool_age.MISS_TTL - 1 for k in restarted._misses}
+        asyncio.run(restarted.get_age_days(EOA))
+        assert len(chain.requests) > after_miss
+
+    def test_pruned_rpc_is_a_miss(self, chain):
+        chain.archive = False
+        service = make_service()
+        assert asyncio.run(service.get_deployment("0x" + "a0" * 20)) is None
+        assert service.stats["misses"] == 1
+
+    def test_failed_probes_are_retried_once(self, chain):
+        flaky, dropped = "0x" + "a0" * 20, "0x" + "b0" * 20
+        # The head probe fails once for one address (retried) and twice for the other (dropped)
+        chain.flaky = {flaky: 1, dropped: 2}
+        found = asyncio.run(make_service().get_deployments([flaky, dropped]))
+
+        assert {a: d.block for a, d in found.items()} == {flaky: DEPLOYED[flaky]}
+
+    def test_other_chains_are_not_answered_from_base(self, chain):
+        service = make_service()
+        assert asyncio.run(service.get_deployments(list(DEPLOYED), chain="ethereum")) == {}
+        assert chain.requests == [] and not service._misses
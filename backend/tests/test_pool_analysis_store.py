@@ -0,0 +1,153 @@
+"""
+Pool Analysis Store Tests
+Materialized SmartRouter responses: single-read serving, popularity-weighted
+refresh cadence and per-dependency partial recomputation.
+
+Run: python -m pytest tests/test_pool_analysis_store.py -v
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from agents.pool_analysis_store import (
+    PoolAnalysisStore, DEPENDENCY_INTERVALS, MAX_AGE, MAX_SLOWDOWN, HOT_VIEWS
+)
+
+POOL = "0x" + "e1" * 20
+VAULT = "beefy-vault-id"
+BASE = {"tvl": 1_000_000, "apy": 12.0, "token0": "0x" + "a1" * 20, "token1": "0x" + "a2" * 20}
+SECTIONS = {"ohlcv": {"price_change_7d": 1.0}, "apy": {"apy_status": "already_set", "apy": 12.0},
+            "security": {"status": "success", "tokens": {}}, "dexscreener": {"token0": {}},
+            "peg": {}, "lp_lock": {"has_lock": True}, "whale": {"source": "moralis"}}
+
+
+def make_router(base=BASE, values=None):
+    """Fake SmartRouter exposing the pieces the store drives"""
+    values = values or {}
+    router = MagicMock()
+    router.fetched = []
+    router._aerodrome_base = AsyncMock(return_value=(dict(base), "geckoterminal+factory_detected"))
+
+    def fetchers(pool_data, address, chain, protocol):
+        def make(name):
+            async def fetch():
+                router.fetched.append(name)
+                return values.get(name, SECTIONS[name])
+            return fetch
+        return {name: make(name) for name in SECTIONS}
+    router._aerodrome_fetchers = MagicMock(side_effect=fetchers)
+
+    async def run_sections(address, fetcher_map, budget):
+        for name, fetch in fetcher_map.items():
+            data = await fetch()
+            yield name, data, "pending" if data is None else "ok"
+    router._run_sections = run_sections
+    router._finish_aerodrome = MagicMock(side_effect=lambda base, sections, *args: {
+        "success": True, "pool": {**base, "sections": sorted(sections)}, "source": args[-1]
+    })
+    router.route_pool = AsyncMock(return_value={"success": True, "pool": {"apy": 7.0}})
+    return router
+
+
+def make_store(router=None, views=1):
+    store = PoolAnalysisStore(router=router or make_router())
+    doc = store.materialize(POOL, "base", {"success": True, "pool": {"tvl": BASE["tvl"]}},
+                            route="aerodrome", protocol="aerodrome_v2",
+                            sections={"base": dict(BASE), **SECTIONS}, states={n: "ok" for n in SECTIONS})
+    doc.views = views
+    return store, doc
+
+
+def age(doc, *deps, seconds=None):
+    for dep in deps:
+        doc.dependency_at[dep] -= seconds if seconds is not None else DEPENDENCY_INTERVALS[dep] * MAX_SLOWDOWN + 1
+
+
+class TestServing:
+
+    def test_repeat_views_are_single_reads(self):
+        store, _ = make_store()
+        first = store.get(POOL.upper().replace("0X", "0x"), "Base")
+        first["pool"]["timings"] = {"total": 0.1}
+
+        second = store.get(POOL, "base")
+        assert second["pool"] == {"tvl": BASE["tvl"]}
+        assert "materialized_at" in second
+        assert store.stats["hits"] == 2
+
+        assert store.materialize(VAULT, "base", {"success": False}) is None
+        assert store.get(VAULT, "base") is None
+
+    def test_stale_prices_are_not_served(self):
+        store, doc = make_store()
+        doc.dependency_at["price"] = time.time() - MAX_AGE - 1
+        assert store.get(POOL, "base") is None
+
+    def test_popular_pools_refresh_faster(self):
+        store, doc = make_store(views=HOT_VIEWS)
+        cold = store.materialize(VAULT, "base", {"success": True}, route="full")
+        cold.views = 1
+
+        assert store.interval(doc, "price") == pytest.approx(DEPENDENCY_INTERVALS["price"])
+        assert store.interval(cold, "price") == pytest.approx(DEPENDENCY_INTERVALS["price"] * MAX_SLOWDOWN)
+
+        age(doc, "price", seconds=DEPENDENCY_INTERVALS["price"])
+        age(cold, "price", seconds=DEPENDENCY_INTERVALS["price"])
+        assert store.due() == [doc]
+
+
+class TestPartialRefresh:
+
+    def test_unmoved_price_only_reads_base(self):
+        router = make_router()
+        store, doc = make_store(router, views=HOT_VIEWS)
+        age(doc, "price")
+
+        assert asyncio.run(store.refresh(doc)) is False
+        assert router._aerodrome_base.await_count == 1
+        assert router.fetched == []
+        assert router._finish_aerodrome.call_count == 0
+        assert store.due() == []
+
+    def test_price_move_recomputes_price_sections(self):
+        router = make_router(base={**BASE, "tvl": 1_100_000})
+        store, doc = make_store(router, views=HOT_VIEWS)
+        age(doc, "price")
+
+        assert asyncio.run(store.refresh(doc)) is True
+        assert sorted(router.fetched) == ["dexscreener", "ohlcv", "peg"]
+        assert store.get(POOL, "base")["pool"]["tvl"] == 1_100_000
+
+    def test_invalidated_dependency_and_pending_sections(self):
+        router = make_router(values={"whale": None})
+        store, doc = make_store(router, views=HOT_VIEWS)
+        store.invalidate(POOL, "base", "security")
+
+        asyncio.run(store.refresh(doc))
+        assert sorted(router.fetched) == ["lp_lock", "security", "whale"]
+        # The whale fetch came back pending - kept dirty and retried next tick
+        assert doc.dirty == {"whale"} and doc.sections["whale"] == SECTIONS["whale"]
+
+        router.fetched.clear()
+        asyncio.run(store.tick())
+        assert router.fetched == ["whale"]
+
+    def test_full_routes_rebuild_whole(self):
+        router = make_router()
+        store = PoolAnalysisStore(router=router)
+        doc = store.materialize(VAULT, "base", {"success": True, "pool": {"apy": 5.0}}, route="full", hint="beefy")
+        doc.views = HOT_VIEWS
+        age(doc, "price")
+
+        assert asyncio.run(store.refresh(doc)) is True
+        router.route_pool.assert_awaited_once_with(VAULT, "base", hint="beefy", materialize=False)
+        assert store.get(VAULT, "base")["pool"]["apy"] == 7.0
+
+    def test_unviewed_documents_are_evicted(self):
+        store, doc = make_store()
+        doc.views = 0.01
+        asyncio.run(store.tick())
+        assert store.docs == {} and store.stats["evicted"] == 1
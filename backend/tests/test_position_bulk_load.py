@@ -0,0 +1,118 @@
+"""
+Position Monitor Bulk Load Tests
+One paginated Supabase load per pass, indexed merge of in-memory exit flags.
+
+Run: python -m pytest tests/test_position_bulk_load.py -v
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from agents.position_monitor import PositionMonitor
+
+ROWS = [
+    {"user_address": "0xusera", "pool": "0xpool1", "protocol": "Aerodrome", "status": "active"},
+    {"user_address": "0xusera", "pool": "0xpool2", "protocol": "aave", "status": "active"},
+    {"user_address": "0xuserb", "pool_address": "0xpool3", "protocol": "morpho", "status": "active"},
+]
+
+
+def make_supabase(rows=ROWS):
+    client = MagicMock()
+    client.is_available = True
+    client.get_all_active_positions = AsyncMock(side_effect=lambda: [dict(r) for r in rows])
+    client.get_user_positions = AsyncMock(return_value=[])
+    return client
+
+
+def make_monitor():
+    monitor = PositionMonitor()
+    monitor.check_position_exit = AsyncMock(return_value={"should_exit": False})
+    monitor._check_position_exit_no_risk = AsyncMock(return_value={"should_exit": False})
+    return monitor
+
+
+class TestPositionBulkLoad:
+
+    def test_one_load_for_all_agents(self):
+        client = make_supabase()
+        monitor = make_monitor()
+        agent_a = {"id": "a", "positions": [], "allocations": []}
+        agent_b = {"id": "b", "positions": [], "allocations": []}
+
+        async def main():
+            checked_a, _ = await monitor.check_agent_positions("0xUserA", agent_a)
+            checked_b, _ = await monitor.check_agent_positions("0xuserb", agent_b)
+            return checked_a, checked_b
+
+        with patch("agents.position_monitor.supabase", client):
+            assert asyncio.run(main()) == (2, 1)
+
+        client.get_all_active_positions.assert_awaited_once()
+        client.get_user_positions.assert_not_awaited()
+
+    def test_in_memory_exit_flags_are_merged(self):
+        client = make_supabase()
+        monitor = make_monitor()
+        agent = {
+            "id": "a",
+            "allocations": [{"pool": "0xpool1", "protocol": "aerodrome", "exit_in_progress": True}],
+            "positions": [{"pool": "0xpool2", "protocol": "AAVE", "exit_status": "completed"}],
+        }
+
+        with patch("agents.position_monitor.supabase", client):
+            checked, _ = asyncio.run(monitor.check_agent_positions("0xusera", agent))
+
+        # Both rows skipped: one exiting, one already exited
+        assert checked == 0
+        monitor.check_position_exit.assert_not_awaited()
+
+    def test_concurrent_checks_share_one_load(self):
+        client = make_supabase()
+        monitor = make_monitor()
+
+        async def main():
+            await asyncio.gather(*(
+                monitor.check_agent_positions("0xusera", {"id": f"a{i}"}) for i in range(5)
+            ))
+
+        with patch("agents.position_monitor.supabase", client):
+            asyncio.run(main())
+
+        client.get_all_active_positions.assert_awaited_once()
+
+    def test_failed_load_falls_back_to_in_memory(self):
+        client = make_supabase()
+        client.get_all_active_positions = AsyncMock(return_value=None)
+        monitor = make_monitor()
+        agent = {"id": "a", "positions": [{"pool": "0xmem", "protocol": "aave"}]}
+
+        with patch("agents.position_monitor.supabase", client):
+            checked, _ = asyncio.run(monitor.check_agent_positions("0xusera", agent))
+
+        assert checked == 1
+
+
+class TestActivePositionsPagination:
+
+    def test_server_row_cap_below_page_size(self):
+        from infrastructure.supabase_client import SupabaseClient
+
+        table = [{"id": i, "user_address": f"0xuser{i % 7}", "status": "active"} for i in range(1, 2501)]
+        requests = []
+
+        async def fake_request(method, table_name, data=None, params=None):
+            requests.append(dict(params))
+            after = int(params.get("id", "gt.0")[3:])
+            matching = sorted((r for r in table if r["id"] > after), key=lambda r: r["id"])
+            # PostgREST max-rows = 400, below the requested page size
+            return matching[:min(params["limit"], 400)]
+
+        client = SupabaseClient()
+        client._request = fake_request
+        rows = asyncio.run(client.get_all_active_positions(page_size=1000))
+
+        assert [r["id"] for r in rows] == list(range(1, 2501))
+        assert all(p["order"] == "id.asc" for p in requests)
+        # 7 pages of up to 400 rows, then the empty page that ends the scan
+        assert len(requests) == 8
@@ -0,0 +1,142 @@
+"""
+Price Snapshot Tests
+One-multicall Pyth/Chainlink reads, fallback order, long-tail batching and
+versioned O(1) lookups.
+
+Run: python -m pytest tests/test_price_snapshot.py -v
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from eth_abi import encode
+
+import data_sources.price_snapshot as price_snapshot
+from data_sources.price_snapshot import (
+    PriceSnapshotService,
+    PYTH_GET_PRICE_UNSAFE,
+    CHAINLINK_LATEST_ROUND,
+    CHAINLINK_DECIMALS,
+)
+from services.price_oracle import PRICE_FEEDS, CHAINLINK_FEEDS
+
+WETH = "0x4200000000000000000000000000000000000006"
+AERO = "0x940181a94a35a4569e4529a3cdfb74e38fd98631"
+LONG_TAIL = "0x" + "ab" * 20
+
+FEED_BY_ID = {bytes.fromhex(v[2:]): k for k, v in PRICE_FEEDS.items()}
+FEED_BY_ADDRESS = {v.lower(): k for k, v in CHAINLINK_FEEDS.items()}
+
+
+def make_aggregate(pyth, chainlink, now):
+    """pyth/chainlink: feed -> (price, age seconds); missing feed = failed call"""
+    def aggregate(calls):
+        results = []
+        for call in calls:
+            data = call["callData"]
+            selector = data[:4]
+            if selector == PYTH_GET_PRICE_UNSAFE:
+                feed = FEED_BY_ID[data[4:]]
+                if feed not in pyth:
+                    results.append((False, b""))
+                    continue
+                price, age = pyth[feed]
+                results.append((True, encode(["int64", "uint64", "int32", "uint256"], [int(price * 1e8), 0, -8, now - age])))
+            else:
+                feed = FEED_BY_ADDRESS[call["target"].lower()]
+                if feed not in chainlink:
+                    results.append((False, b""))
+                elif selector == CHAINLINK_DECIMALS:
+                    results.append((True, encode(["uint8"], [8])))
+                else:
+                    assert selector == CHAINLINK_LATEST_ROUND
+                    price, age = chainlink[feed]
+                    results.append((True, encode(
+                        ["uint80", "int256", "uint256", "uint256", "uint80"], [1, int(price * 1e8), 0, now - age, 1]
+                    )))
+        return results
+    return aggregate
+
+
+def make_service(pyth, chainlink):
+    service = PriceSnapshotService(w3=MagicMock())
+    service._aggregate = MagicMock(side_effect=make_aggregate(pyth, chainlink, int(time.time())))
+    service._long_tail = {}
+    return service
+
+
+class TestPriceSnapshot:
+
+    def test_pyth_preferred_chainlink_fallback(self):
+        service = make_service(
+            pyth={"ETH/USD": (3000.0, 5), "BTC/USD": (60000.0, 600), "USDC/USD": (1.0, 5)},
+            chainlink={"ETH/USD": (2990.0, 100), "BTC/USD": (59900.0, 100)},
+        )
+        snapshot = asyncio.run(service.refresh())
+
+        assert service._aggregate.call_count == 1
+        assert snapshot.feeds["ETH/USD"].source == "pyth"
+        # Stale Pyth BTC yields to fresh Chainlink
+        assert snapshot.feeds["BTC/USD"].source == "chainlink"
+        assert service.get_price("cbBTC") == 59900.0
+        assert service.get_price(WETH) == 3000.0
+        assert service.get_price("ETH") == 3000.0
+        assert snapshot.version == 1
+
+    def test_all_stale_uses_newest_and_marks_stale(self):
+        service = make_service(pyth={"ETH/USD": (3000.0, 7200)}, chainlink={"ETH/USD": (2950.0, 5000)})
+        snapshot = asyncio.run(service.refresh())
+
+        feed = snapshot.feeds["ETH/USD"]
+        assert feed.is_stale and feed.source == "chainlink" and feed.price == 2950.0
+
+    def test_failed_read_carries_previous_values(self):
+        service = make_service(pyth={"ETH/USD": (3000.0, 5)}, chainlink={})
+        asyncio.run(service.refresh())
+
+        service._aggregate.side_effect = RuntimeError("rpc down")
+        snapshot = asyncio.run(service.refresh())
+
+        assert snapshot.version == 2
+        assert snapshot.feeds["ETH/USD"].is_stale
+        assert service.get_price("WETH") == 3000.0
+
+    def test_long_tail_batched_and_tracked(self):
+        service = make_service(pyth={}, chainlink={})
+        gecko = MagicMock()
+        gecko.get_token_prices = AsyncMock(return_value={AERO: {"usd": 1.2}, LONG_TAIL: {"usd": 0.5}})
+
+        with patch("data_sources.geckoterminal.gecko_client", gecko):
+            prices = asyncio.run(service.get_token_prices([AERO, LONG_TAIL]))
+
+        assert prices == {AERO: 1.2, LONG_TAIL: 0.5}
+        assert gecko.get_token_prices.await_count == 1
+        assert service.get_price("AERO") == 1.2
+        assert service.get_price(LONG_TAIL.upper().replace("0X", "0x")) == 0.5
+
+    def test_get_snapshot_reuses_fresh(self):
+        service = make_service(pyth={"ETH/USD": (3000.0, 5)}, chainlink={})
+        first = asyncio.run(service.get_snapshot(max_age=60))
+        second = asyncio.run(service.get_snapshot(max_age=60))
+
+        assert first is second
+        assert service._aggregate.call_count == 1
+
+    def test_idle_long_tail_tokens_expire(self):
+        service = make_service(pyth={}, chainlink={})
+        gecko = MagicMock()
+        gecko.get_token_prices = AsyncMock(side_effect=lambda chain, batch: {a: {"usd": 0.5} for a in batch})
+        other = "0x" + "cd" * 20
+
+        with patch("data_sources.geckoterminal.gecko_client", gecko):
+            asyncio.run(service.get_token_prices([LONG_TAIL, other]))
+            # LONG_TAIL keeps being read, other is not asked for again
+            service._long_tail[other] -= price_snapshot.LONG_TAIL_IDLE + 1
+            service.get_price(LONG_TAIL)
+            service._long_tail_at = 0.0
+            asyncio.run(service.refresh())
+
+        assert list(service._long_tail) == [LONG_TAIL]
+        assert service.get_price(other) is None and service.get_price(LONG_TAIL) == 0.5
+        assert gecko.get_token_prices.await_args.args[1] == [LONG_TAIL]
@@ -0,0 +1,182 @@
+"""
+Price Trigger Index Tests
+Value thresholds -> oracle prices, crossed-slice firing, one-shot re-arming.
+
+Run: python -m pytest tests/test_price_triggers.py -v
+"""
+
+import asyncio
+
+import pytest
+
+from agents.price_triggers import PriceTriggerIndex, price_exposure, DOWN, UP
+
+
+def make_index(price=2000.0):
+    index = PriceTriggerIndex()
+    index.on_price("ETH/USD", price)
+    return index
+
+
+class TestPriceExposure:
+
+    def test_single_asset_and_lp(self):
+        assert price_exposure({"pool": "WETH"}) == ("ETH/USD", 1.0)
+        assert price_exposure({"pool": "WETH-USDC"}) == ("ETH/USD", 0.5)
+        assert price_exposure({"tokens": ["cbBTC", "USDC"]}) == ("BTC/USD", 0.5)
+        assert price_exposure({"pool": "cbETH/WETH"}) == ("ETH/USD", 1.0)
+
+    def test_no_single_feed(self):
+        assert price_exposure({"pool": "USDC"}) is None
+        assert price_exposure({"pool": "WETH-cbBTC"}) is None
+        assert price_exposure({"pool": "AERO-USDC"}) is None
+        assert price_exposure({}) is None
+
+
+class TestPriceTriggerIndex:
+
+    def test_thresholds_converted_to_prices(self):
+        index = make_index(2000.0)
+        index.arm("a:lp", "ETH/USD", "risk", ref_value=1000, thresholds=[(DOWN, 810), (UP, 1210)], exponent=0.5)
+
+        prices = sorted(t.price for t in index.armed("a:lp"))
+        # sqrt model: value 0.81x at 0.6561x price, 1.21x at 1.4641x price
+        assert prices == pytest.approx([2000 * 0.6561, 2000 * 1.4641])
+
+    def test_only_crossed_triggers_fire(self):
+        index = make_index(2000.0)
+        for i, stop in enumerate([900, 800, 700]):
+            index.arm(f"pos{i}", "ETH/USD", "risk", ref_value=1000, thresholds=[(DOWN, stop)])
+        index.arm("tp", "ETH/USD", "risk", ref_value=1000, thresholds=[(UP, 1100)])
+
+        assert index.on_price("ETH/USD", 1900.0) == []
+        fired = index.on_price("ETH/USD", 1550.0)
+        assert sorted(t.key for t in fired) == ["pos0", "pos1"]
+        assert index.armed("pos2") and index.armed("tp")
+
+        fired = index.on_price("ETH/USD", 2300.0)
+        assert [t.key for t in fired] == ["tp"]
+        assert fired[0].value_at(2300.0) == pytest.approx(1150.0)
+
+    def test_one_shot_per_key(self):
+        index = make_index(2000.0)
+        index.arm("pos", "ETH/USD", "risk", ref_value=1000, thresholds=[(DOWN, 900), (DOWN, 500)])
+
+        fired = index.on_price("ETH/USD", 900.0)
+        assert len(fired) == 1
+        assert index.armed("pos") == []
+        assert index.get_stats()["triggers"] == 0
+
+    def test_rearm_replaces_and_disarm_prefix(self):
+        index = make_index(2000.0)
+        index.arm("agent1:a", "ETH/USD", "risk", ref_value=1000, thresholds=[(DOWN, 900)])
+        index.arm("agent1:a", "ETH/USD", "risk", ref_value=1000, thresholds=[(DOWN, 500)])
+        index.arm("agent1:b", "ETH/USD", "risk", ref_value=1000, thresholds=[(DOWN, 900)])
+        index.arm("agent2:a", "ETH/USD", "risk", ref_value=1000, thresholds=[(DOWN, 900)])
+        assert len(index.armed("agent1:a")) == 1
+
+        index.disarm_prefix("agent1:", keep={"agent1:a"})
+        fired = index.on_price("ETH/USD", 1700.0)
+        assert [t.key for t in fired] == ["agent2:a"]
+
+    def test_pending_until_first_price(self):
+        index = PriceTriggerIndex()
+        assert index.arm("pos", "BTC/USD", "risk", ref_value=100, thresholds=[(DOWN, 90)]) == 0
+        assert index.watched_assets() == ["BTC/USD"]
+
+        assert index.on_price("BTC/USD", 60000.0) == []
+        assert index.armed("pos")[0].price == pytest.approx(54000.0)
+
+    def test_dispatch_to_kind_callback(self):
+        index = make_index(2000.0)
+        seen = []
+
+        async def on_deleverage(trigger, price):
+            seen.append((trigger.key, round(trigger.value_at(price), 3)))
+
+        index.on_trigger("deleverage", on_deleverage)
+        # HF 1.3 -> threshold 1.1 at price 2000 * 1.1 / 1.3
+        index.arm("morpho:0xuser:usdc_weth", "ETH/USD", "deleverage", ref_value=1.3, thresholds=[(DOWN, 1.1)])
+
+        asyncio.run(index.update_price("ETH/USD", 1690.0))
+        assert seen == [("morpho:0xuser:usdc_weth", 1.099)]
+
+
+class TestExecutorTriggerHandler:
+
+    def test_trigger_refreshes_values_then_judges_the_marked_value(self, monkeypatch):
+        import agents.strategy_executor as se
+        from agents.price_triggers import PriceTrigger
+
+        position = {"pool": "WETH-USDC", "protocol": "aerodrome", "current_value": 1000.0}
+        agent = {"id": "agent_t", "is_active": True, "allocations": [position]}
+        executor = se.StrategyExecutor()
+        calls = []
+
+        async def refresh(a):
+            calls.append(("refresh", position["current_value"]))
+            position["current_value"] = 990.0      # on-chain value
+
+        async def risks(a, marked_values=None):
+            calls.append(("risks", position["current_value"], marked_values))
+
+        monkeypatch.setattr(se.agent_registry, "get_entry", lambda agent_id: ("0xuser", agent))
+        monkeypatch.setattr(se.work_partitioner, "owns", lambda user: True)
+        monkeypatch.setattr(executor, "_refresh_allocations_value", refresh)
+        monkeypatch.setattr(executor, "check_position_risks", risks)
+        monkeypatch.setattr(executor, "_arm_price_triggers", lambda a: None)
+        monkeypatch.setattr(se, "_save_agents", lambda *args, **kwargs: None)
+
+        trigger = PriceTrigger(key="risk:agent_t:0", asset="ETH/USD", kind="risk", direction=DOWN, price=1600.0,
+                               ref_price=2000.0, ref_value=1000.0, exponent=0.5,
+                               context={"agent_id": "agent_t", "pool": "WETH-USDC", "protocol": "aerodrome"})
+        asyncio.run(executor._on_price_trigger(trigger, 1500.0))
+
+        marked = 1000.0 * (1500.0 / 2000.0) ** 0.5
+        assert calls[0] == ("refresh", 1000.0)
+        assert calls[1][:2] == ("risks", 990.0)
+        assert calls[1][2] == {"aerodrome:WETH-USDC": pytest.approx(marked)}
+        # The marked value is only judged, never persisted
+        assert position["current_value"] == 990.0
+
+    def test_price_drop_below_stop_exits_and_rearm_does_not_drift(self, monkeypatch):
+        import agents.strategy_executor as se
+
+        position = {"pool": "WETH-USDC", "protocol": "aerodrome", "entry_value": 1000.0, "current_value": 1000.0}
+        agent = {"id": "agent_s", "is_active": True, "allocations": [position],
+                 "pro_config": {"stopLossEnabled": True, "stopLossPercent": 10, "volatilityGuard": False}}
+        index = make_index(2000.0)
+        executor = se.StrategyExecutor()
+        exits = []
+
+        async def execute_exit(a, p):
+            exits.append(p["exit_reason"])
+
+        async def refresh(a):
+            pass  # LP value estimate ignores price
+
+        monkeypatch.setattr(se, "price_triggers", index)
+        monkeypatch.setattr(se.agent_registry, "get_entry", lambda agent_id: ("0xuser", agent))
+        monkeypatch.setattr(se.work_partitioner, "owns", lambda user: True)
+        monkeypatch.setattr(se.scheduler, "record_run", lambda *args: None)
+        monkeypatch.setattr(se, "_save_agents", lambda *args, **kwargs: None)
+        monkeypatch.setattr(executor, "_refresh_allocations_value", refresh)
+        monkeypatch.setattr(executor, "execute_exit", execute_exit)
+        index.on_trigger("risk", executor._on_price_trigger)
+
+        executor._arm_price_triggers(agent)
+        stop = 2000.0 * 0.9 ** 2
+        assert [t.price for t in index.armed("agent_s:aerodrome:WETH-USDC")] == [pytest.approx(stop)]
+
+        # Price moves, nothing fires; re-arming keeps the entry anchor
+        asyncio.run(index.update_price("ETH/USD", 1700.0))
+        executor._arm_price_triggers(agent)
+        assert [t.price for t in index.armed("agent_s:aerodrome:WETH-USDC")] == [pytest.approx(stop)]
+        assert position["price_ref"]["price"] == 2000.0
+
+        asyncio.run(index.update_price("ETH/USD", 1500.0))
+
+        assert len(exits) == 1 and "Stop-loss" in exits[0]
+        assert position["exit_in_progress"] is True
+        assert position["current_value"] == 1000.0
+        assert index.armed("agent_s:aerodrome:WETH-USDC") == []
@@ -0,0 +1,125 @@
+"""
+Protocol Classifier Tests
+Single-multicall probing, probe precedence, memory + SQLite caching and
+the SmartRouter factory lookup on top of it.
+
+Run: python -m pytest tests/test_protocol_classifier.py -v
+"""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+from eth_abi import encode
+
+from data_sources.protocol_classifier import ProtocolClassifier, PROBE_SELECTORS
+
+POOL = "0x" + "cd" * 20
+AERO_FACTORY = "0x420dd381b31aef6683db6b902084cb0ffece40da"
+
+SELECTOR_NAMES = {v: k for k, v in PROBE_SELECTORS.items()}
+
+
+def make_aggregate(answers):
+    """answers: probe name -> encoded return data; anything else reverts"""
+    def aggregate(w3, calls):
+        results = []
+        for call in calls:
+            data = answers.get(SELECTOR_NAMES[call["callData"]])
+            results.append((data is not None, data or b""))
+        return results
+    return MagicMock(side_effect=aggregate)
+
+
+def make_classifier(tmp_path, answers):
+    classifier = ProtocolClassifier(path=str(tmp_path / "protocol_cache.db"))
+    classifier._aggregate = make_aggregate(answers)
+    return classifier
+
+
+AERODROME_POOL = {
+    "factory": encode(["address"], [AERO_FACTORY]),
+    "getReserves": encode(["uint256", "uint256", "uint256"], [1, 2, 3]),
+    "stable": encode(["bool"], [False]),
+}
+
+
+class TestProtocolClassifier:
+
+    def test_one_multicall_then_cached(self, tmp_path):
+        classifier = make_classifier(tmp_path, AERODROME_POOL)
+
+        async def run():
+            first = await classifier.classify(POOL, "base", w3=MagicMock())
+            second = await classifier.classify(POOL.upper().replace("0X", "0x"), "Base", w3=MagicMock())
+            return first, second
+
+        first, second = asyncio.run(run())
+
+        assert classifier._aggregate.call_count == 1
+        assert len(classifier._aggregate.call_args[0][1]) == len(PROBE_SELECTORS)
+        assert first is second
+        assert first.protocol == "aerodrome"
+        assert first.factory == AERO_FACTORY
+
+    def test_precedence_and_short_answers(self, tmp_path):
+        # An ERC-4626 vault that also exposes get_virtual_price, plus an EOA-like
+        # empty success for slot0 that must not count
+        classifier = make_classifier(tmp_path, {
+            "get_virtual_price": encode(["uint256"], [10 ** 18]),
+            "totalAssets": encode(["uint256"], [5]),
+            "slot0": b"",
+        })
+        record = asyncio.run(classifier.classify(POOL, w3=MagicMock()))
+
+        assert record.protocol == "erc4626"
+        assert record.probes == ("totalAssets", "get_virtual_price")
+        assert record.factory is None
+
+    def test_persisted_across_instances(self, tmp_path):
+        classifier = make_classifier(tmp_path, AERODROME_POOL)
+        asyncio.run(classifier.classify(POOL, w3=MagicMock()))
+
+        restarted = make_classifier(tmp_path, {})
+        record = asyncio.run(restarted.classify(POOL, w3=MagicMock()))
+
+        assert restarted._aggregate.call_count == 0
+        assert record.protocol == "aerodrome" and record.factory == AERO_FACTORY
+        assert restarted.stats["disk_hits"] == 1
+
+    def test_failures_and_empty_addresses_not_cached(self, tmp_path):
+        classifier = make_classifier(tmp_path, {})
+        assert asyncio.run(classifier.classify(POOL, w3=MagicMock())).protocol is None
+
+        classifier._aggregate.side_effect = RuntimeError("rpc down")
+        assert asyncio.run(classifier.classify(POOL, w3=MagicMock())) is None
+        assert classifier._aggregate.call_count == 2
+
+    def test_concurrent_misses_share_one_probe(self, tmp_path):
+        classifier = make_classifier(tmp_path, AERODROME_POOL)
+
+        async def run():
+            return await asyncio.gather(*(classifier.classify(POOL, w3=MagicMock()) for _ in range(5)))
+
+        records = asyncio.run(run())
+        assert classifier._aggregate.call_count == 1
+        assert {r.protocol for r in records} == {"aerodrome"}
+
+
+class TestDetectProtocol:
+
+    def test_smart_router_maps_cached_factory(self, tmp_path):
+        try:
+            from api.smart_router import SmartRouter, Protocol
+        except Exception as e:
+            pytest.skip(f"smart_router unavailable: {e}")
+
+        classifier = make_classifier(tmp_path, AERODROME_POOL)
+        router = SmartRouter()
+        router._get_web3 = MagicMock(return_value=MagicMock())
+
+        with patch("data_sources.protocol_classifier.protocol_classifier", classifier):
+            assert asyncio.run(router.detect_protocol(POOL, "base")) == Protocol.AERODROME_V2
+            assert asyncio.run(router.detect_protocol(POOL, "base")) == Protocol.AERODROME_V2
+
+        assert classifier._aggregate.call_count == 1
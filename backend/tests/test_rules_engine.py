@@ -0,0 +1,163 @@
+"""
+Rules Engine Tests
+Compiled rule programs must match the per-pool interpreter exactly.
+
+Run: python -m pytest tests/test_rules_engine.py -v
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+from services.conditional_rules import ConditionalRule, RuleCondition, RuleAction, PositionState
+from services.rule_compiler import compile_rules, filter_pools, match_rules, RowTable
+from services.rules_engine import RulesEngine
+from agents.position_monitor import PositionMonitor
+
+
+def make_pools(count=300, seed=7):
+    rng = random.Random(seed)
+    pools = []
+    for _ in range(count):
+        pools.append({
+            "tvl": rng.choice([0, 500_000, 1_000_000, 3_000_000, 8_000_000, 25_000_000]),
+            "apy": rng.choice([None, 0, 3, 8, 15, 40]),
+            "protocol": rng.choice(["Aerodrome", "aave", "morpho", None]),
+            "pool_type": rng.choice(["dual", "single", ""]),
+            "assets": rng.sample(["USDC", "weth", "AERO", "cbBTC"], rng.randint(0, 2)),
+        })
+    return pools
+
+
+def make_rules():
+    return [
+        ConditionalRule(RuleCondition(tvl_min=1_000_000, tvl_max=5_000_000, protocol="aerodrome", pool_type="dual"),
+                        RuleAction(max_duration_hours=1), priority=2, name="small aero"),
+        ConditionalRule(RuleCondition(tvl_min=5_000_000, tvl_max=20_000_000),
+                        RuleAction(trailing_stop_percent=15), priority=1, name="medium"),
+        ConditionalRule(RuleCondition(asset="WETH", apy_min=10),
+                        RuleAction(take_profit_percent=20), priority=1, name="weth"),
+        ConditionalRule(RuleCondition(apy_max=5, tvl_min=0),
+                        RuleAction(exit_if_apy_below=4), priority=0, name="low apy"),
+    ]
+
+
+def interpreted_match(pool, rules):
+    for rule in sorted(rules, key=lambda r: -r.priority):
+        if rule.condition.matches({**pool, "apy": pool["apy"] or 0, "protocol": pool["protocol"] or ""}):
+            return rule
+    return None
+
+
+def make_position(position_id, pool_info, hours=0.5, entry=1000, peak=1000, current=1000):
+    return PositionState(
+        position_id=position_id,
+        user_address="0x123",
+        pool_address="0xpool",
+        entry_time=datetime.utcnow() - timedelta(hours=hours),
+        entry_value=entry,
+        peak_value=peak,
+        current_value=current,
+        pool_info=pool_info,
+    )
+
+
+class TestRuleCompiler:
+
+    def test_first_match_equals_interpreter(self):
+        pools, rules = make_pools(), make_rules()
+        compiled = match_rules(pools, rules)
+        assert compiled == [interpreted_match(p, rules) for p in pools]
+        assert any(r is not None for r in compiled)
+
+    def test_filter_pools_equals_matches(self):
+        pools = make_pools()
+        condition = RuleCondition(protocol="Aerodrome", asset="usdc", tvl_min=1_000_000)
+        expected = [p for p in pools if condition.matches({**p, "protocol": p["protocol"] or ""})]
+        assert filter_pools(pools, condition) == expected
+
+    def test_compiled_cache_returns_callers_rules(self):
+        rules = make_rules()
+        rebuilt = [ConditionalRule.from_dict(r.to_dict()) for r in rules]
+        compile_rules(rules)
+        program = compile_rules(rebuilt)
+        assert all(any(r is x for x in rebuilt) for r in program.rules)
+        assert program.rules[0].name == "small aero"
+
+    def test_no_rules_or_rows(self):
+        assert list(compile_rules([]).first_match(RowTable(make_pools(3)))) == [-1, -1, -1]
+        assert match_rules([], make_rules()) == []
+
+
+class TestRulesEngineBatch:
+
+    def test_exit_checks_in_order(self):
+        engine = RulesEngine()
+        rules = make_rules()
+        aero = {"tvl": 2_000_000, "protocol": "aerodrome", "pool_type": "dual", "apy": 25}
+        medium = {"tvl": 10_000_000, "protocol": "morpho", "pool_type": "single", "apy": 12}
+        weth = {"tvl": 100, "assets": ["WETH"], "apy": 12}
+        none = {"tvl": 100, "apy": 50}
+
+        positions = [
+            make_position("expired", aero, hours=2),
+            make_position("fresh", aero, hours=0.1),
+            make_position("trailing", medium, peak=1200, current=960),
+            make_position("profit", weth, current=1250),
+            make_position("unmatched", none),
+        ]
+        results = engine.evaluate_many(positions, rules)
+
+        assert results[0].should_exit and results[0].exit_reason.startswith("MAX_DURATION")
+        assert not results[1].should_exit and results[1].matched_rule.name == "small aero"
+        assert results[2].exit_reason == "TRAILING_STOP: 20.0% drop from peak (limit: 15%)"
+        assert results[3].exit_reason == "TAKE_PROFIT: 25.0% profit (target: 20%)"
+        assert results[4].matched_rule is None and not results[4].should_exit
+
+        # Interpreted single-position path agrees with the batch
+        for position, batch in zip(positions, results):
+            single = RulesEngine().evaluate(position, rules)
+            assert (single.matched_rule, single.should_exit, single.exit_reason) == \
+                (batch.matched_rule, batch.should_exit, batch.exit_reason)
+
+    def test_peak_tracking_and_zero_guards(self):
+        engine = RulesEngine()
+        rules = [ConditionalRule(RuleCondition(), RuleAction(stop_loss_percent=10))]
+        positions = [
+            make_position("up", {}, current=1100),
+            make_position("zero", {}, entry=0, peak=0, current=0),
+            make_position("down", {}, current=850),
+        ]
+        results = engine.evaluate_many(positions, rules)
+
+        assert engine.peak_values == {"up": 1100}
+        assert [r.should_exit for r in results] == [False, False, True]
+        assert results[2].exit_reason == "STOP_LOSS: 15.0% loss (limit: 10%)"
+
+
+class TestPositionMonitorRules:
+
+    def test_one_batch_per_agent_cycle(self):
+        monitor = PositionMonitor()
+        monitor.check_position_exit = AsyncMock(return_value={"should_exit": False})
+        monitor.execute_exit_and_reinvest = AsyncMock()
+        entered = (datetime.utcnow() - timedelta(hours=3)).isoformat() + "Z"
+        agent = {"id": "a", "positions": [
+            {"id": 1, "pool": "0xaero", "protocol": "aerodrome", "pool_type": "dual",
+             "entry_value": 1000, "current_value": 1000, "entry_time": entered, "metadata": {"tvl": 2_000_000}},
+            {"id": 2, "pool": "0xmorph", "protocol": "morpho", "pool_type": "single",
+             "entry_value": 1000, "current_value": 1000, "entry_time": entered, "apy": 12},
+        ]}
+        engine = RulesEngine()
+
+        with patch("agents.position_monitor.supabase", None), \
+                patch("agents.position_monitor.get_rules_engine", return_value=engine), \
+                patch("agents.position_monitor.get_user_rules_for_engine", return_value=make_rules()), \
+                patch.object(engine, "evaluate_many", wraps=engine.evaluate_many) as batch:
+            checked, exits = asyncio.run(monitor.check_agent_positions("0xuser", agent))
+
+        assert (checked, exits) == (2, 1)
+        batch.assert_called_once()
+        exited = monitor.execute_exit_and_reinvest.await_args.args
+        assert exited[1]["id"] == 1 and exited[2].startswith("MAX_DURATION")
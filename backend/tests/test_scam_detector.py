@@ -0,0 +1,101 @@
+"""
+Scam Detector Pattern Scan Tests
+Single-pass scanner equivalence with per-pattern re.search, source-hash
+result cache and worker-process scanning of large sources.
+
+Run: python -m pytest tests/test_scam_detector.py -v
+"""
+
+import asyncio
+import random
+import re
+from unittest.mock import patch
+
+import services.scam_detector as scam_detector
+from services.scam_detector import (
+    ScamDetector, PatternScanner, SCANNER, SCAM_PATTERNS, SAFE_PATTERNS, _leading_literal
+)
+
+HONEYPOT = """
+// SPDX-License-Identifier: MIT
+// OpenZeppelin Contracts v4.9
+contract Token {
+    address private _owner;
+    uint256 public _maxTxAmount;
+    function transfer(address to, uint256 amount) public {
+        require(msg.sender == owner, "no");
+    }
+}
+"""
+
+FRAGMENTS = [
+    "function _mint(address, uint256) private", "_mint(owner,", "mapping(address => bool) internal blacklist",
+    "isBlacklisted[", "require(!blacklist[", "require(msg.sender == owner", "require( tx.origin == msg.sender )",
+    "onlyOwner x transfer", "maxTxAmount", "_maxTxAmount", "address private _owner", "sellFee = 75",
+    "function setFee 100", "import '@openzeppelin", "OpenZeppelin Contracts", "renounceOwnership()",
+    "owner = address(0)", "ERC1967Proxy", "REQUIRE", "onlyowneR", "owner", " ", "\n", "İ", "ſ",
+]
+
+
+def naive_groups(source):
+    """The pre-scanner behaviour: one IGNORECASE re.search per pattern"""
+    found = set()
+    for kind, table in (("risk", SCAM_PATTERNS), ("safe", SAFE_PATTERNS)):
+        for name, data in table.items():
+            if any(re.search(p, source, re.IGNORECASE) for p in data["patterns"]):
+                found.add(f"{kind}:{name}")
+    return found
+
+
+def make_detector():
+    detector = ScamDetector.__new__(ScamDetector)
+    detector.cache = {}
+    detector.analysis_cache = scam_detector.OrderedDict()
+    return detector
+
+
+class TestPatternScanner:
+
+    def test_matches_per_pattern_search(self):
+        rng = random.Random(7)
+        for _ in range(3000):
+            source = "".join(rng.choice(FRAGMENTS) + rng.choice(["", " ", "\n"]) for _ in range(rng.randint(0, 10)))
+            assert SCANNER.scan(source) == naive_groups(source), source
+
+    def test_overlapping_literals(self):
+        # "owner" starts inside the "renounceownership()" trigger hit
+        scanner = PatternScanner({"a": [r"renounceOwnership\(\)"], "b": [r"owner\s*=\s*1"]})
+        assert scanner.scan("renounceOwnership()") == {"a"}
+        assert scanner.scan("x.renounceOWNER = 1") == {"b"}
+
+    def test_leading_literal(self):
+        assert _leading_literal(r"isBlacklisted\[") == "isBlacklisted["
+        assert _leading_literal(r"require\s*\(") == "require"
+        assert _leading_literal(r"colou?r") == "colo"
+        assert _leading_literal(r"ab|cd") == ""
+        assert _leading_literal(r"(private|internal)?x") == ""
+
+
+class TestAnalysisCache:
+
+    def test_findings_and_cache_by_source_hash(self):
+        detector = make_detector()
+        with patch.object(scam_detector, "scan_source", wraps=scam_detector.scan_source) as scan:
+            first = detector.analyze_source(HONEYPOT)
+            first["findings"].append({"name": "mutated"})
+            second = detector.analyze_source(HONEYPOT)
+
+        assert scan.call_count == 1
+        assert [f["name"] for f in second["findings"]] == ["honeypot", "max_tx", "hidden_owner", "openzeppelin"]
+        assert second["risk_score"] == 35 + 10 + 20 - 15
+
+    def test_large_sources_scanned_in_worker(self):
+        detector = make_detector()
+        source = HONEYPOT * 50
+        with patch.object(scam_detector, "WORKER_THRESHOLD", 1000):
+            analysis = asyncio.run(detector.analyze_source_async(source))
+
+        assert scam_detector._worker_pool is not None
+        assert analysis["risk_score"] == 50 and analysis["source_length"] == len(source)
+        scam_detector._worker_pool.shutdown()
+        scam_detector._worker_pool = None
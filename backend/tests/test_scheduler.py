@@ -0,0 +1,211 @@
+"""
+Deadline Scheduler Tests
+Min-heap ordering, per-agent spreading, dedup, concurrency limits and overruns.
+
+Run: python -m pytest tests/test_scheduler.py -v
+"""
+
+import asyncio
+import time
+
+from infrastructure.scheduler import (
+    DeadlineScheduler,
+    PRIORITY_CRITICAL,
+    PRIORITY_LOW,
+)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestDeadlineScheduler:
+
+    def test_priority_breaks_ties(self):
+        order = []
+
+        async def low():
+            order.append("low")
+
+        async def critical():
+            order.append("critical")
+
+        async def main():
+            s = DeadlineScheduler()
+            s.register("low", low, 60, priority=PRIORITY_LOW, initial_delay=0)
+            s.register("critical", critical, 60, priority=PRIORITY_CRITICAL, initial_delay=0)
+            # Same due time for both - heap ties are broken by priority
+            for task in s._tasks.values():
+                s._schedule(task, 0.0)
+            s.start()
+            await asyncio.sleep(0.05)
+            await s.stop()
+
+        run(main())
+        assert order == ["critical", "low"]
+
+    def test_reregister_is_deduplicated(self):
+        calls = []
+
+        async def job():
+            calls.append(1)
+
+        async def main():
+            s = DeadlineScheduler()
+            s.register("job", job, 60, initial_delay=0)
+            s.register("job", job, 60, initial_delay=0)
+            s.start()
+            await asyncio.sleep(0.05)
+            await s.stop()
+            return s
+
+        s = run(main())
+        assert calls == [1]
+        assert s.get_stats()["registered"] == 1
+
+    def test_per_agent_phases_are_spread(self):
+        s = DeadlineScheduler()
+
+        async def job(agent_id):
+            pass
+
+        agent_ids = [f"agent_{i}" for i in range(200)]
+        s.sync_agents("check", agent_ids, job, 60)
+        now = time.monotonic()
+        offsets = sorted(t.next_due - now for t in s._tasks.values())
+
+        # Roughly uniform over the interval: no bucket of 10s holds most agents
+        buckets = [sum(1 for o in offsets if lo <= o < lo + 10) for lo in range(0, 60, 10)]
+        assert max(buckets) < 80
+        assert all(0 <= o <= 60 for o in offsets)
+
+    def test_sync_agents_adds_and_removes(self):
+        s = DeadlineScheduler()
+
+        async def job(agent_id):
+            pass
+
+        assert s.sync_agents("check", ["a", "b"], job, 60) == (2, 0)
+        assert s.sync_agents("check", ["b", "c"], job, 60) == (1, 1)
+        assert {k[1] for k in s._tasks} == {"b", "c"}
+
+    def test_concurrency_limit(self):
+        active = {"now": 0, "max": 0}
+
+        async def job(agent_id):
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+            await asyncio.sleep(0.02)
+            active["now"] -= 1
+
+        async def main():
+            s = DeadlineScheduler()
+            s.set_concurrency("check", 2)
+            for i in range(6):
+                s.register("check", job, 60, agent_id=f"a{i}", initial_delay=0)
+            s.start()
+            await asyncio.sleep(0.2)
+            await s.stop()
+            return s
+
+        s = run(main())
+        assert active["max"] == 2
+        assert s.get_stats()["tasks"]["check"]["runs"] == 6
+
+    def test_overrun_detection_and_no_overlap(self):
+        started = []
+
+        async def slow():
+            started.append(time.monotonic())
+            await asyncio.sleep(0.1)
+
+        async def main():
+            s = DeadlineScheduler()
+            s.register("slow", slow, 0.02, jitter=0, initial_delay=0)
+            s.start()
+            await asyncio.sleep(0.25)
+            await s.stop()
+            return s
+
+        s = run(main())
+        stats = s.get_stats()["tasks"]["slow"]
+        assert stats["overruns"] >= 1
+        # Never overlaps itself: consecutive starts are at least one run apart
+        assert all(b - a >= 0.09 for a, b in zip(started, started[1:]))
+
+    def test_errors_are_contained(self):
+        async def boom():
+            raise RuntimeError("boom")
+
+        async def main():
+            s = DeadlineScheduler()
+            s.register("boom", boom, 60, initial_delay=0)
+            s.start()
+            await asyncio.sleep(0.05)
+            await s.stop()
+            return s
+
+        s = run(main())
+        assert s.get_stats()["errors"] == 1
+
+    def test_trigger_and_ran_within(self):
+        calls = []
+
+        async def job(agent_id):
+            calls.append(agent_id)
+
+        async def main():
+            s = DeadlineScheduler()
+            s.register("check", job, 3600, agent_id="a1", initial_delay=3600)
+            s.start()
+            assert s.trigger("check", "a1")
+            await asyncio.sleep(0.05)
+            await s.stop()
+            return s
+
+        s = run(main())
+        assert calls == ["a1"]
+        assert s.ran_within("check", "a1", 60)
+
+        s.record_run("agent_risk_checks", "a2")
+        assert s.ran_within("agent_risk_checks", "a2", 900)
+        assert not s.ran_within("agent_risk_checks", "a3", 900)
+
+    def test_reregistered_task_ignores_stale_entries(self):
+        calls = []
+
+        async def job():
+            calls.append(time.monotonic())
+
+        async def main():
+            s = DeadlineScheduler()
+            s.register("job", job, 3600, initial_delay=0.02)
+            s.unregister("job")
+            s.register("job", job, 3600, initial_delay=0.02)
+            s.start()
+            await asyncio.sleep(0.1)
+            await s.stop()
+
+        run(main())
+        assert len(calls) == 1
+
+    def test_trigger_while_running_reruns_once(self):
+        calls = []
+
+        async def main():
+            s = DeadlineScheduler()
+
+            async def job():
+                calls.append(1)
+                if len(calls) == 1:
+                    # Two triggers during the run collapse into one rerun
+                    assert s.trigger("job") and s.trigger("job")
+                    await asyncio.sleep(0.02)
+
+            s.register("job", job, 3600, initial_delay=0)
+            s.start()
+            await asyncio.sleep(0.1)
+            await s.stop()
+
+        run(main())
+        assert len(calls) == 2
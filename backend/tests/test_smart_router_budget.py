@@ -0,0 +1,120 @@
+"""
+SmartRouter Enrichment Budget Tests
+Aerodrome fan-out under a latency budget: late sections come from cache or
+are marked pending, and the streaming variant emits sections as they finish.
+
+Run: python -m pytest tests/test_smart_router_budget.py -v
+"""
+
+import asyncio
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+POOL = "0x" + "d1" * 20
+BASE = {"tvl": 1_000_000, "apy": 12.0, "token0": "0x" + "a1" * 20, "token1": "0x" + "a2" * 20}
+
+
+@pytest.fixture
+def smart_router_module(monkeypatch):
+    # data_sources.aerodrome connects to an RPC at import time
+    monkeypatch.setitem(sys.modules, "data_sources.aerodrome", MagicMock())
+    monkeypatch.delitem(sys.modules, "api.smart_router", raising=False)
+    try:
+        import api.smart_router as module
+    except Exception as e:
+        pytest.skip(f"smart_router unavailable: {e}")
+    module._section_cache.clear()
+    module.pool_analysis_store.docs.clear()
+    yield module
+    module._section_cache.clear()
+    module.pool_analysis_store.docs.clear()
+    # Don't leave the stub-backed module behind for other tests
+    sys.modules.pop("api.smart_router", None)
+
+
+def fetchers(delays, values=None):
+    """name -> fetcher that answers after delays[name] seconds"""
+    values = values or {}
+
+    def make(name, delay):
+        async def fetch():
+            await asyncio.sleep(delay)
+            if isinstance(values.get(name), Exception):
+                raise values[name]
+            return values.get(name, {"source": name})
+        return fetch
+    return {name: make(name, delay) for name, delay in delays.items()}
+
+
+async def collect(router, pool, fetcher_map, budget):
+    return [item async for item in router._run_sections(pool, fetcher_map, budget)]
+
+
+class TestEnrichmentBudget:
+
+    def test_late_sections_are_pending_then_cached(self, smart_router_module):
+        router = smart_router_module.SmartRouter()
+
+        async def run():
+            first = await collect(router, POOL, fetchers({"peg": 0, "whale": 0.5}), budget=0.05)
+            # The late fetcher keeps running and fills the section cache
+            await asyncio.sleep(0.6)
+            second = await collect(router, POOL, fetchers({"peg": 0, "whale": 0.5}), budget=0.05)
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert first == [("peg", {"source": "peg"}, "ok"), ("whale", {"source": "pending"}, "pending")]
+        assert ("whale", {"source": "whale"}, "cached") in second
+
+    def test_errors_use_section_defaults(self, smart_router_module):
+        router = smart_router_module.SmartRouter()
+        items = asyncio.run(collect(
+            router, POOL, fetchers({"apy": 0, "security": 0},
+                                   {"apy": RuntimeError("rpc down"), "security": {"status": "error", "tokens": {}}}),
+            budget=1
+        ))
+
+        assert ("apy", {"apy_status": "error", "reason": "rpc down"}, "error") in items
+        # Error results are returned but never served later as the "last good" value
+        assert smart_router_module._get_cached_section(POOL, "security") is None
+
+    def test_response_marks_pending_sections(self, smart_router_module):
+        router = smart_router_module.SmartRouter()
+        router._aerodrome_base = AsyncMock(return_value=(dict(BASE), "geckoterminal+factory_detected"))
+        router._aerodrome_fetchers = MagicMock(return_value=fetchers(
+            {"apy": 0, "ohlcv": 0, "security": 0.5},
+            {"apy": {"apy_status": "already_set", "apy": 12.0},
+             "ohlcv": {"price_change_24h": 1.0, "price_change_7d": 2.0}}
+        ))
+
+        result = asyncio.run(router._route_aerodrome(POOL, "base", smart_router_module.Protocol.AERODROME_V2, budget=0.05))
+
+        pool = result["pool"]
+        assert result["success"] and pool["tvl_stability"] == "Stable"
+        assert pool["pending_sections"] == ["security"]
+        assert pool["enrichment"] == {"apy": "ok", "ohlcv": "ok", "security": "pending"}
+
+    def test_stream_emits_sections_in_completion_order(self, smart_router_module):
+        router = smart_router_module.SmartRouter()
+        router.detect_protocol = AsyncMock(return_value=smart_router_module.Protocol.AERODROME_V2)
+        router._aerodrome_base = AsyncMock(return_value=(dict(BASE), "geckoterminal+factory_detected"))
+        router._aerodrome_fetchers = MagicMock(return_value=fetchers({"whale": 0.1, "peg": 0}))
+
+        async def run():
+            return [event async for event in router.stream_pool_check(POOL, "base", budget=1)]
+
+        events = asyncio.run(run())
+        assert [e["event"] for e in events] == ["pool", "section", "section", "result"]
+        assert [e["section"] for e in events[1:3]] == ["peg", "whale"]
+        assert events[-1]["success"] and events[-1]["pool"]["pending_sections"] == []
+
+    def test_section_cache_is_bounded(self, smart_router_module, monkeypatch):
+        monkeypatch.setattr(smart_router_module, "SECTION_CACHE_MAX", 3)
+        for i in range(5):
+            smart_router_module._set_cached_section("0x" + f"{i:040x}", "whale", {"source": "whale"})
+
+        cache = smart_router_module._section_cache
+        assert len(cache) == 3
+        assert [pool for pool, _ in cache] == ["0x" + f"{i:040x}" for i in (2, 3, 4)]
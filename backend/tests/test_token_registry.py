@@ -0,0 +1,104 @@
+"""
+Token Registry Tests
+Seeded known tokens, one multicall for every miss and SQLite persistence.
+
+Run: python -m pytest tests/test_token_registry.py -v
+"""
+
+import asyncio
+from unittest.mock import MagicMock
+
+from eth_abi import encode
+
+from data_sources.token_registry import TokenRegistry, SELECTORS
+
+USDC = "0x833589fcd6edb6e08f4c7c32d4f71b54bda02913"
+TOKEN = "0x" + "a1" * 20
+OLD_TOKEN = "0x" + "a2" * 20
+NOT_A_TOKEN = "0x" + "a3" * 20
+POOL = "0x" + "c1" * 20
+
+SELECTOR_NAMES = {v: k for k, v in SELECTORS.items()}
+
+
+def make_aggregate(answers):
+    """answers: (address, probe name) -> encoded return data; anything else reverts"""
+    def aggregate(w3, calls):
+        results = []
+        for call in calls:
+            data = answers.get((call["target"].lower(), SELECTOR_NAMES[call["callData"]]))
+            results.append((data is not None, data or b""))
+        return results
+    return MagicMock(side_effect=aggregate)
+
+
+CHAIN = {
+    (TOKEN, "decimals"): encode(["uint8"], [9]),
+    (TOKEN, "symbol"): encode(["string"], ["NEW"]),
+    (TOKEN, "name"): encode(["string"], ["New Token"]),
+    # bytes32 symbol, no name()
+    (OLD_TOKEN, "decimals"): encode(["uint8"], [18]),
+    (OLD_TOKEN, "symbol"): b"MKR".ljust(32, b"\x00"),
+    (POOL, "token0"): encode(["address"], [USDC]),
+    (POOL, "token1"): encode(["address"], [TOKEN]),
+    (POOL, "stable"): encode(["bool"], [True]),
+}
+
+
+def make_registry(tmp_path, answers=CHAIN):
+    registry = TokenRegistry(path=str(tmp_path / "token_registry.db"))
+    registry._aggregate = make_aggregate(answers)
+    return registry
+
+
+class TestTokenRegistry:
+
+    def test_known_tokens_need_no_rpc(self, tmp_path):
+        registry = make_registry(tmp_path)
+        meta = asyncio.run(registry.get_token(USDC.upper().replace("0X", "0x"), w3=MagicMock()))
+
+        assert (meta.symbol, meta.decimals) == ("USDC", 6)
+        assert registry._aggregate.call_count == 0
+
+    def test_misses_share_one_multicall(self, tmp_path):
+        registry = make_registry(tmp_path)
+        found = asyncio.run(registry.get_tokens([TOKEN, OLD_TOKEN, NOT_A_TOKEN, USDC], w3=MagicMock()))
+
+        assert registry._aggregate.call_count == 1
+        # USDC is seeded - only the three unknown addresses are probed
+        assert len(registry._aggregate.call_args[0][1]) == 9
+        assert (found[TOKEN].symbol, found[TOKEN].name, found[TOKEN].decimals) == ("NEW", "New Token", 9)
+        assert (found[OLD_TOKEN].symbol, found[OLD_TOKEN].name) == ("MKR", None)
+        assert NOT_A_TOKEN not in found
+
+        asyncio.run(registry.get_tokens([TOKEN, OLD_TOKEN], w3=MagicMock()))
+        assert registry._aggregate.call_count == 1
+
+    def test_pool_metadata(self, tmp_path):
+        registry = make_registry(tmp_path)
+        pools = asyncio.run(registry.get_pools([POOL, TOKEN], w3=MagicMock()))
+
+        pool = pools[POOL]
+        assert (pool.token0, pool.token1, pool.fee, pool.stable) == (USDC, TOKEN, None, True)
+        # A token has no token0/token1 - not a pool
+        assert TOKEN not in pools
+
+    def test_persisted_and_preloaded(self, tmp_path):
+        registry = make_registry(tmp_path)
+        asyncio.run(registry.get_tokens([TOKEN], w3=MagicMock()))
+        asyncio.run(registry.get_pools([POOL], w3=MagicMock()))
+
+        restarted = make_registry(tmp_path, answers={})
+        assert restarted.preload() == 2
+        assert restarted.cached_token(TOKEN).symbol == "NEW"
+        assert restarted.cached_pool(POOL).stable is True
+        assert restarted._aggregate.call_count == 0
+
+    def test_failed_multicall_records_nothing(self, tmp_path):
+        registry = make_registry(tmp_path)
+        registry._aggregate.side_effect = RuntimeError("rpc down")
+
+        assert asyncio.run(registry.get_tokens([TOKEN], w3=MagicMock())) == {}
+        assert registry.cached_token(TOKEN) is None
+        assert registry.stats["errors"] == 1
+
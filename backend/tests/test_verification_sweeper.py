@@ -0,0 +1,161 @@
+"""
+Verification Sweeper Tests
+Sweep set (top TVL + request interest), block-range cadence, batched
+verification and block-bounded serving.
+
+Run: python -m pytest tests/test_verification_sweeper.py -v
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from agents.verification_sweeper import VerificationSweeper, SWEEP_BLOCKS, MAX_AGE_BLOCKS
+
+BIG = "0x" + "b1" * 20
+SMALL = "0x" + "b2" * 20
+HOT = "0x" + "b3" * 20
+
+DEFILLAMA = [
+    {"pool": BIG, "chain": "Base", "tvlUsd": 5e8, "apy": 4.0, "project": "aerodrome-v1", "symbol": "WETH-USDC"},
+    {"pool": SMALL, "chain": "Base", "tvlUsd": 1e3, "apy": 90.0},
+    {"pool": "0x" + "e1" * 20, "chain": "Ethereum", "tvlUsd": 9e9},
+    {"pool": "747c1d2a-c668-4682-b9f9-296708a3dd90", "chain": "Base", "tvlUsd": 8e9},
+]
+
+
+def verified(address, protocol, api_data=None):
+    return {"pool_address": address, "protocol": protocol, "verified": True, "error": None,
+            "onchain": {"tvl": 1.0}, "api": api_data, "delta": {"tvl_pct": 0.1} if api_data else None}
+
+
+def make_sweeper(block=1000):
+    w3 = MagicMock()
+    w3.eth.block_number = block
+    verifier = MagicMock()
+    verifier.verify_batch = AsyncMock(side_effect=lambda pools: [
+        verified(p["address"], p["protocol"], p.get("api_data")) for p in pools
+    ])
+    sweeper = VerificationSweeper(w3=w3, verifier=verifier)
+    sweeper.pool_source = AsyncMock(return_value=DEFILLAMA)
+    return sweeper, w3, verifier
+
+
+def classifier(protocol="aerodrome"):
+    mock = MagicMock()
+    mock.classify = AsyncMock(return_value=MagicMock(protocol=protocol))
+    return patch("data_sources.protocol_classifier.protocol_classifier", mock)
+
+
+class TestVerificationSweeper:
+
+    def test_sweeps_top_tvl_and_interest_in_one_batch(self):
+        sweeper, _, verifier = make_sweeper()
+        sweeper.record_interest(HOT, protocol="morpho")
+
+        with classifier():
+            asyncio.run(sweeper.tick())
+
+        (pools,), _ = verifier.verify_batch.call_args
+        assert {p["address"]: p["protocol"] for p in pools} == {BIG: "aerodrome", SMALL: "aerodrome", HOT: "morpho"}
+        assert verifier.verify_batch.await_count == 1
+
+        record = sweeper.get(BIG)
+        assert record.block == 1000 and record.source == "sweep"
+        assert record.result["api"]["tvl"] == 5e8
+        assert record.result["delta"] == {"tvl_pct": 0.1}
+        assert sweeper.get(HOT, protocol="morpho") is not None
+        assert sweeper.get(HOT, protocol="aave-v3") is None
+
+    def test_block_range_cadence(self):
+        sweeper, w3, verifier = make_sweeper()
+        with classifier():
+            asyncio.run(sweeper.tick())
+            w3.eth.block_number = 1000 + SWEEP_BLOCKS - 1
+            asyncio.run(sweeper.tick())
+            assert verifier.verify_batch.await_count == 1
+
+            w3.eth.block_number = 1000 + SWEEP_BLOCKS
+            asyncio.run(sweeper.tick())
+            assert verifier.verify_batch.await_count == 2
+        assert sweeper.get(BIG).block == 1000 + SWEEP_BLOCKS
+
+    def test_records_expire_by_block_age(self):
+        sweeper, w3, _ = make_sweeper()
+        with classifier():
+            asyncio.run(sweeper.tick())
+
+        sweeper.head_block = 1000 + MAX_AGE_BLOCKS + 1
+        assert sweeper.get(BIG) is None
+
+    def test_failures_not_served_and_unknown_protocol_skipped(self):
+        sweeper, _, verifier = make_sweeper()
+        verifier.verify_batch.side_effect = lambda pools: [
+            {"verified": False, "error": "reverted"} for _ in pools
+        ]
+        with classifier(protocol=None):
+            asyncio.run(sweeper.tick())
+
+        # Nothing classifiable -> nothing to verify
+        assert verifier.verify_batch.await_count == 0
+
+        sweeper.record_interest(HOT, protocol="morpho")
+        sweeper.last_sweep_block = None
+        with classifier(protocol=None):
+            asyncio.run(sweeper.tick())
+        assert sweeper.get(HOT) is None
+        assert sweeper.stats["failed"] == 1
+
+    def test_on_demand_results_and_responses_served(self):
+        sweeper, _, _ = make_sweeper()
+        assert sweeper.store(SMALL, "base", "curve", verified(SMALL, "curve")) is None  # no head block yet
+
+        sweeper.head_block, sweeper.head_at = 2000, time.time()
+        sweeper.store(SMALL, "Base", "curve", verified(SMALL, "curve"))
+        assert sweeper.get(SMALL.upper().replace("0X", "0x"), "base").source == "on_demand"
+
+        sweeper.store_response("verify-any", SMALL, "base", {"success": True, "pool": {"tvl": 1}})
+        sweeper.store_response("verify-any", BIG, "base", {"success": False})
+        assert sweeper.get_response("verify-any", SMALL, "base")["pool"] == {"tvl": 1}
+        assert sweeper.get_response("verify-any", BIG, "base") is None
+        assert sweeper.get_response("verify-rpc", SMALL, "base") is None
+
+    def test_moved_values_invalidate_pool_analysis(self):
+        sweeper, _, _ = make_sweeper()
+        sweeper.head_block, sweeper.head_at = 2000, time.time()
+
+        def result(tvl, apy):
+            return {**verified(SMALL, "curve"), "onchain": {"tvl": tvl, "apy": apy}}
+
+        with patch("agents.verification_sweeper.pool_analysis_store") as store:
+            sweeper.store(SMALL, "base", "curve", result(1000.0, 5.0))    # nothing to compare with
+            sweeper.store(SMALL, "base", "curve", result(1001.0, 5.0))    # within epsilon
+            sweeper.store(SMALL, "base", "curve", result(1100.0, 5.0))
+            sweeper.store(SMALL, "base", "curve", result(1100.0, 7.0))
+
+        assert [c.args for c in store.invalidate.call_args_list] == [
+            (SMALL, "base", "price"), (SMALL, "base", "apy")
+        ]
+
+    def test_market_ids_ignored_and_unclassified_not_reprobed(self):
+        sweeper, _, verifier = make_sweeper()
+        market_id = "0x" + "c4" * 32
+        sweeper.pool_source = AsyncMock(return_value=[
+            {"pool": market_id, "chain": "Base", "tvlUsd": 9e9},
+            {"pool": BIG + "-base", "chain": "Base", "tvlUsd": 5e8},
+        ])
+
+        with classifier(protocol=None) as mock:
+            asyncio.run(sweeper.tick())
+            # A 32-byte market id is not read as its first 20 bytes
+            assert [c.args[0] for c in mock.classify.await_args_list] == [BIG]
+
+            sweeper.last_sweep_block = None
+            asyncio.run(sweeper.tick())
+            assert mock.classify.await_count == 1
+
+            sweeper.unclassified[BIG] -= 3601
+            sweeper.last_sweep_block = None
+            asyncio.run(sweeper.tick())
+            assert mock.classify.await_count == 2
+        assert verifier.verify_batch.await_count == 0
@@ -0,0 +1,175 @@
+"""
+Wash Trading Detector Batch Tests
+Aliased multi-pool GraphQL requests, incremental swap cache by timestamp
+cursor and vectorized concentration metrics (checked against the original
+per-pool loop).
+
+Run: python -m pytest tests/test_wash_detector.py -v
+"""
+
+import asyncio
+import random
+import re
+import time
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+import services.wash_detector as wash_detector
+from services.wash_detector import (
+    WashTradingDetector, concentration_metrics, AERODROME_SUBGRAPH, MAX_ALIASES, PAGE_SIZE, MIN_REFRESH
+)
+
+NOW = int(time.time())
+ALIAS_RE = re.compile(r'(p\d+): swaps\(first: (\d+), where: \{ (\w+): "(0x\w+)", timestamp_gte: (\d+) \}')
+
+
+def pool(i):
+    return "0x" + f"{i:040x}"
+
+
+class FakeSubgraph:
+    """Answers aliased swaps() queries from per-pool swap lists"""
+
+    def __init__(self, swaps_by_pool):
+        self.swaps_by_pool = swaps_by_pool
+        self.queries = []
+
+    async def query(self, url, query):
+        self.queries.append((url, ALIAS_RE.findall(query)))
+        await asyncio.sleep(0)   # A real request yields; lets concurrent calls interleave
+        data = {}
+        for alias, first, field, address, cursor in ALIAS_RE.findall(query):
+            swaps = sorted(self.swaps_by_pool.get(address, []), key=lambda s: s["timestamp"])
+            data[alias] = [s for s in swaps if s["timestamp"] >= int(cursor)][:int(first)]
+        return {"data": data}
+
+
+def swap(n, sender, amount, ts):
+    return {"id": f"0xtx{n}", "sender": sender, "amountUSD": str(amount), "timestamp": ts}
+
+
+def reference_metrics(swaps):
+    """The per-pool loop analyze_pool used before batching"""
+    volume_by_address = defaultdict(float)
+    trades_by_address = defaultdict(int)
+    sizes = []
+    for s in swaps:
+        sender, amount = s["sender"].lower(), float(s["amountUSD"] or 0)
+        if sender and amount > 0:
+            volume_by_address[sender] += amount
+            trades_by_address[sender] += 1
+            sizes.append(amount)
+    if not sizes:
+        return None
+    ranked = sorted(volume_by_address.values(), reverse=True)
+    avg = sum(sizes) / len(sizes)
+    cv = (sum((x - avg) ** 2 for x in sizes) / len(sizes)) ** 0.5 / avg
+    return {"volume": sum(sizes), "unique_traders": len(volume_by_address), "top_1_volume": ranked[0],
+            "top_3_volume": sum(ranked[:3]), "max_trades": max(trades_by_address.values()), "cv": cv}
+
+
+def make_detector(monkeypatch, swaps_by_pool):
+    detector = WashTradingDetector()
+    fake = FakeSubgraph(swaps_by_pool)
+    monkeypatch.setattr(detector, "query_subgraph", fake.query)
+    return detector, fake
+
+
+class TestConcentrationMetrics:
+
+    def test_matches_per_pool_loop(self):
+        rng = random.Random(3)
+        pools = []
+        for _ in range(40):
+            traders = [f"0x{rng.randrange(16 ** 8):08x}" for _ in range(rng.randint(1, 12))] + [""]
+            pools.append([swap(n, rng.choice(traders), rng.choice([0, round(rng.uniform(1, 5000), 2)]), n)
+                          for n in range(rng.randint(0, 60))])
+
+        index = np.concatenate([np.full(len(p), i) for i, p in enumerate(pools)]).astype(np.int64)
+        senders = np.asarray([s["sender"] for p in pools for s in p], dtype=str)
+        amounts = np.asarray([float(s["amountUSD"]) for p in pools for s in p])
+        metrics = concentration_metrics(index, senders, amounts, len(pools))
+
+        for i, swaps in enumerate(pools):
+            expected = reference_metrics(swaps)
+            if expected is None:
+                assert metrics["volume"][i] == 0 and metrics["unique_traders"][i] == 0
+                continue
+            for name, value in expected.items():
+                assert metrics[name][i] == pytest.approx(value, rel=1e-9), (i, name)
+
+
+class TestBatchAnalysis:
+
+    def test_pools_share_aliased_requests(self, monkeypatch):
+        pools = [(pool(i), "aerodrome" if i % 3 else "uniswap_v3") for i in range(60)]
+        swaps = {pool(i): [swap(i * 10 + n, f"0xw{n % 2}", 100 + n, NOW - 60 + n) for n in range(4)] for i in range(60)}
+        swaps[pool(7)] = []
+        detector, fake = make_detector(monkeypatch, swaps)
+
+        results = asyncio.run(detector.analyze_pools(pools))
+
+        assert [r["pool"] for r in results] == [p for p, _ in pools]
+        assert all(len(aliases) <= MAX_ALIASES for _, aliases in fake.queries)
+        # 40 aerodrome pools -> 2 requests, 20 uniswap pools -> 1 request
+        assert len(fake.queries) == 3
+        assert sum(1 for url, _ in fake.queries if url == AERODROME_SUBGRAPH) == 2
+        assert {field for _, aliases in fake.queries for _, _, field, _, _ in aliases} == {"pair", "pool"}
+        assert results[7]["red_flags"] == ["No swap data available"]
+        assert results[1]["unique_traders"] == 2 and results[1]["is_wash_trading"] is True
+
+    def test_pagination_and_incremental_cursor(self, monkeypatch):
+        address = pool(1)
+        # 1500 swaps, the page boundary falls inside a run of equal timestamps
+        history = [swap(n, f"0xtrader{n % 40}", 10 + n % 7, NOW - 3000 + n // 3) for n in range(1500)]
+        detector, fake = make_detector(monkeypatch, {address: history})
+
+        first = asyncio.run(detector.analyze_pool(address, "aerodrome"))
+        assert first["total_trades"] == 1500 and "partial" not in first
+        assert len(fake.queries) == 2
+
+        # New swaps arrive; a refresh only asks from the cursor onwards
+        history.extend(swap(2000 + n, "0xwhale", 50_000, NOW - 10 + n) for n in range(5))
+        window = detector.swap_cache[(address, "aerodrome")]
+        window.fetched_at -= MIN_REFRESH + 1
+        second = asyncio.run(detector.analyze_pool(address, "aerodrome"))
+
+        cursor = int(fake.queries[-1][1][0][4])
+        assert cursor == history[1499]["timestamp"]
+        assert second["total_trades"] == 1505
+        assert second["top_1_volume_pct"] > 50
+
+        # Fresh windows are served from cache without a request
+        asyncio.run(detector.analyze_pool(address, "aerodrome"))
+        assert len(fake.queries) == 3
+
+    def test_window_is_pruned_and_busy_pools_marked_partial(self, monkeypatch):
+        address = pool(2)
+        history = [swap(n, f"0xt{n % 9}", 5 + n % 3, NOW - 7200 + n) for n in range(PAGE_SIZE * 6)]
+        monkeypatch.setattr(wash_detector, "MAX_PAGES", 2)
+        detector, fake = make_detector(monkeypatch, {address: history})
+
+        result = asyncio.run(detector.analyze_pool(address, "uniswap_v3", hours=3))
+        # The second page starts at the cursor and skips the swap already seen there
+        assert result["partial"] is True and result["total_trades"] == 2 * PAGE_SIZE - 1
+
+        window = detector.swap_cache[(address, "uniswap_v3")]
+        window.prune(NOW - 7200 + PAGE_SIZE - 1)
+        assert len(window.amounts) == PAGE_SIZE - 1 and window.timestamps[0] == NOW - 7200 + PAGE_SIZE
+
+    def test_concurrent_calls_share_one_refresh(self, monkeypatch):
+        address = pool(3)
+        history = [swap(n, f"0xt{n % 4}", 100, NOW - 100 + n) for n in range(20)]
+        detector, fake = make_detector(monkeypatch, {address: history})
+
+        async def run():
+            return await asyncio.gather(
+                detector.analyze_pool(address, "aerodrome"),
+                detector.analyze_pool(address, "aerodrome"),
+            )
+
+        first, second = asyncio.run(run())
+        assert first["total_trades"] == second["total_trades"] == 20
+        assert len(fake.queries) == 1 and not detector._refreshing
@@ -0,0 +1,94 @@
+"""
+Work Lease Tests
+Shard leases, fair-share rebalancing between replicas and takeover on expiry.
+
+Run: python -m pytest tests/test_work_leases.py -v
+"""
+
+import time
+
+from infrastructure.work_leases import (
+    SQLiteLeaseBackend,
+    WorkPartitioner,
+    shard_of,
+)
+
+
+def make_replica(backend, replica_id, num_shards=8, ttl=30):
+    partitioner = WorkPartitioner(backend, num_shards=num_shards, lease_ttl=ttl, replica_id=replica_id)
+    partitioner.active = True
+    return partitioner
+
+
+class TestSQLiteLeaseBackend:
+
+    def test_acquire_renew_and_conflict(self, tmp_path):
+        backend = SQLiteLeaseBackend(str(tmp_path / "leases.db"))
+
+        assert backend.try_acquire("shard:0", "a", 30)
+        assert backend.try_acquire("shard:0", "a", 30)       # renewal
+        assert not backend.try_acquire("shard:0", "b", 30)   # held by a
+        assert backend.holders("shard:") == {"shard:0": "a"}
+
+        backend.release("shard:0", "b")                     # not the owner: no-op
+        assert backend.holders("shard:") == {"shard:0": "a"}
+        backend.release("shard:0", "a")
+        assert backend.try_acquire("shard:0", "b", 30)
+
+    def test_expired_lease_can_be_stolen(self, tmp_path):
+        backend = SQLiteLeaseBackend(str(tmp_path / "leases.db"))
+        assert backend.try_acquire("shard:0", "a", 0.01)
+        time.sleep(0.02)
+
+        assert backend.holders("shard:") == {}
+        assert backend.try_acquire("shard:0", "b", 30)
+
+
+class TestWorkPartitioner:
+
+    def test_inactive_partitioner_owns_everything(self):
+        partitioner = WorkPartitioner(backend=None, num_shards=8)
+        assert partitioner.owns("0xanyuser")
+
+    def test_single_replica_takes_all_shards(self, tmp_path):
+        replica = make_replica(SQLiteLeaseBackend(str(tmp_path / "leases.db")), "r1")
+        replica.rebalance()
+
+        assert replica.owned == set(range(8))
+        assert replica.owns("0xUser")
+
+    def test_two_replicas_split_shards_without_overlap(self, tmp_path):
+        backend = SQLiteLeaseBackend(str(tmp_path / "leases.db"))
+        r1 = make_replica(backend, "r1")
+        r2 = make_replica(backend, "r2")
+
+        r1.rebalance()      # r1 alone: all 8
+        r2.rebalance()      # r2 joins: nothing free yet
+        r1.rebalance()      # r1 sees 2 replicas: releases surplus
+        r2.rebalance()      # r2 takes the released shards
+
+        assert len(r1.owned) == 4 and len(r2.owned) == 4
+        assert r1.owned.isdisjoint(r2.owned)
+
+        users = [f"0xuser{i}" for i in range(50)]
+        assert all(r1.owns(u) != r2.owns(u) for u in users)
+
+    def test_dead_replica_shards_are_taken_over(self, tmp_path):
+        backend = SQLiteLeaseBackend(str(tmp_path / "leases.db"))
+        r1 = make_replica(backend, "r1", ttl=0.05)
+        r2 = make_replica(backend, "r2", ttl=0.05)
+        r1.rebalance()
+        r2.rebalance()
+        r1.rebalance()
+        r2.rebalance()
+
+        # r1 stops renewing: its leases lapse locally and in the backend
+        time.sleep(0.08)
+        assert not r1.owns_shard(next(iter(r1.owned)))
+
+        r2.rebalance()
+        assert r2.owned == set(range(8))
+
+    def test_shard_of_is_stable_and_case_insensitive(self):
+        assert shard_of("0xABC", 16) == shard_of("0xabc", 16)
+        assert 0 <= shard_of("0xabc", 16) < 16
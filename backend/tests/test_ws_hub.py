@@ -0,0 +1,172 @@
+"""
+WebSocket Hub Tests
+One producer per topic, coalesced JSON-patch fan-out and drop-oldest
+backpressure for slow sockets.
+
+Run: python -m pytest tests/test_ws_hub.py -v
+"""
+
+import asyncio
+import copy
+import json
+from unittest.mock import AsyncMock
+
+from infrastructure.ws_hub import WebSocketHub, json_diff, apply_patch, wallet_topic
+
+
+class FakeSocket:
+    def __init__(self, gate: asyncio.Event = None):
+        self.messages = []
+        self.gate = gate
+
+    async def send_text(self, payload):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.messages.append(json.loads(payload))
+
+
+def client_state(socket, topic):
+    """Replay snapshot/patch messages the way the frontend does"""
+    doc, version = None, None
+    for msg in socket.messages:
+        if msg.get("topic") != topic:
+            continue
+        if msg["type"] == "snapshot":
+            doc, version = copy.deepcopy(msg["data"]), msg["version"]
+        else:
+            assert msg["base"] == version, "patch applied to the wrong base"
+            doc, version = apply_patch(doc, msg["ops"]), msg["version"]
+    return doc, version
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestJsonPatch:
+
+    def test_diff_round_trip(self):
+        old = {"a": 1, "b/c": {"x": [1, 2, 3]}, "gone": True, "list": [1]}
+        new = {"a": 2, "b/c": {"x": [1, 5, 3], "y": "new"}, "list": [1, 2]}
+        ops = json_diff(old, new)
+
+        assert {"op": "remove", "path": "/gone"} in ops
+        assert {"op": "replace", "path": "/b~1c/x/1", "value": 5} in ops
+        assert apply_patch(copy.deepcopy(old), ops) == new
+        assert json_diff(new, new) == []
+
+
+class TestWebSocketHub:
+
+    def test_one_producer_per_topic(self):
+        async def run():
+            hub = WebSocketHub(coalesce_interval=0.01)
+            producer = AsyncMock(return_value={"totalValue": 10})
+            hub.register_producer("wallet", producer, interval=60)
+            a, b = FakeSocket(), FakeSocket()
+
+            await hub.subscribe(a, wallet_topic("0xABC"))
+            await settle()
+            await hub.subscribe(b, wallet_topic("0xabc"))
+            await settle()
+
+            assert producer.await_count == 1
+            producer.assert_awaited_with("0xabc")
+            assert client_state(a, "wallet:0xabc") == ({"totalValue": 10}, 1)
+            assert client_state(b, "wallet:0xabc") == ({"totalValue": 10}, 1)
+
+            task = hub.topics["wallet:0xabc"].producer_task
+            hub.disconnect(a)
+            hub.disconnect(b)
+            await settle()
+            assert task.cancelled() and not hub.topics
+        asyncio.run(run())
+
+    def test_bursts_coalesce_into_one_patch(self):
+        async def run():
+            hub = WebSocketHub(coalesce_interval=0.01)
+            socket = FakeSocket()
+            topic = "token:WETH"
+            await hub.subscribe(socket, topic)
+            hub.publish(topic, {"token": "WETH", "price": 3000.0})
+            hub.flush(topic)
+
+            for i in range(20):
+                hub.publish(topic, {"token": "WETH", "price": 3000.0 + i})
+            await asyncio.sleep(0.05)
+
+            patches = [m for m in socket.messages if m["type"] == "patch"]
+            assert len(patches) == 1
+            assert patches[0]["ops"] == [{"op": "replace", "path": "/price", "value": 3019.0}]
+            assert client_state(socket, topic) == ({"token": "WETH", "price": 3019.0}, 2)
+        asyncio.run(run())
+
+    def test_slow_socket_drops_oldest_and_resyncs(self):
+        async def run():
+            hub = WebSocketHub(coalesce_interval=0.01, max_queue=4)
+            gate = asyncio.Event()
+            fast, slow = FakeSocket(), FakeSocket(gate)
+            topic = "prices"
+            await hub.subscribe(fast, topic)
+            await hub.subscribe(slow, topic)
+
+            for i in range(12):
+                hub.publish(topic, {"ETH": 3000.0 + i, "BTC": 60000.0})
+                hub.flush(topic)
+                await settle()
+
+            expected = ({"ETH": 3011.0, "BTC": 60000.0}, 12)
+            assert client_state(fast, topic) == expected
+            assert hub.subscribers[slow].dropped > 0
+
+            gate.set()
+            await settle()
+            # Gap detected -> full snapshot, then only patches on top of it
+            assert client_state(slow, topic) == expected
+            assert len(slow.messages) < len(fast.messages)
+        asyncio.run(run())
+
+    def test_events_only_reach_topic_subscribers(self):
+        async def run():
+            hub = WebSocketHub()
+            mine, other = FakeSocket(), FakeSocket()
+            await hub.subscribe(mine, wallet_topic("0xAAA"))
+            await hub.subscribe(other, wallet_topic("0xBBB"))
+
+            hub.send_event(wallet_topic("0xaaa"), {"type": "position_exit"})
+            hub.broadcast_event({"type": "heartbeat"})
+            await settle()
+
+            assert [m["type"] for m in mine.messages] == ["position_exit", "heartbeat"]
+            assert [m["type"] for m in other.messages] == ["heartbeat"]
+            assert hub.get_stats()["connections"] == 2
+
+            hub.disconnect(mine)
+            hub.disconnect(other)
+        asyncio.run(run())
+
+    def test_price_ticks_only_reach_token_topic(self):
+        from unittest.mock import patch
+        from api.websocket_router import manager, broadcast_price_update, broadcast_allocation
+        from infrastructure.ws_hub import ws_hub
+
+        async def run(legacy):
+            allocation, portfolio = FakeSocket(), FakeSocket()
+            allocation.accept = AsyncMock()
+            await manager.connect(allocation, "0xccc")
+            await ws_hub.subscribe(portfolio, "prices")
+            assert not ws_hub.topic_count("wallet:")
+
+            with patch("api.websocket_router.LEGACY_PRICE_BROADCAST", legacy):
+                await broadcast_price_update("WETH", 3000.0)
+            await broadcast_allocation("0xCCC", "complete", 100)
+            await settle()
+
+            manager.disconnect(allocation, "0xccc")
+            ws_hub.disconnect(portfolio)
+            return [m["type"] for m in allocation.messages], [m["type"] for m in portfolio.messages]
+
+        assert asyncio.run(run(False)) == (["allocation_complete"], [])
+        # Flagged fallback for clients without topic subscriptions
+        assert asyncio.run(run(True)) == (["price_update", "allocation_complete"], ["price_update"])
@@ -9,8 +9,8 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 
 from aiogram import Bot
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.interval import IntervalTrigger
+
+from infrastructure.scheduler import scheduler
 
 from .models.user_config import user_store, UserConfig
 from .services.alerts import generate_alerts_for_user, fetch_all_pools_for_alerts
@@ -304,55 +304,48 @@ _Use /pools to explore opportunities_
 
 class AlertScheduler:
     """
-    Manages background jobs for alerts
+    Manages background jobs for alerts (on the shared deadline scheduler)
     """
     
+    JOB_IDS = ("alert_check", "new_pool_check", "daily_digest", "airdrop_daily")
+    
     def __init__(self):
-        self.scheduler = AsyncIOScheduler()
-        self._setup_jobs()
+        self.scheduler = scheduler
     
     def _setup_jobs(self):
         """
         Configure scheduled jobs
         """
         # Check alerts every 5 minutes
-        self.scheduler.add_job(
+        self.scheduler.register(
+            "alert_check",
             check_and_send_alerts,
-            IntervalTrigger(minutes=5),
-            id="alert_check",
-            name="Check and send alerts",
-            replace_existing=True
+            5 * 60,
+            initial_delay=5 * 60
         )
         
         # Check for new pools every 5 minutes
-        self.scheduler.add_job(
+        self.scheduler.register(
+            "new_pool_check",
             check_new_pools,
-            IntervalTrigger(minutes=5),
-            id="new_pool_check",
-            name="Check for new pools",
-            replace_existing=True
+            5 * 60,
+            initial_delay=5 * 60
         )
         
         # Daily digest at 8:00 UTC
-        self.scheduler.add_job(
+        self.scheduler.register_daily(
+            "daily_digest",
             send_daily_digest,
-            "cron",
             hour=8,
-            minute=0,
-            id="daily_digest",
-            name="Send daily digest",
-            replace_existing=True
+            minute=0
         )
         
         # Airdrop daily digest at 10:00 UTC (once per day, pinned)
-        self.scheduler.add_job(
+        self.scheduler.register_daily(
+            "airdrop_daily",
             post_airdrop_daily_digest,
-            "cron",
             hour=10,
-            minute=0,
-            id="airdrop_daily",
-            name="Post airdrop daily digest",
-            replace_existing=True
+            minute=0
         )
         
         # NOTE: News channel functionality removed - only Airdrops active
@@ -363,6 +356,7 @@ class AlertScheduler:
         """
         Start the scheduler
         """
+        self._setup_jobs()
         self.scheduler.start()
         logger.info("⏰ Alert scheduler started")
     
@@ -370,7 +364,8 @@ class AlertScheduler:
         """
         Stop the scheduler
         """
-        self.scheduler.shutdown()
+        for job_id in self.JOB_IDS:
+            self.scheduler.unregister(job_id)
         logger.info("⏰ Alert scheduler stopped")
 
 
@@ -2373,6 +2373,10 @@ class PortfolioDashboard {
 
     handleWebSocketMessage(data) {
         switch (data.type) {
+            case 'snapshot':
+            case 'patch':
+                this.handleTopicMessage(data);
+                break;
             case 'portfolio_update':
                 this.handlePortfolioUpdate(data.data);
                 break;
@@ -2400,6 +2404,47 @@ class PortfolioDashboard {
         }
     }
 
+    // Topic state arrives as a full snapshot, then JSON-patch deltas
+    handleTopicMessage(msg) {
+        this.wsTopics = this.wsTopics || {};
+        if (msg.type === 'snapshot') {
+            this.wsTopics[msg.topic] = { version: msg.version, data: msg.data };
+        } else {
+            const state = this.wsTopics[msg.topic];
+            if (!state || state.version !== msg.base) {
+                // Missed a delta - ask for the full document
+                this.ws?.send(JSON.stringify({ type: 'refresh', topic: msg.topic }));
+                return;
+            }
+            state.data = this.applyJsonPatch(state.data, msg.ops);
+            state.version = msg.version;
+        }
+        if (msg.topic.startsWith('wallet:')) {
+            this.handlePortfolioUpdate(this.wsTopics[msg.topic].data);
+        }
+    }
+
+    applyJsonPatch(doc, ops) {
+        for (const op of ops) {
+            const tokens = op.path.split('/').slice(1).map(t => t.replace(/~1/g, '/').replace(/~0/g, '~'));
+            if (!tokens.length) {
+                doc = op.value;
+                continue;
+            }
+            let parent = doc;
+            for (const token of tokens.slice(0, -1)) parent = parent[token];
+            const last = tokens[tokens.length - 1];
+            if (op.op === 'remove') {
+                Array.isArray(parent) ? parent.splice(Number(last), 1) : delete parent[last];
+            } else if (op.op === 'add' && Array.isArray(parent)) {
+                parent.splice(last === '-' ? parent.length : Number(last), 0, op.value);
+            } else {
+                parent[last] = op.value;
+            }
+        }
+        return doc;
+    }
+
     handlePortfolioUpdate(data) {
         if (data.totalValue !== undefined) {
             this.portfolio.totalValue = data.totalValue;